@@ -0,0 +1,24 @@
+"""add_cbt_test_content_version
+
+Revision ID: 4d8b2f6a9e31
+Revises: 9c3e5a7d1f20
+Create Date: 2026-10-16 23:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d8b2f6a9e31'
+down_revision = '9c3e5a7d1f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('cbt_tests', sa.Column('content_version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('cbt_tests', 'content_version')
@@ -0,0 +1,24 @@
+"""add_cbt_answers_submission_index
+
+Revision ID: 6a1c9e4b7d52
+Revises: 4d8b2f6a9e31
+Create Date: 2026-10-17 00:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a1c9e4b7d52'
+down_revision = '4d8b2f6a9e31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_cbt_answers_submission_id'), 'cbt_answers', ['submission_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_cbt_answers_submission_id'), table_name='cbt_answers')
@@ -0,0 +1,55 @@
+"""add_search_indexes
+
+Revision ID: 8e2d4b6f1a73
+Revises: 6a1c9e4b7d52
+Create Date: 2026-10-17 01:05:00.000000
+
+Trigram (pg_trgm) GIN indexes for substring and fuzzy search, and
+lower(...) text_pattern_ops indexes for prefix typeahead, on the fields
+SearchService matches. PostgreSQL only.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8e2d4b6f1a73'
+down_revision = '6a1c9e4b7d52'
+branch_labels = None
+depends_on = None
+
+
+# (index suffix, table, expression) for every searched field
+SEARCH_FIELDS = [
+    ('name', 'students', "(first_name || ' ' || last_name)"),
+    ('last_name', 'students', 'last_name'),
+    ('admission_number', 'students', 'admission_number'),
+    ('name', 'users', "(first_name || ' ' || last_name)"),
+    ('last_name', 'users', 'last_name'),
+    ('email', 'users', 'email'),
+    ('name', 'subjects', 'name'),
+    ('code', 'subjects', 'code'),
+    ('name', 'classes', 'name'),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for suffix, table, expression in SEARCH_FIELDS:
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_{table}_{suffix}_trgm '
+            f'ON {table} USING gin ({expression} gin_trgm_ops)'
+        )
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_{table}_{suffix}_prefix '
+            f'ON {table} (lower({expression}) text_pattern_ops)'
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for suffix, table, _ in SEARCH_FIELDS:
+        op.execute(f'DROP INDEX IF EXISTS ix_{table}_{suffix}_prefix')
+        op.execute(f'DROP INDEX IF EXISTS ix_{table}_{suffix}_trgm')
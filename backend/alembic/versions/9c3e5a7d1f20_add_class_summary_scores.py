@@ -0,0 +1,84 @@
+"""add_class_summary_scores
+
+Revision ID: 9c3e5a7d1f20
+Revises: 787b442df8cd
+Create Date: 2026-10-16 21:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import uuid
+
+
+# revision identifiers, used by Alembic.
+revision = '9c3e5a7d1f20'
+down_revision = '787b442df8cd'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    class_summary_scores = op.create_table('class_summary_scores',
+    sa.Column('total_score', sa.Numeric(precision=8, scale=2), nullable=False),
+    sa.Column('grade_count', sa.Integer(), nullable=False),
+    sa.Column('student_id', sa.String(length=36), nullable=False),
+    sa.Column('subject_id', sa.String(length=36), nullable=False),
+    sa.Column('term_id', sa.String(length=36), nullable=False),
+    sa.Column('school_id', sa.String(length=36), nullable=False),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+    sa.ForeignKeyConstraint(['subject_id'], ['subjects.id'], ),
+    sa.ForeignKeyConstraint(['term_id'], ['terms.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('term_id', 'student_id', 'subject_id', name='uq_class_summary_score')
+    )
+    op.create_index(op.f('ix_class_summary_scores_school_id'), 'class_summary_scores', ['school_id'], unique=False)
+    op.create_index(op.f('ix_class_summary_scores_student_id'), 'class_summary_scores', ['student_id'], unique=False)
+
+    # Backfill from existing grades
+    grades = sa.table(
+        'grades',
+        sa.column('score', sa.Numeric),
+        sa.column('student_id', sa.String),
+        sa.column('subject_id', sa.String),
+        sa.column('term_id', sa.String),
+        sa.column('school_id', sa.String),
+        sa.column('is_deleted', sa.Boolean),
+    )
+    totals = op.get_bind().execute(
+        sa.select(
+            grades.c.school_id,
+            grades.c.term_id,
+            grades.c.student_id,
+            grades.c.subject_id,
+            sa.func.sum(grades.c.score),
+            sa.func.count()
+        )
+        .where(grades.c.is_deleted == sa.false())
+        .group_by(grades.c.school_id, grades.c.term_id, grades.c.student_id, grades.c.subject_id)
+    ).all()
+    if totals:
+        op.bulk_insert(class_summary_scores, [
+            {
+                'id': str(uuid.uuid4()),
+                'school_id': school_id,
+                'term_id': term_id,
+                'student_id': student_id,
+                'subject_id': subject_id,
+                'total_score': total_score,
+                'grade_count': grade_count,
+                'is_deleted': False,
+            }
+            for school_id, term_id, student_id, subject_id, total_score, grade_count in totals
+        ])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_class_summary_scores_student_id'), table_name='class_summary_scores')
+    op.drop_index(op.f('ix_class_summary_scores_school_id'), table_name='class_summary_scores')
+    op.drop_table('class_summary_scores')
@@ -0,0 +1,56 @@
+"""add_platform_stats_rollup
+
+Revision ID: a8d4f2b6c371
+Revises: f3a6d8c1e925
+Create Date: 2026-10-17 06:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8d4f2b6c371'
+down_revision = 'f3a6d8c1e925'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('school_stats',
+    sa.Column('school_id', sa.String(length=36), nullable=False),
+    sa.Column('student_count', sa.Integer(), nullable=False),
+    sa.Column('teacher_count', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['school_id'], ['schools.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('school_id')
+    )
+    op.create_table('platform_stats_snapshots',
+    sa.Column('period_start', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('schools_created', sa.Integer(), nullable=False),
+    sa.Column('trial_schools_created', sa.Integer(), nullable=False),
+    sa.Column('school_owners_created', sa.Integer(), nullable=False),
+    sa.Column('total_schools', sa.Integer(), nullable=False),
+    sa.Column('active_schools', sa.Integer(), nullable=False),
+    sa.Column('trial_schools', sa.Integer(), nullable=False),
+    sa.Column('school_owners', sa.Integer(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('period_start')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('platform_stats_snapshots')
+    op.drop_table('school_stats')
@@ -0,0 +1,71 @@
+"""add_material_search_index
+
+Revision ID: b4f7c2d9e186
+Revises: 8e2d4b6f1a73
+Create Date: 2026-10-17 02:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4f7c2d9e186'
+down_revision = '8e2d4b6f1a73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing materials are indexed by MaterialSearchService on the school's first search
+    op.add_column('teacher_materials', sa.Column('search_length', sa.Float(), nullable=True))
+
+    op.create_table('material_search_terms',
+    sa.Column('material_id', sa.String(length=36), nullable=False),
+    sa.Column('field', sa.String(length=10), nullable=False),
+    sa.Column('term', sa.String(length=100), nullable=False),
+    sa.Column('weight', sa.Float(), nullable=False),
+    sa.Column('length', sa.Float(), nullable=False),
+    sa.Column('school_id', sa.String(length=36), nullable=False),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['material_id'], ['teacher_materials.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_material_search_terms_material', 'material_search_terms', ['material_id', 'field', 'term'], unique=False)
+    op.create_index(op.f('ix_material_search_terms_school_id'), 'material_search_terms', ['school_id'], unique=False)
+    op.create_index('ix_material_search_terms_school_term', 'material_search_terms', ['school_id', 'field', 'term', 'material_id', 'weight', 'length'], unique=False)
+
+    op.create_table('material_similarities',
+    sa.Column('material_id', sa.String(length=36), nullable=False),
+    sa.Column('related_id', sa.String(length=36), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('school_id', sa.String(length=36), nullable=False),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['material_id'], ['teacher_materials.id'], ),
+    sa.ForeignKeyConstraint(['related_id'], ['teacher_materials.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('material_id', 'related_id', name='uq_material_similarity')
+    )
+    op.create_index(op.f('ix_material_similarities_material_id'), 'material_similarities', ['material_id'], unique=False)
+    op.create_index(op.f('ix_material_similarities_related_id'), 'material_similarities', ['related_id'], unique=False)
+    op.create_index(op.f('ix_material_similarities_school_id'), 'material_similarities', ['school_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_material_similarities_school_id'), table_name='material_similarities')
+    op.drop_index(op.f('ix_material_similarities_related_id'), table_name='material_similarities')
+    op.drop_index(op.f('ix_material_similarities_material_id'), table_name='material_similarities')
+    op.drop_table('material_similarities')
+    op.drop_index('ix_material_search_terms_school_term', table_name='material_search_terms')
+    op.drop_index(op.f('ix_material_search_terms_school_id'), table_name='material_search_terms')
+    op.drop_index('ix_material_search_terms_material', table_name='material_search_terms')
+    op.drop_table('material_search_terms')
+    op.drop_column('teacher_materials', 'search_length')
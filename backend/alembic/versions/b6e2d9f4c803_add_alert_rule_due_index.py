@@ -0,0 +1,28 @@
+"""add_alert_rule_due_index
+
+Revision ID: b6e2d9f4c803
+Revises: a8d4f2b6c371
+Create Date: 2026-10-17 08:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6e2d9f4c803'
+down_revision = 'a8d4f2b6c371'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_alert_rules_due', 'alert_rules', ['next_evaluation_at'], unique=False,
+        sqlite_where=sa.text('is_active = 1 AND is_deleted = 0'),
+        postgresql_where=sa.text('is_active = true AND is_deleted = false')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alert_rules_due', table_name='alert_rules')
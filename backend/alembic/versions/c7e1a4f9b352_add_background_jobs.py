@@ -0,0 +1,52 @@
+"""add_background_jobs
+
+Revision ID: c7e1a4f9b352
+Revises: b4f7c2d9e186
+Create Date: 2026-10-17 03:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e1a4f9b352'
+down_revision = 'b4f7c2d9e186'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('background_jobs',
+    sa.Column('job_type', sa.String(length=50), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'RUNNING', 'COMPLETED', 'FAILED', name='jobstatus'), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('progress', sa.JSON(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_after', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_by', sa.String(length=36), nullable=True),
+    sa.Column('school_id', sa.String(length=36), nullable=False),
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('is_deleted', sa.Boolean(), nullable=False),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_background_jobs_job_type'), 'background_jobs', ['job_type'], unique=False)
+    op.create_index(op.f('ix_background_jobs_school_id'), 'background_jobs', ['school_id'], unique=False)
+    op.create_index('ix_background_jobs_school_status', 'background_jobs', ['school_id', 'status'], unique=False)
+    op.create_index('ix_background_jobs_status_run_after', 'background_jobs', ['status', 'run_after'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_background_jobs_status_run_after', table_name='background_jobs')
+    op.drop_index('ix_background_jobs_school_status', table_name='background_jobs')
+    op.drop_index(op.f('ix_background_jobs_school_id'), table_name='background_jobs')
+    op.drop_index(op.f('ix_background_jobs_job_type'), table_name='background_jobs')
+    op.drop_table('background_jobs')
@@ -0,0 +1,47 @@
+"""add_student_middle_name_search_indexes
+
+Revision ID: c9a5e1f7d324
+Revises: b6e2d9f4c803
+Create Date: 2026-10-17 10:10:00.000000
+
+Student search also matches middle names and the displayed
+"first [middle ]last" name; trigram and prefix indexes for both, like
+8e2d4b6f1a73's. PostgreSQL only.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9a5e1f7d324'
+down_revision = 'b6e2d9f4c803'
+branch_labels = None
+depends_on = None
+
+
+# (index suffix, table, expression), spelled as SearchService renders them
+SEARCH_FIELDS = [
+    ('middle_name', 'students', 'middle_name'),
+    ('full_name', 'students', "(first_name || ' ' || coalesce(middle_name || ' ', '') || last_name)"),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for suffix, table, expression in SEARCH_FIELDS:
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_{table}_{suffix}_trgm '
+            f'ON {table} USING gin ({expression} gin_trgm_ops)'
+        )
+        op.execute(
+            f'CREATE INDEX IF NOT EXISTS ix_{table}_{suffix}_prefix '
+            f'ON {table} (lower({expression}) text_pattern_ops)'
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for suffix, table, _ in SEARCH_FIELDS:
+        op.execute(f'DROP INDEX IF EXISTS ix_{table}_{suffix}_prefix')
+        op.execute(f'DROP INDEX IF EXISTS ix_{table}_{suffix}_trgm')
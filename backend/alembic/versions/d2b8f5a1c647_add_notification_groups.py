@@ -0,0 +1,28 @@
+"""add_notification_groups
+
+Revision ID: d2b8f5a1c647
+Revises: c7e1a4f9b352
+Create Date: 2026-10-17 04:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2b8f5a1c647'
+down_revision = 'c7e1a4f9b352'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('notifications', sa.Column('group_key', sa.String(length=100), nullable=True))
+    op.add_column('notifications', sa.Column('group_count', sa.Integer(), server_default='1', nullable=False))
+    op.create_index('ix_notifications_user_group', 'notifications', ['user_id', 'group_key'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notifications_user_group', table_name='notifications')
+    op.drop_column('notifications', 'group_count')
+    op.drop_column('notifications', 'group_key')
@@ -0,0 +1,26 @@
+"""add_background_job_heartbeat
+
+Revision ID: d4b7e2a9f618
+Revises: c9a5e1f7d324
+Create Date: 2026-10-17 12:00:00.000000
+
+Workers refresh heartbeat_at while they run a job, so a running job whose
+worker died can be told apart and requeued.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4b7e2a9f618'
+down_revision = 'c9a5e1f7d324'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('background_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('background_jobs', 'heartbeat_at')
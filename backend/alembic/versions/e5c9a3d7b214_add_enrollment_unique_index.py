@@ -0,0 +1,42 @@
+"""add_enrollment_unique_index
+
+Revision ID: e5c9a3d7b214
+Revises: d2b8f5a1c647
+Create Date: 2026-10-17 05:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c9a3d7b214'
+down_revision = 'd2b8f5a1c647'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Soft-delete duplicate live enrollments, keeping the earliest of each
+    op.execute("""
+        UPDATE enrollments SET is_deleted = true, deleted_at = CURRENT_TIMESTAMP
+        WHERE is_deleted = false AND EXISTS (
+            SELECT 1 FROM enrollments earlier
+            WHERE earlier.student_id = enrollments.student_id
+            AND earlier.subject_id = enrollments.subject_id
+            AND earlier.term_id = enrollments.term_id
+            AND earlier.is_deleted = false
+            AND (earlier.created_at < enrollments.created_at
+                 OR (earlier.created_at = enrollments.created_at AND earlier.id < enrollments.id))
+        )
+    """)
+    op.create_index(
+        'uq_enrollments_student_subject_term', 'enrollments', ['student_id', 'subject_id', 'term_id'],
+        unique=True,
+        sqlite_where=sa.text('is_deleted = 0'),
+        postgresql_where=sa.text('is_deleted = false')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_enrollments_student_subject_term', table_name='enrollments')
@@ -0,0 +1,27 @@
+"""add_fee_assignment_lookup_index
+
+Revision ID: f3a6d8c1e925
+Revises: e5c9a3d7b214
+Create Date: 2026-10-17 05:50:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a6d8c1e925'
+down_revision = 'e5c9a3d7b214'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_fee_assignments_student_structure_term', 'fee_assignments',
+        ['student_id', 'fee_structure_id', 'term_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_fee_assignments_student_structure_term', table_name='fee_assignments')
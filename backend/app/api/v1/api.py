@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 
 # Import all endpoint routers
-from app.api.v1.endpoints import auth, schools, school_selection, users, classes, subjects, terms, students, fees, grades, grade_templates, component_mappings, communication, academic_sessions, teacher_subjects, dashboard, reports, teacher_invitations, enrollments, platform_admin, documents, public_school, school_validation, report_card_templates, student_portal, teacher_tools, cbt, cbt_schedules, cbt_student, notifications, audit_logs, assets, attendance, analytics, goals, alerts, gradebook, curriculum, materials, cbt_generator, support, sessions, promotions, search, credentials, teacher_permissions, certificates, school_blockchain
+from app.api.v1.endpoints import auth, schools, school_selection, users, classes, subjects, terms, students, fees, grades, grade_templates, component_mappings, communication, academic_sessions, teacher_subjects, dashboard, reports, teacher_invitations, enrollments, platform_admin, documents, public_school, school_validation, report_card_templates, student_portal, teacher_tools, cbt, cbt_schedules, cbt_student, notifications, audit_logs, assets, attendance, analytics, goals, alerts, gradebook, curriculum, materials, cbt_generator, support, sessions, promotions, search, credentials, teacher_permissions, certificates, school_blockchain, jobs
 
 api_router = APIRouter()
 
@@ -48,6 +48,7 @@ api_router.include_router(promotions.router, prefix="/promotions", tags=["promot
 api_router.include_router(search.router, prefix="/search", tags=["search"])
 api_router.include_router(credentials.router, prefix="/credentials", tags=["credentials"])
 api_router.include_router(school_blockchain.router, prefix="/schools", tags=["school-identity"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
 
 # School-specific routes with school code
 api_router.include_router(students.router, prefix="/school/{school_code}/students", tags=["school-students"])
@@ -78,6 +79,7 @@ api_router.include_router(student_portal.router, prefix="/school/{school_code}/s
 api_router.include_router(assets.router, prefix="/school/{school_code}/assets", tags=["school-assets"])
 api_router.include_router(attendance.router, prefix="/school/{school_code}/attendance", tags=["school-attendance"])
 api_router.include_router(alerts.router, prefix="/school/{school_code}/alerts", tags=["school-alerts"])
+api_router.include_router(jobs.router, prefix="/school/{school_code}/jobs", tags=["school-jobs"])
 api_router.include_router(gradebook.router, prefix="/school/{school_code}/gradebook", tags=["school-gradebook"])
 api_router.include_router(curriculum.router, prefix="/school/{school_code}/curriculum", tags=["school-curriculum"])
 api_router.include_router(materials.router, prefix="/school/{school_code}/materials", tags=["school-materials"])
@@ -14,7 +14,7 @@ from app.services.alert_service import AlertService
 from app.schemas.alert_rule import (
     AlertRuleCreate, AlertRuleUpdate, AlertRuleResponse,
     AlertNotificationResponse, AlertAcknowledge, AlertResolve,
-    AlertType, AlertSeverity
+    AlertEvaluationMetrics, AlertType, AlertSeverity
 )
 
 router = APIRouter()
@@ -103,6 +103,16 @@ async def evaluate_alert_rule(
     return await AlertService.evaluate_rule(db, current_school.id, rule_id)
 
 
+@router.get("/evaluation/metrics", response_model=AlertEvaluationMetrics)
+async def get_alert_evaluation_metrics(
+    current_user: User = Depends(require_school_admin()),
+    current_school: School = Depends(get_current_school),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Scheduled evaluation health: this school's due-rule backlog and the last run's metrics"""
+    return await AlertService.get_evaluation_metrics(db, current_school.id)
+
+
 # ============== Alert Notifications ==============
 
 @router.get("/notifications", response_model=List[AlertNotificationResponse])
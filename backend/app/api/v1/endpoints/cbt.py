@@ -27,8 +27,10 @@ from app.schemas.cbt import (
     CBTQuestionCreate, CBTQuestionUpdate, CBTQuestionResponse,
     CBTTestScheduleCreate, CBTTestScheduleUpdate, CBTTestScheduleResponse, CBTScheduleListResponse,
     CBTSubmissionResponse, CBTSubmissionListResponse, CBTSubmissionStart, CBTSubmissionSubmit,
-    CBTTestForStudent, CBTQuestionForStudent, CBTQuestionOptionForStudent
+    CBTTestForStudent, CBTQuestionForStudent, CBTQuestionOptionForStudent,
+    CBTItemAnalysisResponse
 )
+from app.services.cbt_item_analysis_service import CBTItemAnalysisService
 
 router = APIRouter()
 
@@ -264,6 +266,7 @@ async def update_test(
     update_data = test_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(test, field, value)
+    test.content_version += 1
 
     await db.commit()
     await db.refresh(test)
@@ -381,6 +384,7 @@ async def add_question(
 
     # Update test total points
     test.total_points = float(test.total_points) + float(question_data.points)
+    test.content_version += 1
 
     await db.commit()
     await db.refresh(question)
@@ -462,6 +466,7 @@ async def update_question(
     if 'points' in update_data:
         new_points = float(update_data['points'])
         question.test.total_points = float(question.test.total_points) - old_points + new_points
+    question.test.content_version += 1
 
     await db.commit()
     await db.refresh(question)
@@ -514,6 +519,7 @@ async def delete_question(
 
     # Update test total points
     question.test.total_points = float(question.test.total_points) - float(question.points)
+    question.test.content_version += 1
 
     # Soft delete
     question.is_deleted = True
@@ -628,6 +634,43 @@ async def get_submission_details(
     return CBTSubmissionResponse.model_validate(submission)
 
 
+@router.get("/tests/{test_id}/item-analysis", response_model=CBTItemAnalysisResponse)
+async def get_item_analysis(
+    test_id: str,
+    schedule_id: Optional[str] = Query(None, description="Limit to one schedule"),
+    school_context: SchoolContext = Depends(require_teacher_or_admin()),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Per-question statistics and score distribution of submitted attempts (Teachers/Admins only)"""
+    current_user = school_context.user
+
+    # Verify test exists and check authorization
+    result = await db.execute(
+        select(CBTTest).where(
+            CBTTest.id == test_id,
+            CBTTest.school_id == school_context.school_id,
+            CBTTest.is_deleted == False
+        )
+    )
+    test = result.scalar_one_or_none()
+
+    if not test:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Test not found"
+        )
+
+    # Teachers can only analyse their own tests
+    if isinstance(current_user, User) and current_user.role == UserRole.TEACHER:
+        if test.created_by != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to view analysis for this test"
+            )
+
+    return await CBTItemAnalysisService.get_item_analysis(db, test, schedule_id)
+
+
 @router.get("/tests/{test_id}/export")
 async def export_test_results(
     test_id: str,
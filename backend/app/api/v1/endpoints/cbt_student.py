@@ -6,7 +6,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 from datetime import datetime, timezone
 from decimal import Decimal
-import random
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.deps import get_current_school_context, SchoolContext
 from app.models.student import Student
@@ -16,8 +16,10 @@ from app.models.cbt import (
 )
 from app.schemas.cbt import (
     CBTSubmissionResponse, CBTSubmissionStart, CBTSubmissionSubmit,
-    CBTTestForStudent, CBTQuestionForStudent, CBTQuestionOptionForStudent
+    CBTTestForStudent, CBTAnswerAutosave, CBTAnswerAutosaveResponse
 )
+from app.services.cbt_answer_buffer_service import CBTAnswerBufferService, Sitting, as_utc
+from app.services.cbt_compiled_test_service import CBTCompiledTestService
 
 router = APIRouter()
 
@@ -42,7 +44,7 @@ async def start_test(
     result = await db.execute(
         select(CBTSubmission)
         .options(
-            selectinload(CBTSubmission.test).selectinload(CBTTest.questions).selectinload(CBTQuestion.options),
+            selectinload(CBTSubmission.test),
             selectinload(CBTSubmission.schedule)
         )
         .where(
@@ -64,13 +66,13 @@ async def start_test(
     current_time = datetime.now(timezone.utc)
     schedule = submission.schedule
     
-    if current_time < schedule.start_datetime:
+    if current_time < as_utc(schedule.start_datetime):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Test has not started yet"
         )
     
-    if current_time > schedule.end_datetime:
+    if current_time > as_utc(schedule.end_datetime):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Test has ended"
@@ -111,54 +113,80 @@ async def start_test(
         submission.started_at = current_time
         await db.commit()
     
+    # Autosaves for this attempt can skip the submission lookup
+    CBTAnswerBufferService.remember_sitting(
+        submission.id,
+        Sitting(student.id, school_context.school_id, as_utc(schedule.end_datetime))
+    )
+
     # Prepare questions for student (without correct answers)
-    questions = list(test.questions)
-    
-    # Randomize questions if configured
-    if test.randomize_questions:
-        random.shuffle(questions)
-    
-    student_questions = []
-    for question in questions:
-        options = list(question.options)
-        
-        # Randomize options if configured
-        if test.randomize_options:
-            random.shuffle(options)
-        
-        # Convert to student schema (no correct answer info)
-        student_options = [
-            CBTQuestionOptionForStudent(
-                id=opt.id,
-                option_label=opt.option_label,
-                option_text=opt.option_text,
-                order_number=opt.order_number
+    compiled = await CBTCompiledTestService.get_compiled_test(db, test)
+    return compiled.for_student()
+
+
+@router.put("/submissions/{submission_id}/answers", response_model=CBTAnswerAutosaveResponse)
+async def autosave_answers(
+    submission_id: str,
+    autosave_data: CBTAnswerAutosave,
+    school_context: SchoolContext = Depends(get_current_school_context),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Autosave answers while a test is in progress (for students)"""
+    # Verify user is a student
+    if not isinstance(school_context.user, Student):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This endpoint is for students only"
+        )
+
+    student = school_context.user
+    current_time = datetime.now(timezone.utc)
+
+    sitting = CBTAnswerBufferService.get_sitting(submission_id)
+    if sitting is None or sitting.student_id != student.id or sitting.school_id != school_context.school_id:
+        result = await db.execute(
+            select(CBTSubmission)
+            .options(selectinload(CBTSubmission.schedule))
+            .where(
+                CBTSubmission.id == submission_id,
+                CBTSubmission.student_id == student.id,
+                CBTSubmission.school_id == school_context.school_id,
+                CBTSubmission.is_deleted == False
             )
-            for opt in options
-        ]
-        
-        student_questions.append(
-            CBTQuestionForStudent(
-                id=question.id,
-                question_text=question.question_text,
-                points=question.points,
-                order_number=question.order_number,
-                image_url=question.image_url,
-                media_url=question.media_url,
-                options=student_options
+        )
+        submission = result.scalar_one_or_none()
+
+        if not submission:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Submission not found"
+            )
+
+        if submission.status != SubmissionStatus.IN_PROGRESS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Submission is not in progress"
+            )
+
+        sitting = Sitting(student.id, school_context.school_id, as_utc(submission.schedule.end_datetime))
+        CBTAnswerBufferService.remember_sitting(submission_id, sitting)
+    else:
+        # The submission may have been submitted since, possibly on another worker
+        result = await db.execute(select(CBTSubmission.status).where(CBTSubmission.id == submission_id))
+        if result.scalar_one_or_none() != SubmissionStatus.IN_PROGRESS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Submission is not in progress"
             )
+
+    if current_time > sitting.ends_at:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Test has ended"
         )
-    
-    return CBTTestForStudent(
-        id=test.id,
-        title=test.title,
-        description=test.description,
-        instructions=test.instructions,
-        duration_minutes=test.duration_minutes,
-        total_points=test.total_points,
-        question_count=len(questions),
-        questions=student_questions
-    )
+
+    accepted = await CBTAnswerBufferService.record(db, submission_id, autosave_data.answers, current_time)
+    return CBTAnswerAutosaveResponse(accepted=accepted, buffered=settings.cbt_autosave_buffered)
 
 
 @router.post("/submissions/{submission_id}/submit", response_model=CBTSubmissionResponse)
@@ -182,7 +210,7 @@ async def submit_test(
     result = await db.execute(
         select(CBTSubmission)
         .options(
-            selectinload(CBTSubmission.test).selectinload(CBTTest.questions).selectinload(CBTQuestion.options),
+            selectinload(CBTSubmission.test),
             selectinload(CBTSubmission.schedule)
         )
         .where(
@@ -212,50 +240,18 @@ async def submit_test(
 
     # Calculate time spent
     if submission.started_at:
-        time_spent = int((current_time - submission.started_at).total_seconds())
+        time_spent = int((current_time - as_utc(submission.started_at)).total_seconds())
     else:
         time_spent = 0
 
-    # Process answers and calculate score
-    total_score = Decimal('0')
-    total_possible = Decimal(str(test.total_points))
-
-    # Create a map of questions for quick lookup
-    question_map = {q.id: q for q in test.questions}
-
-    for answer_data in submission_data.answers:
-        question = question_map.get(answer_data.question_id)
-        if not question:
-            continue
-
-        # Find the selected option
-        selected_option = None
-        if answer_data.selected_option_id:
-            for opt in question.options:
-                if opt.id == answer_data.selected_option_id:
-                    selected_option = opt
-                    break
-
-        # Determine if answer is correct
-        is_correct = selected_option.is_correct if selected_option else False
-        points_earned = Decimal(str(question.points)) if is_correct else Decimal('0')
-        total_score += points_earned
-
-        # Create answer record
-        answer = CBTAnswer(
-            submission_id=submission.id,
-            question_id=question.id,
-            selected_option_id=answer_data.selected_option_id,
-            is_correct=is_correct,
-            points_earned=points_earned,
-            answered_at=current_time,
-            school_id=school_context.school_id
-        )
-        db.add(answer)
+    # Merge the final answers with the autosaved ones and calculate score
+    compiled = await CBTCompiledTestService.get_compiled_test(db, test)
+    total_score = await CBTAnswerBufferService.finalize(db, submission, submission_data.answers, current_time)
+    total_possible = compiled.total_points
 
     # Calculate percentage and pass/fail
     percentage = (total_score / total_possible * 100) if total_possible > 0 else Decimal('0')
-    passed = percentage >= Decimal(str(test.pass_percentage))
+    passed = percentage >= compiled.pass_percentage
 
     # Update submission
     submission.status = SubmissionStatus.SUBMITTED
@@ -267,13 +263,13 @@ async def submit_test(
     submission.passed = passed
 
     await db.commit()
-    await db.refresh(submission)
 
-    # Load answers for response
+    # Reload with answers and student for the response
     result = await db.execute(
         select(CBTSubmission)
-        .options(selectinload(CBTSubmission.answers))
+        .options(selectinload(CBTSubmission.answers), selectinload(CBTSubmission.student))
         .where(CBTSubmission.id == submission.id)
+        .execution_options(populate_existing=True)
     )
     submission = result.scalar_one()
 
@@ -33,7 +33,9 @@ from app.schemas.communication import (
     PaginatedMessageResponse,
     PaginatedAnnouncementResponse
 )
-from app.services.communication_service import CommunicationService
+from app.schemas.job import JobResponse
+from app.services.communication_service import CommunicationService, MESSAGE_DELIVERY_JOB_TYPE
+from app.services.job_service import JobService
 
 router = APIRouter()
 
@@ -211,6 +213,38 @@ async def send_message(
     return {"message": "Message sent successfully"}
 
 
+@router.post("/messages/{message_id}/send/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def send_message_job(
+    message_id: str,
+    current_user: User = Depends(require_teacher_or_admin_user()),
+    current_school: School = Depends(get_current_school),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Send a scheduled message as a background job (Teacher/Admin only).
+    
+    Use this for messages to a whole school; poll /jobs/{job_id} for progress.
+    The result has the recipient, delivered and failed counts.
+    """
+    message = await CommunicationService.get_message_by_id(db, message_id, current_school.id)
+    if not message:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Message not found"
+        )
+    
+    job = await JobService.enqueue(
+        db,
+        current_school.id,
+        MESSAGE_DELIVERY_JOB_TYPE,
+        {'message_id': message.id},
+        created_by=current_user.id,
+        progress={'total_recipients': len(message.message_recipients), 'delivered_count': 0, 'failed_count': 0}
+    )
+    
+    return JobService.as_dict(job)
+
+
 @router.post("/messages/mark-read")
 async def mark_messages_as_read(
     request: MarkAsReadRequest,
@@ -21,8 +21,17 @@ from app.core.cache_manager import cache_response
 router = APIRouter()
 
 
+# Writes to any of these bump the tag and drop cached dashboards for the school
+DASHBOARD_CACHE_TAGS = (
+    "school:{school_id}:students",
+    "school:{school_id}:grades",
+    "school:{school_id}:fees",
+    "school:{school_id}:attendance",
+)
+
+
 @router.get("/stats", response_model=DashboardStats)
-@cache_response(expire=300)
+@cache_response(expire=300, tags=DASHBOARD_CACHE_TAGS)
 async def get_dashboard_stats(
     term_id: Optional[str] = Query(None, description="Filter by term"),
     current_user: User = Depends(get_current_active_user),
@@ -37,7 +46,7 @@ async def get_dashboard_stats(
 
 
 @router.get("/", response_model=DashboardData)
-@cache_response(expire=300)
+@cache_response(expire=300, tags=DASHBOARD_CACHE_TAGS)
 async def get_dashboard_data(
     term_id: Optional[str] = Query(None, description="Filter by term"),
     class_id: Optional[str] = Query(None, description="Filter by class"),
@@ -83,13 +83,14 @@ async def auto_enroll_class_students(
     db: AsyncSession = Depends(get_db)
 ) -> Any:
     """Automatically enroll all students in a class to class subjects (Admin only)"""
-    enrollments = await EnrollmentService.auto_enroll_students_in_class_subjects(
+    current_school = school_context.school
+    counts = await EnrollmentService.auto_enroll_students_in_class_subjects(
         db, class_id, current_school.id, subject_ids
     )
     
     return {
-        "message": f"Successfully enrolled {len(enrollments)} students",
-        "enrollments_created": len(enrollments),
+        "message": f"Successfully enrolled {counts['students_enrolled']} students",
+        **counts,
         "class_id": class_id,
         "subject_ids": subject_ids or "all class subjects"
     }
@@ -126,13 +127,13 @@ async def auto_enroll_student_in_class(
             detail="Student is not assigned to any class"
         )
     
-    enrollments = await EnrollmentService.auto_enroll_student_in_class_subjects(
+    counts = await EnrollmentService.auto_enroll_student_in_class_subjects(
         db, student_id, student.current_class_id, current_school.id
     )
     
     return {
-        "message": f"Successfully enrolled student in {len(enrollments)} subjects",
-        "enrollments_created": len(enrollments),
+        "message": f"Successfully enrolled student in {counts['enrollments_created']} subjects",
+        "enrollments_created": counts['enrollments_created'],
         "student_id": student_id,
         "class_id": student.current_class_id
     }
@@ -21,10 +21,13 @@ from app.schemas.fee import (
     FeePaymentCreate,
     FeePaymentResponse,
     BulkFeeAssignmentCreate,
+    BulkFeeAssignmentResult,
     StudentFeesSummary,
     FeeReport
 )
-from app.services.fee_service import FeeService
+from app.schemas.job import JobResponse
+from app.services.fee_service import FeeService, FEE_ASSIGNMENT_JOB_TYPE
+from app.services.job_service import JobService
 
 router = APIRouter()
 
@@ -193,9 +196,12 @@ async def create_fee_assignment(
     return response
 
 
-@router.post("/assignments/bulk", response_model=List[FeeAssignmentResponse])
+@router.post("/assignments/bulk", response_model=BulkFeeAssignmentResult)
 async def bulk_create_fee_assignments(
     bulk_data: BulkFeeAssignmentCreate,
+    include_details: bool = Query(False, description="Include a page of the created assignments"),
+    skip: int = Query(0, ge=0, description="Skip N created assignments"),
+    limit: int = Query(100, ge=1, le=500, description="Limit created assignments"),
     school_context: SchoolContext = Depends(require_school_admin()),
     db: AsyncSession = Depends(get_db)
 ) -> Any:
@@ -208,10 +214,51 @@ async def bulk_create_fee_assignments(
             detail="School not found"
         )
     
-    assignments = await FeeService.bulk_create_fee_assignments(db, bulk_data, current_school.id)
+    summary = await FeeService.bulk_create_fee_assignments(
+        db, bulk_data, current_school.id, collect_ids=include_details
+    )
     
-    # Enhance response with related data
-    return [FeeAssignmentResponse.from_orm(assignment) for assignment in assignments]
+    if include_details:
+        assignments = await FeeService.get_fee_assignments_by_ids(
+            db, current_school.id, summary.pop('assignment_ids')[skip:skip + limit]
+        )
+        summary['assignments'] = [FeeAssignmentResponse.from_orm(assignment) for assignment in assignments]
+    
+    return BulkFeeAssignmentResult(**summary)
+
+
+@router.post("/assignments/bulk/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def bulk_create_fee_assignments_job(
+    bulk_data: BulkFeeAssignmentCreate,
+    current_user: User = Depends(get_current_active_user),
+    school_context: SchoolContext = Depends(require_school_admin()),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Create fee assignments for multiple students as a background job.
+    
+    Use this for whole-school assignments; poll /jobs/{job_id} for progress.
+    The result is the same summary as /assignments/bulk returns; list the
+    assignments with /assignments?term_id=...&fee_structure_id=...
+    """
+    current_school = school_context.school
+    
+    if not current_school:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="School not found"
+        )
+    
+    job = await JobService.enqueue(
+        db,
+        current_school.id,
+        FEE_ASSIGNMENT_JOB_TYPE,
+        bulk_data.model_dump(mode="json"),
+        created_by=current_user.id,
+        progress={'total_students': 0, 'processed_students': 0, 'created_count': 0, 'skipped_count': 0}
+    )
+    
+    return JobService.as_dict(job)
 
 
 @router.get("/assignments", response_model=List[FeeAssignmentResponse])
@@ -220,6 +267,7 @@ async def get_fee_assignments(
     class_id: Optional[str] = Query(None, description="Filter by class"),
     status: Optional[PaymentStatus] = Query(None, description="Filter by payment status"),
     fee_type: Optional[str] = Query(None, description="Filter by fee type"),
+    fee_structure_id: Optional[str] = Query(None, description="Filter by fee structure"),
     search: Optional[str] = Query(None, description="Search by student name or admission number"),
     skip: int = Query(0, description="Skip N items"),
     limit: int = Query(100, description="Limit results"),
@@ -236,7 +284,8 @@ async def get_fee_assignments(
         )
     
     assignments = await FeeService.get_fee_assignments(
-        db, current_school.id, term_id, class_id, status, fee_type, search, skip, limit
+        db, current_school.id, term_id, class_id, status, fee_type, search, skip, limit,
+        fee_structure_id=fee_structure_id
     )
     
     return [FeeAssignmentResponse.from_orm(assignment) for assignment in assignments]
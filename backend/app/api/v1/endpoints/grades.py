@@ -32,6 +32,8 @@ from app.schemas.grade import (
     ReportCardCreate,
     ReportCardUpdate,
     ReportCardResponse,
+    ReportCardBatchCreate,
+    ReportCardBatchJobResponse,
     GradeStatistics,
     SubjectsWithMappingsResponse,
     SubjectWithMapping,
@@ -39,6 +41,7 @@ from app.schemas.grade import (
     ConsolidatedStudentGrade
 )
 from app.services.grade_service import GradeService
+from app.services.report_card_batch_service import ReportCardBatchService
 
 router = APIRouter()
 
@@ -420,29 +423,11 @@ async def create_bulk_grades(
                     detail=f"You cannot grade student {grade_data['student_id']} as they are not in your classes or subjects"
                 )
 
+    # Grades come back with student, subject, exam and grader loaded
     grades = await GradeService.create_bulk_grades(
         db, bulk_data, current_school.id, current_user.id
     )
-    
-    # Query the grades again with relationships loaded to avoid MissingGreenlet errors
-    if grades:
-        grade_ids = [grade.id for grade in grades]
-        from sqlalchemy.orm import selectinload
-        from sqlalchemy import select
-        from app.models.grade import Grade
-        
-        result = await db.execute(
-            select(Grade)
-            .options(
-                selectinload(Grade.student),
-                selectinload(Grade.subject),
-                selectinload(Grade.exam),
-                selectinload(Grade.grader)
-            )
-            .where(Grade.id.in_(grade_ids))
-        )
-        grades = result.scalars().all()
-    
+
     response_grades = []
     for grade in grades:
         grade_response = GradeResponse.from_orm(grade)
@@ -876,6 +861,24 @@ async def get_class_summary_sheet(
     return summary
 
 
+@router.get("/summary-sheet/consistency")
+async def check_class_summary_sheet(
+    class_id: str = Query(..., description="Class ID"),
+    term_id: str = Query(..., description="Term ID"),
+    repair: bool = Query(False, description="Rewrite mismatched cells from a full recompute"),
+    current_user: User = Depends(require_school_admin()),
+    current_school: School = Depends(get_current_school),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Compare the stored summary sheet for a class against a full recompute from grades.
+    (School Admin only)
+    """
+    return await GradeService.check_class_summary(
+        db, class_id, term_id, current_school.id, repair=repair
+    )
+
+
 @router.get("/summary-sheet/export")
 async def export_class_summary_sheet(
     class_id: str = Query(..., description="Class ID"),
@@ -1111,6 +1114,40 @@ async def create_report_card(
     return response
 
 
+@router.post("/report-cards/batch", response_model=ReportCardBatchJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_report_cards_batch(
+    batch_data: ReportCardBatchCreate,
+    current_user: User = Depends(require_school_admin()),
+    current_school: School = Depends(get_current_school),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Start generating report cards for a whole term, optionally limited to some classes.
+    Poll the returned job for progress and throughput.
+    (School Admin only)
+    """
+    return await ReportCardBatchService.create_job(
+        db, current_school.id, batch_data.term_id, current_user.id, batch_data.class_ids
+    )
+
+
+@router.get("/report-cards/batch/{job_id}", response_model=ReportCardBatchJobResponse)
+async def get_report_cards_batch(
+    job_id: str,
+    current_user: User = Depends(require_school_admin()),
+    current_school: School = Depends(get_current_school),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Get progress of a batch report card job (School Admin only)"""
+    job = await ReportCardBatchService.get_job(db, job_id, current_school.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Batch job not found"
+        )
+    return job
+
+
 @router.get("/report-cards", response_model=List[ReportCardResponse])
 async def get_report_cards(
     student_id: Optional[str] = Query(None, description="Filter by student"),
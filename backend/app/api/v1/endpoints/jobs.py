@@ -0,0 +1,43 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.core.deps import require_school_admin_user, get_current_school
+from app.models.background_job import JobStatus
+from app.models.user import User
+from app.models.school import School
+from app.schemas.job import JobResponse
+from app.services.job_service import JobService
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[JobResponse])
+async def get_jobs(
+    job_type: Optional[str] = None,
+    job_status: Optional[JobStatus] = Query(None, alias="status"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(require_school_admin_user()),
+    current_school: School = Depends(get_current_school),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Get the school's most recent background jobs (Admin only)"""
+    jobs = await JobService.list_jobs(db, current_school.id, job_type, job_status, limit)
+    return [JobService.as_dict(job) for job in jobs]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(require_school_admin_user()),
+    current_school: School = Depends(get_current_school),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Get a background job's status, progress and result (Admin only)"""
+    job = await JobService.get_job(db, job_id, current_school.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return JobService.as_dict(job)
@@ -13,6 +13,7 @@ from app.models.user import User
 from app.models.school import School
 from app.models.teacher_material import MaterialType, DifficultyLevel, AccessType
 from app.services.material_service import MaterialService
+from app.services.material_search_service import MaterialSearchService
 
 router = APIRouter()
 
@@ -67,6 +68,7 @@ class SearchRequest(BaseModel):
     difficulty_level: Optional[DifficultyLevel] = None
     exam_type: Optional[str] = None
     material_type: Optional[MaterialType] = None
+    tags: Optional[List[str]] = None
     limit: int = Field(20, ge=1, le=100)
 
 
@@ -210,14 +212,24 @@ async def smart_search(
     current_school: School = Depends(get_current_school),
     db: AsyncSession = Depends(get_db)
 ) -> Any:
-    """Smart search for materials"""
-    results = await MaterialService.smart_search(
+    """Smart search for materials, ranked by relevance, with tag facets"""
+    found = await MaterialSearchService.search(
         db, current_school.id, data.query,
-        data.subject_id, data.class_id, data.grade_level,
-        data.difficulty_level, data.exam_type, data.material_type,
-        data.limit
+        subject_id=data.subject_id,
+        class_id=data.class_id,
+        grade_level=data.grade_level,
+        difficulty_level=data.difficulty_level,
+        exam_type=data.exam_type,
+        material_type=data.material_type,
+        tags=data.tags,
+        limit=data.limit
     )
-    return {"results": results, "count": len(results)}
+    return {
+        "results": found["results"],
+        "count": len(found["results"]),
+        "total": found["total"],
+        "facets": found["facets"]
+    }
 
 
 @router.get("/{material_id}/related")
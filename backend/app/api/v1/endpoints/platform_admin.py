@@ -18,6 +18,7 @@ from app.schemas.platform_admin import (
     TrialStatistics
 )
 from app.services.platform_admin_service import PlatformAdminService
+from app.services.platform_stats_service import PlatformStatsService
 
 router = APIRouter()
 
@@ -65,6 +66,18 @@ async def get_platform_statistics(
     return PlatformStatistics(**stats)
 
 
+@router.post("/statistics/refresh", response_model=PlatformStatistics)
+async def refresh_platform_statistics(
+    current_user: User = Depends(require_platform_admin_user()),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Rebuild the statistics rollup now instead of waiting for the scheduled refresh"""
+    
+    await PlatformStatsService.refresh(db)
+    stats = await PlatformAdminService.get_platform_statistics(db)
+    return PlatformStatistics(**stats)
+
+
 @router.get("/schools", response_model=List[SchoolDetailResponse])
 async def get_all_schools(
     page: int = Query(1, ge=1),
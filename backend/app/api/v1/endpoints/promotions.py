@@ -16,6 +16,8 @@ from app.schemas.academic_session import (
     BulkPromotionRequest,
     BulkPromotionResult,
 )
+from app.schemas.job import JobResponse
+from app.services.job_service import JobService
 from app.services.promotion_service import PromotionService
 
 
@@ -115,6 +117,39 @@ async def execute_promotions(
     return result
 
 
+@router.post("/execute/jobs", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def execute_promotions_job(
+    promotion_data: BulkPromotionRequest,
+    current_user: User = Depends(get_current_active_user),
+    school_context: SchoolContext = Depends(require_school_admin()),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Execute bulk promotions as a background job.
+    
+    Use this for large promotion runs; poll /jobs/{job_id} for the
+    outcome, whose result has the same shape as /execute's response.
+    """
+    current_school = school_context.school
+    
+    if not current_school:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="School not found"
+        )
+    
+    job = await JobService.enqueue(
+        db,
+        current_school.id,
+        "promotion",
+        promotion_data.model_dump(mode="json"),
+        created_by=current_user.id,
+        progress={'total': len(promotion_data.decisions), 'processed': 0}
+    )
+    
+    return JobService.as_dict(job)
+
+
 @router.post("/auto-promote", response_model=BulkPromotionResult)
 async def auto_promote(
     session_id: str = Query(..., description="Academic session ID"),
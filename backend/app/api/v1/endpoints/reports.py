@@ -13,6 +13,7 @@ from app.models.user import User
 from app.models.school import School
 from app.schemas.dashboard import DashboardStats
 from app.services.dashboard_service import DashboardService
+from app.services.export_service import ExportService
 from app.services.report_service import ReportService
 from app.schemas.report import FinancialReport
 from datetime import date
@@ -132,16 +133,17 @@ async def export_report(
         if end_date:
             end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
 
-        csv_content = await ReportService.export_financial_report_csv(
-            db, current_school.id, start_date, end_date, term_id, class_id, fee_type, payment_status
-        )
-        
-        return Response(
-            content=csv_content,
-            media_type="text/csv",
-            headers={
-                "Content-Disposition": f"attachment; filename=financial_report_{datetime.now().strftime('%Y%m%d')}.csv"
-            }
+        export_format = export_options.get('format', 'csv')
+        if export_format not in ('csv', 'xlsx'):
+            raise HTTPException(status_code=400, detail="Export format must be csv or xlsx")
+
+        return ExportService.streaming_response(
+            db,
+            ReportService.financial_report_rows(
+                db, current_school.id, start_date, end_date, term_id, class_id, fee_type, payment_status
+            ),
+            f"financial_report_{datetime.now().strftime('%Y%m%d')}",
+            export_format
         )
         
     return {"message": f"Export for {report_type} not implemented yet"}
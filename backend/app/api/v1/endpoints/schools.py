@@ -434,12 +434,8 @@ async def upload_school_logo(
             detail="You don't have permission to edit this school"
         )
 
-    # Delete old logo if exists
-    if current_school.logo_url:
-        await FileUploadService.delete_school_logo(current_school.logo_url)
-
-    # Upload new logo
-    logo_url = await FileUploadService.upload_school_logo(file, current_school.id)
+    # Upload new logo; the old one is deleted only once this succeeds
+    logo_url = await FileUploadService.replace_school_logo(file, current_school.id, current_school.logo_url)
 
     # Update school with new logo URL
     updated_school = await SchoolService.update_school(
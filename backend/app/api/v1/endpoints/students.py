@@ -27,11 +27,12 @@ from app.schemas.student import (
     StudentStatusUpdate,
     StudentClassUpdate,
     StudentImportResult,
+    StudentImportJobResponse,
     BulkStudentUpdate
 )
 from app.services.csv_import_service import CSVImportService
 from app.services.student_service import StudentService
-from app.core.cache_manager import cache_response, CacheManager
+from app.core.cache_manager import cache_response, CacheManager, tenant_tag
 import math
 
 router = APIRouter()
@@ -135,9 +136,6 @@ async def create_student(
     student = await StudentService.create_student(
         db, student_data, school_context.school_id, current_user.id
     )
-    
-    # Invalidate cache
-    await CacheManager.invalidate_prefix("get_students")
 
     # Enhance response with related data
     return await enhance_student_response(student, db)
@@ -155,9 +153,6 @@ async def bulk_update_students(
         db, bulk_data, current_school.id, current_user.id
     )
     
-    # Invalidate cache
-    await CacheManager.invalidate_prefix("get_students")
-    
     # Enhance response
     response_students = []
     for student in students:
@@ -168,7 +163,7 @@ async def bulk_update_students(
 
 
 @router.get("/", response_model=StudentListResponse)
-@cache_response(expire=300)
+@cache_response(expire=300, tags=("school:{school_id}:students",))
 async def get_students(
     class_id: Optional[str] = Query(None, description="Filter by class"),
     status: Optional[StudentStatus] = Query(None, description="Filter by status"),
@@ -271,23 +266,19 @@ async def export_students(
     class_id: Optional[str] = Query(None, description="Filter by class"),
     status: Optional[StudentStatus] = Query(None, description="Filter by status"),
     search: Optional[str] = Query(None, description="Search by name or admission number"),
+    format: str = Query("csv", pattern="^(csv|xlsx)$", description="Export format: csv or xlsx"),
     current_user: User = Depends(require_school_admin_user()),
     current_school: School = Depends(get_current_school),
     db: AsyncSession = Depends(get_db)
 ) -> Response:
-    """Export students to CSV with filters (School Admin only)"""
+    """Export students to CSV or XLSX with filters, streamed as it is read (School Admin only)"""
     from app.services.export_service import ExportService
-    
-    csv_content = await ExportService.export_students_csv(
-        db, current_school.id, class_id, status, search
-    )
-    
-    return Response(
-        content=csv_content,
-        media_type="text/csv",
-        headers={
-            "Content-Disposition": f"attachment; filename=students_export_{datetime.now().strftime('%Y%m%d')}.csv"
-        }
+
+    return ExportService.streaming_response(
+        db,
+        ExportService.student_rows(db, current_school.id, class_id, status, search),
+        f"students_export_{datetime.now().strftime('%Y%m%d')}",
+        format
     )
 
 
@@ -400,9 +391,6 @@ async def update_student(
     student = await StudentService.update_student(
         db, student_id, student_data, current_school.id, current_user.id
     )
-    
-    # Invalidate cache
-    await CacheManager.invalidate_prefix("get_students")
 
     # Enhance response
     return await enhance_student_response(student, db)
@@ -435,6 +423,7 @@ async def update_student_status(
     student.status = status_data.status
     await db.commit()
     await db.refresh(student)
+    await CacheManager.invalidate_tags(tenant_tag(current_school.id, "students"))
     
     # Enhance response
     response = StudentResponse.from_orm(student)
@@ -471,6 +460,7 @@ async def update_student_class(
     student.current_class_id = class_data.current_class_id
     await db.commit()
     await db.refresh(student)
+    await CacheManager.invalidate_tags(tenant_tag(current_school.id, "students"))
     
     # Enhance response
     return await enhance_student_response(student, db)
@@ -494,9 +484,6 @@ async def delete_student(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Student not found"
         )
-    
-    # Invalidate cache
-    await CacheManager.invalidate_prefix("get_students")
 
     return {"message": "Student deleted successfully"}
 
@@ -544,3 +531,42 @@ async def import_students_from_csv(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error processing CSV file: {str(e)}"
         )
+
+
+@router.post("/import/jobs", response_model=StudentImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def start_student_import_job(
+    file: UploadFile = File(...),
+    current_user: User = Depends(require_school_admin_user()),
+    current_school: School = Depends(get_current_school),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """
+    Start importing students from a CSV file in the background.
+    The file is checked before the job starts; poll the returned job for
+    progress and per-row errors. (Super Admin only)
+    """
+    if file.size and file.size > 10 * 1024 * 1024:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="File size too large. Maximum size is 10MB"
+        )
+
+    content = await CSVImportService.read_csv_upload(file)
+    return await CSVImportService.create_import_job(db, current_school.id, current_user.id, content)
+
+
+@router.get("/import/jobs/{job_id}", response_model=StudentImportJobResponse)
+async def get_student_import_job(
+    job_id: str,
+    current_user: User = Depends(require_school_admin_user()),
+    current_school: School = Depends(get_current_school),
+    db: AsyncSession = Depends(get_db)
+) -> Any:
+    """Get progress and row errors of a background student import (Super Admin only)"""
+    job = await CSVImportService.get_import_job(db, job_id, current_school.id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    return job
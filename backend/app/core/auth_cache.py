@@ -0,0 +1,173 @@
+"""
+Short-lived cache of resolved principals for the auth dependencies.
+
+Every authenticated request resolves its user (or student), the school in the
+token and, for school owners, their ownership row. The rows change rarely, so
+the resolved objects are kept per process for a few seconds and handed to each
+request as fresh instances merged into its own session without a query.
+
+Entries are dropped as soon as a session flushes a change to a User, Student,
+School, SchoolOwnership or TeacherPermission, so role changes, deactivation and
+revoked ownership take effect immediately in this process and within the TTL
+everywhere else.
+"""
+
+import copy
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from cachetools import TTLCache
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.models.user import User
+from app.models.student import Student
+from app.models.school import School
+from app.models.school_ownership import SchoolOwnership
+from app.models.teacher_permission import TeacherPermission
+
+# (model class, column values) of a fully loaded row
+Snapshot = Tuple[type, Dict[str, Any]]
+
+
+def snapshot(obj: Any) -> Optional[Snapshot]:
+    """Copy the column values of a loaded instance; None if some column isn't loaded"""
+    state = inspect(obj)
+    values = {}
+    for attr in state.mapper.column_attrs:
+        if attr.key not in state.dict:
+            return None
+        values[attr.key] = state.dict[attr.key]
+    return state.mapper.class_, copy.deepcopy(values)
+
+
+async def restore(db: AsyncSession, snap: Snapshot) -> Any:
+    """Attach a snapshot to the session as a persistent instance without querying"""
+    model, values = snap
+    obj = inspect(model).class_manager.new_instance()
+    for key, value in copy.deepcopy(values).items():
+        set_committed_value(obj, key, value)
+    make_transient_to_detached(obj)
+    return await db.merge(obj, load=False)
+
+
+class PrincipalCache:
+    """Per-process cache of users, students, schools and their auth lookups"""
+
+    def __init__(self, ttl: int, max_entries: int):
+        self.enabled = ttl > 0
+        ttl = max(ttl, 1)
+        # principal id -> {lookup key: value}, so one change drops everything for that principal
+        self._principals: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl)
+        self._schools: TTLCache = TTLCache(maxsize=max_entries, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, principal_id: str, key: Hashable) -> Any:
+        """Return the cached value or None"""
+        if not self.enabled:
+            return None
+        value = self._principals.get(principal_id, {}).get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, principal_id: str, key: Hashable, value: Any) -> None:
+        if not self.enabled:
+            return
+        entries = self._principals.get(principal_id)
+        if entries is None:
+            entries = self._principals[principal_id] = {}
+        entries[key] = value
+
+    def get_school(self, school_id: str) -> Any:
+        if not self.enabled:
+            return None
+        value = self._schools.get(school_id)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set_school(self, school_id: str, value: Any) -> None:
+        if self.enabled:
+            self._schools[school_id] = value
+
+    def invalidate_principal(self, principal_id: str) -> None:
+        self._principals.pop(principal_id, None)
+
+    def invalidate_school(self, school_id: str) -> None:
+        self._schools.pop(school_id, None)
+
+    def clear(self) -> None:
+        self._principals.clear()
+        self._schools.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "principals": len(self._principals),
+            "schools": len(self._schools),
+        }
+
+
+principal_cache = PrincipalCache(
+    ttl=settings.auth_cache_ttl,
+    max_entries=settings.auth_cache_max_entries
+)
+
+
+def _changed_keys(session: Session) -> Tuple[set, set]:
+    """Principal and school ids touched by the objects being flushed"""
+    principals, schools = set(), set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (User, Student)):
+            principals.add(obj.id)
+        elif isinstance(obj, School):
+            schools.add(obj.id)
+        elif isinstance(obj, SchoolOwnership):
+            principals.add(obj.user_id)
+        elif isinstance(obj, TeacherPermission):
+            principals.add(obj.teacher_id)
+    principals.discard(None)
+    schools.discard(None)
+    return principals, schools
+
+
+def _invalidate(principals: set, schools: set) -> None:
+    for principal_id in principals:
+        principal_cache.invalidate_principal(principal_id)
+    for school_id in schools:
+        principal_cache.invalidate_school(school_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _invalidate_after_flush(session, flush_context):
+    principals, schools = _changed_keys(session)
+    if principals or schools:
+        _invalidate(principals, schools)
+        # Again at commit, in case a concurrent request cached the old row in between
+        pending = session.info.setdefault("principal_cache_invalidations", (set(), set()))
+        pending[0].update(principals)
+        pending[1].update(schools)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session):
+    pending = session.info.pop("principal_cache_invalidations", None)
+    if pending:
+        _invalidate(*pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop("principal_cache_invalidations", None)
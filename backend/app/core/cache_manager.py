@@ -1,92 +1,291 @@
 
+import asyncio
 import functools
 import json
 import logging
-from typing import Optional, Callable, Any
+import string
+from typing import Optional, Callable, Any, Dict, List, Sequence, Tuple
+from cachetools import LRUCache, TLRUCache
 from fastapi import Request
 from app.services.redis_service import redis_service
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-def cache_response(expire: int = 300, key_prefix: str = ""):
+_MISSING = object()
+
+
+class LocalCache:
+    """
+    In-process L1 cache tier in front of Redis.
+
+    Each tenant gets its own TLRU cache so one busy school can't evict
+    everyone else's entries; the set of tenants is itself LRU-bounded.
+    """
+
+    def __init__(self, max_entries_per_tenant: int, max_tenants: int, enabled: bool = True):
+        self.enabled = enabled
+        self.max_entries_per_tenant = max_entries_per_tenant
+        self._tenants: LRUCache = LRUCache(maxsize=max_tenants)
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+
+    def _tenant_cache(self, tenant: str) -> TLRUCache:
+        cache = self._tenants.get(tenant)
+        if cache is None:
+            # Values are stored as (ttl, value); entries expire ttl seconds after insertion
+            cache = TLRUCache(
+                maxsize=self.max_entries_per_tenant,
+                ttu=lambda key, item, now: now + item[0]
+            )
+            self._tenants[tenant] = cache
+        return cache
+
+    def get(self, tenant: str, key: str) -> Any:
+        """Return the cached value or _MISSING"""
+        if not self.enabled:
+            return _MISSING
+        cache = self._tenants.get(tenant)
+        if cache is None:
+            return _MISSING
+        item = cache.get(key)
+        return _MISSING if item is None else item[1]
+
+    def set(self, tenant: str, key: str, value: Any, ttl: int) -> None:
+        if self.enabled and ttl > 0:
+            self._tenant_cache(tenant)[key] = (ttl, value)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Drop every entry whose key starts with prefix"""
+        deleted = 0
+        for cache in list(self._tenants.values()):
+            for key in [k for k in cache.keys() if k.startswith(prefix)]:
+                cache.pop(key, None)
+                deleted += 1
+        return deleted
+
+    def clear(self) -> None:
+        self._tenants.clear()
+
+    def stats(self) -> dict:
+        lookups = self.l1_hits + self.l2_hits + self.misses
+        return {
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.l1_hits + self.l2_hits) / lookups, 3) if lookups else 0.0,
+            "tenants": len(self._tenants),
+            "entries": sum(len(cache) for cache in self._tenants.values()),
+        }
+
+
+local_cache = LocalCache(
+    max_entries_per_tenant=settings.cache_l1_max_entries_per_tenant,
+    max_tenants=settings.cache_l1_max_tenants,
+    enabled=settings.cache_l1_enabled
+)
+
+# Loads currently running, so concurrent misses on one key share a single handler call
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+async def singleflight(key: str, load: Callable) -> Any:
+    """
+    Run load() once per key at a time; concurrent callers await the same result.
+
+    load() runs in the first caller's task, as it may use that caller's session.
+    If that caller is cancelled, the callers still waiting retry and one of them
+    runs load() itself, rather than all failing with the first one.
     """
-    Decorator to cache FastAPI route responses in Redis.
-    
+    while True:
+        pending = _inflight.get(key)
+        if pending is None:
+            break
+        try:
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            # Only the load was cancelled, not this caller
+            if pending.cancelled() and not asyncio.current_task().cancelling():
+                continue
+            raise
+
+    future = asyncio.get_running_loop().create_future()
+    # Mark a failure as retrieved even when nobody else was waiting for it
+    future.add_done_callback(lambda f: f.cancelled() or f.exception())
+    _inflight[key] = future
+    try:
+        result = await load()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _inflight.pop(key, None)
+
+
+# Tag versions; a cached entry's key embeds the versions of its tags, so bumping a
+# version makes every entry carrying that tag unreachable without touching the keys.
+# Redis holds the shared counters when configured, this dict is the per-process fallback.
+_tag_versions: Dict[str, int] = {}
+
+_formatter = string.Formatter()
+
+
+def tenant_tag(school_id: Any, resource: str) -> str:
+    """Tag for a school-wide resource, e.g. school:{id}:students"""
+    return f"school:{school_id}:{resource}"
+
+
+def _render_tags(templates: Sequence[str], kwargs: dict, tenant: str) -> List[str]:
+    """Fill tag templates from the route kwargs; templates with a missing value are skipped"""
+    values = {k: v for k, v in kwargs.items() if v is not None}
+    if tenant != "global":
+        values['school_id'] = tenant
+
+    tags = []
+    for template in templates:
+        fields = [field for _, field, _, _ in _formatter.parse(template) if field]
+        if all(field in values for field in fields):
+            tags.append(template.format(**{field: values[field] for field in fields}))
+    return tags
+
+
+async def _tag_version_suffix(tags: List[str]) -> str:
+    """Key suffix holding the current version of each tag (one MGET when Redis is configured)"""
+    if settings.redis_url:
+        try:
+            raw = await redis_service.get_many([f"cachetag:{tag}" for tag in tags])
+            return "v" + ".".join(str(int(value or 0)) for value in raw)
+        except Exception as e:
+            logger.error(f"CacheManager tag version error: {e}")
+    # Separate marker so entries keyed on local counters never collide with shared ones
+    return "l" + ".".join(str(_tag_versions.get(tag, 0)) for tag in tags)
+
+
+def _build_cache_key(func: Callable, key_prefix: str, kwargs: dict) -> Tuple[str, str]:
+    """Return (cache_key, tenant) for a route call"""
+    cacheable_kwargs = {}
+    for k, v in kwargs.items():
+        # Filter out standard FastAPI dependencies that we know are objects
+        if k in ['db', 'request', 'response', 'school_context', 'file', 'background_tasks']:
+            continue
+
+        # Handle User object specifically
+        if k == 'current_user' and hasattr(v, 'id'):
+             cacheable_kwargs['user_id'] = str(v.id)
+             cacheable_kwargs['user_role'] = str(v.role) if hasattr(v, 'role') else 'unknown'
+             continue
+
+        cacheable_kwargs[k] = str(v)
+
+    # Routes that only take a SchoolContext still vary by who is asking
+    school_context = kwargs.get('school_context')
+    context_user = getattr(school_context, 'user', None)
+    if 'user_id' not in cacheable_kwargs and context_user is not None and hasattr(context_user, 'id'):
+        cacheable_kwargs['user_id'] = str(context_user.id)
+        cacheable_kwargs['user_role'] = str(getattr(context_user, 'role', 'unknown'))
+
+    # Add tenant context (Crucial for multi-tenancy)
+    tenant = "global"
+    current_school = kwargs.get('current_school') or school_context
+    if current_school:
+         # Handle both School object and SchoolContext object
+         school_id = getattr(current_school, 'id', None) or getattr(current_school, 'school_id', None)
+         if school_id:
+            cacheable_kwargs['school_id'] = str(school_id)
+            tenant = str(school_id)
+
+    # Sort keys for stability
+    key_str = json.dumps(cacheable_kwargs, sort_keys=True)
+    return f"cache:{key_prefix or func.__name__}:{key_str}", tenant
+
+
+def _serialize(result: Any) -> Any:
+    """Turn a route result into JSON-compatible data"""
+    # Handle Pydantic models
+    if hasattr(result, 'dict'):
+        return result.dict()
+    if hasattr(result, 'model_dump'):  # Pydantic v2
+        return result.model_dump()
+    if isinstance(result, list):
+        return [
+            item.dict() if hasattr(item, 'dict') else (item.model_dump() if hasattr(item, 'model_dump') else item)
+            for item in result
+        ]
+    return result
+
+
+def cache_response(expire: int = 300, key_prefix: str = "", tags: Sequence[str] = ()):
+    """
+    Decorator to cache FastAPI route responses.
+
+    Lookups go to the in-process L1 tier first, then Redis (when configured).
+    Concurrent misses on the same key run the route once.
+
     Args:
         expire: Expiration time in seconds (default 5 mins)
-        key_prefix: Optional prefix for the cache key. 
+        key_prefix: Optional prefix for the cache key.
                     If not provided, uses function name.
+        tags: Tag templates filled from the route kwargs plus school_id,
+              e.g. "school:{school_id}:students". CacheManager.invalidate_tags
+              drops every entry carrying one of the tags.
     """
     def decorator(func: Callable):
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
-            # If Redis is not enabled/configured, just run the function
-            if not settings.redis_url:
+            try:
+                cache_key, tenant = _build_cache_key(func, key_prefix, kwargs)
+                entry_tags = _render_tags(tags, kwargs, tenant)
+            except Exception as e:
+                # Fail open - if the key can't be built, just run the backend logic
+                logger.error(f"CacheManager error: {e}")
                 return await func(*args, **kwargs)
 
-            try:
-                # 1. Construct Cache Key
-                cacheable_kwargs = {}
-                for k, v in kwargs.items():
-                    # Filter out standard FastAPI dependencies that we know are objects
-                    if k in ['db', 'request', 'response', 'school_context', 'file', 'background_tasks']:
-                        continue
-                    
-                    # Handle User object specifically
-                    if k == 'current_user' and hasattr(v, 'id'):
-                         cacheable_kwargs['user_id'] = str(v.id)
-                         cacheable_kwargs['user_role'] = str(v.role) if hasattr(v, 'role') else 'unknown'
-                         continue
-                        
-                    cacheable_kwargs[k] = str(v)
-                
-                # Add tenant context (Crucial for multi-tenancy)
-                current_school = kwargs.get('current_school') or kwargs.get('school_context')
-                if current_school:
-                     # Handle both School object and SchoolContext object
-                     school_id = getattr(current_school, 'id', None) or getattr(current_school, 'school_id', None)
-                     if school_id:
-                        cacheable_kwargs['school_id'] = str(school_id)
-
-                # Sort keys for stability
-                key_str = json.dumps(cacheable_kwargs, sort_keys=True)
-                cache_key = f"cache:{key_prefix or func.__name__}:{key_str}"
-                
-                # 2. Try Cache Get
-                cached_data = await redis_service.get(cache_key)
-                if cached_data:
-                    logger.debug(f"Cache HIT for {cache_key}")
-                    return cached_data
+            if entry_tags:
+                # Versions are read before the handler runs, so data loaded before a
+                # write can only ever be stored under the pre-write key
+                cache_key = f"{cache_key}:{await _tag_version_suffix(entry_tags)}"
+
+            # 1. L1 (in-process)
+            cached_data = local_cache.get(tenant, cache_key)
+            if cached_data is not _MISSING:
+                local_cache.l1_hits += 1
+                return cached_data
+
+            l1_ttl = min(expire, settings.cache_l1_ttl)
+
+            async def load():
+                # 2. L2 (Redis)
+                if settings.redis_url:
+                    cached_data = await redis_service.get(cache_key)
+                    if cached_data:
+                        logger.debug(f"Cache HIT for {cache_key}")
+                        local_cache.l2_hits += 1
+                        local_cache.set(tenant, cache_key, cached_data, l1_ttl)
+                        return cached_data
 
                 # 3. Cache Miss - Execute Function
-                # logger.debug(f"Cache MISS for {cache_key}")
+                local_cache.misses += 1
                 result = await func(*args, **kwargs)
-                
+
                 # 4. Serialize & Store
-                to_cache = result
-                # Handle Pydantic models
-                if hasattr(result, 'dict'):
-                    to_cache = result.dict()
-                elif hasattr(result, 'model_dump'): # Pydantic v2
-                    to_cache = result.model_dump()
-                elif isinstance(result, list):
-                    to_cache = [
-                        item.dict() if hasattr(item, 'dict') else (item.model_dump() if hasattr(item, 'model_dump') else item)
-                        for item in result
-                    ]
-                
-                # Don't cache empty results if it looks like an error or initial state?
-                # Actually caching empty lists is fine (it means no data).
-                
-                await redis_service.set(cache_key, to_cache, expire=expire)
-                
+                try:
+                    to_cache = _serialize(result)
+                    local_cache.set(tenant, cache_key, to_cache, l1_ttl)
+                    if settings.redis_url:
+                        await redis_service.set(cache_key, to_cache, expire=expire)
+                except Exception as e:
+                    logger.error(f"CacheManager error: {e}")
+
                 return result
 
-            except Exception as e:
-                # Fail open - if caching fails, just run the backend logic
-                logger.error(f"CacheManager error: {e}")
-                return await func(*args, **kwargs)
+            return await singleflight(cache_key, load)
 
         return wrapper
     return decorator
@@ -95,4 +294,29 @@ class CacheManager:
     @staticmethod
     async def invalidate_prefix(prefix: str):
         """Invalidate all keys starting with prefix"""
+        local_cache.delete_prefix(f"cache:{prefix}")
         await redis_service.delete_prefix(f"cache:{prefix}")
+
+    @staticmethod
+    async def invalidate_tags(*tags: str):
+        """
+        Invalidate every entry carrying any of the tags.
+
+        Bumps one version counter per tag, so the cost doesn't depend on how many
+        keys exist; orphaned entries simply age out through their TTL.
+        """
+        tags = [tag for tag in dict.fromkeys(tags) if tag]
+        if not tags:
+            return
+        for tag in tags:
+            _tag_versions[tag] = _tag_versions.get(tag, 0) + 1
+        if settings.redis_url:
+            try:
+                await redis_service.incr_many([f"cachetag:{tag}" for tag in tags])
+            except Exception as e:
+                logger.error(f"CacheManager tag invalidation error: {e}")
+
+    @staticmethod
+    def stats() -> dict:
+        """Hit/miss counters and size of the in-process tier"""
+        return local_cache.stats()
@@ -28,15 +28,60 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite+aiosqlite:///./school_management.db"
     database_url_sync: str = "sqlite:///./school_management.db"
-    
+
+    # Database connection pooling
+    # "auto" pools on the SQLAlchemy side unless an external pooler (Supabase/PgBouncer) is detected
+    db_pool_mode: str = "auto"  # Options: "auto", "pooled", "null"
+    db_external_pooler: bool = False  # Set when connecting through a PgBouncer we can't detect from the URL
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: int = 30  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Seconds before a connection is replaced
+    db_pool_pre_ping: bool = True
+    db_statement_cache_size: int = 100  # Prepared statements cached per connection (0 disables)
+
     # Redis
     redis_url: str = "redis://localhost:6379/0"
+
+    # In-process (L1) response cache in front of Redis
+    cache_l1_enabled: bool = True
+    cache_l1_ttl: int = 30  # Upper bound on L1 lifetime so other workers' writes show up quickly
+    cache_l1_max_entries_per_tenant: int = 256
+    cache_l1_max_tenants: int = 1000
+
+    # Compiled CBT tests (questions, options and answer key) kept per process
+    cbt_compiled_cache_max_tests: int = 500
+    cbt_item_analysis_cache_max_tests: int = 200  # Cached item analyses (per test version and schedule)
+
+    # CBT answer autosave: deltas are coalesced per process and flushed in batches
+    cbt_autosave_buffered: bool = True  # False writes every autosave straight through
+    cbt_autosave_flush_interval: float = 2.0  # Seconds between background flushes
+    cbt_autosave_flush_threshold: int = 5000  # Buffered answers that trigger an early flush
+    cbt_autosave_flush_batch: int = 200  # Submissions written per flush transaction
+
+    # Background jobs (report card batches, imports, promotions)
+    job_broker: str = "local"  # "local" runs jobs in this process; "celery" hands them to app.worker
+    job_workers: int = 4  # Jobs run at once by the in-process pool
+    job_tenant_concurrency: int = 2  # Jobs one school may have running at once
+    job_retry_delay: float = 30.0  # Seconds before the first retry, doubled per attempt
+    job_poll_interval: float = 5.0  # Seconds between the pool's checks for due jobs
+    job_progress_interval: float = 2.0  # Seconds between saves of a running job's progress
+    job_lease_timeout: float = 120.0  # Seconds without a heartbeat before a running job counts as abandoned
+    job_schedule_interval: float = 60.0  # Seconds between checks for due periodic jobs
+    platform_stats_interval: float = 3600.0  # Seconds between refreshes of the platform statistics rollup
+    alert_evaluation_interval: float = 60.0  # Seconds between scheduled evaluations of due alert rules
+    alert_evaluation_batch_size: int = 100  # Due alert rules claimed at a time
+    material_search_backlog_interval: float = 3600.0  # Seconds between runs indexing materials without postings
     
     # JWT
     secret_key: str = "dev-secret-key-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
+
+    # Resolved users/schools for the auth dependencies, kept per process (0 disables)
+    auth_cache_ttl: int = 30
+    auth_cache_max_entries: int = 10000
     
     # Email Configuration
     # SMTP Settings
@@ -53,6 +98,11 @@ class Settings(BaseSettings):
     
     # Resend (recommended for Render.com)
     resend_api_key: Optional[str] = None
+
+    # Bulk email delivery (message sends to many recipients)
+    email_batch_size: int = 100  # Emails per Resend batch call (Resend allows at most 100)
+    email_concurrency: int = 4  # Resend batch calls, or SMTP connections, in flight at once
+    email_rate_limit: float = 10.0  # Provider requests per second (a Resend batch call or one SMTP message); 0 disables
     
     # Frontend URL (for email links in production)
     frontend_url: str = "http://localhost:3000"
@@ -65,6 +115,7 @@ class Settings(BaseSettings):
     # File Upload
     max_file_size: int = 10485760  # 10MB
     upload_dir: str = "uploads/"
+    image_workers: int = 2  # Processes decoding and encoding uploaded images; 0 uses a thread instead
     allowed_extensions: str = "pdf,doc,docx,jpg,jpeg,png,gif"
     
     # Cloudinary (for cloud image storage)
@@ -1,44 +1,161 @@
 from sqlalchemy import create_engine, event
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 from app.core.config import settings
+from collections import deque
+from typing import Optional
+from urllib.parse import urlparse
 import logging
+import time
 
 # Configure SQLAlchemy logging
 # logging.getLogger('sqlalchemy.engine').setLevel(logging.WARNING)
 # logging.getLogger('sqlalchemy.pool').setLevel(logging.WARNING)
 # logging.getLogger('sqlalchemy.dialects').setLevel(logging.WARNING)
 
-print(f"[database.py] Using DB URL scheme: {settings.database_url.split('://')[0]}", flush=True)
+logger = logging.getLogger(__name__)
 
-# Determine if using Supabase (needs special PgBouncer settings)
-is_supabase = "supabase.com" in settings.database_url or "pooler.supabase.com" in settings.database_url
+# Default port PgBouncer listens on
+PGBOUNCER_PORT = 6432
 
-# For Supabase with asyncpg: disable prepared statement caching for PgBouncer compatibility
-# For other PostgreSQL: use default settings
-if is_supabase:
-    # asyncpg connect_args for PgBouncer transaction pooling mode
-    async_connect_args = {
-        "prepared_statement_cache_size": 0,
-        "statement_cache_size": 0,
-    }
-    print(f"[database.py] Supabase detected - disabling prepared statement cache", flush=True)
-else:
-    async_connect_args = {}
+
+def has_external_pooler(database_url: str) -> bool:
+    """Whether connections already go through a transaction pooler such as Supabase's PgBouncer"""
+    if settings.db_external_pooler:
+        return True
+    if "supabase.com" in database_url or "pgbouncer" in database_url.lower():
+        return True
+    try:
+        return urlparse(database_url).port == PGBOUNCER_PORT
+    except ValueError:
+        return False
+
+
+def use_pooled_engine(database_url: str, mode: Optional[str] = None) -> bool:
+    """Resolve the pool mode; "auto" pools PostgreSQL connections unless an external pooler is in front"""
+    mode = (mode or settings.db_pool_mode).lower()
+    if mode == "pooled":
+        return True
+    if mode == "null":
+        return False
+    return database_url.startswith("postgresql") and not has_external_pooler(database_url)
+
+
+def build_connect_args(database_url: str) -> dict:
+    """Driver connect_args, including prepared statement caching"""
+    # PgBouncer in transaction pooling mode can't keep prepared statements across transactions
+    cache_size = 0 if has_external_pooler(database_url) else settings.db_statement_cache_size
+    if "+asyncpg" in database_url:
+        return {
+            "prepared_statement_cache_size": cache_size,
+            "statement_cache_size": cache_size,
+        }
+    if "+psycopg" in database_url and cache_size == 0:
+        # psycopg prepares statements server-side after prepare_threshold runs; None disables it
+        return {"prepare_threshold": None}
+    return {}
+
+
+def create_app_async_engine(database_url: str, pooled: bool) -> AsyncEngine:
+    """Create the async engine in pooled or NullPool mode"""
+    connect_args = build_connect_args(database_url)
+    if pooled:
+        return create_async_engine(
+            database_url,
+            echo=False,
+            future=True,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+            pool_pre_ping=settings.db_pool_pre_ping,
+            connect_args=connect_args,
+        )
+    # NullPool: no pooling on SQLAlchemy side (let PgBouncer handle it)
+    return create_async_engine(
+        database_url,
+        echo=False,
+        future=True,
+        poolclass=NullPool,
+        connect_args=connect_args,
+    )
+
+
+class PoolMetrics:
+    """Connection checkout latency and pool saturation for an async engine"""
+
+    def __init__(self, engine: AsyncEngine, pooled: bool, window: int = 1000):
+        self.engine = engine
+        self.pooled = pooled
+        self.latencies = deque(maxlen=window)
+        self.checkouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        event.listen(engine.sync_engine, "checkout", self._on_checkout)
+        event.listen(engine.sync_engine, "checkin", self._on_checkin)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self.in_use = max(self.in_use - 1, 0)
+
+    def record_checkout(self, seconds: float) -> None:
+        """Record how long a session waited for its connection"""
+        self.checkouts += 1
+        self.latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        """Current metrics as a JSON-serialisable dictionary"""
+        latencies = sorted(self.latencies)
+        latency_ms = {"avg": 0.0, "p95": 0.0, "max": 0.0}
+        if latencies:
+            latency_ms = {
+                "avg": round(sum(latencies) / len(latencies) * 1000, 3),
+                "p95": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 3),
+                "max": round(latencies[-1] * 1000, 3),
+            }
+
+        metrics = {
+            "mode": "pooled" if self.pooled else "null",
+            "checkouts": self.checkouts,
+            "checkout_latency_ms": latency_ms,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+        }
+        if self.pooled:
+            pool = self.engine.pool
+            capacity = settings.db_pool_size + settings.db_max_overflow
+            metrics.update({
+                "pool_size": pool.size(),
+                "max_overflow": settings.db_max_overflow,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "saturation": round(pool.checkedout() / capacity, 3) if capacity else 1.0,
+            })
+        return metrics
+
+
+logger.info(f"Using DB URL scheme: {settings.database_url.split('://')[0]}")
+
+is_pooled = use_pooled_engine(settings.database_url)
 
 # Async engine for FastAPI
-# NullPool ensures we don't do any pooling on SQLAlchemy side (let PgBouncer handle it)
-async_engine = create_async_engine(
-    settings.database_url,
-    echo=False,
-    future=True,
-    poolclass=NullPool,
-    connect_args=async_connect_args,
-)
+async_engine = create_app_async_engine(settings.database_url, is_pooled)
+pool_metrics = PoolMetrics(async_engine, is_pooled)
 
-print(f"[database.py] Async engine created with NullPool", flush=True)
+if is_pooled:
+    logger.info(
+        f"Async engine created with connection pool "
+        f"(size={settings.db_pool_size}, max_overflow={settings.db_max_overflow})"
+    )
+else:
+    logger.info("Async engine created with NullPool")
 
 # Sync engine for Alembic migrations
 sync_engine = create_engine(
@@ -66,17 +183,19 @@ Base = declarative_base()
 
 # Dependency to get async database session
 async def get_db() -> AsyncSession:
-    print("[get_db] Creating async session...", flush=True)
-    try:
-        async with AsyncSessionLocal() as session:
-            print("[get_db] Session created successfully", flush=True)
-            try:
-                yield session
-            finally:
-                await session.close()
-    except Exception as e:
-        print(f"[get_db] ERROR creating session: {type(e).__name__}: {e}", flush=True)
-        raise
+    async with AsyncSessionLocal() as session:
+        # Acquire the connection up front so checkout latency can be measured
+        started = time.perf_counter()
+        try:
+            await session.connection()
+        except Exception as e:
+            logger.error(f"Error acquiring database connection: {type(e).__name__}: {e}")
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - started)
+        try:
+            yield session
+        finally:
+            await session.close()
 
 
 # Dependency to get sync database session (for migrations)
@@ -86,4 +205,3 @@ def get_sync_db():
         yield db
     finally:
         db.close()
-
@@ -8,6 +8,7 @@ from app.core.security import verify_token
 from app.models.user import User, UserRole
 from app.models.school import School
 from app.models.school_ownership import SchoolOwnership
+from app.core.auth_cache import principal_cache, snapshot, restore
 from dataclasses import dataclass
 
 # Security scheme
@@ -25,6 +26,106 @@ class SchoolContext:
     school: Optional[School] = None
 
 
+async def _load_user(db: AsyncSession, user_id: str) -> Optional[User]:
+    """Load a non-deleted user, from the principal cache when warm"""
+    cached = principal_cache.get(user_id, "user")
+    if cached is not None:
+        return await restore(db, cached)
+
+    result = await db.execute(select(User).where(User.id == user_id, User.is_deleted == False))
+    user = result.scalar_one_or_none()
+    if user is not None and user.is_active:
+        snap = snapshot(user)
+        if snap is not None:
+            principal_cache.set(user_id, "user", snap)
+    return user
+
+
+async def _load_student(db: AsyncSession, student_id: str):
+    """Load a non-deleted student, from the principal cache when warm"""
+    from app.models.student import Student, StudentStatus
+
+    cached = principal_cache.get(student_id, "student")
+    if cached is not None:
+        return await restore(db, cached)
+
+    result = await db.execute(select(Student).where(Student.id == student_id, Student.is_deleted == False))
+    student = result.scalar_one_or_none()
+    if student is not None and student.status == StudentStatus.ACTIVE:
+        snap = snapshot(student)
+        if snap is not None:
+            principal_cache.set(student_id, "student", snap)
+    return student
+
+
+async def _has_school_ownership(db: AsyncSession, user_id: str, school_id: str) -> bool:
+    """Whether the user actively owns the school; only positive answers are cached"""
+    if principal_cache.get(user_id, ("owns", school_id)) is True:
+        return True
+
+    ownership_result = await db.execute(
+        select(SchoolOwnership.id).where(
+            and_(
+                SchoolOwnership.user_id == user_id,
+                SchoolOwnership.school_id == school_id,
+                SchoolOwnership.is_active == True
+            )
+        )
+    )
+    if ownership_result.scalar_one_or_none() is None:
+        return False
+
+    principal_cache.set(user_id, ("owns", school_id), True)
+    return True
+
+
+async def _load_school(db: AsyncSession, school_id: str) -> Optional[School]:
+    """Load a non-deleted school, from the principal cache when warm"""
+    cached = principal_cache.get_school(school_id)
+    if cached is not None:
+        return await restore(db, cached)
+
+    result = await db.execute(
+        select(School).where(
+            School.id == school_id,
+            School.is_deleted == False
+        )
+    )
+    school = result.scalar_one_or_none()
+    if school is not None and school.is_active:
+        snap = snapshot(school)
+        if snap is not None:
+            principal_cache.set_school(school_id, snap)
+    return school
+
+
+async def _load_teacher_permission(
+    db: AsyncSession,
+    teacher_id: str,
+    school_id: str,
+    permission_type: 'PermissionType'
+):
+    """Active delegated permission or None; grants without an expiry are cached"""
+    from app.services.teacher_permission_service import TeacherPermissionService
+
+    key = ("permission", school_id, permission_type)
+    cached = principal_cache.get(teacher_id, key)
+    if cached is not None:
+        return await restore(db, cached)
+
+    permission = await TeacherPermissionService.check_teacher_has_permission(
+        db,
+        teacher_id,
+        school_id,
+        permission_type
+    )
+    if permission is not None and permission.expires_at is None:
+        snap = snapshot(permission)
+        if snap is not None:
+            principal_cache.set(teacher_id, key, snap)
+    return permission
+
+
 async def get_current_user_id(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> str:
@@ -58,8 +159,7 @@ async def get_current_user(
         )
 
     # Get user from database
-    result = await db.execute(select(User).where(User.id == user_id, User.is_deleted == False))
-    user = result.scalar_one_or_none()
+    user = await _load_user(db, user_id)
 
     if user is None:
         raise HTTPException(
@@ -106,8 +206,7 @@ async def get_school_context(
         logger.debug(f"🔍 Authenticating student: {user_id}")
 
         # Get student from database
-        result = await db.execute(select(Student).where(Student.id == user_id, Student.is_deleted == False))
-        student = result.scalar_one_or_none()
+        student = await _load_student(db, user_id)
 
         if student is None:
             logger.warning(f"❌ Student not found in database: {user_id}")
@@ -140,8 +239,7 @@ async def get_school_context(
         return SchoolContext(school_id=current_school_id, user=student)
 
     # Get regular user from database
-    result = await db.execute(select(User).where(User.id == user_id, User.is_deleted == False))
-    user = result.scalar_one_or_none()
+    user = await _load_user(db, user_id)
 
     if user is None:
         raise HTTPException(
@@ -167,18 +265,7 @@ async def get_school_context(
     # For school owners, verify they have access to the school in the JWT
     if user.role == UserRole.SCHOOL_OWNER and school_id and school_id != user.school_id:
         # Verify ownership
-        ownership_result = await db.execute(
-            select(SchoolOwnership).where(
-                and_(
-                    SchoolOwnership.user_id == user.id,
-                    SchoolOwnership.school_id == school_id,
-                    SchoolOwnership.is_active == True
-                )
-            )
-        )
-        ownership = ownership_result.scalar_one_or_none()
-
-        if not ownership:
+        if not await _has_school_ownership(db, user.id, school_id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You don't have access to this school",
@@ -206,13 +293,7 @@ async def get_current_school_context(
     """Get current school context with school details loaded"""
     if school_context.school is None:
         # Load school details
-        result = await db.execute(
-            select(School).where(
-                School.id == school_context.school_id,
-                School.is_deleted == False
-            )
-        )
-        school = result.scalar_one_or_none()
+        school = await _load_school(db, school_context.school_id)
 
         if school is None:
             raise HTTPException(
@@ -381,9 +462,7 @@ def require_permission(permission_type: 'PermissionType'):
         
         # For teachers, check if they have the delegated permission
         if user.role == UserRole.TEACHER:
-            from app.services.teacher_permission_service import TeacherPermissionService
-            
-            permission = await TeacherPermissionService.check_teacher_has_permission(
+            permission = await _load_teacher_permission(
                 db,
                 user.id,
                 school_context.school_id,
@@ -421,9 +500,7 @@ def require_permission_user(permission_type: 'PermissionType'):
         
         # For teachers, check if they have the delegated permission
         if current_user.role == UserRole.TEACHER and current_user.school_id:
-            from app.services.teacher_permission_service import TeacherPermissionService
-            
-            permission = await TeacherPermissionService.check_teacher_has_permission(
+            permission = await _load_teacher_permission(
                 db,
                 current_user.id,
                 current_user.school_id,
@@ -9,7 +9,13 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from fastapi.middleware.gzip import GZipMiddleware
 from app.core.config import settings
+from app.core.database import async_engine, pool_metrics
+from app.core.cache_manager import CacheManager
+from app.core.auth_cache import principal_cache
 from app.core.database_init import check_and_initialize_database
+from app.services.cbt_answer_buffer_service import CBTAnswerBufferService
+from app.services.file_upload_service import FileUploadService
+from app.services.job_service import JobService
 from app.api.v1.api import api_router
 
 # Configure logging - Force DEBUG to capture everything
@@ -42,10 +48,20 @@ async def lifespan(app: FastAPI):
         logger.error(f"Database initialization failed: {e}")
         raise
 
+    CBTAnswerBufferService.start()
+    JobService.start()
+
     yield
 
     # Shutdown
     logger.info("Shutting down School Management System...")
+    try:
+        await CBTAnswerBufferService.stop()
+    except Exception as e:
+        logger.error(f"Flushing buffered CBT answers failed: {e}")
+    await JobService.stop()
+    FileUploadService.shutdown()
+    await async_engine.dispose()
 
 # Create FastAPI application
 app = FastAPI(
@@ -115,3 +131,21 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "version": settings.app_version}
+
+
+@app.get("/health/db")
+async def database_health_check():
+    """Connection pool metrics: checkout latency and saturation"""
+    return {"status": "healthy", "pool": pool_metrics.snapshot()}
+
+
+@app.get("/health/cache")
+async def cache_health_check():
+    """Response cache and auth principal cache hit/miss counters"""
+    return {"status": "healthy", "cache": CacheManager.stats(), "principals": principal_cache.stats()}
+
+
+@app.get("/health/cbt-autosave")
+async def cbt_autosave_health_check():
+    """Buffered CBT answers and rows written per answer received"""
+    return {"status": "healthy", "autosave": CBTAnswerBufferService.stats()}
@@ -25,7 +25,9 @@ from .student_goal import *  # noqa
 from .alert_rule import *  # noqa
 from .curriculum import *  # noqa
 from .teacher_material import *  # noqa
+from .background_job import *  # noqa
 from .teacher_permission import *  # noqa
 from .promotion_request import *  # noqa
+from .platform_stats import *  # noqa
 from .certificate import TransferCertificate
 from .credential import VerifiableCredential
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Enum, ForeignKey, Text, Date, Time, Integer, JSON, Table, Index
+from sqlalchemy import Column, String, Boolean, Enum, ForeignKey, Text, Date, Time, Integer, JSON, Table, Index, text
 from sqlalchemy.orm import relationship
 from app.models.base import TenantBaseModel
 import enum
@@ -192,6 +192,16 @@ class Enrollment(TenantBaseModel):
     class_ = relationship("Class", back_populates="enrollments")
     subject = relationship("Subject", back_populates="enrollments")
     term = relationship("Term", back_populates="enrollments")
+
+    __table_args__ = (
+        # One live enrollment per student, subject and term; lets bulk enrollment skip duplicates
+        Index(
+            'uq_enrollments_student_subject_term', 'student_id', 'subject_id', 'term_id',
+            unique=True,
+            sqlite_where=text('is_deleted = 0'),  # Spelled as SQLAlchemy renders == False, so SQLite uses it
+            postgresql_where=text('is_deleted = false')
+        ),
+    )
     
     def __repr__(self):
         return f"<Enrollment(student_id={self.student_id}, subject_id={self.subject_id})>"
@@ -2,7 +2,7 @@
 Alert Rule Model for Automated Reporting & Alert Rules (P3.1)
 """
 
-from sqlalchemy import Column, String, Text, Boolean, ForeignKey, Enum as SQLEnum, JSON, DateTime, Float
+from sqlalchemy import Column, String, Text, Boolean, ForeignKey, Enum as SQLEnum, JSON, DateTime, Float, Index, text
 from sqlalchemy.orm import relationship
 from app.models.base import TenantBaseModel
 import enum
@@ -83,6 +83,15 @@ class AlertRule(TenantBaseModel):
     # Relationships
     creator = relationship("User", backref="created_alert_rules")
     notifications = relationship("AlertNotification", back_populates="rule")
+
+    __table_args__ = (
+        # The scheduler's due-rule lookup
+        Index(
+            'ix_alert_rules_due', 'next_evaluation_at',
+            sqlite_where=text('is_active = 1 AND is_deleted = 0'),
+            postgresql_where=text('is_active = true AND is_deleted = false')
+        ),
+    )
     
     def __repr__(self):
         return f"<AlertRule {self.name} - {self.alert_type.value}>"
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, String, Integer, Text, DateTime, JSON, Enum, Index
+import enum
+from app.models.base import TenantBaseModel
+
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class BackgroundJob(TenantBaseModel):
+    """A long-running school operation, run by JobService outside the request"""
+
+    __tablename__ = "background_jobs"
+
+    job_type = Column(String(50), nullable=False, index=True)
+    status = Column(Enum(JobStatus), default=JobStatus.PENDING, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    progress = Column(JSON, nullable=False, default=dict)  # Counters the handler updates while it runs
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=1, nullable=False)
+    run_after = Column(DateTime(timezone=True), nullable=False)  # Not picked up before this (retry backoff)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # Refreshed by the worker while it runs the job
+    created_by = Column(String(36), nullable=True)
+
+    __table_args__ = (
+        # Workers look for due pending jobs; the tenant limit counts running jobs per school
+        Index("ix_background_jobs_status_run_after", "status", "run_after"),
+        Index("ix_background_jobs_school_status", "school_id", "status"),
+    )
+
+    def __repr__(self):
+        return f"<BackgroundJob(id={self.id}, type={self.job_type}, status={self.status})>"
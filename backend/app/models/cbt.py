@@ -50,6 +50,9 @@ class CBTTest(TenantBaseModel):
     
     # Status
     status = Column(Enum(TestStatus), default=TestStatus.DRAFT, nullable=False)
+
+    # Bumped whenever questions, options or settings change; keys the compiled test cache
+    content_version = Column(Integer, default=1, server_default="1", nullable=False)
     
     # Metadata
     created_by = Column(String(36), ForeignKey("users.id"), nullable=False)
@@ -197,7 +200,7 @@ class CBTAnswer(TenantBaseModel):
     time_spent_seconds = Column(Integer, nullable=True)
 
     # Foreign Keys
-    submission_id = Column(String(36), ForeignKey("cbt_submissions.id"), nullable=False)
+    submission_id = Column(String(36), ForeignKey("cbt_submissions.id"), nullable=False, index=True)
     question_id = Column(String(36), ForeignKey("cbt_questions.id"), nullable=False)
     school_id = Column(String(36), ForeignKey("schools.id"), nullable=False)
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Enum, ForeignKey, Text, Date, Numeric, JSON, Integer
+from sqlalchemy import Column, String, Boolean, Enum, ForeignKey, Text, Date, Numeric, JSON, Integer, Index
 from sqlalchemy.orm import relationship
 from app.models.base import TenantBaseModel
 import enum
@@ -114,6 +114,11 @@ class FeeAssignment(TenantBaseModel):
     fee_structure = relationship("FeeStructure", back_populates="fee_assignments")
     term = relationship("Term")
     payments = relationship("FeePayment", back_populates="fee_assignment")
+
+    __table_args__ = (
+        # Finding which students already have a fee for a term
+        Index('ix_fee_assignments_student_structure_term', 'student_id', 'fee_structure_id', 'term_id'),
+    )
     
     def __repr__(self):
         return f"<FeeAssignment(student_id={self.student_id}, amount={self.amount}, status={self.status})>"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Enum, ForeignKey, Text, Date, Numeric, Integer, JSON
+from sqlalchemy import Column, String, Boolean, Enum, ForeignKey, Text, Date, Numeric, Integer, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.models.base import TenantBaseModel
 import enum
@@ -113,6 +113,35 @@ class Grade(TenantBaseModel):
         return f"<Grade(student_id={self.student_id}, subject_id={self.subject_id}, score={self.score})>"
 
 
+class ClassSummaryScore(TenantBaseModel):
+    """Materialized cell of the class summary sheet.
+
+    Holds one student's consolidated score for one subject in a term, kept in
+    step with the grades table by GradeService.refresh_class_summary.
+    """
+    
+    __tablename__ = "class_summary_scores"
+    __table_args__ = (
+        UniqueConstraint('term_id', 'student_id', 'subject_id', name='uq_class_summary_score'),
+    )
+    
+    # Consolidated score across all exams for the subject
+    total_score = Column(Numeric(8, 2), nullable=False)
+    grade_count = Column(Integer, nullable=False)
+    
+    # Foreign Keys
+    student_id = Column(String(36), ForeignKey("students.id"), nullable=False, index=True)
+    subject_id = Column(String(36), ForeignKey("subjects.id"), nullable=False)
+    term_id = Column(String(36), ForeignKey("terms.id"), nullable=False)
+    school_id = Column(String(36), ForeignKey("schools.id"), nullable=False, index=True)
+    
+    # Relationships
+    subject = relationship("Subject")
+    
+    def __repr__(self):
+        return f"<ClassSummaryScore(student_id={self.student_id}, subject_id={self.subject_id}, total={self.total_score})>"
+
+
 class ReportCard(TenantBaseModel):
     """Student report card model"""
     
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, Text, Enum
+from sqlalchemy import Column, String, Boolean, Text, Enum, Integer, Index
 import enum
 from app.models.base import TenantBaseModel
 
@@ -17,5 +17,14 @@ class Notification(TenantBaseModel):
     type = Column(String(50), default=NotificationType.INFO, nullable=False)
     is_read = Column(Boolean, default=False, nullable=False)
     link = Column(String(500), nullable=True)
+
+    # Repeated notifications of one kind collapse into a single unread row
+    # (see NotificationService.create_notifications_bulk)
+    group_key = Column(String(100), nullable=True)
+    group_count = Column(Integer, default=1, nullable=False)
+
+    __table_args__ = (
+        Index("ix_notifications_user_group", "user_id", "group_key"),
+    )
     
     # We might want to add metadata or related entity info later, but keeping it simple for now.
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from app.models.base import BaseModel
+
+
+class SchoolStats(BaseModel):
+    """Per-school counters for the platform admin console, rebuilt by PlatformStatsService.refresh"""
+
+    __tablename__ = "school_stats"
+
+    school_id = Column(String(36), ForeignKey("schools.id"), nullable=False, unique=True)
+    student_count = Column(Integer, default=0, nullable=False)
+    teacher_count = Column(Integer, default=0, nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<SchoolStats(school_id={self.school_id}, students={self.student_count}, teachers={self.teacher_count})>"
+
+
+class PlatformStatsSnapshot(BaseModel):
+    """Platform-wide counts for one calendar month (UTC), kept as history once the month ends"""
+
+    __tablename__ = "platform_stats_snapshots"
+
+    period_start = Column(DateTime(timezone=True), nullable=False, unique=True)  # First instant of the month
+
+    # Created during the month
+    schools_created = Column(Integer, default=0, nullable=False)
+    trial_schools_created = Column(Integer, default=0, nullable=False)
+    school_owners_created = Column(Integer, default=0, nullable=False)
+
+    # Totals as of refreshed_at
+    total_schools = Column(Integer, default=0, nullable=False)
+    active_schools = Column(Integer, default=0, nullable=False)
+    trial_schools = Column(Integer, default=0, nullable=False)
+    school_owners = Column(Integer, default=0, nullable=False)
+
+    refreshed_at = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<PlatformStatsSnapshot(period_start={self.period_start}, total_schools={self.total_schools})>"
@@ -2,7 +2,7 @@
 Teacher Material Models for Materials Management and Smart Resource Library (P3.2)
 """
 
-from sqlalchemy import Column, String, Text, Boolean, ForeignKey, Enum as SQLEnum, Integer, DateTime, JSON
+from sqlalchemy import Column, String, Text, Boolean, ForeignKey, Enum as SQLEnum, Integer, DateTime, JSON, Float, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.models.base import TenantBaseModel
 import enum
@@ -92,6 +92,9 @@ class TeacherMaterial(TenantBaseModel):
     view_count = Column(Integer, default=0, nullable=False)
     download_count = Column(Integer, default=0, nullable=False)
     is_favorite = Column(Boolean, default=False, nullable=False)
+
+    # Weighted term count in the search index; NULL until the material is indexed
+    search_length = Column(Float, nullable=True)
     
     # Relationships
     subject = relationship("Subject")
@@ -186,3 +189,43 @@ class MaterialFolderItem(TenantBaseModel):
     def __repr__(self):
         return f"<MaterialFolderItem folder={self.folder_id} material={self.material_id}>"
 
+
+class MaterialSearchTerm(TenantBaseModel):
+    """Posting of the material search index: one term of one searchable material.
+
+    Text rows carry the field-weighted frequency of a word from the title,
+    topic, tags, keywords or description; tag rows carry a whole normalised
+    tag for faceting. Maintained by MaterialSearchService.
+    """
+
+    __tablename__ = "material_search_terms"
+    __table_args__ = (
+        # Covering indexes: term lookups and scoring, then tags by material for facets
+        Index("ix_material_search_terms_school_term", "school_id", "field", "term", "material_id", "weight", "length"),
+        Index("ix_material_search_terms_material", "material_id", "field", "term"),
+    )
+
+    material_id = Column(String(36), ForeignKey("teacher_materials.id"), nullable=False)
+    field = Column(String(10), nullable=False)  # "text" or "tag"
+    term = Column(String(100), nullable=False)
+    weight = Column(Float, nullable=False)
+    length = Column(Float, nullable=False)  # the material's search_length, for BM25
+
+    def __repr__(self):
+        return f"<MaterialSearchTerm {self.material_id} {self.field}:{self.term}>"
+
+
+class MaterialSimilarity(TenantBaseModel):
+    """Precomputed related-material score, maintained by MaterialSearchService"""
+
+    __tablename__ = "material_similarities"
+    __table_args__ = (
+        UniqueConstraint("material_id", "related_id", name="uq_material_similarity"),
+    )
+
+    material_id = Column(String(36), ForeignKey("teacher_materials.id"), nullable=False, index=True)
+    related_id = Column(String(36), ForeignKey("teacher_materials.id"), nullable=False, index=True)
+    score = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<MaterialSimilarity {self.material_id} -> {self.related_id}>"
@@ -118,6 +118,13 @@ class AlertNotificationResponse(AlertNotificationBase):
         from_attributes = True
 
 
+class AlertEvaluationMetrics(BaseModel):
+    backlog: int  # Active rules past their next_evaluation_at
+    oldest_due_seconds: float  # How long the most overdue of them has waited
+    last_run_at: Optional[datetime] = None  # When the last scheduled evaluation finished
+    last_run: Optional[Dict[str, Any]] = None  # Its metrics: rules evaluated, alerts created, latency
+
+
 class AlertAcknowledge(BaseModel):
     notes: Optional[str] = None
 
@@ -230,10 +230,20 @@ class CBTSubmissionStart(BaseModel):
 
 
 class CBTSubmissionSubmit(BaseModel):
-    """Schema for submitting a test"""
+    """Schema for submitting a test with the full answer sheet"""
     answers: List[CBTAnswerCreate]
 
 
+class CBTAnswerAutosave(BaseModel):
+    """Schema for autosaving answers while a test is in progress"""
+    answers: List[CBTAnswerCreate]
+
+
+class CBTAnswerAutosaveResponse(BaseModel):
+    accepted: int
+    buffered: bool
+
+
 class StudentBasicInfo(BaseModel):
     """Basic student info for submissions"""
     id: str
@@ -329,3 +339,52 @@ class CBTTestForStudent(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+# Item Analysis Schemas
+class CBTOptionAnalysis(BaseModel):
+    """How often an option was chosen"""
+    option_id: str
+    option_label: str
+    is_correct: bool
+    count: int
+    proportion: float
+
+
+class CBTItemAnalysis(BaseModel):
+    """Statistics for one question"""
+    question_id: str
+    order_number: int
+    question_text: str
+    points: Decimal
+    p_value: float = Field(..., description="Share of students answering correctly (difficulty)")
+    discrimination_index: float = Field(..., description="p-value of the top 27% minus the bottom 27% by score")
+    point_biserial: Optional[float] = Field(None, description="Correlation between answering correctly and total score")
+    omitted: int
+    options: List[CBTOptionAnalysis] = []
+
+
+class CBTScoreBucket(BaseModel):
+    range_start: int
+    range_end: int
+    count: int
+
+
+class CBTScoreDistribution(BaseModel):
+    mean: float
+    median: float
+    std_dev: float
+    min: float
+    max: float
+    pass_rate: float
+    kr20: Optional[float] = Field(None, description="Kuder-Richardson 20 reliability")
+    buckets: List[CBTScoreBucket] = Field(default_factory=list, description="Submissions per 10% percentage band")
+
+
+class CBTItemAnalysisResponse(BaseModel):
+    test_id: str
+    schedule_id: Optional[str] = None
+    content_version: int
+    submission_count: int
+    score_distribution: Optional[CBTScoreDistribution] = None
+    items: List[CBTItemAnalysis] = []
@@ -158,6 +158,15 @@ class BulkFeeAssignmentCreate(BaseModel):
     discount_reason: Optional[str] = None
 
 
+class BulkFeeAssignmentResult(BaseModel):
+    fee_structure_id: str
+    term_id: str
+    total_students: int
+    created_count: int
+    skipped_count: int  # Students who already had this fee for the term
+    assignments: Optional[List[FeeAssignmentResponse]] = None  # A page of the created assignments, on request
+
+
 class StudentFeesSummary(BaseModel):
     student_id: str
     student_name: str
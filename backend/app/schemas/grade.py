@@ -237,6 +237,27 @@ class ReportCardResponse(ReportCardBase):
         from_attributes = True
 
 
+class ReportCardBatchCreate(BaseModel):
+    term_id: str
+    class_ids: Optional[List[str]] = Field(None, description="Limit the run to these classes; all classes when omitted")
+
+
+class ReportCardBatchJobResponse(BaseModel):
+    job_id: str
+    status: str
+    term_id: str
+    class_ids: Optional[List[str]] = None
+    total_students: int
+    processed_students: int
+    created_count: int
+    skipped_count: int
+    students_per_second: float
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
 class GradeStatistics(BaseModel):
     total_exams: int
     published_exams: int
@@ -0,0 +1,18 @@
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class JobResponse(BaseModel):
+    """Schema for a background job's state and progress"""
+    job_id: str
+    job_type: str
+    status: str
+    progress: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    max_attempts: int
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
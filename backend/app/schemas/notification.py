@@ -20,6 +20,7 @@ class NotificationResponse(NotificationBase):
     school_id: str
     user_id: str
     is_read: bool
+    group_count: int = 1
     created_at: datetime
 
     class Config:
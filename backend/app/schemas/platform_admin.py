@@ -53,6 +53,7 @@ class PlatformStatistics(BaseModel):
     total_school_owners: int
     schools_this_month: int
     growth_metrics: Dict[str, str]
+    refreshed_at: Optional[datetime] = None  # When the statistics rollup was last rebuilt
 
 
 class SchoolDetailResponse(BaseModel):
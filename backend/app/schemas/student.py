@@ -170,6 +170,22 @@ class StudentImportResult(BaseModel):
     created_students: List[StudentResponse]
 
 
+class StudentImportJobResponse(BaseModel):
+    """Schema for a background student import's progress"""
+    job_id: str
+    status: str
+    total_rows: int
+    processed_rows: int
+    successful_imports: int
+    failed_imports: int
+    rows_per_second: float
+    errors: List[StudentImportError]
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
 class CSVStudentRow(BaseModel):
     """Schema for validating CSV student row data"""
     admission_number: str
@@ -1,17 +1,31 @@
 """
 Alert Service for Automated Reporting & Alert Rules (P3.1)
+
+Rules are evaluated on demand (evaluate_rule) and on schedule: the periodic
+"alert_rule_evaluation" job runs evaluate_due_rules every
+settings.alert_evaluation_interval seconds, claiming the rules whose
+next_evaluation_at has passed. Each rule costs one grouped query across its
+students plus one INSERT for the alerts it raises, however many students
+the school has. A student with an unresolved alert from a rule is not
+alerted again by it until that alert is resolved.
 """
 
-from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from operator import eq, ge, gt, le, lt, ne
+from typing import Optional, List, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_, or_, case, exists, insert, update
 from sqlalchemy.orm import selectinload
 
+from app.core.config import settings
 from app.models.alert_rule import (
     AlertRule, AlertNotification, ScheduledReport,
     AlertType, AlertSeverity, AlertConditionOperator, AlertFrequency
 )
+from app.models.background_job import JobStatus
 from app.models.student import Student, StudentStatus
 from app.models.academic import Attendance, AttendanceStatus, Class
 from app.models.grade import Grade
@@ -21,13 +35,32 @@ from app.schemas.alert_rule import (
     AlertNotificationResponse, AlertAcknowledge, AlertResolve,
     ScheduledReportCreate, ScheduledReportUpdate, ScheduledReportResponse
 )
+from app.services.job_service import JobService, PLATFORM_SCOPE, utcnow
 from app.services.notification_service import NotificationService
 from app.schemas.notification import NotificationCreate
 from app.models.notification import NotificationType
-import logging
 
 logger = logging.getLogger(__name__)
 
+ALERT_EVALUATION_JOB_TYPE = "alert_rule_evaluation"
+
+# Comparisons work on plain values and on SQL expressions alike
+_OPERATORS = {
+    AlertConditionOperator.LESS_THAN: lt,
+    AlertConditionOperator.LESS_THAN_OR_EQUAL: le,
+    AlertConditionOperator.GREATER_THAN: gt,
+    AlertConditionOperator.GREATER_THAN_OR_EQUAL: ge,
+    AlertConditionOperator.EQUAL: eq,
+    AlertConditionOperator.NOT_EQUAL: ne,
+}
+
+# Alert title prefix and message (after "Student <name> ") per alert type
+_ALERT_TEXT = {
+    AlertType.ATTENDANCE: ("Attendance Alert", "has attendance rate of {value:.1f}% (threshold: {threshold}%)"),
+    AlertType.GRADE: ("Grade Alert", "has average grade of {value:.1f}% (threshold: {threshold}%)"),
+    AlertType.FEE: ("Fee Alert", "has outstanding fees of {value:.2f} (threshold: {threshold})"),
+}
+
 
 class AlertService:
     """Service for managing alert rules and notifications"""
@@ -141,6 +174,8 @@ class AlertService:
         update_data = rule_data.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(rule, field, value)
+        if 'frequency' in update_data:
+            rule.next_evaluation_at = AlertService._calculate_next_evaluation(rule.frequency)
         
         await db.commit()
         await db.refresh(rule)
@@ -189,278 +224,318 @@ class AlertService:
         if not rule:
             return []
 
-        notifications = []
-
-        # Evaluate based on alert type
-        if rule.alert_type == AlertType.ATTENDANCE:
-            notifications = await AlertService._evaluate_attendance_rule(db, school_id, rule)
-        elif rule.alert_type == AlertType.GRADE:
-            notifications = await AlertService._evaluate_grade_rule(db, school_id, rule)
-        elif rule.alert_type == AlertType.FEE:
-            notifications = await AlertService._evaluate_fee_rule(db, school_id, rule)
+        now = utcnow()
+        alerts = await AlertService._evaluate(db, rule, now)
 
         # Update rule evaluation time
-        rule.last_evaluated_at = datetime.utcnow()
+        rule.last_evaluated_at = now.replace(tzinfo=None)
         rule.next_evaluation_at = AlertService._calculate_next_evaluation(rule.frequency)
         await db.commit()
 
-        return notifications
+        return [AlertNotificationResponse.model_validate(alert) for alert in alerts]
 
     @staticmethod
-    async def _evaluate_attendance_rule(
+    async def evaluate_due_rules(
         db: AsyncSession,
-        school_id: str,
-        rule: AlertRule
-    ) -> List[AlertNotificationResponse]:
-        """Evaluate attendance-based alert rules"""
-        notifications = []
-
-        # Get students with low attendance
-        if rule.scope_type == "school":
-            students_query = select(Student).where(
-                Student.school_id == school_id,
-                Student.is_deleted == False,
-                Student.status == StudentStatus.ACTIVE
-            )
-        elif rule.scope_type == "class" and rule.scope_id:
-            students_query = select(Student).where(
-                Student.school_id == school_id,
-                Student.current_class_id == rule.scope_id,
-                Student.is_deleted == False,
-                Student.status == StudentStatus.ACTIVE
-            )
-        else:
-            return []
-
-        students_result = await db.execute(students_query)
-        students = students_result.scalars().all()
-
-        for student in students:
-            # Calculate attendance rate
-            att_result = await db.execute(
-                select(
-                    func.count(Attendance.id).label('total'),
-                    func.sum(func.case((Attendance.status == AttendanceStatus.PRESENT, 1), else_=0)).label('present')
-                ).where(
-                    Attendance.student_id == student.id,
-                    Attendance.school_id == school_id,
-                    Attendance.is_deleted == False
-                )
-            )
-            att = att_result.one()
-            if not att.total or att.total == 0:
-                continue
-
-            rate = (att.present or 0) / att.total * 100
-
-            # Check if condition is met
-            if AlertService._check_condition(rate, rule.operator, rule.threshold):
-                # Create notification
-                notification = AlertNotification(
-                    school_id=school_id,
-                    rule_id=rule.id,
-                    title=f"Attendance Alert: {student.full_name}",
-                    message=f"Student {student.full_name} has attendance rate of {rate:.1f}% (threshold: {rule.threshold}%)",
-                    severity=rule.severity,
-                    context_type="student",
-                    context_id=student.id,
-                    context_data={"student_name": student.full_name, "class_id": student.current_class_id},
-                    metric_value=rate,
-                    threshold_value=rule.threshold
-                )
-                db.add(notification)
-                await db.flush()
-
-                # Send in-app notifications to configured users
-                await AlertService._send_alert_notifications(db, school_id, rule, notification)
+        batch_size: Optional[int] = None,
+        progress: Optional[dict] = None
+    ) -> dict:
+        """
+        Evaluate every active rule whose next_evaluation_at has passed.
+
+        Rules are claimed batch_size at a time (settings.alert_evaluation_batch_size
+        by default) by moving their next_evaluation_at forward, under
+        SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL so concurrent workers
+        take disjoint batches. Each rule is then evaluated and committed on its
+        own; a failing rule is logged and left for its next evaluation.
+
+        Returns the run's metrics: rules evaluated and failed, alerts created,
+        per-rule latency, how overdue the most overdue rule was and the
+        backlog of due rules left. progress is kept up to date while running.
+        """
+        batch_size = batch_size or settings.alert_evaluation_batch_size
+        progress = progress if progress is not None else {}
+        started = time.perf_counter()
+        cutoff = utcnow()
+        metrics = {
+            'backlog': await AlertService._count_due(db, cutoff),
+            'rules_evaluated': 0,
+            'rules_failed': 0,
+            'alerts_created': 0,
+            'max_lag_seconds': 0.0,
+            'mean_latency_ms': 0.0,
+            'max_latency_ms': 0.0
+        }
+        progress.update(metrics)
+        latencies = []
+
+        while True:
+            rules = await AlertService._claim_due_rules(db, cutoff, batch_size)
+            for rule, due_at in rules:
+                metrics['max_lag_seconds'] = max(metrics['max_lag_seconds'], (cutoff - due_at).total_seconds())
+                rule_started = time.perf_counter()
+                try:
+                    alerts = await AlertService._evaluate(db, rule, utcnow())
+                    await db.execute(
+                        update(AlertRule).where(AlertRule.id == rule.id).values(
+                            last_evaluated_at=datetime.utcnow()
+                        ).execution_options(synchronize_session=False)
+                    )
+                    await db.commit()
+                except Exception as e:
+                    await db.rollback()
+                    metrics['rules_failed'] += 1
+                    logger.error(f"Evaluating alert rule {rule.id} failed: {e}")
+                else:
+                    metrics['rules_evaluated'] += 1
+                    metrics['alerts_created'] += len(alerts)
+                latencies.append(time.perf_counter() - rule_started)
+
+            metrics['backlog'] = max(metrics['backlog'] - len(rules), 0)
+            if latencies:
+                metrics['mean_latency_ms'] = round(sum(latencies) / len(latencies) * 1000, 2)
+                metrics['max_latency_ms'] = round(max(latencies) * 1000, 2)
+            progress.update(metrics)
+            if len(rules) < batch_size:
+                break
+
+        # Rules that fell due while this run was going
+        metrics['backlog'] = await AlertService._count_due(db, utcnow())
+        metrics['max_lag_seconds'] = round(metrics['max_lag_seconds'], 3)
+        metrics['duration_seconds'] = round(time.perf_counter() - started, 3)
+        progress.update(metrics)
+        logger.info(f"Alert rule evaluation: {metrics}")
+        return metrics
 
-                notifications.append(AlertNotificationResponse.model_validate(notification))
+    @staticmethod
+    def _due(moment: datetime, school_id: Optional[str] = None) -> list:
+        conditions = [
+            AlertRule.is_active == True,
+            AlertRule.is_deleted == False,
+            AlertRule.next_evaluation_at <= moment.replace(tzinfo=None)
+        ]
+        if school_id:
+            conditions.append(AlertRule.school_id == school_id)
+        return conditions
 
-        await db.commit()
-        return notifications
+    @staticmethod
+    async def _count_due(db: AsyncSession, moment: datetime) -> int:
+        return (await db.execute(
+            select(func.count(AlertRule.id)).where(*AlertService._due(moment))
+        )).scalar() or 0
 
     @staticmethod
-    async def _evaluate_grade_rule(
+    async def _claim_due_rules(
         db: AsyncSession,
-        school_id: str,
-        rule: AlertRule
-    ) -> List[AlertNotificationResponse]:
-        """Evaluate grade-based alert rules"""
-        notifications = []
-
-        # Get students with grades below threshold
-        if rule.scope_type == "school":
-            students_query = select(Student).where(
-                Student.school_id == school_id,
-                Student.is_deleted == False,
-                Student.status == StudentStatus.ACTIVE
-            )
-        elif rule.scope_type == "class" and rule.scope_id:
-            students_query = select(Student).where(
-                Student.school_id == school_id,
-                Student.current_class_id == rule.scope_id,
-                Student.is_deleted == False,
-                Student.status == StudentStatus.ACTIVE
-            )
-        else:
-            return []
+        cutoff: datetime,
+        limit: int
+    ) -> List[Tuple[AlertRule, datetime]]:
+        """Claim up to limit rules due by cutoff, most overdue first; returns each with when it fell due"""
+        query = select(AlertRule).where(*AlertService._due(cutoff)).order_by(
+            AlertRule.next_evaluation_at
+        ).limit(limit)
+        if db.bind.dialect.name == 'postgresql':
+            # Rows another worker is claiming are skipped rather than waited on
+            query = query.with_for_update(skip_locked=True)
+        rules = (await db.execute(query)).scalars().all()
+
+        claimed = []
+        for rule in rules:
+            claimed.append((rule, rule.next_evaluation_at.replace(tzinfo=timezone.utc)))
+            # Moving the rule forward takes it out of everyone else's due set
+            rule.next_evaluation_at = AlertService._calculate_next_evaluation(rule.frequency)
+        await db.commit()
+        for rule in rules:
+            # Detached, a rolled back evaluation cannot expire the other claimed rules
+            db.expunge(rule)
+        return claimed
 
-        students_result = await db.execute(students_query)
-        students = students_result.scalars().all()
+    @staticmethod
+    def _metric_query(rule: AlertRule):
+        """
+        One row per student in the rule's scope whose metric meets its condition
+        and who has no unresolved alert from the rule yet: the student columns
+        followed by the metric value. None when the rule's alert type or scope
+        cannot be evaluated.
+        """
+        student_columns = (
+            Student.id, Student.first_name, Student.middle_name, Student.last_name, Student.current_class_id
+        )
+        scope = [Student.school_id == rule.school_id, Student.is_deleted == False]
+        if rule.scope_type == "class" and rule.scope_id:
+            scope.append(Student.current_class_id == rule.scope_id)
+        elif rule.scope_type == "student" and rule.scope_id:
+            scope.append(Student.id == rule.scope_id)
+        elif rule.scope_type != "school":
+            return None
+        # Students stay alerted until their alert is resolved, not once per evaluation
+        scope.append(~exists().where(
+            AlertNotification.rule_id == rule.id,
+            AlertNotification.context_type == "student",
+            AlertNotification.context_id == Student.id,
+            AlertNotification.is_resolved == False,
+            AlertNotification.is_deleted == False
+        ))
 
-        for student in students:
-            # Calculate average grade
-            grade_result = await db.execute(
-                select(func.avg(Grade.percentage)).where(
-                    Grade.student_id == student.id,
-                    Grade.school_id == school_id,
+        if rule.alert_type == AlertType.ATTENDANCE:
+            value = func.sum(
+                case((Attendance.status == AttendanceStatus.PRESENT, 100.0), else_=0.0)
+            ) / func.count(Attendance.id)
+            query = select(*student_columns, value).join(
+                Attendance, and_(
+                    Attendance.student_id == Student.id,
+                    Attendance.school_id == rule.school_id,
+                    Attendance.is_deleted == False
+                )
+            ).where(*scope, Student.status == StudentStatus.ACTIVE)
+        elif rule.alert_type == AlertType.GRADE:
+            value = func.avg(Grade.percentage)
+            query = select(*student_columns, value).join(
+                Grade, and_(
+                    Grade.student_id == Student.id,
+                    Grade.school_id == rule.school_id,
                     Grade.is_deleted == False
                 )
-            )
-            avg_grade = grade_result.scalar()
-            if avg_grade is None:
-                continue
-
-            # Check if condition is met
-            if AlertService._check_condition(float(avg_grade), rule.operator, rule.threshold):
-                notification = AlertNotification(
-                    school_id=school_id,
-                    rule_id=rule.id,
-                    title=f"Grade Alert: {student.full_name}",
-                    message=f"Student {student.full_name} has average grade of {avg_grade:.1f}% (threshold: {rule.threshold}%)",
-                    severity=rule.severity,
-                    context_type="student",
-                    context_id=student.id,
-                    context_data={"student_name": student.full_name},
-                    metric_value=float(avg_grade),
-                    threshold_value=rule.threshold
+            ).where(*scope, Student.status == StudentStatus.ACTIVE)
+        elif rule.alert_type == AlertType.FEE:
+            value = func.sum(FeeAssignment.amount_outstanding)
+            query = select(*student_columns, value).join(
+                FeeAssignment, and_(
+                    FeeAssignment.student_id == Student.id,
+                    FeeAssignment.status.in_([PaymentStatus.PENDING, PaymentStatus.PARTIAL, PaymentStatus.OVERDUE]),
+                    FeeAssignment.is_deleted == False
                 )
-                db.add(notification)
-                await db.flush()
-
-                await AlertService._send_alert_notifications(db, school_id, rule, notification)
-                notifications.append(AlertNotificationResponse.model_validate(notification))
+            ).where(*scope)
+        else:
+            return None
 
-        await db.commit()
-        return notifications
+        condition = _OPERATORS[rule.operator](value, rule.threshold)
+        if rule.alert_type == AlertType.FEE:
+            condition = and_(value > 0, condition)
+        return query.group_by(*student_columns).having(condition)
 
     @staticmethod
-    async def _evaluate_fee_rule(
+    async def _evaluate(
         db: AsyncSession,
-        school_id: str,
-        rule: AlertRule
-    ) -> List[AlertNotificationResponse]:
-        """Evaluate fee-based alert rules"""
-        notifications = []
-
-        # Get students with overdue fees
-        overdue_result = await db.execute(
-            select(
-                Student.id,
-                Student.first_name,
-                Student.last_name,
-                func.sum(FeeAssignment.amount_due - FeeAssignment.amount_paid).label('outstanding')
-            ).join(
-                FeeAssignment, FeeAssignment.student_id == Student.id
-            ).where(
-                Student.school_id == school_id,
-                Student.is_deleted == False,
-                FeeAssignment.status.in_([PaymentStatus.PENDING, PaymentStatus.PARTIAL, PaymentStatus.OVERDUE]),
-                FeeAssignment.is_deleted == False
-            ).group_by(Student.id, Student.first_name, Student.last_name)
-        )
-
-        for student_id, first_name, last_name, outstanding in overdue_result.all():
-            if outstanding is None or outstanding <= 0:
-                continue
-
-            if AlertService._check_condition(float(outstanding), rule.operator, rule.threshold):
-                notification = AlertNotification(
-                    school_id=school_id,
-                    rule_id=rule.id,
-                    title=f"Fee Alert: {first_name} {last_name}",
-                    message=f"Student {first_name} {last_name} has outstanding fees of {outstanding:.2f} (threshold: {rule.threshold})",
-                    severity=rule.severity,
-                    context_type="student",
-                    context_id=student_id,
-                    context_data={"student_name": f"{first_name} {last_name}"},
-                    metric_value=float(outstanding),
-                    threshold_value=rule.threshold
-                )
-                db.add(notification)
-                await db.flush()
-
-                await AlertService._send_alert_notifications(db, school_id, rule, notification)
-                notifications.append(AlertNotificationResponse.model_validate(notification))
+        rule: AlertRule,
+        now: datetime
+    ) -> List[dict]:
+        """
+        Evaluate a rule with one grouped query, insert its alerts in one
+        statement and notify the rule's recipients; the caller commits.
+        Returns the inserted alert rows.
+        """
+        query = AlertService._metric_query(rule)
+        if query is None:
+            return []
 
-        await db.commit()
-        return notifications
+        label, template = _ALERT_TEXT[rule.alert_type]
+        alerts = []
+        for student_id, first_name, middle_name, last_name, class_id, value in (await db.execute(query)).all():
+            name = " ".join(part for part in (first_name, middle_name, last_name) if part)
+            value = float(value)
+            alerts.append({
+                'id': str(uuid.uuid4()),
+                'school_id': rule.school_id,
+                'rule_id': rule.id,
+                'title': f"{label}: {name}",
+                'message': f"Student {name} " + template.format(value=value, threshold=rule.threshold),
+                'severity': rule.severity,
+                'context_type': "student",
+                'context_id': student_id,
+                'context_data': {"student_name": name, "class_id": class_id},
+                'metric_value': value,
+                'threshold_value': rule.threshold,
+                'is_acknowledged': False,
+                'is_resolved': False,
+                'created_at': now,
+                'updated_at': now
+            })
+
+        if alerts:
+            await db.execute(insert(AlertNotification.__table__), alerts)
+            await AlertService._send_alert_notifications(db, rule, alerts)
+        return alerts
 
     @staticmethod
     def _check_condition(value: float, operator: AlertConditionOperator, threshold: float) -> bool:
         """Check if a value meets the alert condition"""
-        if operator == AlertConditionOperator.LESS_THAN:
-            return value < threshold
-        elif operator == AlertConditionOperator.LESS_THAN_OR_EQUAL:
-            return value <= threshold
-        elif operator == AlertConditionOperator.GREATER_THAN:
-            return value > threshold
-        elif operator == AlertConditionOperator.GREATER_THAN_OR_EQUAL:
-            return value >= threshold
-        elif operator == AlertConditionOperator.EQUAL:
-            return value == threshold
-        elif operator == AlertConditionOperator.NOT_EQUAL:
-            return value != threshold
-        return False
+        compare = _OPERATORS.get(operator)
+        return bool(compare and compare(value, threshold))
 
     @staticmethod
     async def _send_alert_notifications(
         db: AsyncSession,
-        school_id: str,
         rule: AlertRule,
-        alert: AlertNotification
+        alerts: List[dict]
     ):
-        """Send notifications to configured recipients"""
+        """Notify a rule's recipients of its new alerts, in the caller's transaction"""
         from app.models.user import User, UserRole
 
-        recipients = set()
+        if "in_app" not in (rule.notification_channels or []):
+            return
+
+        recipients = set(rule.notify_users or [])
 
         # Add users by role
-        if rule.notify_roles:
-            for role_str in rule.notify_roles:
-                try:
-                    role = UserRole(role_str)
-                    users_result = await db.execute(
-                        select(User.id).where(
-                            User.school_id == school_id,
-                            User.role == role,
-                            User.is_deleted == False,
-                            User.is_active == True
-                        )
-                    )
-                    for (user_id,) in users_result.all():
-                        recipients.add(user_id)
-                except ValueError:
-                    pass
-
-        # Add specific users
-        if rule.notify_users:
-            recipients.update(rule.notify_users)
-
-        # Create in-app notifications
-        if "in_app" in rule.notification_channels:
-            for user_id in recipients:
-                await NotificationService.create_notification(
-                    db=db,
-                    school_id=school_id,
-                    notification_data=NotificationCreate(
-                        user_id=user_id,
-                        title=alert.title,
-                        message=alert.message,
-                        type=NotificationType.WARNING if alert.severity == AlertSeverity.WARNING else NotificationType.INFO,
-                        link=f"/alerts/{alert.id}"
-                    )
+        roles = []
+        for role_str in rule.notify_roles or []:
+            try:
+                roles.append(UserRole(role_str))
+            except ValueError:
+                pass
+        if roles:
+            users_result = await db.execute(
+                select(User.id).where(
+                    User.school_id == rule.school_id,
+                    User.role.in_(roles),
+                    User.is_deleted == False,
+                    User.is_active == True
+                )
+            )
+            recipients.update(users_result.scalars().all())
+
+        # A run's alerts collapse into one unread notification per recipient
+        notification_type = NotificationType.WARNING if rule.severity == AlertSeverity.WARNING else NotificationType.INFO
+        await NotificationService.create_notifications_bulk(
+            db,
+            rule.school_id,
+            [
+                NotificationCreate(
+                    user_id=user_id,
+                    title=alert['title'],
+                    message=alert['message'],
+                    type=notification_type,
+                    link=f"/alerts/{alert['id']}"
                 )
+                for alert in alerts
+                for user_id in recipients
+            ],
+            group_key=f"alert_rule:{rule.id}",
+            collapsed_message=f"{{count}} new alerts from the rule \"{rule.name}\".",
+            commit=False
+        )
+
+    @staticmethod
+    async def get_evaluation_metrics(db: AsyncSession, school_id: str) -> dict:
+        """A school's backlog of due rules and the latest scheduled evaluation run's metrics"""
+        now = utcnow()
+        backlog, oldest_due = (await db.execute(
+            select(func.count(AlertRule.id), func.min(AlertRule.next_evaluation_at)).where(
+                *AlertService._due(now, school_id)
+            )
+        )).one()
+        runs = await JobService.list_jobs(
+            db, PLATFORM_SCOPE, job_type=ALERT_EVALUATION_JOB_TYPE, status=JobStatus.COMPLETED, limit=1
+        )
+        return {
+            'backlog': backlog,
+            'oldest_due_seconds': (
+                round((now - oldest_due.replace(tzinfo=timezone.utc)).total_seconds(), 3) if oldest_due else 0.0
+            ),
+            'last_run_at': runs[0].finished_at if runs else None,
+            'last_run': runs[0].result if runs else None
+        }
 
     # ============== Alert Notifications ==============
 
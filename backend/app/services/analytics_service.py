@@ -7,12 +7,14 @@ Implements P2.1 - Enrollment & Cohort Trends Explorer
 Implements P2.4 - Teacher Performance & Workload Insights
 """
 
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, desc, or_, case, text
 from datetime import datetime, timedelta, date
 import logging
 
+import numpy as np
+
 from app.models.user import User, UserRole
 from app.models.student import Student, StudentStatus
 from app.models.academic import (
@@ -47,6 +49,167 @@ logger = logging.getLogger(__name__)
 class AnalyticsService:
     """Service class for advanced analytics operations"""
 
+    # ============== Grouped class aggregates ==============
+    # Each helper below answers one question for every class of a school in a
+    # single GROUP BY query, keyed by class id. The per-class dashboards are
+    # assembled from these maps instead of issuing queries inside a class loop.
+
+    @staticmethod
+    async def _get_school_classes(db: AsyncSession, school_id: str) -> List[Class]:
+        """Get all active classes of a school ordered by name"""
+        classes_result = await db.execute(
+            select(Class).where(
+                Class.school_id == school_id,
+                Class.is_deleted == False
+            ).order_by(Class.name)
+        )
+        return classes_result.scalars().all()
+
+    @staticmethod
+    async def _get_enrollment_counts_by_class(
+        db: AsyncSession,
+        school_id: str
+    ) -> Dict[str, Dict[str, int]]:
+        """Count enrolled students per class (all statuses and active only)"""
+        result = await db.execute(
+            select(
+                Student.current_class_id,
+                func.count(Student.id),
+                func.count(case((Student.status == StudentStatus.ACTIVE, Student.id)))
+            ).where(
+                Student.school_id == school_id,
+                Student.is_deleted == False,
+                Student.current_class_id.isnot(None)
+            ).group_by(Student.current_class_id)
+        )
+        return {
+            class_id: {"total": total or 0, "active": active or 0}
+            for class_id, total, active in result.all()
+        }
+
+    @staticmethod
+    async def _get_attendance_counts_by_class(
+        db: AsyncSession,
+        school_id: str,
+        term_id: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> Dict[str, Dict[AttendanceStatus, int]]:
+        """Count attendance records per class and status"""
+        conditions = [Attendance.school_id == school_id]
+        if term_id:
+            conditions.append(Attendance.term_id == term_id)
+        if start_date:
+            conditions.append(Attendance.date >= start_date)
+        if end_date:
+            conditions.append(Attendance.date <= end_date)
+
+        result = await db.execute(
+            select(
+                Attendance.class_id,
+                Attendance.status,
+                func.count(Attendance.id)
+            ).where(and_(*conditions)).group_by(Attendance.class_id, Attendance.status)
+        )
+        counts: Dict[str, Dict[AttendanceStatus, int]] = {}
+        for class_id, status, count in result.all():
+            counts.setdefault(class_id, {})[status] = count
+        return counts
+
+    @staticmethod
+    async def _get_grade_stats_by_class(
+        db: AsyncSession,
+        school_id: str,
+        term_id: Optional[str] = None,
+        threshold: float = 50.0
+    ) -> Dict[str, Dict[str, Any]]:
+        """Aggregate grade statistics per class.
+
+        Grades do not carry a class id themselves; they are attributed to the
+        class of the exam they were recorded against.
+        """
+        conditions = [
+            Grade.school_id == school_id,
+            Grade.is_deleted == False
+        ]
+        if term_id:
+            conditions.append(Grade.term_id == term_id)
+
+        result = await db.execute(
+            select(
+                Exam.class_id,
+                func.avg(Grade.percentage),
+                func.max(Grade.percentage),
+                func.min(Grade.percentage),
+                func.count(func.distinct(Grade.student_id)),
+                func.count(func.distinct(
+                    case((Grade.percentage >= threshold, Grade.student_id))
+                )),
+                func.count(func.distinct(
+                    case((Grade.percentage < threshold, Grade.student_id))
+                ))
+            ).join(Exam, Exam.id == Grade.exam_id)
+            .where(and_(*conditions))
+            .group_by(Exam.class_id)
+        )
+        return {
+            class_id: {
+                "average": avg_score,
+                "highest": max_score,
+                "lowest": min_score,
+                "graded_students": graded or 0,
+                "passing_students": passing or 0,
+                "below_threshold_students": below or 0
+            }
+            for class_id, avg_score, max_score, min_score, graded, passing, below in result.all()
+        }
+
+    @staticmethod
+    async def _get_fee_totals_by_class(
+        db: AsyncSession,
+        school_id: str,
+        term_id: Optional[str] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """Sum fee assignments per class of the assigned students"""
+        conditions = [
+            FeeAssignment.school_id == school_id,
+            FeeAssignment.is_deleted == False,
+            Student.school_id == school_id,
+            Student.is_deleted == False,
+            Student.current_class_id.isnot(None)
+        ]
+        if term_id:
+            conditions.append(FeeAssignment.term_id == term_id)
+
+        overdue = case(
+            (
+                and_(
+                    FeeAssignment.due_date < datetime.utcnow().date(),
+                    FeeAssignment.status != PaymentStatus.PAID
+                ),
+                FeeAssignment.amount_outstanding
+            ),
+            else_=0
+        )
+        result = await db.execute(
+            select(
+                Student.current_class_id,
+                func.sum(FeeAssignment.amount),
+                func.sum(FeeAssignment.amount_paid),
+                func.sum(overdue)
+            ).join(Student, Student.id == FeeAssignment.student_id)
+            .where(and_(*conditions))
+            .group_by(Student.current_class_id)
+        )
+        return {
+            class_id: {
+                "total": float(total or 0),
+                "collected": float(collected or 0),
+                "overdue": float(overdue_total or 0)
+            }
+            for class_id, total, collected, overdue_total in result.all()
+        }
+
     # ============== P1.1 - Executive Dashboard 2.0 ==============
 
     @staticmethod
@@ -56,108 +219,33 @@ class AnalyticsService:
         term_id: Optional[str] = None
     ) -> List[ClassStats]:
         """Get statistics per class for drill-down"""
-        
-        # Get all classes
-        classes_result = await db.execute(
-            select(Class).where(
-                Class.school_id == school_id,
-                Class.is_deleted == False
-            ).order_by(Class.name)
-        )
-        classes = classes_result.scalars().all()
-        
+
+        classes = await AnalyticsService._get_school_classes(db, school_id)
+        if not classes:
+            return []
+
+        enrollment = await AnalyticsService._get_enrollment_counts_by_class(db, school_id)
+        attendance = await AnalyticsService._get_attendance_counts_by_class(db, school_id, term_id)
+        grades = await AnalyticsService._get_grade_stats_by_class(db, school_id, term_id)
+        fees = await AnalyticsService._get_fee_totals_by_class(db, school_id, term_id)
+
         class_stats = []
         for cls in classes:
-            # Count students in class
-            student_count = await db.execute(
-                select(func.count(Student.id)).where(
-                    Student.current_class_id == cls.id,
-                    Student.school_id == school_id,
-                    Student.is_deleted == False,
-                    Student.status == StudentStatus.ACTIVE
-                )
-            )
-            total_students = student_count.scalar() or 0
-            
-            # Calculate attendance rate
-            attendance_conditions = [
-                Attendance.class_id == cls.id,
-                Attendance.school_id == school_id
-            ]
-            if term_id:
-                attendance_conditions.append(Attendance.term_id == term_id)
-            
-            total_att = await db.execute(
-                select(func.count(Attendance.id)).where(and_(*attendance_conditions))
-            )
-            total_attendance = total_att.scalar() or 0
-            
-            present_att = await db.execute(
-                select(func.count(Attendance.id)).where(
-                    and_(*attendance_conditions, Attendance.status == AttendanceStatus.PRESENT)
-                )
-            )
-            present_count = present_att.scalar() or 0
-            
+            total_students = enrollment.get(cls.id, {}).get("active", 0)
+
+            status_counts = attendance.get(cls.id, {})
+            total_attendance = sum(status_counts.values())
+            present_count = status_counts.get(AttendanceStatus.PRESENT, 0)
             attendance_rate = (present_count / total_attendance * 100) if total_attendance > 0 else 0.0
-            
-            # Calculate average grade
-            grade_conditions = [
-                Grade.class_id == cls.id,
-                Grade.school_id == school_id,
-                Grade.is_deleted == False
-            ]
-            if term_id:
-                grade_conditions.append(Grade.term_id == term_id)
-            
-            avg_grade = await db.execute(
-                select(func.avg(Grade.percentage)).where(and_(*grade_conditions))
-            )
-            average_grade = avg_grade.scalar()
-            
-            # Calculate fees
-            fee_conditions = [
-                FeeAssignment.school_id == school_id,
-                FeeAssignment.is_deleted == False
-            ]
-            if term_id:
-                fee_conditions.append(FeeAssignment.term_id == term_id)
-            
-            # Get student IDs in this class
-            student_ids_result = await db.execute(
-                select(Student.id).where(
-                    Student.current_class_id == cls.id,
-                    Student.school_id == school_id,
-                    Student.is_deleted == False
-                )
-            )
-            student_ids = [s for s in student_ids_result.scalars().all()]
-            
-            total_fees = 0.0
-            fees_collected = 0.0
-            pending_fees = 0.0
-            
-            if student_ids:
-                # Total fees assigned
-                total_result = await db.execute(
-                    select(func.sum(FeeAssignment.amount)).where(
-                        and_(*fee_conditions, FeeAssignment.student_id.in_(student_ids))
-                    )
-                )
-                total_fees = float(total_result.scalar() or 0)
-                
-                # Fees collected
-                collected_result = await db.execute(
-                    select(func.sum(FeeAssignment.amount_paid)).where(
-                        and_(*fee_conditions, FeeAssignment.student_id.in_(student_ids))
-                    )
-                )
-                fees_collected = float(collected_result.scalar() or 0)
-                
-                pending_fees = total_fees - fees_collected
-            
+
+            average_grade = grades.get(cls.id, {}).get("average")
+
+            fee_totals = fees.get(cls.id, {})
+            total_fees = fee_totals.get("total", 0.0)
+            fees_collected = fee_totals.get("collected", 0.0)
+            pending_fees = total_fees - fees_collected
             collection_rate = (fees_collected / total_fees * 100) if total_fees > 0 else 0.0
-            
+
             class_stats.append(ClassStats(
                 class_id=cls.id,
                 class_name=cls.name,
@@ -183,34 +271,18 @@ class AnalyticsService:
     ) -> List[AttendanceByClass]:
         """Get attendance breakdown per class"""
 
-        classes_result = await db.execute(
-            select(Class).where(
-                Class.school_id == school_id,
-                Class.is_deleted == False
-            ).order_by(Class.name)
+        classes = await AnalyticsService._get_school_classes(db, school_id)
+        if not classes:
+            return []
+
+        attendance = await AnalyticsService._get_attendance_counts_by_class(
+            db, school_id, term_id, start_date, end_date
         )
-        classes = classes_result.scalars().all()
+        enrollment = await AnalyticsService._get_enrollment_counts_by_class(db, school_id)
 
         attendance_by_class = []
         for cls in classes:
-            conditions = [
-                Attendance.class_id == cls.id,
-                Attendance.school_id == school_id
-            ]
-            if term_id:
-                conditions.append(Attendance.term_id == term_id)
-            if start_date:
-                conditions.append(Attendance.date >= start_date)
-            if end_date:
-                conditions.append(Attendance.date <= end_date)
-
-            # Count by status
-            status_counts = await db.execute(
-                select(Attendance.status, func.count(Attendance.id)).where(
-                    and_(*conditions)
-                ).group_by(Attendance.status)
-            )
-            counts = {status: count for status, count in status_counts.all()}
+            counts = attendance.get(cls.id, {})
 
             present = counts.get(AttendanceStatus.PRESENT, 0)
             absent = counts.get(AttendanceStatus.ABSENT, 0)
@@ -218,16 +290,7 @@ class AnalyticsService:
             excused = counts.get(AttendanceStatus.EXCUSED, 0)
             total = present + absent + late + excused
 
-            # Get student count
-            student_count = await db.execute(
-                select(func.count(Student.id)).where(
-                    Student.current_class_id == cls.id,
-                    Student.school_id == school_id,
-                    Student.is_deleted == False,
-                    Student.status == StudentStatus.ACTIVE
-                )
-            )
-            total_students = student_count.scalar() or 0
+            total_students = enrollment.get(cls.id, {}).get("active", 0)
 
             attendance_rate = ((present + late) / total * 100) if total > 0 else 0.0
 
@@ -253,50 +316,23 @@ class AnalyticsService:
     ) -> List[PerformanceByClass]:
         """Get academic performance breakdown per class"""
 
-        classes_result = await db.execute(
-            select(Class).where(
-                Class.school_id == school_id,
-                Class.is_deleted == False
-            ).order_by(Class.name)
+        classes = await AnalyticsService._get_school_classes(db, school_id)
+        if not classes:
+            return []
+
+        grades = await AnalyticsService._get_grade_stats_by_class(
+            db, school_id, term_id, threshold
         )
-        classes = classes_result.scalars().all()
 
         performance_by_class = []
         for cls in classes:
-            conditions = [
-                Grade.class_id == cls.id,
-                Grade.school_id == school_id,
-                Grade.is_deleted == False
-            ]
-            if term_id:
-                conditions.append(Grade.term_id == term_id)
-
-            # Get grade statistics
-            stats = await db.execute(
-                select(
-                    func.avg(Grade.percentage),
-                    func.max(Grade.percentage),
-                    func.min(Grade.percentage),
-                    func.count(func.distinct(Grade.student_id))
-                ).where(and_(*conditions))
-            )
-            avg_score, max_score, min_score, graded_students = stats.one()
-
-            # Count students passing (>= threshold)
-            passing = await db.execute(
-                select(func.count(func.distinct(Grade.student_id))).where(
-                    and_(*conditions, Grade.percentage >= threshold)
-                )
-            )
-            passing_count = passing.scalar() or 0
-
-            # Count students below threshold
-            below = await db.execute(
-                select(func.count(func.distinct(Grade.student_id))).where(
-                    and_(*conditions, Grade.percentage < threshold)
-                )
-            )
-            below_count = below.scalar() or 0
+            stats = grades.get(cls.id, {})
+            avg_score = stats.get("average")
+            max_score = stats.get("highest")
+            min_score = stats.get("lowest")
+            graded_students = stats.get("graded_students", 0)
+            passing_count = stats.get("passing_students", 0)
+            below_count = stats.get("below_threshold_students", 0)
 
             pass_rate = (passing_count / graded_students * 100) if graded_students else 0.0
 
@@ -321,27 +357,18 @@ class AnalyticsService:
     ) -> List[FeesByClass]:
         """Get fee collection status per class"""
 
-        classes_result = await db.execute(
-            select(Class).where(
-                Class.school_id == school_id,
-                Class.is_deleted == False
-            ).order_by(Class.name)
-        )
-        classes = classes_result.scalars().all()
+        classes = await AnalyticsService._get_school_classes(db, school_id)
+        if not classes:
+            return []
+
+        enrollment = await AnalyticsService._get_enrollment_counts_by_class(db, school_id)
+        fees = await AnalyticsService._get_fee_totals_by_class(db, school_id, term_id)
 
         fees_by_class = []
         for cls in classes:
-            # Get student IDs in this class
-            student_ids_result = await db.execute(
-                select(Student.id).where(
-                    Student.current_class_id == cls.id,
-                    Student.school_id == school_id,
-                    Student.is_deleted == False
-                )
-            )
-            student_ids = [s for s in student_ids_result.scalars().all()]
+            student_count = enrollment.get(cls.id, {}).get("total", 0)
 
-            if not student_ids:
+            if not student_count:
                 fees_by_class.append(FeesByClass(
                     class_id=cls.id,
                     class_name=cls.name,
@@ -354,37 +381,10 @@ class AnalyticsService:
                 ))
                 continue
 
-            fee_conditions = [
-                FeeAssignment.school_id == school_id,
-                FeeAssignment.is_deleted == False,
-                FeeAssignment.student_id.in_(student_ids)
-            ]
-            if term_id:
-                fee_conditions.append(FeeAssignment.term_id == term_id)
-
-            # Total fees
-            total_result = await db.execute(
-                select(func.sum(FeeAssignment.amount)).where(and_(*fee_conditions))
-            )
-            total_fees = float(total_result.scalar() or 0)
-
-            # Collected
-            collected_result = await db.execute(
-                select(func.sum(FeeAssignment.amount_paid)).where(and_(*fee_conditions))
-            )
-            fees_collected = float(collected_result.scalar() or 0)
-
-            # Overdue (past due date and not fully paid)
-            overdue_result = await db.execute(
-                select(func.sum(FeeAssignment.amount_outstanding)).where(
-                    and_(
-                        *fee_conditions,
-                        FeeAssignment.due_date < datetime.utcnow().date(),
-                        FeeAssignment.status != PaymentStatus.PAID
-                    )
-                )
-            )
-            overdue_fees = float(overdue_result.scalar() or 0)
+            fee_totals = fees.get(cls.id, {})
+            total_fees = fee_totals.get("total", 0.0)
+            fees_collected = fee_totals.get("collected", 0.0)
+            overdue_fees = fee_totals.get("overdue", 0.0)
 
             pending_fees = total_fees - fees_collected
             collection_rate = (fees_collected / total_fees * 100) if total_fees > 0 else 0.0
@@ -392,7 +392,7 @@ class AnalyticsService:
             fees_by_class.append(FeesByClass(
                 class_id=cls.id,
                 class_name=cls.name,
-                total_students=len(student_ids),
+                total_students=student_count,
                 total_fees=total_fees,
                 fees_collected=fees_collected,
                 pending_fees=pending_fees,
@@ -676,37 +676,22 @@ class AnalyticsService:
         if term_id:
             att_conditions.append(Attendance.term_id == term_id)
 
-        total_att = await db.execute(
-            select(func.count(Attendance.id)).where(and_(*att_conditions))
-        )
-        total_attendance = total_att.scalar() or 0
-
-        present_att = await db.execute(
-            select(func.count(Attendance.id)).where(
-                and_(*att_conditions,
-                     or_(Attendance.status == AttendanceStatus.PRESENT,
-                         Attendance.status == AttendanceStatus.LATE))
-            )
+        att_result = await db.execute(
+            select(
+                func.count(Attendance.id),
+                func.count(case((
+                    Attendance.status.in_([AttendanceStatus.PRESENT, AttendanceStatus.LATE]),
+                    Attendance.id
+                )))
+            ).where(and_(*att_conditions))
         )
-        present_count = present_att.scalar() or 0
+        total_attendance, present_count = att_result.one()
+        total_attendance = total_attendance or 0
+        present_count = present_count or 0
         attendance_rate = (present_count / total_attendance * 100) if total_attendance > 0 else 0.0
 
-        # Calculate average grade
-        grade_conditions = [
-            Grade.class_id == class_id,
-            Grade.school_id == school_id,
-            Grade.is_deleted == False
-        ]
-        if term_id:
-            grade_conditions.append(Grade.term_id == term_id)
-
-        avg_grade_result = await db.execute(
-            select(func.avg(Grade.percentage)).where(and_(*grade_conditions))
-        )
-        average_grade = avg_grade_result.scalar()
-
-        # Grade distribution
-        grade_distribution = await AnalyticsService._get_grade_distribution(
+        # Grade distribution (also yields the class average)
+        grade_distribution, average_grade = await AnalyticsService._get_grade_distribution(
             db, school_id, class_id, term_id
         )
 
@@ -717,7 +702,7 @@ class AnalyticsService:
 
         # At-risk students
         at_risk_students = await AnalyticsService._get_at_risk_students(
-            db, school_id, class_id, term_id
+            db, school_id, class_id, term_id, students=students
         )
         high_risk_count = len([s for s in at_risk_students if s.risk_level == "high"])
 
@@ -750,11 +735,11 @@ class AnalyticsService:
         school_id: str,
         class_id: str,
         term_id: Optional[str] = None
-    ) -> List[GradeDistribution]:
-        """Get grade distribution for a class"""
+    ) -> Tuple[List[GradeDistribution], Optional[float]]:
+        """Get grade distribution and average percentage for a class"""
 
         conditions = [
-            Grade.class_id == class_id,
+            Exam.class_id == class_id,
             Grade.school_id == school_id,
             Grade.is_deleted == False
         ]
@@ -771,23 +756,25 @@ class AnalyticsService:
             ("F", 0, 29)
         ]
 
-        total_grades = await db.execute(
-            select(func.count(Grade.id)).where(and_(*conditions))
+        result = await db.execute(
+            select(
+                func.count(Grade.id),
+                func.avg(Grade.percentage),
+                *[
+                    func.count(case((
+                        and_(Grade.percentage >= min_score, Grade.percentage <= max_score),
+                        Grade.id
+                    )))
+                    for _, min_score, max_score in grade_ranges
+                ]
+            ).join(Exam, Exam.id == Grade.exam_id).where(and_(*conditions))
         )
-        total = total_grades.scalar() or 0
+        total, average_grade, *range_counts = result.one()
+        total = total or 0
 
         distribution = []
-        for grade_letter, min_score, max_score in grade_ranges:
-            count_result = await db.execute(
-                select(func.count(Grade.id)).where(
-                    and_(
-                        *conditions,
-                        Grade.percentage >= min_score,
-                        Grade.percentage <= max_score
-                    )
-                )
-            )
-            count = count_result.scalar() or 0
+        for (grade_letter, _, _), count in zip(grade_ranges, range_counts):
+            count = count or 0
             percentage = (count / total * 100) if total > 0 else 0.0
 
             distribution.append(GradeDistribution(
@@ -796,7 +783,7 @@ class AnalyticsService:
                 percentage=round(percentage, 1)
             ))
 
-        return distribution
+        return distribution, average_grade
 
     @staticmethod
     async def _get_subject_performance_for_class(
@@ -808,7 +795,7 @@ class AnalyticsService:
         """Get subject-wise performance for a class"""
 
         conditions = [
-            Grade.class_id == class_id,
+            Exam.class_id == class_id,
             Grade.school_id == school_id,
             Grade.is_deleted == False
         ]
@@ -825,6 +812,8 @@ class AnalyticsService:
                 func.count(Grade.id)
             ).join(
                 Subject, Grade.subject_id == Subject.id
+            ).join(
+                Exam, Exam.id == Grade.exam_id
             ).where(
                 and_(*conditions)
             ).group_by(Subject.id, Subject.name)
@@ -843,94 +832,144 @@ class AnalyticsService:
 
         return subject_performance
 
+    @staticmethod
+    def _score_risk(
+        attendance_rates: np.ndarray,
+        average_grades: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Score risk for many students at once.
+
+        ``average_grades`` uses NaN for students without grades. Returns the
+        poor-attendance, low-grade and below-average flags plus the risk level
+        for every student.
+        """
+        graded = ~np.isnan(average_grades) & (average_grades != 0)
+        grades = np.where(graded, average_grades, np.inf)
+
+        poor_attendance = attendance_rates < 75
+        low_grades = grades < 40
+        below_average = ~low_grades & (grades < 50)
+        factor_count = poor_attendance.astype(int) + low_grades + below_average
+
+        risk_levels = np.select(
+            [(factor_count >= 2) | low_grades, factor_count == 1],
+            ["high", "medium"],
+            default="low"
+        )
+        return poor_attendance, low_grades, below_average, risk_levels
+
     @staticmethod
     async def _get_at_risk_students(
         db: AsyncSession,
         school_id: str,
         class_id: str,
-        term_id: Optional[str] = None
+        term_id: Optional[str] = None,
+        students: Optional[List[Student]] = None
     ) -> List[StudentAtRisk]:
-        """Identify at-risk students in a class"""
+        """Identify at-risk students in a class.
+
+        Attendance counts and grade averages for the whole class are fetched in
+        one grouped query each and risk is scored over arrays, so the number of
+        queries does not depend on class size.
+        """
+
+        class_student_ids = select(Student.id).where(
+            Student.current_class_id == class_id,
+            Student.school_id == school_id,
+            Student.is_deleted == False,
+            Student.status == StudentStatus.ACTIVE
+        )
 
         # Get students in class
-        students_result = await db.execute(
-            select(Student).where(
-                Student.current_class_id == class_id,
-                Student.school_id == school_id,
-                Student.is_deleted == False,
-                Student.status == StudentStatus.ACTIVE
+        if students is None:
+            students_result = await db.execute(
+                select(Student).where(Student.id.in_(class_student_ids))
             )
-        )
-        students = students_result.scalars().all()
-
-        at_risk = []
-        for student in students:
-            risk_factors = []
+            students = students_result.scalars().all()
+        if not students:
+            return []
 
-            # Check attendance
-            att_conditions = [
-                Attendance.student_id == student.id,
-                Attendance.school_id == school_id
-            ]
-            if term_id:
-                att_conditions.append(Attendance.term_id == term_id)
+        # Attendance totals per student
+        att_conditions = [
+            Attendance.student_id.in_(class_student_ids),
+            Attendance.school_id == school_id
+        ]
+        if term_id:
+            att_conditions.append(Attendance.term_id == term_id)
 
-            total_att = await db.execute(
-                select(func.count(Attendance.id)).where(and_(*att_conditions))
-            )
-            total_attendance = total_att.scalar() or 0
+        att_result = await db.execute(
+            select(
+                Attendance.student_id,
+                func.count(Attendance.id),
+                func.count(case((
+                    Attendance.status.in_([AttendanceStatus.PRESENT, AttendanceStatus.LATE]),
+                    Attendance.id
+                )))
+            ).where(and_(*att_conditions)).group_by(Attendance.student_id)
+        )
+        attendance_counts = {row[0]: (row[1], row[2]) for row in att_result.all()}
 
-            present_att = await db.execute(
-                select(func.count(Attendance.id)).where(
-                    and_(*att_conditions,
-                         or_(Attendance.status == AttendanceStatus.PRESENT,
-                             Attendance.status == AttendanceStatus.LATE))
-                )
-            )
-            present_count = present_att.scalar() or 0
-            attendance_rate = (present_count / total_attendance * 100) if total_attendance > 0 else 100.0
+        # Grade averages per student
+        grade_conditions = [
+            Grade.student_id.in_(class_student_ids),
+            Grade.school_id == school_id,
+            Grade.is_deleted == False
+        ]
+        if term_id:
+            grade_conditions.append(Grade.term_id == term_id)
 
-            if attendance_rate < 75:
-                risk_factors.append("poor_attendance")
+        grade_result = await db.execute(
+            select(Grade.student_id, func.avg(Grade.percentage))
+            .where(and_(*grade_conditions))
+            .group_by(Grade.student_id)
+        )
+        grade_averages = {student_id: avg for student_id, avg in grade_result.all()}
 
-            # Check grades
-            grade_conditions = [
-                Grade.student_id == student.id,
-                Grade.school_id == school_id,
-                Grade.is_deleted == False
-            ]
-            if term_id:
-                grade_conditions.append(Grade.term_id == term_id)
+        totals = np.array(
+            [attendance_counts.get(s.id, (0, 0))[0] for s in students], dtype=float
+        )
+        present = np.array(
+            [attendance_counts.get(s.id, (0, 0))[1] for s in students], dtype=float
+        )
+        attendance_rates = np.divide(
+            present * 100, totals, out=np.full(len(students), 100.0), where=totals > 0
+        )
+        average_grades = np.array(
+            [
+                float(grade_averages[s.id]) if grade_averages.get(s.id) is not None else np.nan
+                for s in students
+            ],
+            dtype=float
+        )
 
-            avg_grade_result = await db.execute(
-                select(func.avg(Grade.percentage)).where(and_(*grade_conditions))
-            )
-            average_grade = avg_grade_result.scalar()
+        poor_attendance, low_grades, below_average, risk_levels = AnalyticsService._score_risk(
+            attendance_rates, average_grades
+        )
 
-            if average_grade and average_grade < 40:
+        at_risk = []
+        for idx in np.flatnonzero(poor_attendance | low_grades | below_average):
+            student = students[idx]
+            risk_factors = []
+            if poor_attendance[idx]:
+                risk_factors.append("poor_attendance")
+            if low_grades[idx]:
                 risk_factors.append("low_grades")
-            elif average_grade and average_grade < 50:
+            elif below_average[idx]:
                 risk_factors.append("below_average_grades")
 
-            # Determine risk level
-            if len(risk_factors) >= 2 or "low_grades" in risk_factors:
-                risk_level = "high"
-            elif len(risk_factors) == 1:
-                risk_level = "medium"
-            else:
-                risk_level = "low"
-
-            # Only include students with risk factors
-            if risk_factors:
-                at_risk.append(StudentAtRisk(
-                    student_id=student.id,
-                    student_name=f"{student.first_name} {student.last_name}",
-                    admission_number=student.admission_number or "",
-                    attendance_rate=round(attendance_rate, 1),
-                    average_grade=round(average_grade, 1) if average_grade else None,
-                    risk_level=risk_level,
-                    risk_factors=risk_factors
-                ))
+            average_grade = average_grades[idx]
+            at_risk.append(StudentAtRisk(
+                student_id=student.id,
+                student_name=f"{student.first_name} {student.last_name}",
+                admission_number=student.admission_number or "",
+                attendance_rate=round(float(attendance_rates[idx]), 1),
+                average_grade=(
+                    round(float(average_grade), 1)
+                    if not np.isnan(average_grade) and average_grade else None
+                ),
+                risk_level=str(risk_levels[idx]),
+                risk_factors=risk_factors
+            ))
 
         # Sort by risk level (high first)
         risk_order = {"high": 0, "medium": 1, "low": 2}
@@ -1418,29 +1457,23 @@ class AnalyticsService:
             )
             previous_term = prev_term_result.scalar_one_or_none()
 
-        # Current average
-        current_avg_result = await db.execute(
-            select(func.avg(Grade.percentage)).where(
-                Grade.student_id == student_id,
-                Grade.school_id == school_id,
-                Grade.is_deleted == False,
-                Grade.term_id == current_term_id if current_term_id else True
-            )
+        # Load every grade and attendance row of the student once
+        grades, attendance = await AnalyticsService._load_student_records(
+            db, school_id, student_id
         )
-        current_average = current_avg_result.scalar()
+
+        # Current average
+        current_average = AnalyticsService._mean([
+            g.percentage for g in grades
+            if not current_term_id or g.term_id == current_term_id
+        ])
 
         # Previous average
         previous_average = None
         if previous_term:
-            prev_avg_result = await db.execute(
-                select(func.avg(Grade.percentage)).where(
-                    Grade.student_id == student_id,
-                    Grade.school_id == school_id,
-                    Grade.is_deleted == False,
-                    Grade.term_id == previous_term.id
-                )
-            )
-            previous_average = prev_avg_result.scalar()
+            previous_average = AnalyticsService._mean([
+                g.percentage for g in grades if g.term_id == previous_term.id
+            ])
 
         # Calculate improvement
         improvement = None
@@ -1455,30 +1488,13 @@ class AnalyticsService:
         # Current term attendance
         attendance_rate = None
         if current_term_id:
-            total_att = await db.execute(
-                select(func.count(Attendance.id)).where(
-                    Attendance.student_id == student_id,
-                    Attendance.school_id == school_id,
-                    Attendance.term_id == current_term_id
-                )
-            )
-            total = total_att.scalar() or 0
-
-            present_att = await db.execute(
-                select(func.count(Attendance.id)).where(
-                    Attendance.student_id == student_id,
-                    Attendance.school_id == school_id,
-                    Attendance.term_id == current_term_id,
-                    or_(Attendance.status == AttendanceStatus.PRESENT,
-                        Attendance.status == AttendanceStatus.LATE)
-                )
+            attendance_rate = AnalyticsService._attendance_rate(
+                [a.status for a in attendance if a.term_id == current_term_id]
             )
-            present = present_att.scalar() or 0
-            attendance_rate = (present / total * 100) if total > 0 else None
 
         # Subject performance
-        subjects = await AnalyticsService._get_student_subject_performance(
-            db, school_id, student_id, current_term_id, previous_term.id if previous_term else None
+        subjects = AnalyticsService._get_student_subject_performance(
+            grades, current_term_id, previous_term.id if previous_term else None
         )
 
         # Find strongest and weakest subjects
@@ -1496,7 +1512,7 @@ class AnalyticsService:
 
         # Term history
         term_history = await AnalyticsService._get_student_term_history(
-            db, school_id, student_id
+            db, grades, attendance
         )
 
         # Generate insights
@@ -1530,53 +1546,86 @@ class AnalyticsService:
         )
 
     @staticmethod
-    async def _get_student_subject_performance(
+    async def _load_student_records(
         db: AsyncSession,
         school_id: str,
-        student_id: str,
-        current_term_id: Optional[str],
-        previous_term_id: Optional[str]
-    ) -> List[SubjectPerformance]:
-        """Get subject-wise performance for a student"""
+        student_id: str
+    ) -> Tuple[List[Any], List[Any]]:
+        """Fetch all non-deleted grades and all attendance rows of a student.
 
-        # Get all subjects the student has grades for
-        subjects_result = await db.execute(
-            select(Subject.id, Subject.name).join(
-                Grade, Grade.subject_id == Subject.id
+        Grade rows carry subject_id, subject_name, term_id, percentage and
+        created_at; attendance rows carry term_id and status.
+        """
+        grades_result = await db.execute(
+            select(
+                Grade.subject_id,
+                Subject.name.label("subject_name"),
+                Grade.term_id,
+                Grade.percentage,
+                Grade.created_at
+            ).outerjoin(
+                Subject, Grade.subject_id == Subject.id
             ).where(
                 Grade.student_id == student_id,
                 Grade.school_id == school_id,
                 Grade.is_deleted == False
-            ).distinct()
+            )
+        )
+        attendance_result = await db.execute(
+            select(Attendance.term_id, Attendance.status).where(
+                Attendance.student_id == student_id,
+                Attendance.school_id == school_id
+            )
         )
+        return grades_result.all(), attendance_result.all()
+
+    @staticmethod
+    def _mean(values: List[Any]) -> Optional[Any]:
+        """Average of the values, or None when there are none"""
+        return sum(values) / len(values) if values else None
+
+    @staticmethod
+    def _attendance_rate(statuses: List[AttendanceStatus]) -> Optional[float]:
+        """Share of present or late marks, or None without any marks"""
+        if not statuses:
+            return None
+        present = sum(
+            1 for status in statuses
+            if status in (AttendanceStatus.PRESENT, AttendanceStatus.LATE)
+        )
+        return present / len(statuses) * 100
+
+    @staticmethod
+    def _get_student_subject_performance(
+        grades: List[Any],
+        current_term_id: Optional[str],
+        previous_term_id: Optional[str]
+    ) -> List[SubjectPerformance]:
+        """Get subject-wise performance for a student from loaded grade rows"""
+
+        grades_by_subject: Dict[str, List[Any]] = {}
+        subject_names: Dict[str, str] = {}
+        for grade in grades:
+            if grade.subject_name is None:
+                continue
+            grades_by_subject.setdefault(grade.subject_id, []).append(grade)
+            subject_names[grade.subject_id] = grade.subject_name
 
         subject_performance = []
-        for subj_id, subj_name in subjects_result.all():
+        for subj_id, subj_grades in grades_by_subject.items():
             # Current term average
             current_avg = None
             if current_term_id:
-                curr_result = await db.execute(
-                    select(func.avg(Grade.percentage)).where(
-                        Grade.student_id == student_id,
-                        Grade.subject_id == subj_id,
-                        Grade.term_id == current_term_id,
-                        Grade.is_deleted == False
-                    )
-                )
-                current_avg = curr_result.scalar()
+                current_avg = AnalyticsService._mean([
+                    g.percentage for g in subj_grades if g.term_id == current_term_id
+                ])
 
             # Previous term average
             previous_avg = None
             if previous_term_id:
-                prev_result = await db.execute(
-                    select(func.avg(Grade.percentage)).where(
-                        Grade.student_id == student_id,
-                        Grade.subject_id == subj_id,
-                        Grade.term_id == previous_term_id,
-                        Grade.is_deleted == False
-                    )
-                )
-                previous_avg = prev_result.scalar()
+                previous_avg = AnalyticsService._mean([
+                    g.percentage for g in subj_grades if g.term_id == previous_term_id
+                ])
 
             # Determine trend
             trend = "stable"
@@ -1587,33 +1636,16 @@ class AnalyticsService:
                 elif diff < -5:
                     trend = "declining"
 
-            # Grade count
-            count_result = await db.execute(
-                select(func.count(Grade.id)).where(
-                    Grade.student_id == student_id,
-                    Grade.subject_id == subj_id,
-                    Grade.is_deleted == False
-                )
-            )
-            grade_count = count_result.scalar() or 0
-
             # Last exam score
-            last_grade = await db.execute(
-                select(Grade.percentage).where(
-                    Grade.student_id == student_id,
-                    Grade.subject_id == subj_id,
-                    Grade.is_deleted == False
-                ).order_by(desc(Grade.created_at)).limit(1)
-            )
-            last_score = last_grade.scalar()
+            last_score = max(subj_grades, key=lambda g: g.created_at).percentage
 
             subject_performance.append(SubjectPerformance(
                 subject_id=subj_id,
-                subject_name=subj_name,
+                subject_name=subject_names[subj_id],
                 current_average=round(current_avg, 1) if current_avg else None,
                 previous_average=round(previous_avg, 1) if previous_avg else None,
                 trend=trend,
-                grade_count=grade_count,
+                grade_count=len(subj_grades),
                 last_exam_score=round(last_score, 1) if last_score else None
             ))
 
@@ -1622,65 +1654,32 @@ class AnalyticsService:
     @staticmethod
     async def _get_student_term_history(
         db: AsyncSession,
-        school_id: str,
-        student_id: str
+        grades: List[Any],
+        attendance: List[Any]
     ) -> List[TermPerformance]:
-        """Get term-by-term performance history for a student"""
+        """Get term-by-term performance history for a student from loaded rows"""
+
+        term_ids = {g.term_id for g in grades}
+        if not term_ids:
+            return []
 
-        # Get all terms with grades
+        # Latest six terms with grades
         terms_result = await db.execute(
-            select(Term).join(
-                Grade, Grade.term_id == Term.id
-            ).where(
-                Grade.student_id == student_id,
-                Grade.school_id == school_id,
-                Grade.is_deleted == False,
+            select(Term).where(
+                Term.id.in_(term_ids),
                 Term.is_deleted == False
-            ).distinct().order_by(desc(Term.start_date)).limit(6)
+            ).order_by(desc(Term.start_date)).limit(6)
         )
         terms = terms_result.scalars().all()
 
         term_history = []
         for term in terms:
-            # Average for term
-            avg_result = await db.execute(
-                select(func.avg(Grade.percentage)).where(
-                    Grade.student_id == student_id,
-                    Grade.term_id == term.id,
-                    Grade.is_deleted == False
-                )
-            )
-            avg = avg_result.scalar()
-
-            # Subject count
-            subj_count = await db.execute(
-                select(func.count(func.distinct(Grade.subject_id))).where(
-                    Grade.student_id == student_id,
-                    Grade.term_id == term.id,
-                    Grade.is_deleted == False
-                )
-            )
-            subjects = subj_count.scalar() or 0
-
-            # Attendance rate
-            total_att = await db.execute(
-                select(func.count(Attendance.id)).where(
-                    Attendance.student_id == student_id,
-                    Attendance.term_id == term.id
-                )
-            )
-            total = total_att.scalar() or 0
-
-            present_att = await db.execute(
-                select(func.count(Attendance.id)).where(
-                    Attendance.student_id == student_id,
-                    Attendance.term_id == term.id,
-                    or_(Attendance.status == AttendanceStatus.PRESENT,
-                        Attendance.status == AttendanceStatus.LATE)
-                )
+            term_grades = [g for g in grades if g.term_id == term.id]
+            avg = AnalyticsService._mean([g.percentage for g in term_grades])
+            subjects = len({g.subject_id for g in term_grades})
+            att_rate = AnalyticsService._attendance_rate(
+                [a.status for a in attendance if a.term_id == term.id]
             )
-            present = present_att.scalar() or 0
-            att_rate = (present / total * 100) if total > 0 else None
 
             term_history.append(TermPerformance(
                 term_id=term.id,
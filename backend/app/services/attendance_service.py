@@ -19,6 +19,7 @@ from app.schemas.academic import (
     BulkSubjectAttendanceCreate,
     StudentAttendanceSummary,
 )
+from app.core.cache_manager import CacheManager, tenant_tag
 
 
 class AttendanceService:
@@ -167,6 +168,7 @@ class AttendanceService:
             attendance_records.append(attendance)
 
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "attendance"))
 
         # Fetch with joined data
         response_records = []
@@ -303,6 +305,7 @@ class AttendanceService:
             attendance_records.append(attendance)
 
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "attendance"))
 
         # Fetch with joined data
         response_records = []
@@ -444,8 +447,9 @@ class AttendanceService:
         for field, value in update_dict.items():
             setattr(attendance, field, value)
 
-        attendance.updated_at = datetime.utcnow().isoformat()
+        attendance.updated_at = datetime.utcnow()
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "attendance"))
         await db.refresh(attendance)
 
         return AttendanceResponse(
@@ -10,6 +10,7 @@ from fastapi import HTTPException, status
 
 from app.models.academic import Attendance, AttendanceStatus
 from app.models.user import UserRole
+from app.core.cache_manager import CacheManager, tenant_tag
 
 
 class AttendanceServiceExtensions:
@@ -107,6 +108,7 @@ class AttendanceServiceExtensions:
         attendance.is_deleted = True
         attendance.deleted_at = datetime.utcnow()
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "attendance"))
 
         return True
 
@@ -169,4 +171,5 @@ class AttendanceServiceExtensions:
             count += 1
 
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "attendance"))
         return count
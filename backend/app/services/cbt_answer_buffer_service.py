@@ -0,0 +1,317 @@
+"""
+CBT Answer Buffer Service
+
+Students autosave answers while a test is running. Each save is coalesced per
+process into the latest answer per (submission, question) and a background
+task writes the buffer to cbt_answers in batches, one transaction per batch of
+submissions, grading each row from the compiled test.
+
+The buffer is per process, so a save acknowledged by one worker may not have
+been flushed when another worker takes the submission. Submitting therefore
+still carries the full answer sheet, but only the answers that changed since
+the last flush are written instead of the whole answer sheet of every student
+at the deadline.
+
+Rows carry the answered_at of the save that produced them and an older save
+never overwrites a newer row, so a late flush from another worker cannot undo
+the answers written at submission.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from cachetools import TTLCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.cbt import CBTAnswer, CBTSubmission, SubmissionStatus
+from app.services.cbt_compiled_test_service import CBTCompiledTestService
+
+logger = logging.getLogger(__name__)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes (SQLite drops the offset) as UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+@dataclass(frozen=True)
+class PendingAnswer:
+    question_id: str
+    selected_option_id: Optional[str]
+    answered_at: datetime
+
+
+@dataclass(frozen=True)
+class Sitting:
+    """A validated submission, so repeat autosaves skip loading it and its schedule"""
+    student_id: str
+    school_id: str
+    ends_at: datetime
+
+
+# submission id -> question id -> latest answer
+AnswerSheet = Dict[str, PendingAnswer]
+
+
+class CBTAnswerBufferService:
+    """Coalesces autosaved answers and writes them to cbt_answers in batches"""
+
+    _pending: Dict[str, AnswerSheet] = {}
+    _in_flight: set = set()
+    _sittings: TTLCache = TTLCache(maxsize=100_000, ttl=60)
+    _flush_lock: Optional[asyncio.Lock] = None
+    _wake: Optional[asyncio.Event] = None
+    _task: Optional[asyncio.Task] = None
+
+    # Counters for write amplification (rows written per answer received)
+    answers_received: int = 0
+    rows_written: int = 0
+    flushes: int = 0
+
+    @staticmethod
+    def get_sitting(submission_id: str) -> Optional[Sitting]:
+        return CBTAnswerBufferService._sittings.get(submission_id)
+
+    @staticmethod
+    def remember_sitting(submission_id: str, sitting: Sitting) -> None:
+        CBTAnswerBufferService._sittings[submission_id] = sitting
+
+    @staticmethod
+    def pending_count() -> int:
+        return sum(len(sheet) for sheet in CBTAnswerBufferService._pending.values())
+
+    @staticmethod
+    async def record(
+        db: AsyncSession,
+        submission_id: str,
+        answers: Iterable,
+        answered_at: datetime
+    ) -> int:
+        """Buffer answers (objects with question_id and selected_option_id); returns how many were accepted"""
+        sheet = {
+            answer.question_id: PendingAnswer(answer.question_id, answer.selected_option_id, answered_at)
+            for answer in answers
+        }
+        CBTAnswerBufferService.answers_received += len(sheet)
+
+        if not settings.cbt_autosave_buffered:
+            result = await db.execute(
+                select(CBTSubmission)
+                .options(selectinload(CBTSubmission.test))
+                .where(CBTSubmission.id == submission_id)
+            )
+            await CBTAnswerBufferService.write(db, [result.scalar_one()], {submission_id: sheet})
+            await db.commit()
+            return len(sheet)
+
+        CBTAnswerBufferService._pending.setdefault(submission_id, {}).update(sheet)
+        wake = CBTAnswerBufferService._wake
+        if wake is not None and CBTAnswerBufferService.pending_count() >= settings.cbt_autosave_flush_threshold:
+            wake.set()
+        return len(sheet)
+
+    @staticmethod
+    async def write(
+        db: AsyncSession,
+        submissions: List[CBTSubmission],
+        sheets: Dict[str, AnswerSheet]
+    ) -> Dict[str, Decimal]:
+        """
+        Merge answer sheets into the stored answers of the given submissions
+        (loaded with their test) and regrade them; returns each total score.
+
+        Only new or changed rows are written. The caller commits.
+        """
+        totals = {}
+        if not submissions:
+            return totals
+
+        result = await db.execute(
+            select(CBTAnswer).where(
+                CBTAnswer.submission_id.in_([s.id for s in submissions]),
+                CBTAnswer.is_deleted == False
+            )
+        )
+        stored_by_submission: Dict[str, Dict[str, CBTAnswer]] = {}
+        for row in result.scalars().all():
+            stored_by_submission.setdefault(row.submission_id, {})[row.question_id] = row
+
+        written = []
+        for submission in submissions:
+            compiled = await CBTCompiledTestService.get_compiled_test(db, submission.test)
+            stored = stored_by_submission.get(submission.id, {})
+
+            sheet = {
+                question_id: PendingAnswer(question_id, row.selected_option_id, row.answered_at)
+                for question_id, row in stored.items()
+            }
+            for question_id, answer in sheets.get(submission.id, {}).items():
+                current = sheet.get(question_id)
+                if current is None or current.answered_at is None or as_utc(current.answered_at) <= answer.answered_at:
+                    sheet[question_id] = answer
+
+            graded_answers, totals[submission.id] = compiled.grade(sheet.values())
+            for graded in graded_answers:
+                answered_at = sheet[graded.question_id].answered_at
+                row = stored.get(graded.question_id)
+                if row is None:
+                    written.append(CBTAnswer(
+                        submission_id=submission.id,
+                        question_id=graded.question_id,
+                        selected_option_id=graded.selected_option_id,
+                        is_correct=graded.is_correct,
+                        points_earned=graded.points_earned,
+                        answered_at=answered_at,
+                        school_id=submission.school_id
+                    ))
+                elif (
+                    row.selected_option_id != graded.selected_option_id
+                    or row.is_correct != graded.is_correct
+                    or Decimal(str(row.points_earned or 0)) != graded.points_earned
+                ):
+                    row.selected_option_id = graded.selected_option_id
+                    row.is_correct = graded.is_correct
+                    row.points_earned = graded.points_earned
+                    row.answered_at = answered_at
+                    written.append(row)
+
+        db.add_all(written)
+        CBTAnswerBufferService.rows_written += len(written)
+        return totals
+
+    @staticmethod
+    async def flush(db: Optional[AsyncSession] = None) -> int:
+        """Write everything buffered in this process; returns the answers flushed"""
+        if CBTAnswerBufferService._flush_lock is None:
+            CBTAnswerBufferService._flush_lock = asyncio.Lock()
+
+        flushed = 0
+        async with CBTAnswerBufferService._flush_lock:
+            while CBTAnswerBufferService._pending:
+                ids = list(CBTAnswerBufferService._pending)[:settings.cbt_autosave_flush_batch]
+                batch = {submission_id: CBTAnswerBufferService._pending.pop(submission_id) for submission_id in ids}
+                CBTAnswerBufferService._in_flight = set(ids)
+                written = False
+                try:
+                    if db is not None:
+                        await CBTAnswerBufferService._write_batch(db, batch)
+                    else:
+                        async with AsyncSessionLocal() as session:
+                            await CBTAnswerBufferService._write_batch(session, batch)
+                    written = True
+                except BaseException:
+                    if db is not None:
+                        await db.rollback()
+                    raise
+                finally:
+                    CBTAnswerBufferService._in_flight = set()
+                    if not written:
+                        # Failed or cancelled (e.g. by stop): put the batch back under anything
+                        # saved since, so the next flush retries it
+                        for submission_id, sheet in batch.items():
+                            sheet.update(CBTAnswerBufferService._pending.get(submission_id, {}))
+                            CBTAnswerBufferService._pending[submission_id] = sheet
+                flushed += sum(len(sheet) for sheet in batch.values())
+                CBTAnswerBufferService.flushes += 1
+        return flushed
+
+    @staticmethod
+    async def _write_batch(db: AsyncSession, batch: Dict[str, AnswerSheet]) -> None:
+        # Answers saved after a submission was finalized (possibly on another worker) are dropped
+        result = await db.execute(
+            select(CBTSubmission)
+            .options(selectinload(CBTSubmission.test))
+            .where(
+                CBTSubmission.id.in_(list(batch)),
+                CBTSubmission.status == SubmissionStatus.IN_PROGRESS,
+                CBTSubmission.is_deleted == False
+            )
+        )
+        await CBTAnswerBufferService.write(db, result.scalars().all(), batch)
+        await db.commit()
+
+    @staticmethod
+    async def finalize(
+        db: AsyncSession,
+        submission: CBTSubmission,
+        answers: Iterable,
+        submitted_at: datetime
+    ) -> Decimal:
+        """
+        Fold this process's buffer and the submitted answer sheet into the stored
+        answers and return the total score. The sheet wins over any autosave,
+        including ones still buffered on other workers. The caller commits.
+        """
+        if submission.id in CBTAnswerBufferService._in_flight:
+            # Let the running flush land so its rows are read below
+            async with CBTAnswerBufferService._flush_lock:
+                pass
+
+        sheet = CBTAnswerBufferService._pending.pop(submission.id, {})
+        for answer in answers:
+            sheet[answer.question_id] = PendingAnswer(answer.question_id, answer.selected_option_id, submitted_at)
+        CBTAnswerBufferService._sittings.pop(submission.id, None)
+
+        totals = await CBTAnswerBufferService.write(db, [submission], {submission.id: sheet})
+        return totals[submission.id]
+
+    @staticmethod
+    async def _run() -> None:
+        while True:
+            try:
+                await asyncio.wait_for(CBTAnswerBufferService._wake.wait(), settings.cbt_autosave_flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            CBTAnswerBufferService._wake.clear()
+            try:
+                await CBTAnswerBufferService.flush()
+            except Exception as e:
+                logger.error(f"CBT answer flush failed, will retry: {e}")
+
+    @staticmethod
+    def start() -> None:
+        """Start the background flusher on the running loop"""
+        if CBTAnswerBufferService._task is None:
+            CBTAnswerBufferService._wake = asyncio.Event()
+            CBTAnswerBufferService._task = asyncio.create_task(CBTAnswerBufferService._run())
+
+    @staticmethod
+    async def stop() -> None:
+        """Stop the background flusher and write what is left"""
+        task = CBTAnswerBufferService._task
+        CBTAnswerBufferService._task = None
+        CBTAnswerBufferService._wake = None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await CBTAnswerBufferService.flush()
+
+    @staticmethod
+    def clear() -> None:
+        CBTAnswerBufferService._pending.clear()
+        CBTAnswerBufferService._sittings.clear()
+        CBTAnswerBufferService.answers_received = 0
+        CBTAnswerBufferService.rows_written = 0
+        CBTAnswerBufferService.flushes = 0
+
+    @staticmethod
+    def stats() -> dict:
+        received = CBTAnswerBufferService.answers_received
+        return {
+            "pending": CBTAnswerBufferService.pending_count(),
+            "answers_received": received,
+            "rows_written": CBTAnswerBufferService.rows_written,
+            "rows_per_answer": round(CBTAnswerBufferService.rows_written / received, 3) if received else 0.0,
+            "flushes": CBTAnswerBufferService.flushes,
+        }
@@ -0,0 +1,223 @@
+"""
+CBT Compiled Test Service
+
+Compiles a test's questions and options into an immutable artifact (question
+order, option ids, a correct-option bitmap per question and points) and keeps
+it per process, keyed by test id and content version. Every student starting
+or submitting the same sitting shares one artifact instead of reloading the
+test -> questions -> options graph, and grading scores each answer with dict
+lookups and a bit test.
+"""
+
+import random
+from dataclasses import dataclass
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Iterable, List, Mapping, Optional, Tuple
+
+from cachetools import LRUCache
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from app.core.cache_manager import singleflight
+from app.core.config import settings
+from app.models.cbt import CBTTest, CBTQuestion, TestStatus
+from app.schemas.cbt import CBTTestForStudent, CBTQuestionForStudent, CBTQuestionOptionForStudent
+
+
+@dataclass(frozen=True)
+class CompiledOption:
+    id: str
+    option_label: str
+    option_text: str
+    order_number: int
+
+
+@dataclass(frozen=True)
+class CompiledQuestion:
+    id: str
+    question_text: str
+    points: Decimal
+    order_number: int
+    image_url: Optional[str]
+    media_url: Optional[str]
+    options: Tuple[CompiledOption, ...]
+    option_index: Mapping[str, int]  # option id -> position in options
+    correct_mask: int  # bit i set when options[i] is correct
+
+
+@dataclass(frozen=True)
+class GradedAnswer:
+    question_id: str
+    selected_option_id: Optional[str]
+    is_correct: bool
+    points_earned: Decimal
+
+
+@dataclass(frozen=True)
+class CompiledTest:
+    test_id: str
+    version: int
+    title: str
+    description: Optional[str]
+    instructions: Optional[str]
+    duration_minutes: int
+    total_points: Decimal
+    pass_percentage: Decimal
+    randomize_questions: bool
+    randomize_options: bool
+    questions: Tuple[CompiledQuestion, ...]
+    question_index: Mapping[str, int]  # question id -> position in questions
+
+    def grade(self, answers: Iterable) -> Tuple[List[GradedAnswer], Decimal]:
+        """Score answers (objects with question_id and selected_option_id); unknown questions are skipped"""
+        graded = []
+        total_score = Decimal('0')
+        for answer in answers:
+            position = self.question_index.get(answer.question_id)
+            if position is None:
+                continue
+            question = self.questions[position]
+            option_position = question.option_index.get(answer.selected_option_id) if answer.selected_option_id else None
+            is_correct = option_position is not None and bool(question.correct_mask >> option_position & 1)
+            points_earned = question.points if is_correct else Decimal('0')
+            total_score += points_earned
+            graded.append(GradedAnswer(question.id, answer.selected_option_id, is_correct, points_earned))
+        return graded, total_score
+
+    def for_student(self) -> CBTTestForStudent:
+        """Student view of the test (no answer key), shuffled when the test asks for it"""
+        questions = list(self.questions)
+        if self.randomize_questions:
+            random.shuffle(questions)
+
+        student_questions = []
+        for question in questions:
+            options = list(question.options)
+            if self.randomize_options:
+                random.shuffle(options)
+            student_questions.append(
+                CBTQuestionForStudent(
+                    id=question.id,
+                    question_text=question.question_text,
+                    points=question.points,
+                    order_number=question.order_number,
+                    image_url=question.image_url,
+                    media_url=question.media_url,
+                    options=[
+                        CBTQuestionOptionForStudent(
+                            id=opt.id,
+                            option_label=opt.option_label,
+                            option_text=opt.option_text,
+                            order_number=opt.order_number
+                        )
+                        for opt in options
+                    ]
+                )
+            )
+
+        return CBTTestForStudent(
+            id=self.test_id,
+            title=self.title,
+            description=self.description,
+            instructions=self.instructions,
+            duration_minutes=self.duration_minutes,
+            total_points=self.total_points,
+            question_count=len(questions),
+            questions=student_questions
+        )
+
+
+class CBTCompiledTestService:
+    """Compiles CBT tests and caches the artifacts of published tests"""
+
+    _cache: LRUCache = LRUCache(maxsize=settings.cbt_compiled_cache_max_tests)
+    enabled: bool = True
+    compilations: int = 0
+
+    @staticmethod
+    def compile(test: CBTTest, questions: Iterable[CBTQuestion]) -> CompiledTest:
+        """Build the artifact from a test and its loaded questions/options"""
+        compiled_questions = []
+        for question in sorted(
+            (q for q in questions if not q.is_deleted),
+            key=lambda q: (q.order_number, q.id)
+        ):
+            options = sorted(
+                (o for o in question.options if not o.is_deleted),
+                key=lambda o: (o.order_number, o.id)
+            )
+            correct_mask = 0
+            for position, option in enumerate(options):
+                if option.is_correct:
+                    correct_mask |= 1 << position
+            compiled_questions.append(CompiledQuestion(
+                id=question.id,
+                question_text=question.question_text,
+                points=Decimal(str(question.points)),
+                order_number=question.order_number,
+                image_url=question.image_url,
+                media_url=question.media_url,
+                options=tuple(
+                    CompiledOption(o.id, o.option_label, o.option_text, o.order_number) for o in options
+                ),
+                option_index=MappingProxyType({o.id: position for position, o in enumerate(options)}),
+                correct_mask=correct_mask
+            ))
+
+        CBTCompiledTestService.compilations += 1
+        return CompiledTest(
+            test_id=test.id,
+            version=test.content_version,
+            title=test.title,
+            description=test.description,
+            instructions=test.instructions,
+            duration_minutes=test.duration_minutes,
+            total_points=Decimal(str(test.total_points)),
+            pass_percentage=Decimal(str(test.pass_percentage if test.pass_percentage is not None else 0)),
+            randomize_questions=test.randomize_questions,
+            randomize_options=test.randomize_options,
+            questions=tuple(compiled_questions),
+            question_index=MappingProxyType({q.id: position for position, q in enumerate(compiled_questions)})
+        )
+
+    @staticmethod
+    async def _load_and_compile(db: AsyncSession, test: CBTTest) -> CompiledTest:
+        result = await db.execute(
+            select(CBTQuestion)
+            .options(selectinload(CBTQuestion.options))
+            .where(
+                CBTQuestion.test_id == test.id,
+                CBTQuestion.is_deleted == False
+            )
+        )
+        return CBTCompiledTestService.compile(test, result.scalars().all())
+
+    @staticmethod
+    async def get_compiled_test(db: AsyncSession, test: CBTTest) -> CompiledTest:
+        """
+        Compiled artifact for the test's current content version.
+
+        The version comes from the test row the caller already loaded, so an
+        edit made through any worker is picked up on the next request.
+        """
+        if not CBTCompiledTestService.enabled or test.status != TestStatus.PUBLISHED:
+            return await CBTCompiledTestService._load_and_compile(db, test)
+
+        key = (test.id, test.content_version)
+        compiled = CBTCompiledTestService._cache.get(key)
+        if compiled is not None:
+            return compiled
+
+        async def load():
+            compiled = await CBTCompiledTestService._load_and_compile(db, test)
+            CBTCompiledTestService._cache[key] = compiled
+            return compiled
+
+        # Students starting the same sitting together share one load
+        return await singleflight(f"cbt-compiled:{test.id}:{test.content_version}", load)
+
+    @staticmethod
+    def clear() -> None:
+        CBTCompiledTestService._cache.clear()
@@ -0,0 +1,249 @@
+"""
+CBT Item Analysis Service
+
+Per-question statistics for a test (optionally one schedule): difficulty
+(p-value), upper/lower 27% discrimination index, point-biserial correlation,
+distractor frequencies and the score distribution with KR-20 reliability.
+
+Option counts and the questions each student got right come from GROUP BY
+queries over the answers; correctness is loaded into a students x questions
+boolean matrix and every statistic is computed from it with NumPy. The aggregates are cached per test content version and
+schedule, and later requests only load the answers of submissions that
+arrived since, so item analysis stays cheap while a sitting is still being
+submitted.
+"""
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+from cachetools import LRUCache
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache_manager import singleflight
+from app.core.config import settings
+from app.models.cbt import CBTAnswer, CBTSubmission, CBTTest, SubmissionStatus
+from app.schemas.cbt import (
+    CBTItemAnalysis, CBTItemAnalysisResponse, CBTOptionAnalysis,
+    CBTScoreBucket, CBTScoreDistribution
+)
+from app.services.cbt_compiled_test_service import CBTCompiledTestService, CompiledTest
+
+# Share of students in each of the upper and lower groups for the discrimination index
+GROUP_FRACTION = 0.27
+
+# Submission ids per answers query when loading new submissions
+ID_CHUNK = 5000
+
+
+@dataclass
+class _AnalysisState:
+    """Aggregates for the submissions seen so far; rows follow submission_index"""
+    question_index: Dict[str, int]
+    option_slots: Dict[str, int]
+    submission_index: Dict[str, int] = field(default_factory=dict)
+    scores: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    percentages: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    correct: Optional[np.ndarray] = None
+    option_counts: Optional[np.ndarray] = None
+    result: Optional[CBTItemAnalysisResponse] = None
+
+    def __post_init__(self):
+        self.correct = np.zeros((0, len(self.question_index)), dtype=bool)
+        self.option_counts = np.zeros(len(self.option_slots), dtype=np.int64)
+
+
+def _round(value: float) -> Optional[float]:
+    return round(float(value), 4) if math.isfinite(value) else None
+
+
+class CBTItemAnalysisService:
+    """Batch item analysis over CBT submissions, cached per test version"""
+
+    _cache: LRUCache = LRUCache(maxsize=settings.cbt_item_analysis_cache_max_tests)
+
+    @staticmethod
+    def _new_state(compiled: CompiledTest) -> _AnalysisState:
+        slots = {}
+        for question in compiled.questions:
+            for option in question.options:
+                slots[option.id] = len(slots)
+        return _AnalysisState(question_index=dict(compiled.question_index), option_slots=slots)
+
+    @staticmethod
+    async def get_item_analysis(
+        db: AsyncSession,
+        test: CBTTest,
+        schedule_id: Optional[str] = None
+    ) -> CBTItemAnalysisResponse:
+        """Item analysis of the submitted attempts of a test, optionally for one schedule"""
+        compiled = await CBTCompiledTestService.get_compiled_test(db, test)
+        key = (test.id, compiled.version, schedule_id)
+
+        async def refresh():
+            filters = [
+                CBTSubmission.test_id == test.id,
+                CBTSubmission.school_id == test.school_id,
+                CBTSubmission.status == SubmissionStatus.SUBMITTED,
+                CBTSubmission.is_deleted == False
+            ]
+            if schedule_id:
+                filters.append(CBTSubmission.schedule_id == schedule_id)
+
+            result = await db.execute(
+                select(CBTSubmission.id, CBTSubmission.total_score, CBTSubmission.percentage).where(*filters)
+            )
+            submissions = result.all()
+
+            state = CBTItemAnalysisService._cache.get(key)
+            if state is None or not CBTItemAnalysisService._unchanged(state, submissions):
+                # First load, or a submission was removed or regraded: start over
+                state = CBTItemAnalysisService._new_state(compiled)
+
+            new_submissions = [s for s in submissions if s.id not in state.submission_index]
+            if new_submissions:
+                try:
+                    await CBTItemAnalysisService._ingest(db, state, new_submissions)
+                except Exception:
+                    CBTItemAnalysisService._cache.pop(key, None)
+                    raise
+                state.result = None
+            if state.result is None:
+                state.result = CBTItemAnalysisService._summarise(state, compiled, schedule_id)
+
+            CBTItemAnalysisService._cache[key] = state
+            return state.result
+
+        return await singleflight(f"cbt-item-analysis:{test.id}:{compiled.version}:{schedule_id}", refresh)
+
+    @staticmethod
+    def _unchanged(state: _AnalysisState, submissions: List) -> bool:
+        """True when every submission already ingested is still there with the same score"""
+        known = [(state.submission_index[s.id], float(s.total_score or 0)) for s in submissions if s.id in state.submission_index]
+        if len(known) != len(state.submission_index):
+            return False
+        if not known:
+            return True
+        rows, scores = zip(*known)
+        return bool(np.array_equal(state.scores[list(rows)], np.array(scores)))
+
+    @staticmethod
+    async def _ingest(db: AsyncSession, state: _AnalysisState, submissions: List) -> None:
+        """Add the answers of new submissions to the aggregates"""
+        first_row = len(state.submission_index)
+        for offset, submission in enumerate(submissions):
+            state.submission_index[submission.id] = first_row + offset
+        state.scores = np.concatenate([state.scores, [float(s.total_score or 0) for s in submissions]])
+        state.percentages = np.concatenate([state.percentages, [float(s.percentage or 0) for s in submissions]])
+
+        block = np.zeros((len(submissions), len(state.question_index)), dtype=bool)
+        ids = [s.id for s in submissions]
+        for start in range(0, len(ids), ID_CHUNK):
+            # The ids were selected with the submission filters, so the answers need no join
+            chunk_filters = [
+                CBTAnswer.submission_id.in_(ids[start:start + ID_CHUNK]),
+                CBTAnswer.is_deleted == False
+            ]
+
+            # Option frequencies, aggregated by the database
+            result = await db.execute(
+                select(CBTAnswer.selected_option_id, func.count())
+                .where(*chunk_filters, CBTAnswer.selected_option_id.isnot(None))
+                .group_by(CBTAnswer.selected_option_id)
+            )
+            for option_id, count in result.all():
+                slot = state.option_slots.get(option_id)
+                if slot is not None:
+                    state.option_counts[slot] += count
+
+            # Correct answers, one row per submission listing the questions it got right
+            result = await db.execute(
+                select(CBTAnswer.submission_id, func.aggregate_strings(CBTAnswer.question_id, ","))
+                .where(*chunk_filters, CBTAnswer.is_correct == True)
+                .group_by(CBTAnswer.submission_id)
+            )
+            for submission_id, question_ids in result.all():
+                row = state.submission_index[submission_id] - first_row
+                cols = [state.question_index.get(q, -1) for q in question_ids.split(",")]
+                block[row, [c for c in cols if c >= 0]] = True  # questions deleted since are ignored
+
+        state.correct = np.vstack([state.correct, block])
+
+    @staticmethod
+    def _summarise(state: _AnalysisState, compiled: CompiledTest, schedule_id: Optional[str]) -> CBTItemAnalysisResponse:
+        n = len(state.submission_index)
+        response = CBTItemAnalysisResponse(
+            test_id=compiled.test_id,
+            schedule_id=schedule_id,
+            content_version=compiled.version,
+            submission_count=n
+        )
+        if n == 0:
+            return response
+
+        scores = state.scores
+        matrix = state.correct.astype(np.float64)
+        p_values = matrix.mean(axis=0)
+
+        # Discrimination: p-value of the top group minus that of the bottom group by total score
+        group = max(1, math.ceil(GROUP_FRACTION * n))
+        order = np.argsort(-scores, kind="stable")
+        discrimination = matrix[order[:group]].mean(axis=0) - matrix[order[-group:]].mean(axis=0)
+
+        # Point-biserial: (mean score of those correct - mean score) / sd * sqrt(p / q)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            correct_counts = matrix.sum(axis=0)
+            mean_correct = (matrix.T @ scores) / correct_counts
+            point_biserial = (mean_correct - scores.mean()) / scores.std() * np.sqrt(p_values / (1 - p_values))
+
+        # KR-20 over the number of correct answers
+        k = len(state.question_index)
+        number_correct = matrix.sum(axis=1)
+        kr20 = None
+        if k > 1 and number_correct.var() > 0:
+            kr20 = _round(k / (k - 1) * (1 - (p_values * (1 - p_values)).sum() / number_correct.var()))
+
+        bucket_counts, edges = np.histogram(np.clip(state.percentages, 0, 100), bins=np.arange(0, 101, 10))
+        response.score_distribution = CBTScoreDistribution(
+            mean=_round(scores.mean()),
+            median=_round(np.median(scores)),
+            std_dev=_round(scores.std()),
+            min=_round(scores.min()),
+            max=_round(scores.max()),
+            pass_rate=_round((state.percentages >= float(compiled.pass_percentage)).mean()),
+            kr20=kr20,
+            buckets=[
+                CBTScoreBucket(range_start=int(edges[i]), range_end=int(edges[i + 1]), count=int(count))
+                for i, count in enumerate(bucket_counts)
+            ]
+        )
+
+        for position, question in enumerate(compiled.questions):
+            options = [
+                CBTOptionAnalysis(
+                    option_id=option.id,
+                    option_label=option.option_label,
+                    is_correct=bool(question.correct_mask >> i & 1),
+                    count=int(state.option_counts[state.option_slots[option.id]]),
+                    proportion=_round(state.option_counts[state.option_slots[option.id]] / n)
+                )
+                for i, option in enumerate(question.options)
+            ]
+            response.items.append(CBTItemAnalysis(
+                question_id=question.id,
+                order_number=question.order_number,
+                question_text=question.question_text,
+                points=question.points,
+                p_value=_round(p_values[position]),
+                discrimination_index=_round(discrimination[position]),
+                point_biserial=_round(point_biserial[position]),
+                omitted=n - sum(option.count for option in options),
+                options=options
+            ))
+        return response
+
+    @staticmethod
+    def clear() -> None:
+        CBTItemAnalysisService._cache.clear()
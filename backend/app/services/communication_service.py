@@ -1,6 +1,6 @@
 from typing import Optional, List, Dict, Any, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, desc, asc
+from sqlalchemy import select, update, func, and_, or_, desc, asc
 from sqlalchemy.orm import selectinload, joinedload
 from fastapi import HTTPException, status
 from datetime import datetime, timedelta
@@ -20,12 +20,21 @@ from app.schemas.communication import (
     NotificationTemplateCreate, NotificationTemplateUpdate,
     MessageStatistics, CommunicationDashboard
 )
+from app.services.email_service import EmailService, OutgoingEmail
 from app.services.notification_service import NotificationService
 from app.schemas.notification import NotificationCreate
 from app.models.notification import NotificationType
 
 logger = logging.getLogger(__name__)
 
+# Stands in for the recipient's name in an email rendered once per message
+RECIPIENT_NAME_PLACEHOLDER = "\x00recipient_name\x00"
+
+# Recipient ids per status UPDATE
+DELIVERY_UPDATE_CHUNK = 1000
+
+MESSAGE_DELIVERY_JOB_TYPE = "message_delivery"
+
 
 class CommunicationService:
     """Service class for communication operations"""
@@ -218,9 +227,15 @@ class CommunicationService:
     async def send_message(
         db: AsyncSession,
         message_id: str,
-        school_id: str
+        school_id: str,
+        progress: Optional[Dict[str, Any]] = None
     ) -> bool:
-        """Send a message to all recipients"""
+        """
+        Send a message to all recipients.
+        
+        When progress is given, it gets the recipient, delivered and failed
+        counts, which is how a message_delivery job reports its result.
+        """
         from app.models.school import School
         
         # Get school info for dynamic email branding
@@ -245,165 +260,173 @@ class CommunicationService:
         if not message:
             return False
         
-        # Update message status
+        now = datetime.utcnow()
         message.status = MessageStatus.SENT
-        message.sent_at = datetime.utcnow()
-        
-        # Send to each recipient
-        for recipient in message.message_recipients:
-            try:
-                # Send with school branding
-                success = await CommunicationService._send_to_recipient(
-                    message, recipient, school_name=school_name, school_logo=school_logo
-                )
-                
-                if success:
-                    recipient.status = MessageStatus.DELIVERED
-                    recipient.delivered_at = datetime.utcnow()
+        message.sent_at = now
+        
+        delivered_ids: List[str] = []
+        failures: Dict[str, List[str]] = {}  # error -> recipient ids
+        
+        if message.message_type == MessageType.EMAIL:
+            # Render once; only the greeting differs between recipients
+            html_template, text_template = CommunicationService._render_message_email(
+                message, school_name=school_name, school_logo=school_logo
+            )
+            sendable = []
+            for recipient in message.message_recipients:
+                if recipient.recipient_email:
+                    sendable.append(recipient)
                 else:
-                    recipient.status = MessageStatus.FAILED
-                    recipient.failed_at = datetime.utcnow()
-                    recipient.error_message = "Failed to send"
-                    
-            except Exception as e:
-                logger.error(f"Failed to send message to {recipient.recipient_id}: {str(e)}")
-                recipient.status = MessageStatus.FAILED
-                recipient.failed_at = datetime.utcnow()
-                recipient.error_message = str(e)
-                recipient.retry_count += 1
-        
-        # Create System Notifications for recipients
-        for recipient in message.message_recipients:
-             # Find user_id from recipient_id (which is User.id)
-             # In _get_recipients, we stored recipient_id as User.id or Student.user.id
-             # So recipient.recipient_id IS the user_id we need.
-             
-             await NotificationService.create_notification(
-                db=db,
-                school_id=school_id,
-                notification_data=NotificationCreate(
+                    logger.warning(f"No email address for recipient {recipient.recipient_name}")
+                    failures.setdefault("No email address", []).append(recipient.id)
+            
+            errors = await EmailService.send_bulk(
+                [
+                    OutgoingEmail(
+                        to=recipient.recipient_email,
+                        subject=message.subject,
+                        html_content=html_template.replace(RECIPIENT_NAME_PLACEHOLDER, recipient.recipient_name),
+                        text_content=text_template.replace(RECIPIENT_NAME_PLACEHOLDER, recipient.recipient_name)
+                    )
+                    for recipient in sendable
+                ],
+                sender_name=school_name  # Dynamic school name as sender
+            )
+            for recipient, error in zip(sendable, errors):
+                if error is None:
+                    delivered_ids.append(recipient.id)
+                else:
+                    failures.setdefault(error, []).append(recipient.id)
+        
+        elif message.message_type in (MessageType.SMS, MessageType.NOTIFICATION):
+            # SMS has no provider yet (TODO: Twilio, AWS SNS, etc.) and in-app
+            # notifications are created below, so neither blocks delivery
+            logger.info(f"{message.message_type.value} message {message.id} to {len(message.message_recipients)} recipients")
+            delivered_ids = [recipient.id for recipient in message.message_recipients]
+        
+        else:
+            failures["Failed to send"] = [recipient.id for recipient in message.message_recipients]
+        
+        await CommunicationService._record_delivery(db, delivered_ids, failures, now)
+        
+        if progress is not None:
+            progress['total_recipients'] = len(message.message_recipients)
+            progress['delivered_count'] = len(delivered_ids)
+            progress['failed_count'] = sum(len(recipient_ids) for recipient_ids in failures.values())
+        
+        # Create System Notifications for recipients (recipient_id is the user id)
+        await NotificationService.create_notifications_bulk(
+            db,
+            school_id,
+            [
+                NotificationCreate(
                     user_id=recipient.recipient_id,
                     title=f"New Message from {message.sender_name}",
                     message=f"{message.subject}",
                     type=NotificationType.INFO,
                     link=f"/communication/messages/{message.id}"
                 )
-            )
+                for recipient in message.message_recipients
+            ],
+            commit=False
+        )
 
         await db.commit()
         return True
     
     @staticmethod
-    async def _send_to_recipient(
+    async def _record_delivery(
+        db: AsyncSession,
+        delivered_ids: List[str],
+        failures: Dict[str, List[str]],
+        now: datetime
+    ) -> None:
+        """Set recipient statuses with one UPDATE per outcome rather than one per recipient"""
+        for start in range(0, len(delivered_ids), DELIVERY_UPDATE_CHUNK):
+            await db.execute(
+                update(MessageRecipient).where(
+                    MessageRecipient.id.in_(delivered_ids[start:start + DELIVERY_UPDATE_CHUNK])
+                ).values(status=MessageStatus.DELIVERED, delivered_at=now)
+            )
+        
+        for error, recipient_ids in failures.items():
+            logger.error(f"Failed to send message to {len(recipient_ids)} recipients: {error}")
+            for start in range(0, len(recipient_ids), DELIVERY_UPDATE_CHUNK):
+                await db.execute(
+                    update(MessageRecipient).where(
+                        MessageRecipient.id.in_(recipient_ids[start:start + DELIVERY_UPDATE_CHUNK])
+                    ).values(status=MessageStatus.FAILED, failed_at=now, error_message=error)
+                )
+    
+    @staticmethod
+    def _render_message_email(
         message: Message,
-        recipient: MessageRecipient,
         school_name: Optional[str] = None,
         school_logo: Optional[str] = None
-    ) -> bool:
-        """Send message to individual recipient using real email/SMS services"""
-        import asyncio
-        from app.services.email_service import EmailService
-        
-        try:
-            if message.message_type == MessageType.EMAIL:
-                # Send real email using EmailService
-                if not recipient.recipient_email:
-                    logger.warning(f"No email address for recipient {recipient.recipient_name}")
-                    return False
-                
-                # Build logo HTML if school has a logo
-                logo_html = ""
-                if school_logo:
-                    logo_html = f'<img src="{school_logo}" alt="{school_name or "School"} Logo" style="max-height: 60px; margin-bottom: 10px;">'
-                
-                # Use school name or fallback
-                display_school_name = school_name or "School"
-                
-                # Create HTML content for the email with school branding
-                html_content = f"""
-                <!DOCTYPE html>
-                <html>
-                <head>
-                    <meta charset="utf-8">
-                    <style>
-                        body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
-                        .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
-                        .header {{ background-color: #4f46e5; color: white; padding: 20px; text-align: center; border-radius: 8px 8px 0 0; }}
-                        .header img {{ max-height: 60px; margin-bottom: 10px; }}
-                        .content {{ background-color: #f9fafb; padding: 20px; border-radius: 0 0 8px 8px; }}
-                        .footer {{ margin-top: 20px; padding-top: 15px; border-top: 1px solid #e5e7eb; font-size: 12px; color: #6b7280; text-align: center; }}
-                        .urgent {{ background-color: #fef2f2; border-left: 4px solid #ef4444; padding: 10px; margin-bottom: 15px; }}
-                    </style>
-                </head>
-                <body>
-                    <div class="container">
-                        <div class="header">
-                            {logo_html}
-                            <h2>{message.subject}</h2>
-                        </div>
-                        <div class="content">
-                            {"<div class='urgent'><strong>⚠️ URGENT MESSAGE</strong></div>" if message.is_urgent else ""}
-                            <p>Dear {recipient.recipient_name},</p>
-                            <div>{message.content}</div>
-                        </div>
-                        <div class="footer">
-                            <p>Sent by: {message.sender_name}</p>
-                            <p>This is an automated message from {display_school_name}.</p>
-                        </div>
-                    </div>
-                </body>
-                </html>
-                """
-                
-                text_content = f"""
-                {message.subject}
-                
-                Dear {recipient.recipient_name},
-                
-                {"⚠️ URGENT MESSAGE" if message.is_urgent else ""}
-                
-                {message.content}
-                
-                ---
-                Sent by: {message.sender_name}
-                This is an automated message from {display_school_name}.
-                """
-                
-                logger.info(f"Sending email to {recipient.recipient_email}: {message.subject}")
-                email_sent = await EmailService.send_email(
-                    to_emails=[recipient.recipient_email],
-                    subject=message.subject,
-                    html_content=html_content,
-                    text_content=text_content,
-                    sender_name=school_name  # Dynamic school name as sender
-                )
-                
-                if email_sent:
-                    logger.info(f"Email sent successfully to {recipient.recipient_email}")
-                else:
-                    logger.warning(f"Failed to send email to {recipient.recipient_email}")
-                
-                return email_sent
-                
-            elif message.message_type == MessageType.SMS:
-                # SMS sending - would integrate with Twilio or similar
-                # For now, log the attempt but return True to not block
-                logger.info(f"SMS sending to {recipient.recipient_phone}: {message.content[:50]}...")
-                # TODO: Integrate with SMS provider (Twilio, AWS SNS, etc.)
-                return True
-                
-            elif message.message_type == MessageType.NOTIFICATION:
-                # In-app notification - already handled by NotificationService in send_message
-                logger.info(f"In-app notification for {recipient.recipient_name}: {message.subject}")
-                return True
-                
-            return False
-            
-        except Exception as e:
-            logger.error(f"Error sending message to {recipient.recipient_name}: {str(e)}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            return False
+    ) -> Tuple[str, str]:
+        """
+        Build a message's branded email as (html, text), with
+        RECIPIENT_NAME_PLACEHOLDER where each recipient's name goes
+        """
+        # Build logo HTML if school has a logo
+        logo_html = ""
+        if school_logo:
+            logo_html = f'<img src="{school_logo}" alt="{school_name or "School"} Logo" style="max-height: 60px; margin-bottom: 10px;">'
+        
+        # Use school name or fallback
+        display_school_name = school_name or "School"
+        
+        # Create HTML content for the email with school branding
+        html_content = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <style>
+                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+                .header {{ background-color: #4f46e5; color: white; padding: 20px; text-align: center; border-radius: 8px 8px 0 0; }}
+                .header img {{ max-height: 60px; margin-bottom: 10px; }}
+                .content {{ background-color: #f9fafb; padding: 20px; border-radius: 0 0 8px 8px; }}
+                .footer {{ margin-top: 20px; padding-top: 15px; border-top: 1px solid #e5e7eb; font-size: 12px; color: #6b7280; text-align: center; }}
+                .urgent {{ background-color: #fef2f2; border-left: 4px solid #ef4444; padding: 10px; margin-bottom: 15px; }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    {logo_html}
+                    <h2>{message.subject}</h2>
+                </div>
+                <div class="content">
+                    {"<div class='urgent'><strong>⚠️ URGENT MESSAGE</strong></div>" if message.is_urgent else ""}
+                    <p>Dear {RECIPIENT_NAME_PLACEHOLDER},</p>
+                    <div>{message.content}</div>
+                </div>
+                <div class="footer">
+                    <p>Sent by: {message.sender_name}</p>
+                    <p>This is an automated message from {display_school_name}.</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+        
+        text_content = f"""
+        {message.subject}
+        
+        Dear {RECIPIENT_NAME_PLACEHOLDER},
+        
+        {"⚠️ URGENT MESSAGE" if message.is_urgent else ""}
+        
+        {message.content}
+        
+        ---
+        Sent by: {message.sender_name}
+        This is an automated message from {display_school_name}.
+        """
+        
+        return html_content, text_content
 
     @staticmethod
     async def get_messages(
@@ -1,35 +1,64 @@
-import pandas as pd
+import csv
 import io
-from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime, date
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+import logging
+import time
+import uuid
+from datetime import datetime, date, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
 from fastapi import HTTPException, UploadFile
-from app.models.student import Student, StudentStatus
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache_manager import CacheManager, tenant_tag
 from app.models.academic import Class
+from app.models.student import Student, StudentStatus
 from app.models.user import Gender
+from app.services.job_service import JobService
 from app.schemas.student import (
-    CSVStudentRow, 
-    StudentCreate, 
-    StudentImportResult, 
+    StudentImportResult,
     StudentImportError,
     StudentResponse
 )
 
+logger = logging.getLogger(__name__)
+
+# Rows parsed, validated and inserted per round trip
+IMPORT_CHUNK_SIZE = 500
+
+IMPORT_JOB_TYPE = "student_import"
+
+REQUIRED_HEADERS = [
+    "admission_number", "first_name", "last_name",
+    "date_of_birth", "gender", "address_line1",
+    "city", "state", "postal_code", "admission_date"
+]
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y']
+
+EMAIL_PATTERN = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
+GENDER_MAPPING = {
+    'male': Gender.MALE,
+    'm': Gender.MALE,
+    'female': Gender.FEMALE,
+    'f': Gender.FEMALE,
+    'other': Gender.OTHER
+}
+
+# Free-text columns copied as-is, with blanks and 'nan'/'none' stored as NULL
+OPTIONAL_COLUMNS = [
+    "middle_name", "phone", "address_line2",
+    "guardian_name", "guardian_phone", "guardian_relationship",
+    "emergency_contact_name", "emergency_contact_phone", "emergency_contact_relationship",
+    "medical_conditions", "allergies", "blood_group", "notes"
+]
+
 
 class CSVImportService:
     """Service for handling CSV import of students"""
 
-    @staticmethod
-    def _safe_string_value(value) -> Optional[str]:
-        """Safely convert pandas value to string, handling NaN values"""
-        if value is None or pd.isna(value):
-            return None
-        str_value = str(value).strip()
-        if str_value.lower() in ['nan', 'none', '']:
-            return None
-        return str_value
-
     @staticmethod
     def get_csv_template_headers() -> List[str]:
         """Get the headers for the CSV template"""
@@ -134,52 +163,70 @@ class CSVImportService:
         return df.to_csv(index=False, sep=',')
     
     @staticmethod
-    async def validate_csv_file(file: UploadFile) -> pd.DataFrame:
-        """Validate and parse CSV file"""
+    def _detect_separator(content: str) -> str:
+        """Comma unless the header line is tab-separated"""
+        header = content.split('\n', 1)[0]
+        return '\t' if '\t' in header and ',' not in header else ','
+
+    @staticmethod
+    async def read_csv_upload(file: UploadFile) -> str:
+        """Read an uploaded CSV, checking its type, encoding, headers and that it has rows"""
         if not file.filename.endswith('.csv'):
             raise HTTPException(status_code=400, detail="File must be a CSV file")
 
         try:
-            # Read file content
-            content = await file.read()
-            content_str = content.decode('utf-8')
-
-            # Try to detect separator (comma or tab)
-            try:
-                # First try with comma separator
-                df = pd.read_csv(io.StringIO(content_str), sep=',')
-                # If we get only one column, it might be tab-separated
-                if len(df.columns) == 1:
-                    df = pd.read_csv(io.StringIO(content_str), sep='\t')
-            except:
-                # If comma fails, try tab separator
-                df = pd.read_csv(io.StringIO(content_str), sep='\t')
-
-            # Check if DataFrame is empty
-            if df.empty:
-                raise HTTPException(status_code=400, detail="CSV file is empty")
-            
-            # Validate required headers
-            required_headers = ["admission_number", "first_name", "last_name", 
-                              "date_of_birth", "gender", "address_line1", 
-                              "city", "state", "postal_code", "admission_date"]
-            
-            missing_headers = [h for h in required_headers if h not in df.columns]
-            if missing_headers:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Missing required columns: {', '.join(missing_headers)}"
-                )
-            
-            return df
-            
+            content = (await file.read()).decode('utf-8')
+            sample = pd.read_csv(
+                io.StringIO(content), sep=CSVImportService._detect_separator(content), dtype=str, nrows=1
+            )
         except pd.errors.EmptyDataError:
             raise HTTPException(status_code=400, detail="CSV file is empty")
         except pd.errors.ParserError as e:
             raise HTTPException(status_code=400, detail=f"Error parsing CSV file: {str(e)}")
         except UnicodeDecodeError:
             raise HTTPException(status_code=400, detail="File encoding not supported. Please use UTF-8")
-    
+
+        if sample.empty:
+            raise HTTPException(status_code=400, detail="CSV file is empty")
+
+        missing_headers = [h for h in REQUIRED_HEADERS if h not in sample.columns]
+        if missing_headers:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Missing required columns: {', '.join(missing_headers)}"
+            )
+
+        return content
+
+    @staticmethod
+    def iter_csv_chunks(content: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """Parse CSV text lazily, chunk_size rows at a time, keeping every cell as a string"""
+        reader = pd.read_csv(
+            io.StringIO(content),
+            sep=CSVImportService._detect_separator(content),
+            dtype=str,
+            keep_default_na=False,
+            chunksize=chunk_size
+        )
+        row_offset = 0
+        for chunk in reader:
+            # Number rows as the user sees them in a spreadsheet: header is row 1
+            chunk.index = pd.RangeIndex(row_offset + 2, row_offset + 2 + len(chunk))
+            row_offset += len(chunk)
+            yield chunk
+
+    @staticmethod
+    def count_csv_rows(content: str) -> int:
+        """Count data rows without parsing them into frames, for progress reporting"""
+        rows = csv.reader(io.StringIO(content), delimiter=CSVImportService._detect_separator(content))
+        return max(sum(1 for row in rows if row) - 1, 0)
+
+    @staticmethod
+    async def validate_csv_file(file: UploadFile) -> pd.DataFrame:
+        """Validate and parse a whole CSV file into one frame"""
+        content = await CSVImportService.read_csv_upload(file)
+        return pd.concat(CSVImportService.iter_csv_chunks(content))
+
     @staticmethod
     def parse_date(date_str: str, field_name: str) -> Optional[date]:
         """Parse date string to date object"""
@@ -188,7 +235,7 @@ class CSVImportService:
             
         try:
             # Try different date formats
-            for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%m/%d/%Y', '%d-%m-%Y']:
+            for fmt in DATE_FORMATS:
                 try:
                     return datetime.strptime(str(date_str).strip(), fmt).date()
                 except ValueError:
@@ -204,59 +251,227 @@ class CSVImportService:
             raise ValueError("Gender is required")
         
         gender_lower = str(gender_str).lower().strip()
-        gender_mapping = {
-            'male': Gender.MALE,
-            'm': Gender.MALE,
-            'female': Gender.FEMALE,
-            'f': Gender.FEMALE,
-            'other': Gender.OTHER
-        }
-        
-        if gender_lower not in gender_mapping:
+        if gender_lower not in GENDER_MAPPING:
             raise ValueError(f"Invalid gender: {gender_str}. Must be male, female, or other")
         
-        return gender_mapping[gender_lower]
-    
+        return GENDER_MAPPING[gender_lower]
+
     @staticmethod
-    async def resolve_class_name_to_id(class_name: str, school_id: str, db: AsyncSession) -> Optional[str]:
-        """Resolve class name to class ID"""
-        if not class_name or pd.isna(class_name):
-            return None
+    def _parse_dates(values: pd.Series) -> pd.Series:
+        """Vectorized parse_date: the first format that matches wins, NaT where none does"""
+        parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+        for fmt in DATE_FORMATS:
+            parsed = parsed.fillna(pd.to_datetime(values, format=fmt, errors='coerce'))
+        return parsed
 
-        # Clean the class name
-        clean_class_name = str(class_name).strip()
-        if not clean_class_name or clean_class_name.lower() in ['nan', 'none', '']:
-            return None
+    @staticmethod
+    def validate_chunk(
+        chunk: pd.DataFrame,
+        class_ids: Dict[str, str],
+        known_admission_numbers: set
+    ) -> Tuple[pd.DataFrame, List[StudentImportError]]:
+        """
+        Validate a chunk of rows column by column.
+
+        Returns (valid, errors): a frame of student columns for the rows that
+        passed, and one StudentImportError for the first problem on each row
+        that did not.
+        """
+        def column(name: str) -> pd.Series:
+            if name not in chunk.columns:
+                return pd.Series('', index=chunk.index, dtype=object)
+            return chunk[name].fillna('').str.strip()
+
+        admission_number = column('admission_number')
+        first_name = column('first_name')
+        last_name = column('last_name')
+        date_of_birth_raw = column('date_of_birth')
+        admission_date_raw = column('admission_date')
+        gender_raw = column('gender')
+        email = column('email')
+        guardian_email = column('guardian_email')
+        class_name = column('current_class_name')
+        class_name = class_name.mask(class_name.str.lower().isin(['nan', 'none']), '')
+
+        date_of_birth = CSVImportService._parse_dates(date_of_birth_raw)
+        admission_date = CSVImportService._parse_dates(admission_date_raw)
+        gender = gender_raw.str.lower().map(GENDER_MAPPING)
+        current_class_id = class_name.map(class_ids)
+
+        # Checks in the order a row is reported: only its first failure is kept
+        checks = [
+            ('admission_number', admission_number == '', "Admission number is required and cannot be empty"),
+            ('admission_number', admission_number.str.len() > 50,
+             "Admission number '" + admission_number + "' is too long (maximum 50 characters)"),
+            ('admission_number', admission_number.isin(known_admission_numbers),
+             "Admission number '" + admission_number
+             + "' already exists in the system or appears multiple times in this file"),
+            ('first_name', first_name == '', "First name is required and cannot be empty"),
+            ('first_name', first_name.str.len() > 100,
+             "First name '" + first_name + "' is too long (maximum 100 characters)"),
+            ('last_name', last_name == '', "Last name is required and cannot be empty"),
+            ('last_name', last_name.str.len() > 100,
+             "Last name '" + last_name + "' is too long (maximum 100 characters)"),
+            ('date_of_birth', date_of_birth_raw == '', "Date of birth is required"),
+            ('date_of_birth', date_of_birth.isna(), "Invalid date format for date_of_birth"),
+            ('admission_date', admission_date_raw == '', "Admission date is required"),
+            ('admission_date', admission_date.isna(), "Invalid date format for admission_date"),
+            ('gender', gender_raw == '', "Gender is required"),
+            ('gender', gender.isna(), "Invalid gender: " + gender_raw + ". Must be male, female, or other"),
+            ('address_line1', column('address_line1') == '', "Address line 1 is required"),
+            ('city', column('city') == '', "City is required"),
+            ('state', column('state') == '', "State is required"),
+            ('postal_code', column('postal_code') == '', "Postal code is required"),
+            ('email', (email != '') & ~email.str.match(EMAIL_PATTERN),
+             "Invalid email format: '" + email + "'"),
+            ('guardian_email', (guardian_email != '') & ~guardian_email.str.match(EMAIL_PATTERN),
+             "Invalid guardian email format: '" + guardian_email + "'"),
+            ('current_class_name', (class_name != '') & current_class_id.isna(),
+             "Class '" + class_name + "' not found in the system"),
+        ]
+
+        field = pd.Series(None, index=chunk.index, dtype=object)
+        message = pd.Series(None, index=chunk.index, dtype=object)
+        value = pd.Series('', index=chunk.index, dtype=object)
+        for name, failed, text in checks:
+            first_failure = failed & field.isna()
+            field[first_failure] = name
+            message[first_failure] = text[first_failure] if isinstance(text, pd.Series) else text
+            value[first_failure] = column(name)[first_failure]
+
+        # Repeats within the chunk lose to the first otherwise-valid row with that number
+        passed = field.isna()
+        repeated = passed & admission_number.where(passed).duplicated(keep='first')
+        field[repeated] = 'admission_number'
+        message[repeated] = (
+            "Admission number '" + admission_number[repeated]
+            + "' already exists in the system or appears multiple times in this file"
+        )
+        value[repeated] = admission_number[repeated]
+        passed &= ~repeated
 
-        result = await db.execute(
-            select(Class).where(
-                Class.name == clean_class_name,
+        errors = [
+            StudentImportError(row=row, field=name, value=bad_value, error=text)
+            for row, name, bad_value, text in zip(
+                field.index[~passed], field[~passed], value[~passed], message[~passed]
+            )
+        ]
+
+        valid = pd.DataFrame({
+            'admission_number': admission_number,
+            'first_name': first_name,
+            'last_name': last_name,
+            'date_of_birth': date_of_birth.dt.date,
+            'gender': gender,
+            'email': email,
+            'address_line1': column('address_line1'),
+            'city': column('city'),
+            'state': column('state'),
+            'postal_code': column('postal_code'),
+            'admission_date': admission_date.dt.date,
+            'current_class_id': current_class_id,
+            'guardian_email': guardian_email,
+            **{name: column(name) for name in OPTIONAL_COLUMNS},
+        })[passed].astype(object)
+        # Blank optional cells are stored as NULL, as single-row parsing did
+        for name in OPTIONAL_COLUMNS + ['email', 'guardian_email']:
+            valid[name] = valid[name].mask(valid[name].str.lower().isin(['', 'nan', 'none']), None)
+        valid = valid.where(valid.notna(), None)
+
+        return valid, errors
+
+    @staticmethod
+    async def import_students(
+        db: AsyncSession,
+        school_id: str,
+        content: str,
+        chunk_size: int = IMPORT_CHUNK_SIZE,
+        progress: Optional[dict] = None,
+        collect_created: bool = True
+    ) -> StudentImportResult:
+        """
+        Import students from CSV text chunk by chunk.
+
+        Classes and existing admission numbers are loaded once up front. Each
+        chunk is validated column-wise, its valid rows inserted with a single
+        executemany and committed, so a long file never holds one transaction
+        open and rows already imported survive a later failure. Pass a dict as
+        progress to have counters updated after every chunk; leave
+        collect_created off for large background imports so created students
+        are counted rather than kept in memory.
+        """
+        started = time.perf_counter()
+        total_rows = CSVImportService.count_csv_rows(content)
+        if progress is not None:
+            progress['total_rows'] = total_rows
+
+        class_result = await db.execute(
+            select(Class.name, Class.id).where(
                 Class.school_id == school_id,
                 Class.is_deleted == False
             )
         )
-        class_obj = result.scalar_one_or_none()
-        return class_obj.id if class_obj else None
-    
-    @staticmethod
-    async def validate_admission_number_unique(
-        admission_number: str,
-        school_id: str,
-        db: AsyncSession,
-        existing_numbers: set = None
-    ) -> bool:
-        """Check if admission number is unique"""
-        if existing_numbers and admission_number in existing_numbers:
-            return False
-
-        result = await db.execute(
-            select(Student).where(
-                Student.admission_number == admission_number,
+        class_ids = {name: class_id for name, class_id in class_result.all()}
+
+        existing_result = await db.execute(
+            select(Student.admission_number).where(
                 Student.school_id == school_id,
                 Student.is_deleted == False
             )
         )
-        return result.scalar_one_or_none() is None
+        known_admission_numbers = set(existing_result.scalars().all())
+
+        errors: List[StudentImportError] = []
+        created_students: List[StudentResponse] = []
+        processed_rows = 0
+        successful_imports = 0
+
+        for chunk in CSVImportService.iter_csv_chunks(content, chunk_size):
+            valid, chunk_errors = CSVImportService.validate_chunk(chunk, class_ids, known_admission_numbers)
+            errors.extend(chunk_errors)
+
+            if not valid.empty:
+                now = datetime.now(timezone.utc)
+                rows = valid.to_dict('records')
+                for row in rows:
+                    row.update(
+                        id=str(uuid.uuid4()),
+                        school_id=school_id,
+                        status=StudentStatus.ACTIVE,
+                        created_at=now,
+                        updated_at=now
+                    )
+                await db.execute(insert(Student.__table__), rows)
+                await db.commit()
+
+                known_admission_numbers.update(valid['admission_number'])
+                successful_imports += len(rows)
+                if collect_created:
+                    from app.api.v1.endpoints.students import enhance_student_response
+                    for row in rows:
+                        created_students.append(await enhance_student_response(Student(**row), db))
+
+            processed_rows += len(chunk)
+            if progress is not None:
+                elapsed = time.perf_counter() - started
+                progress.update(
+                    processed_rows=processed_rows,
+                    successful_imports=successful_imports,
+                    failed_imports=len(errors),
+                    rows_per_second=round(processed_rows / elapsed, 1) if elapsed else 0.0
+                )
+                progress['errors'].extend(error.model_dump() for error in chunk_errors)
+
+        if successful_imports:
+            await CacheManager.invalidate_tags(tenant_tag(school_id, "students"))
+
+        return StudentImportResult(
+            total_rows=processed_rows,
+            successful_imports=successful_imports,
+            failed_imports=len(errors),
+            errors=errors,
+            created_students=created_students
+        )
 
     @staticmethod
     async def process_csv_import(
@@ -265,114 +480,11 @@ class CSVImportService:
         db: AsyncSession
     ) -> StudentImportResult:
         """Process CSV file and import students"""
-        try:
-            # Validate and parse CSV
-            df = await CSVImportService.validate_csv_file(file)
-
-            errors: List[StudentImportError] = []
-            created_students: List[StudentResponse] = []
-            existing_admission_numbers = set()
-
-            # Pre-load existing admission numbers for better performance
-            existing_result = await db.execute(
-                select(Student.admission_number).where(
-                    Student.school_id == school_id,
-                    Student.is_deleted == False
-                )
-            )
-            existing_admission_numbers.update([row[0] for row in existing_result.fetchall()])
-
-            # Process each row
-            for index, row in df.iterrows():
-                row_number = index + 2  # +2 because pandas is 0-indexed and we skip header
-
-                try:
-                    # Validate and convert row data
-                    student_data = await CSVImportService.validate_and_convert_row(
-                        row, row_number, school_id, db, existing_admission_numbers
-                    )
-
-                    if student_data:
-                        # Create student
-                        student = Student(**student_data)
-                        db.add(student)
-                        await db.flush()  # Flush to get ID but don't commit yet
-
-                        # Add to existing numbers to prevent duplicates in same file
-                        existing_admission_numbers.add(student_data['admission_number'])
-
-                        # Create response object
-                        from app.api.v1.endpoints.students import enhance_student_response
-                        student_response = await enhance_student_response(student, db)
-                        created_students.append(student_response)
-
-                except ValueError as ve:
-                    # Validation error - extract field and value if possible
-                    error_msg = str(ve)
-                    field = "general"
-                    value = ""
-
-                    # Try to extract field name from error message
-                    if "admission_number" in error_msg.lower():
-                        field = "admission_number"
-                        value = str(row.get('admission_number', ''))
-                    elif "first_name" in error_msg.lower():
-                        field = "first_name"
-                        value = str(row.get('first_name', ''))
-                    elif "last_name" in error_msg.lower():
-                        field = "last_name"
-                        value = str(row.get('last_name', ''))
-                    elif "date_of_birth" in error_msg.lower():
-                        field = "date_of_birth"
-                        value = str(row.get('date_of_birth', ''))
-                    elif "gender" in error_msg.lower():
-                        field = "gender"
-                        value = str(row.get('gender', ''))
-                    elif "email" in error_msg.lower():
-                        field = "email"
-                        value = str(row.get('email', ''))
-                    elif "guardian_email" in error_msg.lower():
-                        field = "guardian_email"
-                        value = str(row.get('guardian_email', ''))
-                    elif "class" in error_msg.lower():
-                        field = "current_class_name"
-                        value = str(row.get('current_class_name', ''))
-
-                    errors.append(StudentImportError(
-                        row=row_number,
-                        field=field,
-                        value=value,
-                        error=error_msg.replace(f"Row {row_number}: ", "")
-                    ))
-
-                except Exception as e:
-                    # Unexpected error
-                    errors.append(StudentImportError(
-                        row=row_number,
-                        field="general",
-                        value="",
-                        error=f"Unexpected error: {str(e)}"
-                    ))
-
-            # Commit all successful imports or rollback if none succeeded
-            if created_students:
-                await db.commit()
-            else:
-                await db.rollback()
-
-            return StudentImportResult(
-                total_rows=len(df),
-                successful_imports=len(created_students),
-                failed_imports=len(errors),
-                errors=errors,
-                created_students=created_students
-            )
+        content = await CSVImportService.read_csv_upload(file)
 
-        except HTTPException:
-            # Re-raise HTTP exceptions (file validation errors)
-            raise
+        try:
+            return await CSVImportService.import_students(db, school_id, content)
         except Exception as e:
-            # Rollback on any unexpected error
             await db.rollback()
             raise HTTPException(
                 status_code=500,
@@ -380,142 +492,27 @@ class CSVImportService:
             )
 
     @staticmethod
-    async def validate_and_convert_row(
-        row: pd.Series,
-        row_number: int,
-        school_id: str,
-        db: AsyncSession,
-        existing_numbers: set
-    ) -> Optional[Dict[str, Any]]:
-        """Validate and convert a single CSV row to student data"""
-        import re  # Import re module at the beginning
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'  # Define email pattern once
-
-        try:
-            # Required fields validation with detailed error messages
-            admission_number = str(row.get('admission_number', '')).strip()
-            if not admission_number:
-                raise ValueError("Admission number is required and cannot be empty")
-
-            # Validate admission number format (alphanumeric, max 50 chars)
-            if len(admission_number) > 50:
-                raise ValueError(f"Admission number '{admission_number}' is too long (maximum 50 characters)")
-
-            # Check uniqueness
-            is_unique = await CSVImportService.validate_admission_number_unique(
-                admission_number, school_id, db, existing_numbers
-            )
-            if not is_unique:
-                raise ValueError(f"Admission number '{admission_number}' already exists in the system or appears multiple times in this file")
-
-            first_name = str(row.get('first_name', '')).strip()
-            if not first_name:
-                raise ValueError("First name is required and cannot be empty")
-            if len(first_name) > 100:
-                raise ValueError(f"First name '{first_name}' is too long (maximum 100 characters)")
-
-            last_name = str(row.get('last_name', '')).strip()
-            if not last_name:
-                raise ValueError("Last name is required and cannot be empty")
-            if len(last_name) > 100:
-                raise ValueError(f"Last name '{last_name}' is too long (maximum 100 characters)")
-
-            # Parse dates
-            date_of_birth = CSVImportService.parse_date(row.get('date_of_birth'), 'date_of_birth')
-            if not date_of_birth:
-                raise ValueError("Date of birth is required")
-
-            admission_date = CSVImportService.parse_date(row.get('admission_date'), 'admission_date')
-            if not admission_date:
-                raise ValueError("Admission date is required")
-
-            # Validate gender
-            gender = CSVImportService.validate_gender(row.get('gender'))
-
-            # Required address fields
-            address_line1 = str(row.get('address_line1', '')).strip()
-            if not address_line1:
-                raise ValueError("Address line 1 is required")
-
-            city = str(row.get('city', '')).strip()
-            if not city:
-                raise ValueError("City is required")
-
-            state = str(row.get('state', '')).strip()
-            if not state:
-                raise ValueError("State is required")
-
-            postal_code = str(row.get('postal_code', '')).strip()
-            if not postal_code:
-                raise ValueError("Postal code is required")
-
-            # Validate email format if provided
-            email = None
-            email_value = row.get('email')
-            if email_value is not None and not pd.isna(email_value):
-                email = str(email_value).strip()
-                if email and email.lower() != 'nan':  # Handle pandas NaN representation
-                    if not re.match(email_pattern, email):
-                        raise ValueError(f"Invalid email format: '{email}'")
-                else:
-                    email = None
-
-            # Validate guardian email format if provided
-            guardian_email = None
-            guardian_email_value = row.get('guardian_email')
-            if guardian_email_value is not None and not pd.isna(guardian_email_value):
-                guardian_email = str(guardian_email_value).strip()
-                if guardian_email and guardian_email.lower() != 'nan':  # Handle pandas NaN representation
-                    if not re.match(email_pattern, guardian_email):
-                        raise ValueError(f"Invalid guardian email format: '{guardian_email}'")
-                else:
-                    guardian_email = None
-
-            # Resolve class name to ID
-            current_class_id = None
-            class_name = CSVImportService._safe_string_value(row.get('current_class_name'))
-            if class_name:  # Only process if we have a valid class name
-                current_class_id = await CSVImportService.resolve_class_name_to_id(
-                    class_name, school_id, db
-                )
-                if current_class_id is None:
-                    raise ValueError(f"Class '{class_name}' not found in the system")
-
-            # Build student data dictionary
-            student_data = {
-                'admission_number': admission_number,
-                'first_name': first_name,
-                'last_name': last_name,
-                'middle_name': CSVImportService._safe_string_value(row.get('middle_name')),
-                'date_of_birth': date_of_birth,
-                'gender': gender,
-                'phone': CSVImportService._safe_string_value(row.get('phone')),
-                'email': email,
-                'address_line1': address_line1,
-                'address_line2': CSVImportService._safe_string_value(row.get('address_line2')),
-                'city': city,
-                'state': state,
-                'postal_code': postal_code,
-                'admission_date': admission_date,
-                'current_class_id': current_class_id,
-                'status': StudentStatus.ACTIVE,
-                'school_id': school_id,
-
-                # Optional fields
-                'guardian_name': CSVImportService._safe_string_value(row.get('guardian_name')),
-                'guardian_phone': CSVImportService._safe_string_value(row.get('guardian_phone')),
-                'guardian_email': guardian_email,
-                'guardian_relationship': CSVImportService._safe_string_value(row.get('guardian_relationship')),
-                'emergency_contact_name': CSVImportService._safe_string_value(row.get('emergency_contact_name')),
-                'emergency_contact_phone': CSVImportService._safe_string_value(row.get('emergency_contact_phone')),
-                'emergency_contact_relationship': CSVImportService._safe_string_value(row.get('emergency_contact_relationship')),
-                'medical_conditions': CSVImportService._safe_string_value(row.get('medical_conditions')),
-                'allergies': CSVImportService._safe_string_value(row.get('allergies')),
-                'blood_group': CSVImportService._safe_string_value(row.get('blood_group')),
-                'notes': CSVImportService._safe_string_value(row.get('notes')),
+    async def create_import_job(db: AsyncSession, school_id: str, started_by: str, content: str) -> dict:
+        """Queue a background import of already-checked CSV content and return its state"""
+        job = await JobService.enqueue(
+            db,
+            school_id,
+            IMPORT_JOB_TYPE,
+            {'content': content},
+            created_by=started_by,
+            progress={
+                'total_rows': 0,
+                'processed_rows': 0,
+                'successful_imports': 0,
+                'failed_imports': 0,
+                'rows_per_second': 0.0,
+                'errors': []
             }
+        )
+        return JobService.as_dict(job)
 
-            return student_data
-
-        except Exception as e:
-            raise ValueError(f"Row {row_number}: {str(e)}")
+    @staticmethod
+    async def get_import_job(db: AsyncSession, job_id: str, school_id: str) -> Optional[dict]:
+        """Get an import job's state, scoped to the school that started it"""
+        job = await JobService.get_job(db, job_id, school_id, job_type=IMPORT_JOB_TYPE)
+        return JobService.as_dict(job) if job else None
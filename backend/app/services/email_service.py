@@ -1,9 +1,44 @@
+import asyncio
 import logging
+from dataclasses import dataclass
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
 from typing import List, Optional
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_SENDER_NAME = "Edix School Platform"
+RESEND_SENDER_ADDRESS = "noreply@campuspq.com"
+
+
+@dataclass
+class OutgoingEmail:
+    """One email to one recipient, as handed to EmailService.send_bulk"""
+    to: str
+    subject: str
+    html_content: str
+    text_content: Optional[str] = None
+
+
+class RateLimiter:
+    """Spaces out provider requests to at most `rate` per second (0 disables)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = asyncio.get_running_loop().time()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
 
 class EmailService:
     """Service for sending emails using Resend API (HTTP-based, works on Render.com)"""
@@ -77,8 +112,8 @@ class EmailService:
             resend.api_key = settings.resend_api_key
             
             # Use dynamic school name or default to platform name
-            display_name = sender_name or "Edix School Platform"
-            sender = f"{display_name} <noreply@campuspq.com>"
+            display_name = sender_name or DEFAULT_SENDER_NAME
+            sender = f"{display_name} <{RESEND_SENDER_ADDRESS}>"
             
             logger.info(f"Sending email from: {sender}")
             
@@ -92,7 +127,8 @@ class EmailService:
             if text_content:
                 params["text"] = text_content
             
-            email_response = resend.Emails.send(params)
+            # The Resend client is blocking, so keep it off the event loop
+            email_response = await asyncio.to_thread(resend.Emails.send, params)
             
             logger.info(f"Email sent successfully via Resend to {', '.join(to_emails)}")
             logger.info(f"Resend response: {email_response}")
@@ -116,9 +152,7 @@ class EmailService:
     ) -> bool:
         """Send email using SMTP (fallback for local development)"""
         try:
-            import smtplib
-            from email.mime.text import MIMEText
-            from email.mime.multipart import MIMEMultipart
+            import aiosmtplib
             
             logger.info(f"Attempting to send email via SMTP to {to_emails}")
             logger.info(f"SMTP settings - Host: {settings.smtp_host}, Port: {settings.smtp_port}, User: {settings.smtp_user}")
@@ -127,43 +161,27 @@ class EmailService:
                 logger.warning("SMTP credentials not configured. Email not sent.")
                 return False
             
-            from_email = from_email or settings.emails_from_email
-            
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = from_email
-            msg['To'] = ', '.join(to_emails)
-            
-            # Add text content if provided
-            if text_content:
-                text_part = MIMEText(text_content, 'plain')
-                msg.attach(text_part)
-            
-            # Add HTML content
-            html_part = MIMEText(html_content, 'html')
-            msg.attach(html_part)
+            msg = EmailService._build_mime(to_emails, subject, html_content, text_content, from_email)
             
             # Connect to SMTP server and send email
             logger.info(f"Connecting to SMTP server {settings.smtp_host}:{settings.smtp_port}")
             logger.info(f"Using SSL: {settings.smtp_ssl}, Using TLS: {settings.smtp_tls}")
 
-            if settings.smtp_ssl:
-                server = smtplib.SMTP_SSL(settings.smtp_host, settings.smtp_port)
-                logger.info("Connected using SSL")
-            else:
-                server = smtplib.SMTP(settings.smtp_host, settings.smtp_port)
-                logger.info("Connected using regular SMTP")
-                if settings.smtp_tls:
-                    logger.info("Starting TLS")
-                    server.starttls()
+            server = aiosmtplib.SMTP(
+                hostname=settings.smtp_host,
+                port=settings.smtp_port,
+                use_tls=settings.smtp_ssl,
+                start_tls=settings.smtp_tls and not settings.smtp_ssl
+            )
+            await server.connect()
+            logger.info("Connected using SSL" if settings.smtp_ssl else "Connected using regular SMTP")
 
             logger.info(f"Logging in with user: {settings.smtp_user}")
-            server.login(settings.smtp_user, settings.smtp_password)
+            await server.login(settings.smtp_user, settings.smtp_password)
             logger.info("Login successful, sending message")
-            server.send_message(msg)
+            await server.send_message(msg)
             logger.info("Message sent, closing connection")
-            server.quit()
+            await server.quit()
 
             logger.info(f"Email sent successfully via SMTP to {', '.join(to_emails)}")
             return True
@@ -175,6 +193,156 @@ class EmailService:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return False
     
+    @staticmethod
+    def _build_mime(
+        to_emails: List[str],
+        subject: str,
+        html_content: str,
+        text_content: Optional[str] = None,
+        from_email: Optional[str] = None
+    ) -> MIMEMultipart:
+        """Build a multipart/alternative message with optional plain text and HTML parts"""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = from_email or settings.emails_from_email
+        msg['To'] = ', '.join(to_emails)
+        
+        # Add text content if provided
+        if text_content:
+            msg.attach(MIMEText(text_content, 'plain'))
+        
+        # Add HTML content
+        msg.attach(MIMEText(html_content, 'html'))
+        return msg
+
+    @staticmethod
+    async def send_bulk(
+        emails: List[OutgoingEmail],
+        sender_name: Optional[str] = None,
+        from_email: Optional[str] = None
+    ) -> List[Optional[str]]:
+        """
+        Send many emails, each to a single recipient.
+
+        Resend gets batch calls of up to email_batch_size emails; SMTP sends
+        over a few reused connections. Either way at most email_concurrency
+        requests are in flight and email_rate_limit paces them.
+
+        Returns:
+            list: One entry per email, None if it was accepted, else the error
+        """
+        if not emails:
+            return []
+        limiter = RateLimiter(settings.email_rate_limit)
+        if settings.resend_api_key:
+            return await EmailService._send_bulk_via_resend(emails, sender_name, limiter)
+        return await EmailService._send_bulk_via_smtp(emails, from_email, limiter)
+
+    @staticmethod
+    async def _send_bulk_via_resend(
+        emails: List[OutgoingEmail],
+        sender_name: Optional[str],
+        limiter: RateLimiter
+    ) -> List[Optional[str]]:
+        """Send emails through Resend's batch endpoint"""
+        import resend
+
+        resend.api_key = settings.resend_api_key
+        sender = f"{sender_name or DEFAULT_SENDER_NAME} <{RESEND_SENDER_ADDRESS}>"
+        errors: List[Optional[str]] = [None] * len(emails)
+        semaphore = asyncio.Semaphore(settings.email_concurrency)
+        size = settings.email_batch_size
+
+        async def send_batch(start: int) -> None:
+            params = []
+            for email in emails[start:start + size]:
+                item = {"from": sender, "to": [email.to], "subject": email.subject, "html": email.html_content}
+                if email.text_content:
+                    item["text"] = email.text_content
+                params.append(item)
+
+            async with semaphore:
+                await limiter.wait()
+                try:
+                    # The Resend client is blocking, so keep it off the event loop
+                    await asyncio.to_thread(resend.Batch.send, params)
+                except Exception as e:
+                    logger.error(f"Resend batch of {len(params)} emails failed: {str(e)}")
+                    errors[start:start + len(params)] = [str(e)] * len(params)
+
+        await asyncio.gather(*(send_batch(start) for start in range(0, len(emails), size)))
+        logger.info(f"Sent {errors.count(None)}/{len(emails)} emails via Resend batches")
+        return errors
+
+    @staticmethod
+    async def _send_bulk_via_smtp(
+        emails: List[OutgoingEmail],
+        from_email: Optional[str],
+        limiter: RateLimiter
+    ) -> List[Optional[str]]:
+        """Send emails over up to email_concurrency SMTP connections, each reused for many emails"""
+        import aiosmtplib
+
+        if not settings.smtp_user or not settings.smtp_password:
+            logger.warning("SMTP credentials not configured. Emails not sent.")
+            return ["SMTP credentials not configured"] * len(emails)
+
+        errors: List[Optional[str]] = [None] * len(emails)
+        attempted = [False] * len(emails)
+        pending = iter(range(len(emails)))
+        connection_errors: List[str] = []
+
+        async def worker() -> None:
+            smtp = aiosmtplib.SMTP(
+                hostname=settings.smtp_host,
+                port=settings.smtp_port,
+                use_tls=settings.smtp_ssl,
+                start_tls=settings.smtp_tls and not settings.smtp_ssl
+            )
+            try:
+                await smtp.connect()
+                await smtp.login(settings.smtp_user, settings.smtp_password)
+            except Exception as e:
+                # Leave this worker's share to the connections that did open
+                logger.error(f"SMTP connection to {settings.smtp_host}:{settings.smtp_port} failed: {str(e)}")
+                connection_errors.append(str(e))
+                return
+
+            try:
+                for index in pending:
+                    attempted[index] = True
+                    email = emails[index]
+                    await limiter.wait()
+                    try:
+                        await smtp.send_message(EmailService._build_mime(
+                            [email.to], email.subject, email.html_content, email.text_content, from_email
+                        ))
+                    except aiosmtplib.SMTPRecipientsRefused as e:
+                        errors[index] = "; ".join(f"{r.code} {r.message}" for r in e.recipients)
+                    except aiosmtplib.SMTPResponseException as e:
+                        errors[index] = f"{e.code} {e.message}"
+                    except aiosmtplib.SMTPException as e:
+                        # The connection is gone; the other connections carry on
+                        errors[index] = str(e)
+                        connection_errors.append(str(e))
+                        break
+            finally:
+                try:
+                    await smtp.quit()
+                except Exception:
+                    pass
+
+        workers = min(settings.email_concurrency, len(emails))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+        # Emails no connection got to, because every connection failed or broke
+        unsent = connection_errors[-1] if connection_errors else "SMTP connection lost"
+        for index, done in enumerate(attempted):
+            if not done:
+                errors[index] = unsent
+        logger.info(f"Sent {errors.count(None)}/{len(emails)} emails via SMTP")
+        return errors
+
     @staticmethod
     def generate_teacher_invitation_email(
         teacher_name: str,
@@ -1,18 +1,21 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, and_, text
+from sqlalchemy import select, delete, and_, exists, insert, text
 from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
 from datetime import date, datetime
 import uuid
 
-from app.models.academic import Enrollment, Subject, Class, Term
-from app.models.student import Student, StudentClassHistory, ClassHistoryStatus
+from app.models.academic import Enrollment, Subject, Class, Term, class_subject_association
+from app.models.student import Student, StudentClassHistory, ClassHistoryStatus, StudentStatus
 from app.schemas.academic import EnrollmentCreate, EnrollmentResponse
 from app.services.notification_service import NotificationService
 from app.schemas.notification import NotificationCreate
 from app.models.notification import NotificationType
 
+ENROLLMENT_NOTIFICATION_GROUP = "subject_enrollment"
+ENROLLMENT_NOTIFICATION_COLLAPSED = "You have been enrolled in {count} subjects."
+
 
 class EnrollmentService:
     """Service for managing student enrollments in subjects"""
@@ -87,164 +90,154 @@ class EnrollmentService:
         return enrollment
 
     @staticmethod
-    async def auto_enroll_students_in_class_subjects(
+    def _insert_skipping_duplicates(db: AsyncSession, table):
+        """INSERT that silently skips rows already covered by a unique index"""
+        dialect = db.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            return insert(table)
+        return dialect_insert(table).on_conflict_do_nothing()
+
+    @staticmethod
+    async def _enroll_missing(
         db: AsyncSession,
         class_id: str,
         school_id: str,
+        term: Term,
+        student_filter,
         subject_ids: Optional[List[str]] = None
-    ) -> List[Enrollment]:
+    ) -> List[tuple]:
         """
-        Automatically enroll all students in a class to the class's subjects
-        If subject_ids is provided, only enroll in those specific subjects
+        Enroll the students matching student_filter in the class's subjects for
+        the term, skipping pairs that are already enrolled.
+
+        The missing (student, subject) pairs come from one anti-join and are
+        written with one INSERT; returns (student_id, user_id, subject_name)
+        for every enrollment created.
         """
-        # Get current term
-        current_term = await EnrollmentService.get_current_term(db, school_id)
-        if not current_term:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No current term found. Please set a current term first."
+        query = (
+            select(Student.id, Student.user_id, Subject.id, Subject.name)
+            .select_from(Student)
+            .join(
+                class_subject_association,
+                and_(
+                    class_subject_association.c.class_id == class_id,
+                    class_subject_association.c.school_id == school_id,
+                    class_subject_association.c.is_deleted == False
+                )
             )
-
-        # Get all active students in the class
-        from app.models.student import StudentStatus
-        students_result = await db.execute(
-            select(Student).where(
-                Student.current_class_id == class_id,
+            .join(Subject, Subject.id == class_subject_association.c.subject_id)
+            .where(
+                student_filter,
                 Student.school_id == school_id,
                 Student.is_deleted == False,
-                Student.status == StudentStatus.ACTIVE
+                Subject.is_deleted == False,
+                Subject.is_active == True,
+                ~exists().where(
+                    Enrollment.student_id == Student.id,
+                    Enrollment.subject_id == Subject.id,
+                    Enrollment.term_id == term.id,
+                    Enrollment.school_id == school_id,
+                    Enrollment.is_deleted == False
+                )
             )
+            .distinct()
         )
-        students = students_result.scalars().all()
-
-        if not students:
-            return []
-
-        # Get class subjects (either specific subjects or all class subjects)
         if subject_ids:
-            # Get specific subjects assigned to this class
-            # Use IN clause instead of ANY for SQLite compatibility
-            placeholders = ','.join(['?' for _ in subject_ids])
-            query = text(f"""
-                SELECT DISTINCT s.id
-                FROM subjects s
-                JOIN class_subjects cs ON s.id = cs.subject_id
-                WHERE cs.class_id = :class_id
-                AND cs.school_id = :school_id
-                AND s.id IN ({placeholders})
-                AND cs.is_deleted = false
-                AND s.is_deleted = false
-                AND s.is_active = true
-            """)
-            params = {
-                "class_id": class_id,
-                "school_id": school_id,
-            }
-            # Add subject_ids as individual parameters
-            for i, subject_id in enumerate(subject_ids):
-                params[f"subject_id_{i}"] = subject_id
-
-            # Update placeholders to use named parameters
-            placeholders = ','.join([f':subject_id_{i}' for i in range(len(subject_ids))])
-            query = text(f"""
-                SELECT DISTINCT s.id
-                FROM subjects s
-                JOIN class_subjects cs ON s.id = cs.subject_id
-                WHERE cs.class_id = :class_id
-                AND cs.school_id = :school_id
-                AND s.id IN ({placeholders})
-                AND cs.is_deleted = false
-                AND s.is_deleted = false
-                AND s.is_active = true
-            """)
-            result = await db.execute(query, params)
-        else:
-            # Get all subjects assigned to this class
-            query = text("""
-                SELECT DISTINCT s.id
-                FROM subjects s
-                JOIN class_subjects cs ON s.id = cs.subject_id
-                WHERE cs.class_id = :class_id
-                AND cs.school_id = :school_id
-                AND cs.is_deleted = false
-                AND s.is_deleted = false
-                AND s.is_active = true
-            """)
-            result = await db.execute(query, {
-                "class_id": class_id,
-                "school_id": school_id
-            })
-
-        subject_ids_to_enroll = [row[0] for row in result.fetchall()]
-
-        if not subject_ids_to_enroll:
+            query = query.where(Subject.id.in_(subject_ids))
+        missing = (await db.execute(query)).all()
+        if not missing:
             return []
 
-        # Fetch subject names for notifications
-        subject_names = {}
-        if subject_ids_to_enroll:
-            subjects_query = select(Subject.id, Subject.name).where(Subject.id.in_(subject_ids_to_enroll))
-            subjects_res = await db.execute(subjects_query)
-            subject_names = {row.id: row.name for row in subjects_res.fetchall()}
-
-        # Create enrollments for each student-subject combination
-        enrollments = []
         enrollment_date = date.today()
-        
-        for student in students:
-            for subject_id in subject_ids_to_enroll:
-                # Check if enrollment already exists
-                existing_result = await db.execute(
-                    select(Enrollment).where(
-                        Enrollment.student_id == student.id,
-                        Enrollment.subject_id == subject_id,
-                        Enrollment.term_id == current_term.id,
-                        Enrollment.school_id == school_id,
-                        Enrollment.is_deleted == False
-                    )
-                )
-                
-                if not existing_result.scalar_one_or_none():
-                    # Create new enrollment
-                    enrollment = Enrollment(
-                        student_id=student.id,
-                        class_id=class_id,
-                        subject_id=subject_id,
-                        term_id=current_term.id,
-                        school_id=school_id,
-                        enrollment_date=enrollment_date,
-                        is_active=True
-                    )
-                    db.add(enrollment)
-                    enrollments.append(enrollment)
-                    
-                    # Notify Student
-                    if student.user_id:
-                        subject_name = subject_names.get(subject_id, "a subject")
-                        await NotificationService.create_notification(
-                            db=db,
-                            school_id=school_id,
-                            notification_data=NotificationCreate(
-                                user_id=student.user_id,
-                                title="Subject Enrollment",
-                                message=f"You have been enrolled in {subject_name}.",
-                                type=NotificationType.INFO,
-                                link="/academics/subjects"
-                            )
-                        )
+        table = Enrollment.__table__
+        # A concurrent run may have enrolled some pairs since the anti-join;
+        # the unique index turns those into no-ops and RETURNING leaves them out
+        created = await db.execute(
+            EnrollmentService._insert_skipping_duplicates(db, table).returning(table.c.student_id, table.c.subject_id),
+            [
+                {
+                    'student_id': student_id,
+                    'class_id': class_id,
+                    'subject_id': subject_id,
+                    'term_id': term.id,
+                    'school_id': school_id,
+                    'enrollment_date': enrollment_date,
+                    'is_active': True
+                }
+                for student_id, _, subject_id, _ in missing
+            ]
+        )
+        created_pairs = set(created.all())
+        return [
+            (student_id, user_id, subject_name)
+            for student_id, user_id, subject_id, subject_name in missing
+            if (student_id, subject_id) in created_pairs
+        ]
 
-        if enrollments:
-            await db.commit()
-            # Refresh all enrollments
-            for enrollment in enrollments:
-                await db.refresh(enrollment)
+    @staticmethod
+    async def auto_enroll_students_in_class_subjects(
+        db: AsyncSession,
+        class_id: str,
+        school_id: str,
+        subject_ids: Optional[List[str]] = None
+    ) -> Dict[str, int]:
+        """
+        Automatically enroll all active students in a class to the class's subjects
+        If subject_ids is provided, only enroll in those specific subjects
 
-            # Create class history records for students
-            await EnrollmentService._create_class_history_for_enrollments(
-                db, students, class_id, current_term, school_id
+        Returns counts of the enrollments and class history records created.
+        """
+        # Get current term
+        current_term = await EnrollmentService.get_current_term(db, school_id)
+        if not current_term:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No current term found. Please set a current term first."
             )
 
-        return enrollments
+        created = await EnrollmentService._enroll_missing(
+            db, class_id, school_id, current_term,
+            and_(Student.current_class_id == class_id, Student.status == StudentStatus.ACTIVE),
+            subject_ids
+        )
+        counts = {
+            'enrollments_created': len(created),
+            'students_enrolled': len({student_id for student_id, _, _ in created}),
+            'class_history_created': 0
+        }
+        if not created:
+            return counts
+
+        # Notify Students, one collapsing notification each however many subjects were added
+        await NotificationService.create_notifications_bulk(
+            db,
+            school_id,
+            [
+                NotificationCreate(
+                    user_id=user_id,
+                    title="Subject Enrollment",
+                    message=f"You have been enrolled in {subject_name}.",
+                    type=NotificationType.INFO,
+                    link="/academics/subjects"
+                )
+                for _, user_id, subject_name in created
+                if user_id
+            ],
+            group_key=ENROLLMENT_NOTIFICATION_GROUP,
+            collapsed_message=ENROLLMENT_NOTIFICATION_COLLAPSED,
+            commit=False
+        )
+
+        # Create class history records for students
+        counts['class_history_created'] = await EnrollmentService._create_class_history_for_enrollments(
+            db, class_id, current_term, school_id
+        )
+        await db.commit()
+        return counts
 
     @staticmethod
     async def auto_enroll_student_in_class_subjects(
@@ -252,7 +245,7 @@ class EnrollmentService:
         student_id: str,
         class_id: str,
         school_id: str
-    ) -> List[Enrollment]:
+    ) -> Dict[str, int]:
         """
         Automatically enroll a specific student in all subjects of their class
         """
@@ -264,64 +257,12 @@ class EnrollmentService:
                 detail="No current term found. Please set a current term first."
             )
 
-        # Get all subjects assigned to the class
-        query = text("""
-            SELECT DISTINCT s.id
-            FROM subjects s
-            JOIN class_subjects cs ON s.id = cs.subject_id
-            WHERE cs.class_id = :class_id
-            AND cs.school_id = :school_id
-            AND cs.is_deleted = false
-            AND s.is_deleted = false
-            AND s.is_active = true
-        """)
-        result = await db.execute(query, {
-            "class_id": class_id,
-            "school_id": school_id
-        })
-
-        subject_ids = [row[0] for row in result.fetchall()]
-
-        if not subject_ids:
-            return []
-
-        # Create enrollments for each subject
-        enrollments = []
-        enrollment_date = date.today()
-        
-        for subject_id in subject_ids:
-            # Check if enrollment already exists
-            existing_result = await db.execute(
-                select(Enrollment).where(
-                    Enrollment.student_id == student_id,
-                    Enrollment.subject_id == subject_id,
-                    Enrollment.term_id == current_term.id,
-                    Enrollment.school_id == school_id,
-                    Enrollment.is_deleted == False
-                )
-            )
-            
-            if not existing_result.scalar_one_or_none():
-                # Create new enrollment
-                enrollment = Enrollment(
-                    student_id=student_id,
-                    class_id=class_id,
-                    subject_id=subject_id,
-                    term_id=current_term.id,
-                    school_id=school_id,
-                    enrollment_date=enrollment_date,
-                    is_active=True
-                )
-                db.add(enrollment)
-                enrollments.append(enrollment)
-
-        if enrollments:
+        created = await EnrollmentService._enroll_missing(
+            db, class_id, school_id, current_term, Student.id == student_id
+        )
+        if created:
             await db.commit()
-            # Refresh all enrollments
-            for enrollment in enrollments:
-                await db.refresh(enrollment)
-
-        return enrollments
+        return {'enrollments_created': len(created)}
 
     @staticmethod
     async def get_enrollments(
@@ -449,37 +390,49 @@ class EnrollmentService:
     @staticmethod
     async def _create_class_history_for_enrollments(
         db: AsyncSession,
-        students: List[Student],
         class_id: str,
         term: Term,
         school_id: str
-    ) -> None:
-        """Helper method to create class history records for enrolled students"""
-        for student in students:
-            # Check if class history already exists for this student-term combination
-            existing_result = await db.execute(
-                select(StudentClassHistory).where(
-                    StudentClassHistory.student_id == student.id,
+    ) -> int:
+        """
+        Helper method to create class history records for the active students of
+        a class that have none for the term; returns how many were created.
+        The caller commits.
+        """
+        result = await db.execute(
+            select(Student.id).where(
+                Student.current_class_id == class_id,
+                Student.school_id == school_id,
+                Student.is_deleted == False,
+                Student.status == StudentStatus.ACTIVE,
+                ~exists().where(
+                    StudentClassHistory.student_id == Student.id,
                     StudentClassHistory.term_id == term.id,
                     StudentClassHistory.school_id == school_id,
                     StudentClassHistory.is_deleted == False
                 )
             )
-            existing = existing_result.scalar_one_or_none()
-
-            if not existing:
-                # Create new class history record
-                history = StudentClassHistory(
-                    student_id=student.id,
-                    class_id=class_id,
-                    term_id=term.id,
-                    academic_session=term.academic_session,
-                    academic_session_id=term.academic_session_id,  # Set FK for proper querying
-                    school_id=school_id,
-                    enrollment_date=date.today(),
-                    status=ClassHistoryStatus.ACTIVE,
-                    is_current=term.is_current
-                )
-                db.add(history)
+        )
+        student_ids = result.scalars().all()
+        if not student_ids:
+            return 0
 
-        await db.commit()
+        enrollment_date = date.today()
+        await db.execute(
+            insert(StudentClassHistory.__table__),
+            [
+                {
+                    'student_id': student_id,
+                    'class_id': class_id,
+                    'term_id': term.id,
+                    'academic_session': term.academic_session,
+                    'academic_session_id': term.academic_session_id,  # Set FK for proper querying
+                    'school_id': school_id,
+                    'enrollment_date': enrollment_date,
+                    'status': ClassHistoryStatus.ACTIVE,
+                    'is_current': term.is_current
+                }
+                for student_id in student_ids
+            ]
+        )
+        return len(student_ids)
@@ -1,221 +1,362 @@
-from typing import Optional
+from typing import AsyncIterator, Optional
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased
+from fastapi.responses import StreamingResponse
+import asyncio
 import csv
 import io
+import tempfile
 
+from openpyxl import Workbook
+
+from app.models.academic import Class, Subject, teacher_subject_association
 from app.models.student import Student, StudentStatus
 from app.models.user import User, UserRole
 
+# Rows fetched per server-side cursor round trip, and written per yielded chunk
+EXPORT_BATCH_SIZE = 500
+
+# Bytes per chunk when streaming a finished XLSX file
+XLSX_CHUNK_SIZE = 64 * 1024
+
+EXPORT_MEDIA_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+STUDENT_EXPORT_HEADER = [
+    'Admission Number',
+    'First Name',
+    'Middle Name',
+    'Last Name',
+    'Date of Birth',
+    'Age',
+    'Gender',
+    'Email',
+    'Phone',
+    'Current Class',
+    'Status',
+    'Admission Date',
+    'Parent Name',
+    'Guardian Name',
+    'Guardian Phone',
+    'Guardian Email',
+    'Guardian Relationship',
+    'Emergency Contact Name',
+    'Emergency Contact Phone',
+    'Emergency Contact Relationship',
+    'Medical Conditions',
+    'Allergies',
+    'Blood Group',
+    'Address Line 1',
+    'Address Line 2',
+    'City',
+    'State',
+    'Postal Code'
+]
+
+TEACHER_EXPORT_HEADER = [
+    'Employee ID',
+    'First Name',
+    'Last Name',
+    'Email',
+    'Phone',
+    'Department',
+    'Position',
+    'Hire Date',
+    'Status',
+    'Subjects Taught',
+    'Classes Assigned'
+]
+
+
+def _enum_value(value) -> str:
+    return value.value if hasattr(value, 'value') else str(value)
+
 
 class ExportService:
+    """
+    Exports stream: rows are read through a server-side cursor and written
+    out a batch at a time, so memory stays flat however large the school is.
+    Row generators yield plain lists (header first) that write_csv and
+    write_xlsx turn into response chunks.
+    """
+
     @staticmethod
-    async def export_students_csv(
+    async def student_rows(
         db: AsyncSession,
         school_id: str,
         class_id: Optional[str] = None,
         status: Optional[StudentStatus] = None,
         search: Optional[str] = None
-    ) -> str:
-        """
-        Generate CSV content for students export with filters
-        """
-        # Build query with filters
-        query = select(Student).options(
-            selectinload(Student.current_class),
-            selectinload(Student.parent)
+    ) -> AsyncIterator[list]:
+        """Yield the students export header, then one row per matching student"""
+        parent = aliased(User)
+        query = select(
+            Student.admission_number,
+            Student.first_name,
+            Student.middle_name,
+            Student.last_name,
+            Student.date_of_birth,
+            Student.gender,
+            Student.email,
+            Student.phone,
+            Class.name,
+            Student.status,
+            Student.admission_date,
+            parent.first_name,
+            parent.middle_name,
+            parent.last_name,
+            Student.guardian_name,
+            Student.guardian_phone,
+            Student.guardian_email,
+            Student.guardian_relationship,
+            Student.emergency_contact_name,
+            Student.emergency_contact_phone,
+            Student.emergency_contact_relationship,
+            Student.medical_conditions,
+            Student.allergies,
+            Student.blood_group,
+            Student.address_line1,
+            Student.address_line2,
+            Student.city,
+            Student.state,
+            Student.postal_code
+        ).outerjoin(
+            Class, Student.current_class_id == Class.id
+        ).outerjoin(
+            parent, Student.parent_id == parent.id
         ).where(
             Student.school_id == school_id,
             Student.is_deleted == False
-        )
-        
+        ).order_by(Student.admission_number)
+
         # Apply filters
         if class_id:
             query = query.where(Student.current_class_id == class_id)
-        
+
         if status:
             query = query.where(Student.status == status)
-        
+
         if search:
-            search_filter = or_(
+            query = query.where(or_(
                 Student.first_name.ilike(f"%{search}%"),
                 Student.last_name.ilike(f"%{search}%"),
                 Student.admission_number.ilike(f"%{search}%")
+            ))
+
+        yield STUDENT_EXPORT_HEADER
+
+        today = datetime.now().date()
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for (
+            admission_number, first_name, middle_name, last_name, date_of_birth, gender, email, phone,
+            class_name, student_status, admission_date, parent_first, parent_middle, parent_last,
+            *details
+        ) in result:
+            age = today.year - date_of_birth.year - (
+                (today.month, today.day) < (date_of_birth.month, date_of_birth.day)
             )
-            query = query.where(search_filter)
-        
-        # Execute query
-        result = await db.execute(query)
-        students = result.scalars().all()
-        
-        # Generate CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Header row
-        writer.writerow([
-            'Admission Number',
-            'First Name',
-            'Middle Name',
-            'Last Name',
-            'Date of Birth',
-            'Age',
-            'Gender',
-            'Email',
-            'Phone',
-            'Current Class',
-            'Status',
-            'Admission Date',
-            'Parent Name',
-            'Guardian Name',
-            'Guardian Phone',
-            'Guardian Email',
-            'Guardian Relationship',
-            'Emergency Contact Name',
-            'Emergency Contact Phone',
-            'Emergency Contact Relationship',
-            'Medical Conditions',
-            'Allergies',
-            'Blood Group',
-            'Address Line 1',
-            'Address Line 2',
-            'City',
-            'State',
-            'Postal Code'
-        ])
-        
-        # Data rows
-        for student in students:
-            # Calculate age
-            today = datetime.now().date()
-            age = today.year - student.date_of_birth.year - (
-                (today.month, today.day) < (student.date_of_birth.month, student.date_of_birth.day)
-            )
-            
-            writer.writerow([
-                student.admission_number,
-                student.first_name,
-                student.middle_name or '',
-                student.last_name,
-                student.date_of_birth.strftime('%Y-%m-%d'),
+            parent_name = ' '.join(part for part in (parent_first, parent_middle, parent_last) if part)
+            yield [
+                admission_number,
+                first_name,
+                middle_name or '',
+                last_name,
+                date_of_birth,
                 age,
-                student.gender,
-                student.email or '',
-                student.phone or '',
-                student.current_class.name if student.current_class else '',
-                student.status.value if hasattr(student.status, 'value') else str(student.status),
-                student.admission_date.strftime('%Y-%m-%d') if student.admission_date else '',
-                student.parent.full_name if student.parent else '',
-                student.guardian_name or '',
-                student.guardian_phone or '',
-                student.guardian_email or '',
-                student.guardian_relationship or '',
-                student.emergency_contact_name or '',
-                student.emergency_contact_phone or '',
-                student.emergency_contact_relationship or '',
-                student.medical_conditions or '',
-                student.allergies or '',
-                student.blood_group or '',
-                student.address_line1 or '',
-                student.address_line2 or '',
-                student.city or '',
-                student.state or '',
-                student.postal_code or ''
-            ])
-        
-        return output.getvalue()
+                _enum_value(gender),
+                email or '',
+                phone or '',
+                class_name or '',
+                _enum_value(student_status),
+                admission_date or '',
+                parent_name,
+                *(value or '' for value in details)
+            ]
 
     @staticmethod
-    async def export_teachers_csv(
+    async def teacher_rows(
         db: AsyncSession,
         school_id: str,
         department: Optional[str] = None,
         is_active: Optional[bool] = None
-    ) -> str:
-        """
-        Generate CSV content for teachers export with filters
-        """
-        from app.models.academic import teacher_subject_association, Subject, Class
-        
-        # Build query with filters - load taught_classes relationship
-        query = select(User).options(
-            selectinload(User.taught_classes)
+    ) -> AsyncIterator[list]:
+        """Yield the teachers export header, then one row per matching teacher"""
+        # Subjects and classes per teacher in two queries instead of two per teacher
+        subjects_result = await db.execute(
+            select(teacher_subject_association.c.teacher_id, Subject.name).join(
+                Subject, Subject.id == teacher_subject_association.c.subject_id
+            ).where(
+                teacher_subject_association.c.school_id == school_id,
+                teacher_subject_association.c.is_deleted == False
+            )
+        )
+        subjects = {}
+        for teacher_id, name in subjects_result:
+            subjects.setdefault(teacher_id, set()).add(name)
+
+        classes_result = await db.execute(
+            select(Class.teacher_id, Class.name).where(
+                Class.school_id == school_id,
+                Class.teacher_id.isnot(None),
+                Class.is_deleted == False
+            )
+        )
+        classes = {}
+        for teacher_id, name in classes_result:
+            classes.setdefault(teacher_id, set()).add(name)
+
+        query = select(
+            User.id,
+            User.employee_id,
+            User.first_name,
+            User.last_name,
+            User.email,
+            User.phone,
+            User.department,
+            User.position,
+            User.created_at,
+            User.is_active
         ).where(
             User.school_id == school_id,
             User.role == UserRole.TEACHER,
             User.is_deleted == False
-        )
-        
+        ).order_by(User.last_name, User.first_name)
+
         # Apply filters
         if department:
             query = query.where(User.department == department)
-        
+
         if is_active is not None:
             query = query.where(User.is_active == is_active)
-        
-        # Execute query
-        result = await db.execute(query)
-        teachers = result.scalars().all()
-        
-        # Generate CSV
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Header row
-        writer.writerow([
-            'Employee ID',
-            'First Name',
-            'Last Name',
-            'Email',
-            'Phone',
-            'Department',
-            'Position',
-            'Hire Date',
-            'Status',
-            'Subjects Taught',
-            'Classes Assigned'
-        ])
-        
-        # Data rows
-        for teacher in teachers:
-            # Get teacher's subjects from the association table
-            subjects_query = select(
-                teacher_subject_association.c.subject_id
-            ).where(
-                teacher_subject_association.c.teacher_id == teacher.id,
-                teacher_subject_association.c.school_id == school_id,
-                teacher_subject_association.c.is_deleted == False
-            )
-            
-            subjects_result = await db.execute(subjects_query)
-            subject_ids = [row[0] for row in subjects_result.fetchall()]
-            
-            # Get subject details
-            subjects = set()
-            if subject_ids:
-                subject_query = select(Subject).where(Subject.id.in_(subject_ids))
-                subject_result = await db.execute(subject_query)
-                subjects = {s.name for s in subject_result.scalars().all()}
-            
-            # Get classes through taught_classes relationship
-            classes = set()
-            if teacher.taught_classes:
-                classes = {c.name for c in teacher.taught_classes if not c.is_deleted}
-            
-            writer.writerow([
-                teacher.employee_id or '',
-                teacher.first_name,
-                teacher.last_name,
-                teacher.email,
-                teacher.phone or '',
-                teacher.department or '',
-                teacher.position or 'Teacher',
-                teacher.created_at.strftime('%Y-%m-%d') if teacher.created_at else '',
-                'Active' if teacher.is_active else 'Inactive',
-                ', '.join(sorted(subjects)) if subjects else '',
-                ', '.join(sorted(classes)) if classes else ''
-            ])
-        
-        return output.getvalue()
+
+        yield TEACHER_EXPORT_HEADER
+
+        result = await db.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for (
+            teacher_id, employee_id, first_name, last_name, email, phone,
+            department_name, position, created_at, active
+        ) in result:
+            yield [
+                employee_id or '',
+                first_name,
+                last_name,
+                email,
+                phone or '',
+                department_name or '',
+                position or 'Teacher',
+                created_at.strftime('%Y-%m-%d') if created_at else '',
+                'Active' if active else 'Inactive',
+                ', '.join(sorted(subjects.get(teacher_id, ()))),
+                ', '.join(sorted(classes.get(teacher_id, ())))
+            ]
+
+    @staticmethod
+    async def write_csv(rows: AsyncIterator[list]) -> AsyncIterator[str]:
+        """Encode rows as CSV, yielding one chunk per EXPORT_BATCH_SIZE rows"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        pending = 0
+        async for row in rows:
+            writer.writerow(row)
+            pending += 1
+            if pending == EXPORT_BATCH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+        if pending:
+            yield buffer.getvalue()
+
+    @staticmethod
+    async def write_xlsx(rows: AsyncIterator[list], title: str) -> AsyncIterator[bytes]:
+        """
+        Encode rows as a one-sheet XLSX workbook.
+
+        The workbook is write-only, so openpyxl spools rows to disk as they
+        are appended; the finished file is then streamed from disk. Cell
+        encoding is CPU-bound, so batches are appended in a worker thread to
+        keep the event loop free.
+        """
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=title[:31])
+
+        def append(batch):
+            for row in batch:
+                sheet.append(row)
+
+        batch = []
+        async for row in rows:
+            batch.append(row)
+            if len(batch) == EXPORT_BATCH_SIZE:
+                await asyncio.to_thread(append, batch)
+                batch = []
+        if batch:
+            await asyncio.to_thread(append, batch)
+
+        with tempfile.TemporaryFile() as output:
+            await asyncio.to_thread(workbook.save, output)
+            output.seek(0)
+            while chunk := output.read(XLSX_CHUNK_SIZE):
+                yield chunk
+
+    @staticmethod
+    def streaming_response(
+        db: AsyncSession,
+        rows: AsyncIterator[list],
+        filename: str,
+        format: str = 'csv'
+    ) -> StreamingResponse:
+        """
+        Stream rows as a CSV or XLSX download.
+
+        FastAPI closes the request's session before a streamed body is sent.
+        A closed session can be used again, so the rows are read through it
+        on a fresh connection, which is released once the body is finished.
+        """
+        async def body():
+            try:
+                if format == 'xlsx':
+                    async for chunk in ExportService.write_xlsx(rows, filename):
+                        yield chunk
+                else:
+                    async for chunk in ExportService.write_csv(rows):
+                        yield chunk
+            finally:
+                await db.close()
+
+        return StreamingResponse(
+            body(),
+            media_type=EXPORT_MEDIA_TYPES[format],
+            headers={"Content-Disposition": f"attachment; filename={filename}.{format}"}
+        )
+
+    @staticmethod
+    async def export_students_csv(
+        db: AsyncSession,
+        school_id: str,
+        class_id: Optional[str] = None,
+        status: Optional[StudentStatus] = None,
+        search: Optional[str] = None
+    ) -> str:
+        """
+        Generate CSV content for students export with filters
+        """
+        rows = ExportService.student_rows(db, school_id, class_id, status, search)
+        return ''.join([chunk async for chunk in ExportService.write_csv(rows)])
+
+    @staticmethod
+    async def export_teachers_csv(
+        db: AsyncSession,
+        school_id: str,
+        department: Optional[str] = None,
+        is_active: Optional[bool] = None
+    ) -> str:
+        """
+        Generate CSV content for teachers export with filters
+        """
+        rows = ExportService.teacher_rows(db, school_id, department, is_active)
+        return ''.join([chunk async for chunk in ExportService.write_csv(rows)])
@@ -1,6 +1,6 @@
 from typing import Optional, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_, or_, exists, insert
 from fastapi import HTTPException, status
 from decimal import Decimal
 from datetime import date, datetime, timedelta
@@ -17,6 +17,10 @@ import uuid
 from app.services.notification_service import NotificationService
 from app.schemas.notification import NotificationCreate
 from app.models.notification import NotificationType
+from app.core.cache_manager import CacheManager, tenant_tag
+
+FEE_ASSIGNMENT_CHUNK_SIZE = 500
+FEE_ASSIGNMENT_JOB_TYPE = "fee_assignment"
 
 
 class FeeService:
@@ -53,6 +57,7 @@ class FeeService:
         fee_structure = FeeStructure(**fee_dict)
         db.add(fee_structure)
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "fees"))
         await db.refresh(fee_structure)
         
         return fee_structure
@@ -116,6 +121,7 @@ class FeeService:
             setattr(fee_structure, field, value)
         
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "fees"))
         await db.refresh(fee_structure)
         
         # Notify Students (Optional - depends on business logic)
@@ -164,6 +170,7 @@ class FeeService:
         fee_structure.updated_at = datetime.utcnow()
 
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "fees"))
         return True
 
     # Fee Assignment Management
@@ -201,6 +208,7 @@ class FeeService:
         assignment = FeeAssignment(**assignment_dict)
         db.add(assignment)
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "fees"))
         await db.refresh(assignment)
         
         # Notify Student
@@ -232,9 +240,23 @@ class FeeService:
     async def bulk_create_fee_assignments(
         db: AsyncSession,
         bulk_data: BulkFeeAssignmentCreate,
-        school_id: str
-    ) -> List[FeeAssignment]:
-        """Create fee assignments for multiple students"""
+        school_id: str,
+        chunk_size: int = FEE_ASSIGNMENT_CHUNK_SIZE,
+        progress: Optional[dict] = None,
+        collect_ids: bool = True
+    ) -> dict:
+        """
+        Create fee assignments for every student in the given classes.
+
+        One query lists the target students together with whether each
+        already has this fee for the term; the rest are inserted chunk_size
+        rows per INSERT, with their notifications, and committed chunk by
+        chunk so a whole school never holds one long transaction. Rerunning
+        after a failure only assigns the students still missing.
+
+        Returns a summary, plus the new assignment ids unless collect_ids is
+        off. Pass a dict as progress to have counters updated after every chunk.
+        """
         # Get fee structure
         fee_result = await db.execute(
             select(FeeStructure).where(
@@ -251,81 +273,117 @@ class FeeService:
                 detail="Fee structure not found"
             )
         
-        # Get students from specified classes
+        # Students in the classes, flagged when they already have this fee for the term
         students_result = await db.execute(
-            select(Student).where(
-                Student.current_class_id.in_(bulk_data.class_ids),
-                Student.school_id == school_id,
-                Student.is_deleted == False
-            )
-        )
-        students = students_result.scalars().all()
-        
-        assignments = []
-        for student in students:
-            # Check if assignment already exists
-            existing_result = await db.execute(
-                select(FeeAssignment).where(
-                    FeeAssignment.student_id == student.id,
+            select(
+                Student.id,
+                Student.user_id,
+                exists().where(
+                    FeeAssignment.student_id == Student.id,
                     FeeAssignment.fee_structure_id == bulk_data.fee_structure_id,
                     FeeAssignment.term_id == bulk_data.term_id,
                     FeeAssignment.school_id == school_id,
                     FeeAssignment.is_deleted == False
-                )
-            )
-            if existing_result.scalar_one_or_none():
-                continue  # Skip if already exists
-            
-            # Create assignment
-            assignment = FeeAssignment(
-                student_id=student.id,
-                fee_structure_id=bulk_data.fee_structure_id,
-                term_id=bulk_data.term_id,
-                assigned_date=date.today(),
-                due_date=bulk_data.due_date or fee_structure.due_date or (date.today() + timedelta(days=30)),
-                amount=fee_structure.amount,
-                discount_amount=bulk_data.discount_amount or Decimal('0.00'),
-                discount_reason=bulk_data.discount_reason,
-                amount_outstanding=fee_structure.amount - (bulk_data.discount_amount or Decimal('0.00')),
-                school_id=school_id
+                ).label('assigned')
+            ).where(
+                Student.current_class_id.in_(bulk_data.class_ids),
+                Student.school_id == school_id,
+                Student.is_deleted == False
             )
-            
-            db.add(assignment)
-            assignments.append(assignment)
-        
-        await db.commit()
-        
-        await db.commit()
-        
-        # Fetch created assignments with relationships
-        assignment_ids = [a.id for a in assignments]
-        query = select(FeeAssignment).where(
-            FeeAssignment.id.in_(assignment_ids)
-        ).options(
-            selectinload(FeeAssignment.student).selectinload(Student.current_class),
-            selectinload(FeeAssignment.fee_structure),
-            selectinload(FeeAssignment.term)
         )
-        
-        result = await db.execute(query)
-        assignments = result.scalars().all()
-        
-        # Notify Students
-        for assignment in assignments:
-            if assignment.student and assignment.student.user_id:
-                 await NotificationService.create_notification(
-                    db=db,
-                    school_id=school_id,
-                    notification_data=NotificationCreate(
-                        user_id=assignment.student.user_id,
+        students = students_result.all()
+        missing = [(student_id, user_id) for student_id, user_id, assigned in students if not assigned]
+
+        summary = {
+            'fee_structure_id': fee_structure.id,
+            'term_id': bulk_data.term_id,
+            'total_students': len(students),
+            'created_count': 0,
+            'skipped_count': len(students) - len(missing)
+        }
+        if progress is not None:
+            progress.update(total_students=len(students), processed_students=summary['skipped_count'],
+                            created_count=0, skipped_count=summary['skipped_count'])
+
+        discount_amount = bulk_data.discount_amount or Decimal('0.00')
+        assignment_values = {
+            'fee_structure_id': fee_structure.id,
+            'term_id': bulk_data.term_id,
+            'assigned_date': date.today(),
+            'due_date': bulk_data.due_date or fee_structure.due_date or (date.today() + timedelta(days=30)),
+            'amount': fee_structure.amount,
+            'discount_amount': discount_amount,
+            'discount_reason': bulk_data.discount_reason,
+            'amount_outstanding': fee_structure.amount - discount_amount,
+            'school_id': school_id
+        }
+        message = f"A new fee '{fee_structure.name}' of {fee_structure.amount} has been assigned to you."
+
+        assignment_ids = []
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            rows = [
+                {**assignment_values, 'id': str(uuid.uuid4()), 'student_id': student_id}
+                for student_id, _ in chunk
+            ]
+            await db.execute(insert(FeeAssignment.__table__), rows)
+
+            # Notify Students
+            await NotificationService.create_notifications_bulk(
+                db,
+                school_id,
+                [
+                    NotificationCreate(
+                        user_id=user_id,
                         title="New Fee Assigned",
-                        message=f"A new fee '{assignment.fee_structure.name}' of {assignment.amount} has been assigned to you.",
-                        type=NotificationType.WARNING,
+                        message=message,
+                        type=NotificationType.WARNING,  # Warning because it's a debt
                         link="/fees"
                     )
+                    for _, user_id in chunk
+                    if user_id
+                ],
+                commit=False
+            )
+            await db.commit()
+
+            summary['created_count'] += len(rows)
+            if collect_ids:
+                assignment_ids.extend(row['id'] for row in rows)
+            if progress is not None:
+                progress.update(
+                    processed_students=summary['skipped_count'] + summary['created_count'],
+                    created_count=summary['created_count']
                 )
 
-        return assignments
+        if summary['created_count']:
+            await CacheManager.invalidate_tags(tenant_tag(school_id, "fees"))
+        if collect_ids:
+            summary['assignment_ids'] = assignment_ids
+        return summary
+
+    @staticmethod
+    async def get_fee_assignments_by_ids(
+        db: AsyncSession,
+        school_id: str,
+        assignment_ids: List[str]
+    ) -> List[FeeAssignment]:
+        """Get fee assignments by id, in the order given, with their related data"""
+        if not assignment_ids:
+            return []
+        result = await db.execute(
+            select(FeeAssignment).where(
+                FeeAssignment.id.in_(assignment_ids),
+                FeeAssignment.school_id == school_id,
+                FeeAssignment.is_deleted == False
+            ).options(
+                selectinload(FeeAssignment.student).selectinload(Student.current_class),
+                selectinload(FeeAssignment.fee_structure),
+                selectinload(FeeAssignment.term)
+            )
+        )
+        by_id = {assignment.id: assignment for assignment in result.scalars().all()}
+        return [by_id[assignment_id] for assignment_id in assignment_ids if assignment_id in by_id]
     
     @staticmethod
     async def get_student_fee_assignments(
@@ -365,7 +423,8 @@ class FeeService:
         fee_type: Optional[str] = None,
         search: Optional[str] = None,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        fee_structure_id: Optional[str] = None
     ) -> List[FeeAssignment]:
         """Get all fee assignments for a school with filters"""
         query = select(FeeAssignment).where(
@@ -380,6 +439,9 @@ class FeeService:
         
         if term_id:
             query = query.where(FeeAssignment.term_id == term_id)
+
+        if fee_structure_id:
+            query = query.where(FeeAssignment.fee_structure_id == fee_structure_id)
             
         if class_id:
             query = query.join(Student).where(Student.current_class_id == class_id)
@@ -532,6 +594,7 @@ class FeeService:
         
         await db.commit()
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "fees"))
         
         # Fetch payment with relationships
         result = await db.execute(
@@ -1,12 +1,30 @@
+"""
+File Upload Service
+
+Uploaded images are decoded and re-encoded in a process pool
+(settings.image_workers processes, see image_pipeline) so a large upload never
+stalls the event loop, and the blocking Cloudinary SDK and local file writes
+run on threads.
+
+Stored images are named by owner and content hash. With local storage one
+upload produces <owner>_<hash>.png (the URL returned) plus a .webp copy and
+_<width>.png/.webp responsive copies next to it; Cloudinary gets the PNG
+and serves other sizes and formats itself. Uploading an image that is
+already stored, or that is being processed for another request, reuses that
+work instead of repeating it.
+"""
+
+import asyncio
+import glob
+import multiprocessing
 import os
-import uuid
-import aiofiles
 import logging
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence
 from fastapi import HTTPException, UploadFile, status
-from PIL import Image
-import io
 from app.core.config import settings
+from app.services.image_pipeline import ImageVariant, content_hash, process_image
 
 logger = logging.getLogger(__name__)
 
@@ -18,8 +36,12 @@ class FileUploadService:
     MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
     LOGO_MAX_DIMENSIONS = (500, 500)  # Max width/height for logos
     PROFILE_MAX_DIMENSIONS = (200, 200)  # Max width/height for profile pictures
+    LOGO_WIDTHS = (250, 120)  # Responsive copies of a logo stored locally
+    PROFILE_WIDTHS = (96, 48)  # Responsive copies of a profile picture stored locally
     
     _cloudinary_configured = False
+    _image_pool: Optional[ProcessPoolExecutor] = None
+    _in_flight: Dict[str, asyncio.Future] = {}
     
     @classmethod
     def _configure_cloudinary(cls) -> bool:
@@ -78,44 +100,147 @@ class FileUploadService:
                 detail=f"File too large. Maximum size: {FileUploadService.MAX_IMAGE_SIZE // (1024*1024)}MB"
             )
     
-    @staticmethod
-    async def _resize_image(image_data: bytes, max_dimensions: tuple[int, int]) -> bytes:
-        """Resize image if it exceeds max dimensions"""
+    
+    @classmethod
+    def _get_image_pool(cls) -> Optional[ProcessPoolExecutor]:
+        """The image processing pool, started on first use; None when image_workers is 0"""
+        if cls._image_pool is None and settings.image_workers > 0:
+            # Spawned rather than forked: the parent runs an event loop and driver threads
+            cls._image_pool = ProcessPoolExecutor(
+                max_workers=settings.image_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return cls._image_pool
+    
+    @classmethod
+    def shutdown(cls) -> None:
+        """Stop the image processing pool (called on app shutdown)"""
+        pool, cls._image_pool = cls._image_pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    @classmethod
+    async def _process_image(
+        cls,
+        image_data: bytes,
+        max_dimensions: tuple[int, int],
+        widths: Sequence[int] = (),
+        webp: bool = True
+    ) -> List[ImageVariant]:
+        """Decode, resize and encode an image off the event loop"""
+        pool = cls._get_image_pool()
         try:
-            # Open image
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Convert to RGB if necessary (for PNG with transparency)
-            if image.mode in ('RGBA', 'LA', 'P'):
-                # Create white background
-                background = Image.new('RGB', image.size, (255, 255, 255))
-                if image.mode == 'P':
-                    image = image.convert('RGBA')
-                background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
-                image = background
-            
-            # Resize if needed
-            if image.size[0] > max_dimensions[0] or image.size[1] > max_dimensions[1]:
-                image.thumbnail(max_dimensions, Image.Resampling.LANCZOS)
-            
-            # Save to bytes
-            output = io.BytesIO()
-            image.save(output, format='PNG', optimize=True)
-            return output.getvalue()
-            
+            if pool is None:
+                return await asyncio.to_thread(process_image, image_data, max_dimensions, widths, webp)
+            return await asyncio.get_running_loop().run_in_executor(
+                pool, process_image, image_data, max_dimensions, widths, webp
+            )
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool for the next upload
+            if cls._image_pool is pool:
+                cls.shutdown()
+            logger.error("Image processing pool broke while processing an upload")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to process image"
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid image file: {str(e)}"
             )
     
+    @classmethod
+    async def _once(cls, key: str, make: Callable[[], Awaitable[str]]) -> str:
+        """Run make() once for concurrent callers with the same key and share its result"""
+        pending = cls._in_flight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(make())
+            cls._in_flight[key] = pending
+            pending.add_done_callback(lambda _: cls._in_flight.pop(key, None))
+        # Shielded so one caller going away does not cancel the others' upload
+        return await asyncio.shield(pending)
+    
+    @staticmethod
+    def _write_variants(directory: str, stem: str, variants: List[ImageVariant]) -> None:
+        """Write an image's variants, the full-size PNG last so its presence means the set is complete"""
+        os.makedirs(directory, exist_ok=True)
+        for variant in reversed(variants):
+            path = os.path.join(directory, f"{stem}{variant.suffix}{variant.extension}")
+            with open(f"{path}.tmp", 'wb') as f:
+                f.write(variant.data)
+            os.replace(f"{path}.tmp", path)
+    
+    @staticmethod
+    def _remove_stored(directory: str, filename: str) -> None:
+        """Remove a locally stored image and its variants"""
+        stem = os.path.splitext(filename)[0]
+        for path in glob.glob(os.path.join(directory, glob.escape(stem) + ".*")) + glob.glob(
+            os.path.join(directory, glob.escape(stem) + "_*")
+        ):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    
+    @staticmethod
+    async def _store_image(
+        file: UploadFile,
+        owner_id: str,
+        folder: str,
+        public_id_prefix: str,
+        max_dimensions: tuple[int, int],
+        widths: Sequence[int]
+    ) -> str:
+        """Validate, process and store an image - uses Cloudinary if configured, otherwise local storage"""
+        FileUploadService._validate_image_file(file)
+        content = await file.read()
+        if len(content) > FileUploadService.MAX_IMAGE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File too large. Maximum size: {FileUploadService.MAX_IMAGE_SIZE // (1024*1024)}MB"
+            )
+        # hashlib releases the GIL, so hashing on a thread keeps the loop free
+        stem = f"{owner_id}_{(await asyncio.to_thread(content_hash, content))[:16]}"
+        
+        if FileUploadService._configure_cloudinary():
+            async def upload() -> str:
+                # Cloudinary resizes and converts on delivery, so only the PNG is needed
+                variants = await FileUploadService._process_image(content, max_dimensions, webp=False)
+                return await FileUploadService._upload_to_cloudinary(
+                    variants[0].data, folder=folder, public_id=f"{public_id_prefix}_{stem}"
+                )
+            return await FileUploadService._once(f"cloudinary:{folder}/{stem}", upload)
+        
+        # Fall back to local storage
+        upload_dir = os.path.join(settings.upload_dir, folder)
+        url = f"/uploads/{folder}/{stem}.png"
+        if os.path.exists(os.path.join(upload_dir, f"{stem}.png")):
+            # This image is already stored for this owner
+            return url
+        
+        async def store() -> str:
+            variants = await FileUploadService._process_image(content, max_dimensions, widths)
+            try:
+                await asyncio.to_thread(FileUploadService._write_variants, upload_dir, stem, variants)
+            except Exception as e:
+                await asyncio.to_thread(FileUploadService._remove_stored, upload_dir, f"{stem}.png")
+                raise HTTPException(
+                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    detail=f"Failed to upload file: {str(e)}"
+                )
+            return url
+        return await FileUploadService._once(f"local:{folder}/{stem}", store)
+    
     @staticmethod
     async def _upload_to_cloudinary(content: bytes, folder: str, public_id: str) -> str:
         """Upload image to Cloudinary and return URL"""
         import cloudinary.uploader
         
         try:
-            result = cloudinary.uploader.upload(
+            # The SDK blocks on the HTTP request, so it runs on a thread
+            result = await asyncio.to_thread(
+                cloudinary.uploader.upload,
                 content,
                 folder=folder,
                 public_id=public_id,
@@ -141,150 +266,88 @@ class FileUploadService:
         import cloudinary.uploader
         
         try:
-            result = cloudinary.uploader.destroy(public_id, resource_type="image")
+            result = await asyncio.to_thread(cloudinary.uploader.destroy, public_id, resource_type="image")
             logger.info(f"Image deleted from Cloudinary: {public_id}, result: {result}")
         except Exception as e:
             logger.error(f"Failed to delete from Cloudinary: {str(e)}")
             # Don't raise exception for delete failures
     
+    @staticmethod
+    def _stored_id(url: str, folder: str) -> Optional[str]:
+        """
+        The "<folder>/<name>" a stored image's URL points at, without the
+        Cloudinary version or file extension, so two URLs for one stored
+        image compare equal; None for URLs not in folder.
+        """
+        if not url:
+            return None
+        # Cloudinary: https://res.cloudinary.com/{cloud_name}/image/upload/v{version}/{folder}/{public_id}.{ext}
+        # Local: /uploads/{folder}/{stem}.png
+        parts = url.split("/")
+        if folder not in parts:
+            return None
+        idx = parts.index(folder)
+        name_with_ext = parts[idx + 1] if idx + 1 < len(parts) else None
+        if not name_with_ext:
+            return None
+        return f"{folder}/{os.path.splitext(name_with_ext)[0]}"
+    
+    @staticmethod
+    async def _delete_image(url: str, folder: str) -> None:
+        """Delete a stored image - handles both Cloudinary and local storage"""
+        stored_id = FileUploadService._stored_id(url, folder)
+        if not stored_id:
+            return
+        
+        # Check if it's a Cloudinary URL
+        if "cloudinary.com" in url or "res.cloudinary.com" in url:
+            await FileUploadService._delete_from_cloudinary(stored_id)
+        elif url.startswith(f"/uploads/{folder}/"):
+            # Local file and its variants
+            await asyncio.to_thread(
+                FileUploadService._remove_stored,
+                os.path.join(settings.upload_dir, folder),
+                os.path.basename(url)
+            )
+    
+    @staticmethod
+    async def _replace_image(old_url: Optional[str], folder: str, upload: Awaitable[str]) -> str:
+        """Store a new image, then delete old_url unless it is the same stored image"""
+        url = await upload
+        # Re-uploading an image gives Cloudinary the same public_id under a new version
+        if old_url and FileUploadService._stored_id(old_url, folder) != FileUploadService._stored_id(url, folder):
+            await FileUploadService._delete_image(old_url, folder)
+        return url
+    
     @staticmethod
     async def upload_school_logo(file: UploadFile, school_id: str) -> str:
         """Upload and process school logo - uses Cloudinary if configured, otherwise local storage"""
-        # Validate file
-        FileUploadService._validate_image_file(file)
-        
-        # Read and process file content
-        content = await file.read()
-        processed_content = await FileUploadService._resize_image(
-            content, FileUploadService.LOGO_MAX_DIMENSIONS
+        return await FileUploadService._store_image(
+            file, school_id, "school_logos", "school_logo",
+            FileUploadService.LOGO_MAX_DIMENSIONS, FileUploadService.LOGO_WIDTHS
+        )
+    
+    @staticmethod
+    async def replace_school_logo(file: UploadFile, school_id: str, old_logo_url: Optional[str]) -> str:
+        """Upload a new school logo, then delete the old one unless the same image was uploaded again"""
+        return await FileUploadService._replace_image(
+            old_logo_url, "school_logos", FileUploadService.upload_school_logo(file, school_id)
         )
-        
-        # Check if Cloudinary is configured
-        if FileUploadService._configure_cloudinary():
-            # Upload to Cloudinary
-            public_id = f"school_logo_{school_id}"
-            return await FileUploadService._upload_to_cloudinary(
-                processed_content,
-                folder="school_logos",
-                public_id=public_id
-            )
-        else:
-            # Fall back to local storage
-            upload_dir = os.path.join(settings.upload_dir, "school_logos")
-            FileUploadService._ensure_upload_directory(upload_dir)
-            
-            ext = FileUploadService._get_file_extension(file.filename)
-            filename = f"{school_id}_{uuid.uuid4().hex}{ext}"
-            file_path = os.path.join(upload_dir, filename)
-            
-            try:
-                async with aiofiles.open(file_path, 'wb') as f:
-                    await f.write(processed_content)
-                return f"/uploads/school_logos/{filename}"
-            except Exception as e:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to upload file: {str(e)}"
-                )
     
     @staticmethod
     async def delete_school_logo(logo_url: str) -> None:
         """Delete school logo - handles both Cloudinary and local storage"""
-        if not logo_url:
-            return
-        
-        # Check if it's a Cloudinary URL
-        if "cloudinary.com" in logo_url or "res.cloudinary.com" in logo_url:
-            # Extract public_id from Cloudinary URL
-            # URL format: https://res.cloudinary.com/{cloud_name}/image/upload/{version}/{folder}/{public_id}.{ext}
-            try:
-                parts = logo_url.split("/")
-                # Get folder/filename part
-                if "school_logos" in parts:
-                    idx = parts.index("school_logos")
-                    public_id_with_ext = parts[idx + 1] if idx + 1 < len(parts) else None
-                    if public_id_with_ext:
-                        public_id = f"school_logos/{os.path.splitext(public_id_with_ext)[0]}"
-                        await FileUploadService._delete_from_cloudinary(public_id)
-            except Exception as e:
-                logger.error(f"Failed to parse Cloudinary URL for deletion: {str(e)}")
-        elif logo_url.startswith("/uploads/school_logos/"):
-            # Local file
-            filename = os.path.basename(logo_url)
-            file_path = os.path.join(settings.upload_dir, "school_logos", filename)
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception:
-                    pass
+        await FileUploadService._delete_image(logo_url, "school_logos")
     
     @staticmethod
     async def upload_profile_picture(file: UploadFile, user_id: str) -> str:
         """Upload and process profile picture - uses Cloudinary if configured, otherwise local storage"""
-        # Validate file
-        FileUploadService._validate_image_file(file)
-        
-        # Read and process file content
-        content = await file.read()
-        processed_content = await FileUploadService._resize_image(
-            content, FileUploadService.PROFILE_MAX_DIMENSIONS
+        return await FileUploadService._store_image(
+            file, user_id, "profile_pictures", "profile",
+            FileUploadService.PROFILE_MAX_DIMENSIONS, FileUploadService.PROFILE_WIDTHS
         )
-        
-        # Check if Cloudinary is configured
-        if FileUploadService._configure_cloudinary():
-            # Upload to Cloudinary
-            public_id = f"profile_{user_id}"
-            return await FileUploadService._upload_to_cloudinary(
-                processed_content,
-                folder="profile_pictures",
-                public_id=public_id
-            )
-        else:
-            # Fall back to local storage
-            upload_dir = os.path.join(settings.upload_dir, "profile_pictures")
-            FileUploadService._ensure_upload_directory(upload_dir)
-            
-            ext = FileUploadService._get_file_extension(file.filename)
-            filename = f"{user_id}_{uuid.uuid4().hex}{ext}"
-            file_path = os.path.join(upload_dir, filename)
-            
-            try:
-                async with aiofiles.open(file_path, 'wb') as f:
-                    await f.write(processed_content)
-                return f"/uploads/profile_pictures/{filename}"
-            except Exception as e:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to upload file: {str(e)}"
-                )
 
     @staticmethod
     async def delete_profile_picture(picture_url: str) -> None:
         """Delete profile picture - handles both Cloudinary and local storage"""
-        if not picture_url:
-            return
-        
-        # Check if it's a Cloudinary URL
-        if "cloudinary.com" in picture_url or "res.cloudinary.com" in picture_url:
-            try:
-                parts = picture_url.split("/")
-                if "profile_pictures" in parts:
-                    idx = parts.index("profile_pictures")
-                    public_id_with_ext = parts[idx + 1] if idx + 1 < len(parts) else None
-                    if public_id_with_ext:
-                        public_id = f"profile_pictures/{os.path.splitext(public_id_with_ext)[0]}"
-                        await FileUploadService._delete_from_cloudinary(public_id)
-            except Exception as e:
-                logger.error(f"Failed to parse Cloudinary URL for deletion: {str(e)}")
-        elif picture_url.startswith("/uploads/profile_pictures/"):
-            filename = os.path.basename(picture_url)
-            file_path = os.path.join(settings.upload_dir, "profile_pictures", filename)
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception:
-                    pass
+        await FileUploadService._delete_image(picture_url, "profile_pictures")
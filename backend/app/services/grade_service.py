@@ -1,12 +1,14 @@
-from typing import Optional, List
+from typing import Optional, List, Iterable, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, desc, case
 from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
 from decimal import Decimal
 from datetime import date, datetime
+import time
+import uuid
 
-from app.models.grade import Exam, Grade, ReportCard, ExamType, GradeScale
+from app.models.grade import Exam, Grade, ReportCard, ExamType, GradeScale, ClassSummaryScore
 from app.models.academic import Class, Subject, Term, Enrollment
 from app.models.student import Student
 from app.models.user import User
@@ -18,7 +20,11 @@ from app.schemas.grade import (
 from app.services.notification_service import NotificationService
 from app.schemas.notification import NotificationCreate
 from app.models.notification import NotificationType
+from app.core.cache_manager import CacheManager, tenant_tag
 
+# Grade notifications collapse into one unread "N new grades" notification per student
+GRADE_NOTIFICATION_GROUP = "new_grades"
+GRADE_NOTIFICATION_COLLAPSED = "{count} new grades have been posted."
 
 class GradeService:
     """Service class for grade and exam operations"""
@@ -126,6 +132,7 @@ class GradeService:
         exam = Exam(**exam_dict)
         db.add(exam)
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "grades"))
         
         # Reload exam with relationships to avoid greenlet errors
         result = await db.execute(
@@ -254,6 +261,7 @@ class GradeService:
             setattr(exam, field, value)
         
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "grades"))
         await db.refresh(exam)
         
         return exam
@@ -286,6 +294,7 @@ class GradeService:
         
         exam.is_deleted = True
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "grades"))
 
         return True
 
@@ -405,7 +414,11 @@ class GradeService:
 
         grade = Grade(**grade_dict)
         db.add(grade)
+        await GradeService.refresh_class_summary(
+            db, school_id, grade.term_id, [(grade.student_id, grade.subject_id)]
+        )
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "grades"))
         await db.refresh(grade)
 
         # Reload grade with relationships to avoid greenlet errors
@@ -422,16 +435,18 @@ class GradeService:
 
         # Send Notification to Student
         if grade.student and grade.student.user_id:
-            await NotificationService.create_notification(
-                db=db,
-                school_id=school_id,
-                notification_data=NotificationCreate(
+            await NotificationService.create_notifications_bulk(
+                db,
+                school_id,
+                [NotificationCreate(
                     user_id=grade.student.user_id,
                     title="New Grade Posted",
                     message=f"A new grade has been posted for {grade.subject.name} ({grade.exam.name}). Score: {grade.score}/{grade.total_marks}",
                     type=NotificationType.INFO,
                     link=f"/grades"
-                )
+                )],
+                group_key=GRADE_NOTIFICATION_GROUP,
+                collapsed_message=GRADE_NOTIFICATION_COLLAPSED
             )
 
         return grade
@@ -443,7 +458,13 @@ class GradeService:
         school_id: str,
         graded_by: str
     ) -> List[Grade]:
-        """Create multiple grades for an exam"""
+        """Create or update multiple grades for an exam in a single transaction.
+
+        Existing grades, students and enrollments for the whole batch are
+        prefetched up front, new grades are inserted with one executemany
+        flush, updates are batched by the unit of work, and notifications are
+        added to the same transaction.
+        """
         # Verify exam exists
         exam_result = await db.execute(
             select(Exam).where(
@@ -459,131 +480,193 @@ class GradeService:
                 detail="Exam not found"
             )
 
-        created_grades = []
+        student_ids = list({grade_data['student_id'] for grade_data in bulk_data.grades})
+
+        # Prefetch everything the per-row checks need
+        existing_result = await db.execute(
+            select(Grade).where(
+                Grade.student_id.in_(student_ids),
+                Grade.exam_id == exam.id,
+                Grade.is_deleted == False
+            )
+        )
+        existing_by_student = {grade.student_id: grade for grade in existing_result.scalars().all()}
+
+        students_result = await db.execute(
+            select(Student.id).where(
+                Student.id.in_(student_ids),
+                Student.school_id == school_id,
+                Student.is_deleted == False
+            )
+        )
+        valid_student_ids = set(students_result.scalars().all())
+
+        subject_result = await db.execute(
+            select(Subject.id).where(
+                Subject.id == exam.subject_id,
+                Subject.school_id == school_id,
+                Subject.is_deleted == False
+            )
+        )
+        subject_exists = subject_result.scalar_one_or_none() is not None
+
+        term_result = await db.execute(
+            select(Term.id).where(
+                Term.id == exam.term_id,
+                Term.school_id == school_id,
+                Term.is_deleted == False
+            )
+        )
+        term_exists = term_result.scalar_one_or_none() is not None
+
+        enrollment_result = await db.execute(
+            select(Enrollment.student_id).where(
+                Enrollment.student_id.in_(student_ids),
+                Enrollment.subject_id == exam.subject_id,
+                Enrollment.term_id == exam.term_id,
+                Enrollment.school_id == school_id,
+                Enrollment.is_deleted == False
+            )
+        )
+        enrolled_student_ids = set(enrollment_result.scalars().all())
+
+        saved_grades = {}
+        new_grades = []
         errors = []
+        today = datetime.utcnow().date()
 
         for grade_data in bulk_data.grades:
-            try:
-                # Validate score
-                score = grade_data['score']
-                if not isinstance(score, (int, float, Decimal)):
-                    try:
-                        score = float(score)
-                    except (ValueError, TypeError):
-                        errors.append({
-                            'student_id': grade_data['student_id'],
-                            'error': f"Invalid score: {score}"
-                        })
-                        continue
-                
-                # Check if grade already exists
-                existing_grade_result = await db.execute(
-                    select(Grade)
-                    .options(selectinload(Grade.student))
-                    .where(
-                        Grade.student_id == grade_data['student_id'],
-                        Grade.exam_id == exam.id,
-                        Grade.is_deleted == False
-                    )
-                )
-                existing_grade = existing_grade_result.scalar_one_or_none()
-                
-                if existing_grade:
-                    # Update existing grade
-                    existing_grade.score = score
-                    existing_grade.total_marks = exam.total_marks
-                    existing_grade.remarks = grade_data.get('remarks')
-                    
-                    # Recalculate percentage and grade
-                    if exam.total_marks > 0:
-                        percentage = (score / exam.total_marks) * 100
-                        existing_grade.percentage = percentage
-                        existing_grade.grade = GradeService.calculate_grade(percentage)
-                    else:
-                        existing_grade.percentage = 0
-                        existing_grade.grade = GradeScale.F
-                    existing_grade.graded_by = graded_by
-                    existing_grade.graded_date = datetime.utcnow().date()
-                    existing_grade.updated_at = datetime.utcnow()
-                    
-                    # Commit the changes to the database
-                    await db.commit()
-                    await db.refresh(existing_grade)
-                    
-                    # Reload existing grade with relationships
-                    result = await db.execute(
-                        select(Grade)
-                        .options(
-                            selectinload(Grade.student),
-                            selectinload(Grade.subject),
-                            selectinload(Grade.exam)
-                        )
-                        .where(Grade.id == existing_grade.id)
-                    )
-                    existing_grade = result.scalar_one()
-                    
-                    created_grades.append(existing_grade)
+            student_id = grade_data['student_id']
+
+            # Validate score
+            score = grade_data['score']
+            if not isinstance(score, (int, float, Decimal)):
+                try:
+                    score = float(score)
+                except (ValueError, TypeError):
+                    errors.append({
+                        'student_id': student_id,
+                        'error': f"Invalid score: {score}"
+                    })
+                    continue
+
+            existing_grade = existing_by_student.get(student_id)
+
+            if existing_grade:
+                # Update existing grade
+                existing_grade.score = score
+                existing_grade.total_marks = exam.total_marks
+                existing_grade.remarks = grade_data.get('remarks')
+
+                # Recalculate percentage and grade
+                if exam.total_marks > 0:
+                    percentage = (Decimal(str(score)) / exam.total_marks) * 100
+                    existing_grade.percentage = percentage
+                    existing_grade.grade = GradeService.calculate_grade(percentage)
                 else:
-                    # Create new grade
-                    grade_create = GradeCreate(
-                        score=score,
-                        total_marks=exam.total_marks,
-                        student_id=grade_data['student_id'],
-                        subject_id=exam.subject_id,
-                        exam_id=exam.id,
-                        term_id=exam.term_id,
-                        remarks=grade_data.get('remarks')
-                    )
+                    existing_grade.percentage = 0
+                    existing_grade.grade = GradeScale.F
+                existing_grade.graded_by = graded_by
+                existing_grade.graded_date = today
+                existing_grade.updated_at = datetime.utcnow()
 
-                    grade = await GradeService.create_grade(
-                        db, grade_create, school_id, graded_by
-                    )
-                    created_grades.append(grade)
+                saved_grades[existing_grade.id] = existing_grade
+                continue
 
-            except HTTPException as e:
-                errors.append({
-                    'student_id': grade_data['student_id'],
-                    'error': str(e.detail)
-                })
+            # Same checks (and messages) as create_grade, against the prefetched sets
+            if student_id not in valid_student_ids:
+                error = "Student not found"
+            elif not subject_exists:
+                error = "Subject not found"
+            elif not term_exists:
+                error = "Term not found"
+            elif student_id not in enrolled_student_ids:
+                error = "Student is not enrolled in this subject for this term"
+            else:
+                error = None
+            if error:
+                errors.append({'student_id': student_id, 'error': error})
                 continue
 
-        if errors and not created_grades:
+            grade_create = GradeCreate(
+                score=score,
+                total_marks=exam.total_marks,
+                student_id=student_id,
+                subject_id=exam.subject_id,
+                exam_id=exam.id,
+                term_id=exam.term_id,
+                remarks=grade_data.get('remarks')
+            )
+            percentage = (grade_create.score / grade_create.total_marks) * 100
+            grade = Grade(
+                id=str(uuid.uuid4()),
+                **grade_create.dict(),
+                school_id=school_id,
+                graded_by=graded_by,
+                graded_date=date.today(),
+                percentage=percentage,
+                grade=GradeService.calculate_grade(percentage)
+            )
+            new_grades.append(grade)
+            saved_grades[grade.id] = grade
+            # A repeated student later in the batch updates this row
+            existing_by_student[student_id] = grade
+
+        if errors and not saved_grades:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Failed to create any grades. Errors: {errors}"
             )
 
-        # Reload all grades with relationships to avoid greenlet errors
-        if created_grades:
-            grade_ids = [grade.id for grade in created_grades]
-            result = await db.execute(
-                select(Grade)
-                .options(
-                    selectinload(Grade.student),
-                    selectinload(Grade.subject),
-                    selectinload(Grade.exam),
-                    selectinload(Grade.grader)
+        if not saved_grades:
+            return []
+
+        db.add_all(new_grades)
+        await db.flush()
+        await GradeService.refresh_class_summary(
+            db,
+            school_id,
+            exam.term_id,
+            [(grade.student_id, grade.subject_id) for grade in saved_grades.values()]
+        )
+
+        # Reload all grades with relationships and database-rounded values
+        result = await db.execute(
+            select(Grade)
+            .options(
+                selectinload(Grade.student),
+                selectinload(Grade.subject),
+                selectinload(Grade.exam),
+                selectinload(Grade.grader)
+            )
+            .where(Grade.id.in_(list(saved_grades)))
+            .execution_options(populate_existing=True)
+        )
+        saved = result.scalars().all()
+
+        # Notifications for every posted grade, written in the same transaction
+        await NotificationService.create_notifications_bulk(
+            db,
+            school_id,
+            [
+                NotificationCreate(
+                    user_id=grade.student.user_id,
+                    title="New Grade Posted",
+                    message=f"A new grade has been posted for {grade.subject.name} ({grade.exam.name}). Score: {grade.score}/{grade.total_marks}",
+                    type=NotificationType.INFO,
+                    link=f"/grades"
                 )
-                .where(Grade.id.in_(grade_ids))
-            )
-            created_grades = result.scalars().all()
-
-            # Send Notifications for bulk grades
-            for grade in created_grades:
-                if grade.student and grade.student.user_id:
-                    await NotificationService.create_notification(
-                        db=db,
-                        school_id=school_id,
-                        notification_data=NotificationCreate(
-                            user_id=grade.student.user_id,
-                            title="New Grade Posted",
-                            message=f"A new grade has been posted for {grade.subject.name} ({grade.exam.name}). Score: {grade.score}/{grade.total_marks}",
-                            type=NotificationType.INFO,
-                            link=f"/grades"
-                        )
-                    )
+                for grade in saved
+                if grade.student and grade.student.user_id
+            ],
+            group_key=GRADE_NOTIFICATION_GROUP,
+            collapsed_message=GRADE_NOTIFICATION_COLLAPSED,
+            commit=False
+        )
+        await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "grades"))
 
-        return created_grades
+        return saved
 
     @staticmethod
     async def get_grades(
@@ -675,14 +758,19 @@ class GradeService:
 
         # Recalculate percentage and letter grade if score is updated
         if 'score' in update_data:
-            percentage = (update_data['score'] / grade.total_marks) * 100
+            percentage = (Decimal(str(update_data['score'])) / grade.total_marks) * 100
             update_data['percentage'] = percentage
             update_data['grade'] = GradeService.calculate_grade(percentage)
 
         for field, value in update_data.items():
             setattr(grade, field, value)
 
+        if 'score' in update_data:
+            await GradeService.refresh_class_summary(
+                db, school_id, grade.term_id, [(grade.student_id, grade.subject_id)]
+            )
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "grades"))
         await db.refresh(grade)
 
         return grade
@@ -699,7 +787,11 @@ class GradeService:
             return False
 
         grade.is_deleted = True
+        await GradeService.refresh_class_summary(
+            db, school_id, grade.term_id, [(grade.student_id, grade.subject_id)]
+        )
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "grades"))
 
         return True
 
@@ -725,7 +817,6 @@ class GradeService:
         Returns:
             List of dictionaries with consolidated grade data, one per subject
         """
-        from app.models.component_mapping import ComponentMapping
         from app.models.grade_template import AssessmentComponent
         
         # Get grade template components if template is specified
@@ -741,37 +832,63 @@ class GradeService:
             components = list(components_result.scalars().all())
             component_name_map = {c.id: c.name for c in components}
         
-        # Group grades by subject
-        subject_grades_map = {}
-        for grade in grades:
-            subject_id = grade.subject_id
-            if subject_id not in subject_grades_map:
-                subject_grades_map[subject_id] = []
-            subject_grades_map[subject_id].append(grade)
-        
-        # Consolidate each subject's grades
-        # Optimization: Fetch all component mappings for all subjects at once
-        subject_ids = list(subject_grades_map.keys())
-        
+        # Fetch all component mappings for the graded subjects at once
+        subject_ids = list({grade.subject_id for grade in grades})
+        mappings_by_subject = await GradeService._load_component_mappings(
+            db, term_id, school_id, subject_ids
+        )
+
+        return GradeService._consolidate_loaded_grades(grades, mappings_by_subject)
+
+    @staticmethod
+    async def _load_component_mappings(
+        db: AsyncSession,
+        term_id: str,
+        school_id: str,
+        subject_ids: Optional[List[str]] = None
+    ) -> dict:
+        """Load calculation-enabled component mappings for a term, grouped by subject_id"""
+        from app.models.component_mapping import ComponentMapping
+        from app.models.grade_template import AssessmentComponent
+
+        conditions = [
+            ComponentMapping.term_id == term_id,
+            ComponentMapping.school_id == school_id,
+            ComponentMapping.is_deleted == False,
+            ComponentMapping.include_in_calculation == True
+        ]
+        if subject_ids is not None:
+            conditions.append(ComponentMapping.subject_id.in_(subject_ids))
+
         all_mappings_result = await db.execute(
             select(ComponentMapping).options(
                 selectinload(ComponentMapping.component).selectinload(AssessmentComponent.template)
-            ).where(
-                ComponentMapping.subject_id.in_(subject_ids),
-                ComponentMapping.term_id == term_id,
-                ComponentMapping.school_id == school_id,
-                ComponentMapping.is_deleted == False,
-                ComponentMapping.include_in_calculation == True
-            )
+            ).where(*conditions)
         )
-        all_mappings = list(all_mappings_result.scalars().all())
-        
+
         # Group mappings by subject_id
         mappings_by_subject = {}
-        for mapping in all_mappings:
+        for mapping in all_mappings_result.scalars().all():
             if mapping.subject_id not in mappings_by_subject:
                 mappings_by_subject[mapping.subject_id] = []
             mappings_by_subject[mapping.subject_id].append(mapping)
+        return mappings_by_subject
+
+    @staticmethod
+    def _consolidate_loaded_grades(grades: List[Grade], mappings_by_subject: dict) -> List[dict]:
+        """
+        Consolidate one student's grades per subject using preloaded component mappings.
+
+        Pure in-memory counterpart of consolidate_grades_by_subject; grades must have
+        exam, subject, student and grader loaded.
+        """
+        # Group grades by subject
+        subject_grades_map = {}
+        for grade in grades:
+            subject_id = grade.subject_id
+            if subject_id not in subject_grades_map:
+                subject_grades_map[subject_id] = []
+            subject_grades_map[subject_id].append(grade)
 
         consolidated_grades = []
         for subject_id, subject_grades in subject_grades_map.items():
@@ -957,6 +1074,7 @@ class GradeService:
         # Commit repairs if any
         if grades_to_repair:
             await db.commit()
+            await CacheManager.invalidate_tags(tenant_tag(school_id, "grades"))
         
         # **CONSOLIDATE GRADES BY SUBJECT** - Uses component mappings to map exam types
         # to grade template components (First C.A, Second C.A, Exam)
@@ -1391,6 +1509,225 @@ class GradeService:
 
         return report_card
 
+    @staticmethod
+    async def create_report_cards_batch(
+        db: AsyncSession,
+        term_id: str,
+        school_id: str,
+        generated_by: str,
+        class_ids: Optional[List[str]] = None,
+        chunk_size: int = 200,
+        progress: Optional[dict] = None
+    ) -> dict:
+        """
+        Generate report cards for every student in a term, optionally limited to some classes.
+
+        Grades, component mappings, enrollments and template assignments are loaded
+        once; each student is consolidated in memory and report cards are written in
+        chunks of ``chunk_size``. Students who already have a report card for the term
+        are skipped.
+
+        Args:
+            db: Database session
+            term_id: Term ID
+            school_id: School ID
+            generated_by: User ID recorded on the report cards
+            class_ids: Optional list of class IDs to limit the run to
+            chunk_size: Number of report cards written per transaction
+            progress: Optional dictionary updated in place after every chunk
+
+        Returns:
+            Dictionary with counts, elapsed time and throughput in students per second
+        """
+        started = time.perf_counter()
+        if progress is None:
+            progress = {}
+
+        term_result = await db.execute(
+            select(Term).where(
+                Term.id == term_id,
+                Term.school_id == school_id,
+                Term.is_deleted == False
+            )
+        )
+        term = term_result.scalar_one_or_none()
+        if not term:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Term not found"
+            )
+
+        student_conditions = [
+            Student.school_id == school_id,
+            Student.is_deleted == False,
+            Student.current_class_id.isnot(None)
+        ]
+        if class_ids:
+            student_conditions.append(Student.current_class_id.in_(class_ids))
+
+        students_result = await db.execute(
+            select(Student).where(*student_conditions).order_by(
+                Student.current_class_id, Student.last_name, Student.first_name
+            )
+        )
+        students = list(students_result.scalars().all())
+
+        existing_result = await db.execute(
+            select(ReportCard.student_id).join(Student, Student.id == ReportCard.student_id).where(
+                ReportCard.term_id == term_id,
+                ReportCard.school_id == school_id,
+                ReportCard.is_deleted == False,
+                *student_conditions
+            )
+        )
+        existing_student_ids = set(existing_result.scalars().all())
+
+        # Preload everything consolidation needs for the whole run
+        grades_result = await db.execute(
+            select(Grade).options(
+                selectinload(Grade.subject),
+                selectinload(Grade.exam),
+                selectinload(Grade.grader),
+                selectinload(Grade.student)
+            ).join(Student, Student.id == Grade.student_id).where(
+                Grade.term_id == term_id,
+                Grade.school_id == school_id,
+                Grade.is_deleted == False,
+                *student_conditions
+            )
+        )
+        grades_by_student = {}
+        for grade in grades_result.scalars().all():
+            grades_by_student.setdefault(grade.student_id, []).append(grade)
+
+        mappings_by_subject = await GradeService._load_component_mappings(db, term_id, school_id)
+
+        enrollments_result = await db.execute(
+            select(Enrollment.student_id, func.count(Enrollment.id.distinct()))
+            .join(Student, Student.id == Enrollment.student_id)
+            .where(
+                Enrollment.term_id == term_id,
+                Enrollment.school_id == school_id,
+                Enrollment.is_deleted == False,
+                *student_conditions
+            )
+            .group_by(Enrollment.student_id)
+        )
+        enrolled_subjects = dict(enrollments_result.all())
+
+        from app.services.report_card_template_service import ReportCardTemplateAssignmentService
+        assignments = await ReportCardTemplateAssignmentService.get_assignments(
+            db, school_id, is_active=True
+        )
+        template_by_class = {}
+        for assignment in assignments:
+            template_by_class.setdefault(assignment.class_id, assignment.template_id)
+
+        # Consolidate every student in memory
+        class_sizes = {}
+        figures = {}
+        for student in students:
+            class_sizes[student.current_class_id] = class_sizes.get(student.current_class_id, 0) + 1
+            consolidated = GradeService._consolidate_loaded_grades(
+                grades_by_student.get(student.id, []), mappings_by_subject
+            )
+            total_score = sum(grade['score'] for grade in consolidated)
+            total_possible = sum(grade['total_marks'] for grade in consolidated)
+            figures[student.id] = (
+                total_score,
+                (total_score / total_possible * 100) if total_possible > 0 else 0
+            )
+
+        # Rank within each class by overall percentage, ties share a position
+        positions = {}
+        class_rankings = {}
+        for student in students:
+            class_rankings.setdefault(student.current_class_id, []).append(student.id)
+        for ranked in class_rankings.values():
+            ranked.sort(key=lambda sid: figures[sid][1], reverse=True)
+            current_position = 1
+            for i, sid in enumerate(ranked):
+                if i > 0 and figures[sid][1] < figures[ranked[i - 1]][1]:
+                    current_position = i + 1
+                positions[sid] = current_position
+
+        pending = [s for s in students if s.id not in existing_student_ids]
+        progress.update({
+            'total_students': len(students),
+            'processed_students': len(students) - len(pending),
+            'created_count': 0,
+            'skipped_count': len(students) - len(pending),
+            'students_per_second': 0.0
+        })
+
+        today = date.today()
+        for offset in range(0, len(pending), chunk_size):
+            chunk = pending[offset:offset + chunk_size]
+            report_cards = []
+            for student in chunk:
+                total_score, overall_percentage = figures[student.id]
+                template_id = template_by_class.get(student.current_class_id)
+                report_cards.append(ReportCard(
+                    id=str(uuid.uuid4()),
+                    student_id=student.id,
+                    class_id=student.current_class_id,
+                    term_id=term_id,
+                    school_id=school_id,
+                    generated_by=generated_by,
+                    generated_date=today,
+                    total_score=total_score,
+                    average_score=overall_percentage,
+                    total_subjects=enrolled_subjects.get(student.id, 0),
+                    position=positions[student.id],
+                    total_students=class_sizes[student.current_class_id],
+                    term_name=term.name,
+                    academic_session=term.academic_session,
+                    total_school_days=180,  # This should be calculated from attendance
+                    days_present=160,  # This should be calculated from attendance
+                    days_absent=20,  # This should be calculated from attendance
+                    additional_data={
+                        'template_id': template_id,
+                        'generated_with_template': True
+                    } if template_id else {}
+                ))
+            db.add_all(report_cards)
+            await db.flush()
+            await NotificationService.create_notifications_bulk(
+                db,
+                school_id,
+                [
+                    NotificationCreate(
+                        user_id=student.user_id,
+                        title="Report Card Generated",
+                        message=f"Your report card for {term.name} has been generated.",
+                        type=NotificationType.INFO,
+                        link=f"/academics/reports/{report_card.id}"
+                    )
+                    for student, report_card in zip(chunk, report_cards)
+                    if student.user_id
+                ],
+                commit=False
+            )
+            await db.commit()
+
+            elapsed = time.perf_counter() - started
+            progress['processed_students'] += len(chunk)
+            progress['created_count'] += len(chunk)
+            progress['students_per_second'] = round(progress['processed_students'] / elapsed, 2) if elapsed > 0 else 0.0
+
+        elapsed = time.perf_counter() - started
+        progress['students_per_second'] = round(len(students) / elapsed, 2) if elapsed > 0 else 0.0
+        return {
+            'term_id': term_id,
+            'class_ids': class_ids,
+            'total_students': progress['total_students'],
+            'processed_students': progress['processed_students'],
+            'created_count': progress['created_count'],
+            'skipped_count': progress['skipped_count'],
+            'elapsed_seconds': round(elapsed, 3),
+            'students_per_second': progress['students_per_second']
+        }
+
     @staticmethod
     async def get_grade_statistics(
         db: AsyncSession,
@@ -1503,6 +1840,7 @@ class GradeService:
                     
                     if grades_list:
                         await db.commit()
+                        await CacheManager.invalidate_tags(tenant_tag(school_id, "grades"))
                         # Retry the average calculation with all grades
                         avg_performance_result = await db.execute(
                             select(func.avg(Grade.percentage)).where(and_(*all_grade_conditions))
@@ -1652,52 +1990,41 @@ class GradeService:
                 "generated_at": datetime.utcnow()
             }
         
-        # Get all grades for these students in this term
+        # Read the materialized per-subject totals for these students in this term
         student_ids = [s.id for s in students]
-        grades_result = await db.execute(
-            select(Grade).options(
-                selectinload(Grade.exam),
-                selectinload(Grade.subject)
-            ).where(
-                Grade.student_id.in_(student_ids),
-                Grade.term_id == term_id,
-                Grade.school_id == school_id,
-                Grade.is_deleted == False
+        scores_result = await db.execute(
+            select(
+                ClassSummaryScore.student_id,
+                ClassSummaryScore.subject_id,
+                ClassSummaryScore.total_score,
+                Subject.name,
+                Subject.code
+            )
+            .join(Subject, Subject.id == ClassSummaryScore.subject_id)
+            .where(
+                ClassSummaryScore.student_id.in_(student_ids),
+                ClassSummaryScore.term_id == term_id,
+                ClassSummaryScore.school_id == school_id
             )
         )
-        all_grades = list(grades_result.scalars().all())
         
-        # Get unique subjects from the grades (subjects that actually have grades)
+        # Subjects that actually have grades, and consolidated score per student per subject
         subject_map = {}  # subject_id (str) -> subject info
-        for grade in all_grades:
-            if grade.subject_id and grade.subject:
-                sid = str(grade.subject_id)
-                if sid not in subject_map:
-                    subject_map[sid] = {
-                        "id": sid,
-                        "name": grade.subject.name,
-                        "code": grade.subject.code or ""
-                    }
+        student_subject_scores = {}  # {student_id (str): {subject_id (str): consolidated_score}}
+        for student_id, subject_id, total_score, subject_name, subject_code in scores_result.all():
+            sid = str(subject_id)
+            if sid not in subject_map:
+                subject_map[sid] = {
+                    "id": sid,
+                    "name": subject_name,
+                    "code": subject_code or ""
+                }
+            student_subject_scores.setdefault(str(student_id), {})[sid] = float(total_score)
         
         # Sort subjects by name
         subjects = sorted(subject_map.values(), key=lambda x: x["name"])
         subject_ids = [s["id"] for s in subjects]
         
-        # Group grades by student and subject, consolidate to get total score per subject
-        # Sum all grade scores for each subject (across multiple exams)
-        student_subject_scores = {}  # {student_id (str): {subject_id (str): consolidated_score}}
-        
-        for grade in all_grades:
-            student_id = str(grade.student_id)
-            subject_id = str(grade.subject_id)
-            
-            if student_id not in student_subject_scores:
-                student_subject_scores[student_id] = {}
-            
-            # Sum scores from different exams for the same subject
-            current_score = student_subject_scores[student_id].get(subject_id, 0.0)
-            student_subject_scores[student_id][subject_id] = current_score + float(grade.score)
-        
         # Build student rows with scores and calculate totals
         student_rows = []
         for student in students:
@@ -1745,3 +2072,164 @@ class GradeService:
             "generated_at": datetime.utcnow()
         }
 
+    @staticmethod
+    async def _compute_summary_totals(
+        db: AsyncSession,
+        school_id: str,
+        term_id: str,
+        student_ids: Iterable[str],
+        subject_ids: Optional[Iterable[str]] = None
+    ) -> dict:
+        """Sum grade scores per (student_id, subject_id) straight from the grades table."""
+        conditions = [
+            Grade.student_id.in_(list(student_ids)),
+            Grade.term_id == term_id,
+            Grade.school_id == school_id,
+            Grade.is_deleted == False
+        ]
+        if subject_ids is not None:
+            conditions.append(Grade.subject_id.in_(list(subject_ids)))
+
+        result = await db.execute(
+            select(
+                Grade.student_id,
+                Grade.subject_id,
+                func.sum(Grade.score),
+                func.count(Grade.id)
+            )
+            .where(*conditions)
+            .group_by(Grade.student_id, Grade.subject_id)
+        )
+        return {
+            (student_id, subject_id): (Decimal(str(total)).quantize(Decimal("0.01")), count)
+            for student_id, subject_id, total, count in result.all()
+        }
+
+    @staticmethod
+    async def refresh_class_summary(
+        db: AsyncSession,
+        school_id: str,
+        term_id: str,
+        pairs: Iterable[Tuple[str, str]]
+    ) -> None:
+        """
+        Bring the materialized summary sheet cells in line with the grades table.
+
+        Only the given (student_id, subject_id) cells are recomputed. Runs inside
+        the caller's transaction; the caller is responsible for committing.
+        """
+        pairs = set(pairs)
+        if not pairs:
+            return
+
+        student_ids = {student_id for student_id, _ in pairs}
+        subject_ids = {subject_id for _, subject_id in pairs}
+        totals = await GradeService._compute_summary_totals(
+            db, school_id, term_id, student_ids, subject_ids
+        )
+
+        cells_result = await db.execute(
+            select(ClassSummaryScore).where(
+                ClassSummaryScore.student_id.in_(student_ids),
+                ClassSummaryScore.subject_id.in_(subject_ids),
+                ClassSummaryScore.term_id == term_id,
+                ClassSummaryScore.school_id == school_id
+            )
+        )
+        cells = {(cell.student_id, cell.subject_id): cell for cell in cells_result.scalars().all()}
+
+        for pair in pairs:
+            total = totals.get(pair)
+            cell = cells.get(pair)
+            if total is None:
+                if cell is not None:
+                    await db.delete(cell)
+            elif cell is not None:
+                cell.total_score, cell.grade_count = total
+            else:
+                db.add(ClassSummaryScore(
+                    student_id=pair[0],
+                    subject_id=pair[1],
+                    term_id=term_id,
+                    school_id=school_id,
+                    total_score=total[0],
+                    grade_count=total[1]
+                ))
+
+    @staticmethod
+    async def check_class_summary(
+        db: AsyncSession,
+        class_id: str,
+        term_id: str,
+        school_id: str,
+        repair: bool = False
+    ) -> dict:
+        """
+        Compare the materialized summary sheet for a class against a full recompute.
+
+        Args:
+            db: Database session
+            class_id: Class ID
+            term_id: Term ID
+            school_id: School ID
+            repair: Rewrite mismatched cells from the recompute and commit
+
+        Returns:
+            Dictionary with the number of cells checked and the mismatches found
+        """
+        students_result = await db.execute(
+            select(Student.id).where(
+                Student.current_class_id == class_id,
+                Student.school_id == school_id,
+                Student.is_deleted == False
+            )
+        )
+        student_ids = list(students_result.scalars().all())
+
+        expected = {}
+        stored = {}
+        if student_ids:
+            expected = await GradeService._compute_summary_totals(
+                db, school_id, term_id, student_ids
+            )
+            cells_result = await db.execute(
+                select(ClassSummaryScore).where(
+                    ClassSummaryScore.student_id.in_(student_ids),
+                    ClassSummaryScore.term_id == term_id,
+                    ClassSummaryScore.school_id == school_id
+                )
+            )
+            stored = {
+                (cell.student_id, cell.subject_id): (cell.total_score, cell.grade_count)
+                for cell in cells_result.scalars().all()
+            }
+
+        mismatches = []
+        for pair in sorted(set(expected) | set(stored)):
+            expected_total = expected.get(pair)
+            stored_total = stored.get(pair)
+            if expected_total != stored_total:
+                mismatches.append({
+                    "student_id": pair[0],
+                    "subject_id": pair[1],
+                    "expected_score": float(expected_total[0]) if expected_total else None,
+                    "stored_score": float(stored_total[0]) if stored_total else None
+                })
+
+        if repair and mismatches:
+            await GradeService.refresh_class_summary(
+                db,
+                school_id,
+                term_id,
+                [(m["student_id"], m["subject_id"]) for m in mismatches]
+            )
+            await db.commit()
+
+        return {
+            "class_id": class_id,
+            "term_id": term_id,
+            "cells_checked": len(set(expected) | set(stored)),
+            "consistent": not mismatches,
+            "mismatches": mismatches,
+            "repaired": bool(repair and mismatches)
+        }
@@ -15,6 +15,7 @@ from app.models.component_mapping import ComponentMapping
 from app.models.student import Student, StudentStatus
 from app.models.academic import Subject, Class, Term
 from app.models.cbt import CBTTest, CBTSubmission
+from app.core.cache_manager import CacheManager, tenant_tag
 import logging
 import uuid
 
@@ -353,7 +354,20 @@ class GradebookService:
                     "error": str(e)
                 })
 
+        # Keep the materialized class summary sheet in step
+        from app.services.grade_service import GradeService
+        await GradeService.refresh_class_summary(
+            db,
+            school_id,
+            term_id,
+            [
+                (student_data["student_id"], subject_id)
+                for student_data in gradebook["students"]
+                if student_data["final_score"] is not None
+            ]
+        )
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "grades"))
 
         return {
             "processed": processed,
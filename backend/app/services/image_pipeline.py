@@ -0,0 +1,90 @@
+"""
+Image Pipeline
+
+Decoding, compositing, resizing and encoding an uploaded image is CPU-bound
+work that holds the GIL, so FileUploadService runs process_image in a
+process pool rather than on the event loop. It decodes the upload once and
+encodes every variant from that one decode: the image within its maximum
+dimensions plus smaller responsive widths, each as PNG and, optionally, WebP.
+
+This module imports nothing from the app so pool processes start quickly.
+"""
+
+import hashlib
+import io
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+from PIL import Image
+
+# Encoder options per output format
+ENCODINGS = {
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 80, 'method': 4},
+}
+
+EXTENSIONS = {'PNG': '.png', 'WEBP': '.webp'}
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    suffix: str  # "" for the full-size image, "_<width>" for a responsive copy
+    format: str  # "PNG" or "WEBP"
+    data: bytes
+    width: int
+    height: int
+
+    @property
+    def extension(self) -> str:
+        return EXTENSIONS[self.format]
+
+
+def content_hash(data: bytes) -> str:
+    """Hex SHA-256 of an upload, used to name and deduplicate stored images"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """Composite any transparency onto white and return an RGB image"""
+    if image.mode in ('RGBA', 'LA', 'P', 'PA'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image if image.mode == 'RGB' else image.convert('RGB')
+
+
+def process_image(
+    data: bytes,
+    max_dimensions: Tuple[int, int],
+    widths: Sequence[int] = (),
+    webp: bool = True
+) -> List[ImageVariant]:
+    """
+    Decode an image once and encode its variants, full size first.
+
+    The full-size image is shrunk to fit max_dimensions; each of widths
+    smaller than it adds a copy at that width. Raises on data Pillow cannot
+    decode.
+    """
+    image = Image.open(io.BytesIO(data))
+    # JPEGs decode straight at the smallest scale still covering max_dimensions
+    image.draft(None, max_dimensions)
+    image = _flatten(image)
+    if image.width > max_dimensions[0] or image.height > max_dimensions[1]:
+        image.thumbnail(max_dimensions, Image.Resampling.LANCZOS)
+
+    sizes = [('', image)] + [
+        (f"_{width}", image.resize((width, max(1, round(image.height * width / image.width))), Image.Resampling.LANCZOS))
+        for width in sorted(set(widths), reverse=True)
+        if width < image.width
+    ]
+    formats = ('PNG', 'WEBP') if webp else ('PNG',)
+
+    variants = []
+    for suffix, sized in sizes:
+        for fmt in formats:
+            output = io.BytesIO()
+            sized.save(output, format=fmt, **ENCODINGS[fmt])
+            variants.append(ImageVariant(suffix, fmt, output.getvalue(), sized.width, sized.height))
+    return variants
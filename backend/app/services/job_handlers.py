@@ -0,0 +1,94 @@
+"""
+Background Job Handlers
+
+One handler per job type run by JobService. A handler gets a session, the
+claimed job and a progress dict to update in place, and returns a
+JSON-serialisable result. Importing this module registers them all.
+"""
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.background_job import BackgroundJob
+from app.schemas.academic_session import PromotionDecision
+from app.schemas.fee import BulkFeeAssignmentCreate
+from app.services.alert_service import AlertService, ALERT_EVALUATION_JOB_TYPE
+from app.services.communication_service import CommunicationService, MESSAGE_DELIVERY_JOB_TYPE
+from app.services.csv_import_service import CSVImportService
+from app.services.fee_service import FeeService, FEE_ASSIGNMENT_JOB_TYPE
+from app.services.grade_service import GradeService
+from app.services.job_service import JobService
+from app.services.material_search_service import MaterialSearchService, BACKLOG_JOB_TYPE
+from app.services.platform_stats_service import PlatformStatsService, REFRESH_JOB_TYPE
+from app.services.promotion_service import PromotionService
+
+
+@JobService.handler("report_card_batch", max_attempts=3)
+async def generate_report_cards(db: AsyncSession, job: BackgroundJob, progress: dict) -> dict:
+    # Safe to retry: students who already have a report card are skipped
+    return await GradeService.create_report_cards_batch(
+        db,
+        job.payload['term_id'],
+        job.school_id,
+        job.created_by,
+        class_ids=job.payload.get('class_ids'),
+        progress=progress
+    )
+
+
+@JobService.handler("student_import")
+async def import_students(db: AsyncSession, job: BackgroundJob, progress: dict) -> dict:
+    # Chunks already committed would come back as duplicates, so no retries
+    await CSVImportService.import_students(
+        db, job.school_id, job.payload['content'], progress=progress, collect_created=False
+    )
+    return {
+        'total_rows': progress['total_rows'],
+        'successful_imports': progress['successful_imports'],
+        'failed_imports': progress['failed_imports']
+    }
+
+
+@JobService.handler("promotion")
+async def promote_students(db: AsyncSession, job: BackgroundJob, progress: dict) -> dict:
+    decisions = [PromotionDecision(**decision) for decision in job.payload['decisions']]
+    result = await PromotionService.promote_students(
+        db, job.school_id, job.payload['session_id'], decisions, job.created_by
+    )
+    progress['processed'] = result.total_processed
+    return result.model_dump(mode="json")
+
+
+@JobService.handler(FEE_ASSIGNMENT_JOB_TYPE, max_attempts=3)
+async def assign_fees(db: AsyncSession, job: BackgroundJob, progress: dict) -> dict:
+    # Safe to retry: students assigned by committed chunks are skipped
+    return await FeeService.bulk_create_fee_assignments(
+        db, BulkFeeAssignmentCreate(**job.payload), job.school_id, progress=progress, collect_ids=False
+    )
+
+
+@JobService.handler(MESSAGE_DELIVERY_JOB_TYPE)
+async def deliver_message(db: AsyncSession, job: BackgroundJob, progress: dict) -> dict:
+    # Emails already handed to the provider would go out again, so no retries
+    if not await CommunicationService.send_message(db, job.payload['message_id'], job.school_id, progress=progress):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
+    return dict(progress)
+
+
+@JobService.handler(REFRESH_JOB_TYPE, every=settings.platform_stats_interval)
+async def refresh_platform_stats(db: AsyncSession, job: BackgroundJob, progress: dict) -> dict:
+    # Periodic: rebuilds the platform admin console's rollup tables
+    return await PlatformStatsService.refresh(db)
+
+
+@JobService.handler(ALERT_EVALUATION_JOB_TYPE, every=settings.alert_evaluation_interval)
+async def evaluate_alert_rules(db: AsyncSession, job: BackgroundJob, progress: dict) -> dict:
+    # Periodic: rules missed by a failed run are still due and are picked up by the next
+    return await AlertService.evaluate_due_rules(db, progress=progress)
+
+
+@JobService.handler(BACKLOG_JOB_TYPE, every=settings.material_search_backlog_interval)
+async def index_material_backlog(db: AsyncSession, job: BackgroundJob, progress: dict) -> dict:
+    # Periodic: the first run after deploying the search index backfills it
+    return await MaterialSearchService.index_backlog(db, progress=progress)
@@ -0,0 +1,508 @@
+"""
+Background Job Service
+
+Long-running school operations (report card batches, student imports,
+promotions) run as jobs stored in background_jobs rather than inside a
+request. Each job records its status, progress counters, result and error, so
+progress can be read from any process and survives restarts.
+
+A job is claimed with a conditional update that also enforces the per-school
+concurrency limit, so one school's bulk work cannot take every worker. Failed
+attempts are retried with exponential backoff up to the job type's
+max_attempts; an HTTPException from a handler is a caller error and is not
+retried.
+
+The worker running a job refreshes its heartbeat along with its progress. A
+running job whose heartbeat is older than job_lease_timeout lost its worker
+(a crash, a killed container); requeue_stale hands it back to the queue, or
+fails it when it is out of attempts, so it stops holding its school's slot.
+
+Job types registered with every=<seconds> are also periodic: a run is queued
+under PLATFORM_SCOPE whenever the last one is that old and none is waiting,
+for platform-wide upkeep such as statistics rollups.
+
+Where jobs run depends on settings.job_broker:
+
+- "local": a pool of asyncio tasks in the web process picks up due jobs
+  (started from the app lifespan). Jobs left running by a previous process
+  are requeued when the pool starts, so this mode expects one process.
+- "celery": enqueue hands the job id to Celery (app.worker) and workers on
+  other machines run it; the database stays the source of truth. Celery beat
+  queues the periodic jobs and requeues abandoned ones.
+"""
+
+import asyncio
+import importlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.background_job import BackgroundJob, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# Handlers get a session, the claimed job and a progress dict to update in
+# place; they return a JSON-serialisable result
+JobHandler = Callable[[AsyncSession, BackgroundJob, dict], Awaitable[Optional[dict]]]
+
+# Module whose import registers every job handler
+HANDLERS_MODULE = "app.services.job_handlers"
+
+# school_id of jobs that are not for any one school
+PLATFORM_SCOPE = "platform"
+
+
+@dataclass(frozen=True)
+class JobType:
+    handler: JobHandler
+    max_attempts: int
+    every: Optional[float] = None  # Seconds between runs of a periodic job type
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class JobService:
+    """Durable job queue with an in-process worker pool and a Celery hand-off"""
+
+    session_factory = AsyncSessionLocal
+
+    _handlers: Dict[str, JobType] = {}
+    _active: Dict[str, asyncio.Task] = {}
+    _wake: Optional[asyncio.Event] = None
+    _task: Optional[asyncio.Task] = None
+
+    _next_schedule: float = 0.0
+
+    @staticmethod
+    def handler(job_type: str, max_attempts: int = 1, every: Optional[float] = None):
+        """Register the decorated coroutine as the handler for job_type, run every N seconds if given"""
+        def register(func: JobHandler) -> JobHandler:
+            JobService._handlers[job_type] = JobType(func, max_attempts, every)
+            return func
+        return register
+
+    @staticmethod
+    def _load_handlers() -> None:
+        importlib.import_module(HANDLERS_MODULE)
+
+    @staticmethod
+    async def enqueue(
+        db: AsyncSession,
+        school_id: str,
+        job_type: str,
+        payload: dict,
+        created_by: Optional[str] = None,
+        progress: Optional[dict] = None
+    ) -> BackgroundJob:
+        """Store a pending job and hand it to the broker"""
+        JobService._load_handlers()
+        if job_type not in JobService._handlers:
+            raise ValueError(f"Unknown job type '{job_type}'")
+
+        job = BackgroundJob(
+            school_id=school_id,
+            job_type=job_type,
+            payload=payload,
+            progress=progress or {},
+            max_attempts=JobService._handlers[job_type].max_attempts,
+            run_after=utcnow(),
+            created_by=created_by
+        )
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+
+        JobService.publish(job.id)
+        return job
+
+    @staticmethod
+    async def enqueue_scheduled() -> List[str]:
+        """Queue a run of each periodic job type that is due; returns the job types queued"""
+        JobService._load_handlers()
+        periodic = {name: job_type for name, job_type in JobService._handlers.items() if job_type.every}
+        if not periodic:
+            return []
+
+        now = utcnow()
+        async with JobService.session_factory() as db:
+            # Types with a run still waiting, or started too recently
+            not_due = set((await db.execute(
+                select(BackgroundJob.job_type).where(
+                    BackgroundJob.school_id == PLATFORM_SCOPE,
+                    BackgroundJob.is_deleted == False,
+                    or_(*(
+                        and_(
+                            BackgroundJob.job_type == name,
+                            or_(
+                                BackgroundJob.status.in_([JobStatus.PENDING, JobStatus.RUNNING]),
+                                BackgroundJob.created_at > now - timedelta(seconds=job_type.every)
+                            )
+                        )
+                        for name, job_type in periodic.items()
+                    ))
+                ).distinct()
+            )).scalars().all())
+
+            queued = []
+            for name in periodic:
+                if name not in not_due:
+                    await JobService.enqueue(db, PLATFORM_SCOPE, name, {})
+                    queued.append(name)
+        return queued
+
+    @staticmethod
+    def publish(job_id: str, delay: float = 0) -> None:
+        """Tell workers a job is due (now or after delay seconds)"""
+        if settings.job_broker == "celery":
+            from app.worker import run_background_job
+            run_background_job.apply_async(args=[job_id], countdown=delay)
+        elif JobService._wake is not None and not delay:
+            # Delayed retries are found by the pool's next poll once due
+            JobService._wake.set()
+
+    @staticmethod
+    async def get_job(
+        db: AsyncSession,
+        job_id: str,
+        school_id: str,
+        job_type: Optional[str] = None
+    ) -> Optional[BackgroundJob]:
+        """Get a job, scoped to the school that started it"""
+        query = select(BackgroundJob).where(
+            BackgroundJob.id == job_id,
+            BackgroundJob.school_id == school_id,
+            BackgroundJob.is_deleted == False
+        )
+        if job_type:
+            query = query.where(BackgroundJob.job_type == job_type)
+        # Workers update jobs from other sessions, so never serve a cached copy
+        result = await db.execute(query.execution_options(populate_existing=True))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def list_jobs(
+        db: AsyncSession,
+        school_id: str,
+        job_type: Optional[str] = None,
+        status: Optional[JobStatus] = None,
+        limit: int = 50
+    ) -> List[BackgroundJob]:
+        """A school's most recent jobs"""
+        query = select(BackgroundJob).where(
+            BackgroundJob.school_id == school_id,
+            BackgroundJob.is_deleted == False
+        )
+        if job_type:
+            query = query.where(BackgroundJob.job_type == job_type)
+        if status:
+            query = query.where(BackgroundJob.status == status)
+        result = await db.execute(
+            query.order_by(BackgroundJob.created_at.desc()).limit(limit).execution_options(populate_existing=True)
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    def as_dict(job: BackgroundJob) -> dict:
+        """A job's state, with its progress counters also at the top level"""
+        return {
+            **(job.progress or {}),
+            'job_id': job.id,
+            'job_type': job.job_type,
+            'status': job.status.value,
+            'progress': job.progress or {},
+            'result': job.result,
+            'error': job.error,
+            'attempts': job.attempts,
+            'max_attempts': job.max_attempts,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at
+        }
+
+    @staticmethod
+    def _busy_schools():
+        """Schools already running as many jobs as they are allowed"""
+        return select(BackgroundJob.school_id).where(
+            BackgroundJob.status == JobStatus.RUNNING
+        ).group_by(BackgroundJob.school_id).having(func.count() >= settings.job_tenant_concurrency)
+
+    @staticmethod
+    async def _claim(db: AsyncSession, job_id: str) -> bool:
+        """Mark a due pending job running, unless its school is at its concurrency limit"""
+        school_id = (await db.execute(
+            select(BackgroundJob.school_id).where(BackgroundJob.id == job_id)
+        )).scalar_one_or_none()
+        if school_id is None:
+            return False
+
+        if db.bind.dialect.name == 'postgresql':
+            # Serialise claims per school so two workers cannot both take the last slot
+            await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(school_id))))
+
+        running = aliased(BackgroundJob)
+        running_count = select(func.count()).select_from(running).where(
+            running.school_id == school_id,
+            running.status == JobStatus.RUNNING
+        ).scalar_subquery()
+        now = utcnow()
+        result = await db.execute(
+            update(BackgroundJob).where(
+                BackgroundJob.id == job_id,
+                BackgroundJob.status == JobStatus.PENDING,
+                BackgroundJob.run_after <= now,
+                running_count < settings.job_tenant_concurrency
+            ).values(
+                status=JobStatus.RUNNING,
+                attempts=BackgroundJob.attempts + 1,
+                started_at=now,
+                heartbeat_at=now
+            ).execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    async def run_job(job_id: str) -> bool:
+        """
+        Claim and run one job in a session of its own.
+
+        Returns False when the job is still waiting (not yet due, or its school
+        is at its concurrency limit) so the caller can offer it again later.
+        """
+        JobService._load_handlers()
+        async with JobService.session_factory() as db:
+            if not await JobService._claim(db, job_id):
+                status = (await db.execute(
+                    select(BackgroundJob.status).where(BackgroundJob.id == job_id)
+                )).scalar_one_or_none()
+                return status != JobStatus.PENDING
+
+            job = (await db.execute(select(BackgroundJob).where(BackgroundJob.id == job_id))).scalar_one()
+            attempts, max_attempts = job.attempts, job.max_attempts
+            progress = dict(job.progress or {})
+            job_type = JobService._handlers.get(job.job_type)
+            reporter = asyncio.create_task(JobService._report_progress(job_id, attempts, progress))
+
+            failure = None
+            try:
+                if job_type is None:
+                    raise ValueError(f"No handler registered for job type '{job.job_type}'")
+                result = await job_type.handler(db, job, progress)
+            except Exception as e:
+                failure = e
+            finally:
+                # Also when the handler is cancelled, which is not an Exception
+                reporter.cancel()
+
+            if failure is not None:
+                await db.rollback()
+                await JobService._record_failure(db, job_id, attempts, max_attempts, progress, failure)
+                return True
+
+            await db.execute(
+                update(BackgroundJob).where(
+                    BackgroundJob.id == job_id,
+                    BackgroundJob.attempts == attempts  # Not if the job was requeued and claimed again
+                ).values(
+                    status=JobStatus.COMPLETED,
+                    progress=progress,
+                    result=result,
+                    error=None,
+                    finished_at=utcnow()
+                ).execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            return True
+
+    @staticmethod
+    async def _record_failure(
+        db: AsyncSession,
+        job_id: str,
+        attempts: int,
+        max_attempts: int,
+        progress: dict,
+        error: Exception
+    ) -> None:
+        message = str(error.detail) if isinstance(error, HTTPException) else str(error)
+        retry = not isinstance(error, HTTPException) and attempts < max_attempts
+        logger.error(f"Background job {job_id} attempt {attempts}/{max_attempts} failed: {message}")
+
+        if retry:
+            delay = settings.job_retry_delay * 2 ** (attempts - 1)
+            values = dict(status=JobStatus.PENDING, run_after=utcnow() + timedelta(seconds=delay))
+        else:
+            delay = None
+            values = dict(status=JobStatus.FAILED, finished_at=utcnow())
+
+        await db.execute(
+            update(BackgroundJob).where(
+                BackgroundJob.id == job_id,
+                BackgroundJob.attempts == attempts
+            ).values(
+                progress=progress, error=message, **values
+            ).execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        if retry:
+            JobService.publish(job_id, delay)
+
+    @staticmethod
+    async def _report_progress(job_id: str, attempts: int, progress: dict) -> None:
+        """Persist the handler's progress counters and heartbeat every job_progress_interval seconds"""
+        while True:
+            await asyncio.sleep(settings.job_progress_interval)
+            try:
+                async with JobService.session_factory() as db:
+                    await db.execute(
+                        update(BackgroundJob).where(
+                            BackgroundJob.id == job_id,
+                            BackgroundJob.attempts == attempts
+                        ).values(
+                            progress=dict(progress),
+                            heartbeat_at=utcnow()
+                        ).execution_options(synchronize_session=False)
+                    )
+                    await db.commit()
+            except Exception as e:
+                logger.warning(f"Saving progress of background job {job_id} failed: {e}")
+
+    @staticmethod
+    async def _requeue_running(db: AsyncSession, *conditions, error: str) -> List[str]:
+        """Requeue running jobs matching conditions, or fail those out of attempts; returns the requeued ids"""
+        now = utcnow()
+        running = [BackgroundJob.status == JobStatus.RUNNING, *conditions]
+        requeued = (await db.execute(
+            update(BackgroundJob).where(
+                *running,
+                BackgroundJob.attempts < BackgroundJob.max_attempts
+            ).values(
+                status=JobStatus.PENDING, run_after=now, error=error
+            ).returning(BackgroundJob.id).execution_options(synchronize_session=False)
+        )).scalars().all()
+        await db.execute(
+            update(BackgroundJob).where(*running).values(
+                status=JobStatus.FAILED, error=error, finished_at=now
+            ).execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        return list(requeued)
+
+    @staticmethod
+    async def requeue_stale() -> List[str]:
+        """Hand back running jobs whose worker stopped sending heartbeats; returns the requeued ids"""
+        stale_before = utcnow() - timedelta(seconds=settings.job_lease_timeout)
+        async with JobService.session_factory() as db:
+            requeued = await JobService._requeue_running(
+                db,
+                or_(
+                    BackgroundJob.heartbeat_at < stale_before,
+                    and_(BackgroundJob.heartbeat_at.is_(None), BackgroundJob.started_at < stale_before)
+                ),
+                error="Worker stopped responding"
+            )
+        for job_id in requeued:
+            logger.warning(f"Background job {job_id} lost its worker; requeued")
+            # A redelivered broker message may already have been dropped while the job looked running
+            JobService.publish(job_id)
+        return requeued
+
+    # In-process worker pool (job_broker == "local")
+
+    @staticmethod
+    async def recover() -> None:
+        """Requeue jobs a previous process left running, or fail them when out of attempts"""
+        async with JobService.session_factory() as db:
+            await JobService._requeue_running(db, error="Interrupted by a restart")
+
+    @staticmethod
+    async def dispatch() -> int:
+        """Start due jobs on free workers; returns how many were started"""
+        free = settings.job_workers - len(JobService._active)
+        if free <= 0:
+            return 0
+
+        query = select(BackgroundJob.id).where(
+            BackgroundJob.status == JobStatus.PENDING,
+            BackgroundJob.run_after <= utcnow(),
+            BackgroundJob.school_id.notin_(JobService._busy_schools())
+        ).order_by(BackgroundJob.created_at).limit(free)
+        if JobService._active:
+            query = query.where(BackgroundJob.id.notin_(list(JobService._active)))
+        async with JobService.session_factory() as db:
+            due = (await db.execute(query)).scalars().all()
+
+        for job_id in due:
+            task = asyncio.create_task(JobService.run_job(job_id))
+            JobService._active[job_id] = task
+            task.add_done_callback(lambda done, job_id=job_id: JobService._finished(job_id, done))
+        return len(due)
+
+    @staticmethod
+    def _finished(job_id: str, task: asyncio.Task) -> None:
+        JobService._active.pop(job_id, None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.error(f"Background job {job_id} crashed its worker: {task.exception()}")
+        # A finished job frees a worker and perhaps its school's slot
+        if JobService._wake is not None:
+            JobService._wake.set()
+
+    @staticmethod
+    async def _run() -> None:
+        try:
+            await JobService.recover()
+        except Exception as e:
+            logger.error(f"Recovering interrupted background jobs failed: {e}")
+        loop = asyncio.get_running_loop()
+        while True:
+            if loop.time() >= JobService._next_schedule:
+                JobService._next_schedule = loop.time() + settings.job_schedule_interval
+                try:
+                    await JobService.requeue_stale()
+                    await JobService.enqueue_scheduled()
+                except Exception as e:
+                    logger.error(f"Queueing periodic background jobs failed, will retry: {e}")
+            try:
+                await JobService.dispatch()
+            except Exception as e:
+                logger.error(f"Dispatching background jobs failed, will retry: {e}")
+            try:
+                await asyncio.wait_for(JobService._wake.wait(), settings.job_poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            JobService._wake.clear()
+
+    @staticmethod
+    def start() -> None:
+        """Start the in-process worker pool on the running loop"""
+        if settings.job_broker == "local" and JobService._task is None:
+            JobService._wake = asyncio.Event()
+            JobService._task = asyncio.create_task(JobService._run())
+
+    @staticmethod
+    async def stop() -> None:
+        """Stop the pool; jobs cut short are requeued by the next start"""
+        task = JobService._task
+        JobService._task = None
+        JobService._wake = None
+        JobService._next_schedule = 0.0
+        running = list(JobService._active.values())
+        for pending in ([task] if task else []) + running:
+            pending.cancel()
+        for pending in ([task] if task else []) + running:
+            try:
+                await pending
+            except (asyncio.CancelledError, Exception):
+                pass
+        JobService._active.clear()
@@ -0,0 +1,581 @@
+"""
+Material Search Service
+
+Full-text search over teacher materials, backed by an inverted index
+(material_search_terms) that is maintained whenever a material is created,
+updated, retagged or deleted.
+
+Only searchable (published, current) materials have postings. Words from
+the title, topic, tags, keywords, description and exam fields are stored with
+a field-weighted frequency and the material's length, so a query is a lookup
+of its terms on the (school_id, field, term) index followed by Okapi BM25
+scoring in SQL, without touching teacher_materials unless filters are given.
+The last query word also matches as a prefix, keeping partial-word searches
+working. Whole tags are indexed separately and give tag facets over the
+matching materials.
+
+Materials without postings (created before the index existed) are indexed,
+related materials included, by the periodic "material_search_backlog" job
+rather than by reads, so searching and related lookups never write.
+
+Related materials are precomputed: when a material is indexed, its most
+distinctive terms are run as a BM25 query, combined with subject, topic and
+grade matches, and the best neighbours are stored in material_similarities
+in both directions.
+"""
+
+import math
+import re
+import uuid
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from cachetools import TTLCache
+
+from sqlalchemy import Float, and_, case, delete, desc, exists, func, insert, literal, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, selectinload
+
+from app.models.teacher_material import (
+    DifficultyLevel, MaterialSearchTerm, MaterialSimilarity, MaterialType, TeacherMaterial
+)
+
+# Okapi BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Weight of one occurrence of a word in each field
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "topic": 2.0,
+    "tags": 2.0,
+    "keywords": 2.0,
+    "description": 1.0,
+    "content_summary": 1.0,
+    "grade_level": 1.0,
+    "exam_type": 1.0,
+}
+
+# Terms the last query word may expand to as a prefix, and their share of the idf
+MAX_QUERY_TERMS = 50
+PREFIX_WEIGHT = 0.5
+
+# Neighbours stored per material, and the terms that describe it for the lookup
+RELATED_PER_MATERIAL = 20
+RELATED_QUERY_TERMS = 20
+RELATED_TEXT_WEIGHT = 2.0
+SAME_SUBJECT_BONUS = 1.0
+SAME_TOPIC_BONUS = 1.0
+SAME_GRADE_BONUS = 0.5
+
+MAX_FACETS = 20
+
+# Seconds the corpus size and mean length used for BM25 are reused between writes
+CORPUS_STATS_TTL = 60
+
+# Periodic job that indexes materials without postings, and materials per commit
+BACKLOG_JOB_TYPE = "material_search_backlog"
+BACKLOG_BATCH_SIZE = 200
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it its of on or the this to with".split()
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lower-cased words of a text, without stopwords and single letters"""
+    if not text:
+        return []
+    return [
+        word[:100] for word in _WORD.findall(text.lower())
+        if word not in STOPWORDS and (len(word) > 1 or word.isdigit())
+    ]
+
+
+def _normalise_tag(tag: str) -> str:
+    return " ".join(str(tag).lower().split())[:100]
+
+
+def _idf(total: int, frequency: int) -> float:
+    # The corpus size may lag the postings by CORPUS_STATS_TTL
+    total = max(total, frequency)
+    return math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+
+
+def _is_searchable(material: TeacherMaterial) -> bool:
+    return not material.is_deleted and material.is_current_version and material.is_published
+
+
+def _published() -> List[Any]:
+    return [
+        TeacherMaterial.is_deleted == False,
+        TeacherMaterial.is_current_version == True,
+        TeacherMaterial.is_published == True
+    ]
+
+
+def _searchable(school_id: str) -> List[Any]:
+    """Materials that appear in search results"""
+    return [TeacherMaterial.school_id == school_id, *_published()]
+
+
+class MaterialSearchService:
+    """Index maintenance, ranked search and related materials"""
+
+    _corpus_stats: TTLCache = TTLCache(maxsize=10_000, ttl=CORPUS_STATS_TTL)
+
+    # ============== Indexing ==============
+
+    @staticmethod
+    def build_postings(material: TeacherMaterial) -> Tuple[Counter, Set[str]]:
+        """Field-weighted term frequencies and normalised tags of a material"""
+        weights: Counter = Counter()
+        fields = {
+            "title": material.title,
+            "topic": material.topic,
+            "description": material.description,
+            "content_summary": material.content_summary,
+            "grade_level": material.grade_level,
+            "exam_type": material.exam_type,
+            "tags": " ".join(str(t) for t in material.tags or []),
+            "keywords": " ".join(str(k) for k in material.keywords or []),
+        }
+        for field, text in fields.items():
+            for word in tokenize(text):
+                weights[word] += FIELD_WEIGHTS[field]
+        tags = {_normalise_tag(tag) for tag in material.tags or [] if str(tag).strip()}
+        return weights, tags
+
+    @staticmethod
+    def _posting_rows(material: TeacherMaterial, weights: Counter, tags: Set[str]) -> List[Dict[str, Any]]:
+        """material_search_terms rows for a material's postings; search_length must be set"""
+        postings = [
+            {"field": "text", "term": term, "weight": weight} for term, weight in weights.items()
+        ] + [
+            {"field": "tag", "term": tag, "weight": 1.0} for tag in tags
+        ]
+        return [
+            {
+                "id": str(uuid.uuid4()),
+                "school_id": material.school_id,
+                "material_id": material.id,
+                "length": material.search_length,
+                **posting
+            }
+            for posting in postings
+        ]
+
+    @staticmethod
+    async def index_material(db: AsyncSession, material: TeacherMaterial, related: bool = True) -> None:
+        """
+        Replace the postings (and, with related=True, the precomputed related
+        materials) of a material. Drafts and old versions keep no postings but
+        still get related materials. Runs in the caller's transaction; the
+        material must already be flushed.
+        """
+        await db.execute(delete(MaterialSearchTerm).where(MaterialSearchTerm.material_id == material.id))
+        MaterialSearchService._corpus_stats.pop(material.school_id, None)
+        if material.is_deleted:
+            await db.execute(delete(MaterialSimilarity).where(or_(
+                MaterialSimilarity.material_id == material.id,
+                MaterialSimilarity.related_id == material.id
+            )))
+            material.search_length = None
+            return
+
+        weights, tags = MaterialSearchService.build_postings(material)
+        material.search_length = float(sum(weights.values()))
+        rows = MaterialSearchService._posting_rows(material, weights, tags)
+        if rows and _is_searchable(material):
+            await db.execute(insert(MaterialSearchTerm), rows)
+
+        if related:
+            await MaterialSearchService.refresh_related(db, material, weights)
+
+    @staticmethod
+    async def index_backlog(
+        db: AsyncSession,
+        batch_size: int = BACKLOG_BATCH_SIZE,
+        progress: Optional[dict] = None
+    ) -> Dict[str, int]:
+        """
+        Index materials that have no postings yet, such as those created before
+        the search index existed, and compute their related materials,
+        batch_size at a time with a commit per batch. Runs as the periodic
+        BACKLOG_JOB_TYPE job, so searches and related lookups never write.
+        """
+        progress = progress if progress is not None else {}
+        indexed = 0
+        while True:
+            pending = (await db.execute(
+                select(TeacherMaterial).where(
+                    TeacherMaterial.is_deleted == False,
+                    TeacherMaterial.search_length.is_(None)
+                ).order_by(TeacherMaterial.id).limit(batch_size)
+            )).scalars().all()
+            if not pending:
+                break
+
+            # One DELETE and one INSERT for the whole batch
+            await db.execute(delete(MaterialSearchTerm).where(
+                MaterialSearchTerm.material_id.in_([material.id for material in pending])
+            ))
+            rows = []
+            weights_by_id = {}
+            for material in pending:
+                weights, tags = MaterialSearchService.build_postings(material)
+                weights_by_id[material.id] = weights
+                material.search_length = float(sum(weights.values()))
+                if _is_searchable(material):
+                    rows.extend(MaterialSearchService._posting_rows(material, weights, tags))
+                MaterialSearchService._corpus_stats.pop(material.school_id, None)
+            if rows:
+                await db.execute(insert(MaterialSearchTerm), rows)
+            # Once the whole batch has postings, so its materials can relate to each other
+            for material in pending:
+                await MaterialSearchService.refresh_related(db, material, weights_by_id[material.id])
+            await db.commit()
+
+            indexed += len(pending)
+            progress['indexed'] = indexed
+        return {'indexed': indexed}
+
+    # ============== Search ==============
+
+    @staticmethod
+    async def _corpus(db: AsyncSession, school_id: str) -> Tuple[int, float]:
+        """Number and mean length of the searchable materials"""
+        stats = MaterialSearchService._corpus_stats.get(school_id)
+        if stats is None:
+            total, average_length = (await db.execute(
+                select(func.count(), func.avg(TeacherMaterial.search_length)).where(
+                    *_searchable(school_id), TeacherMaterial.search_length.isnot(None)
+                )
+            )).one()
+            stats = MaterialSearchService._corpus_stats[school_id] = (total, float(average_length or 1.0))
+        return stats
+
+    @staticmethod
+    async def _query_terms(
+        db: AsyncSession,
+        school_id: str,
+        words: List[str],
+        prefix: Optional[str]
+    ) -> Tuple[Dict[str, float], float]:
+        """idf of the indexed terms a query matches, with the mean material length"""
+        total, average_length = await MaterialSearchService._corpus(db, school_id)
+        if not total:
+            return {}, average_length
+
+        def frequencies(condition):
+            return (
+                select(MaterialSearchTerm.term.label("term"), func.count().label("frequency"))
+                .where(MaterialSearchTerm.school_id == school_id, MaterialSearchTerm.field == "text", condition)
+                .group_by(MaterialSearchTerm.term)
+            )
+
+        # One index seek per branch; an OR of the two would scan the school's postings
+        exact_words = words[:-1] if prefix else words
+        branches = [frequencies(MaterialSearchTerm.term.in_(exact_words))] if exact_words else []
+        if prefix:
+            # A range rather than LIKE 'prefix%', so the term index serves it on every database
+            upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            branches.append(frequencies(and_(MaterialSearchTerm.term >= prefix, MaterialSearchTerm.term < upper)))
+        combined = union_all(*branches).subquery()
+        result = await db.execute(
+            select(combined.c.term, combined.c.frequency)
+            .order_by(case((combined.c.term.in_(words), 0), else_=1), desc(combined.c.frequency))
+            .limit(MAX_QUERY_TERMS)
+        )
+        idf = {}
+        for term, frequency in result.all():
+            weight = 1.0 if term in words else PREFIX_WEIGHT
+            idf[term] = _idf(total, frequency) * weight
+        return idf, average_length
+
+    @staticmethod
+    def _bm25(idf: Dict[str, float], average_length: float):
+        """SQL expression for the BM25 score of one material over its matching postings"""
+        term_idf = case(
+            *((MaterialSearchTerm.term == term, literal(value, Float)) for term, value in idf.items()),
+            else_=literal(0.0, Float)
+        )
+        frequency = MaterialSearchTerm.weight
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * MaterialSearchTerm.length / average_length)
+        return func.sum(term_idf * frequency * (BM25_K1 + 1) / (frequency + norm))
+
+    @staticmethod
+    async def search(
+        db: AsyncSession,
+        school_id: str,
+        query: str,
+        subject_id: Optional[str] = None,
+        class_id: Optional[str] = None,
+        grade_level: Optional[str] = None,
+        difficulty_level: Optional[DifficultyLevel] = None,
+        exam_type: Optional[str] = None,
+        material_type: Optional[MaterialType] = None,
+        tags: Optional[List[str]] = None,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """
+        Ranked search over published materials.
+
+        Returns the best `limit` results by BM25 score, the number of matching
+        materials and the tag facets over all of them; `tags` narrows the
+        results to materials carrying all of the given tags.
+        """
+        empty = {"results": [], "total": 0, "facets": {"tags": []}}
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return empty
+
+        # The last word may still be being typed
+        prefix = words[-1] if len(words[-1]) > 1 else None
+        idf, average_length = await MaterialSearchService._query_terms(db, school_id, words, prefix)
+        if not idf:
+            return empty
+
+        conditions = [
+            MaterialSearchTerm.school_id == school_id,
+            MaterialSearchTerm.field == "text",
+            MaterialSearchTerm.term.in_(list(idf))
+        ]
+        filters = []
+        if subject_id:
+            filters.append(TeacherMaterial.subject_id == subject_id)
+        if class_id:
+            filters.append(TeacherMaterial.class_id == class_id)
+        if grade_level:
+            filters.append(TeacherMaterial.grade_level == grade_level)
+        if difficulty_level:
+            filters.append(TeacherMaterial.difficulty_level == difficulty_level)
+        if exam_type:
+            filters.append(TeacherMaterial.exam_type == exam_type)
+        if material_type:
+            filters.append(TeacherMaterial.material_type == material_type)
+        for tag in tags or []:
+            tagged = aliased(MaterialSearchTerm)
+            conditions.append(exists().where(
+                tagged.material_id == MaterialSearchTerm.material_id,
+                tagged.field == "tag",
+                tagged.term == _normalise_tag(tag)
+            ))
+
+        def matches(*columns):
+            statement = select(*columns).where(*conditions)
+            if filters:
+                statement = statement.join(
+                    TeacherMaterial, TeacherMaterial.id == MaterialSearchTerm.material_id
+                ).where(*filters)
+            return statement.group_by(MaterialSearchTerm.material_id)
+
+        score = MaterialSearchService._bm25(idf, average_length).label("score")
+        matching = matches(MaterialSearchTerm.material_id)
+        result = await db.execute(
+            matches(MaterialSearchTerm.material_id, score)
+            .order_by(desc(score), MaterialSearchTerm.material_id)
+            .limit(limit)
+        )
+        ranked = result.all()
+        if not ranked:
+            return empty
+
+        total = (await db.execute(select(func.count()).select_from(matching.subquery()))).scalar()
+        # Driven from the matches, so only their tag postings are read
+        matched = matching.subquery()
+        tagged = aliased(MaterialSearchTerm)
+        facet_count = func.count().label("count")
+        facets = await db.execute(
+            select(tagged.term, facet_count)
+            .select_from(matched)
+            .join(tagged, and_(tagged.material_id == matched.c.material_id, tagged.field == "tag"))
+            .group_by(tagged.term)
+            .order_by(desc(facet_count), tagged.term)
+            .limit(MAX_FACETS)
+        )
+
+        materials = await db.execute(
+            select(TeacherMaterial)
+            .where(TeacherMaterial.id.in_([row.material_id for row in ranked]))
+            .options(
+                selectinload(TeacherMaterial.subject),
+                selectinload(TeacherMaterial.class_),
+                selectinload(TeacherMaterial.uploader)
+            )
+        )
+        by_id = {material.id: material for material in materials.scalars().all()}
+        return {
+            "results": [
+                MaterialSearchService._format(by_id[row.material_id], row.score)
+                for row in ranked if row.material_id in by_id
+            ],
+            "total": total,
+            "facets": {"tags": [{"tag": tag, "count": n} for tag, n in facets.all()]}
+        }
+
+    @staticmethod
+    def _format(material: TeacherMaterial, score: float) -> Dict[str, Any]:
+        return {
+            "id": material.id,
+            "title": material.title,
+            "description": material.description,
+            "material_type": material.material_type.value,
+            "subject_name": material.subject.name if material.subject else None,
+            "class_name": material.class_.name if material.class_ else None,
+            "grade_level": material.grade_level,
+            "topic": material.topic,
+            "tags": material.tags or [],
+            "difficulty_level": material.difficulty_level.value if material.difficulty_level else None,
+            "exam_type": material.exam_type,
+            "view_count": material.view_count,
+            "download_count": material.download_count,
+            "uploader_name": f"{material.uploader.first_name} {material.uploader.last_name}" if material.uploader else None,
+            "created_at": material.created_at.isoformat(),
+            "score": round(float(score), 4)
+        }
+
+    # ============== Related Materials ==============
+
+    @staticmethod
+    async def _related_scores(
+        db: AsyncSession,
+        material: TeacherMaterial,
+        weights: Optional[Counter] = None
+    ) -> Dict[str, float]:
+        """Score the material's neighbours by shared terms, subject, topic and grade level, best first"""
+        if weights is None:
+            weights, _ = MaterialSearchService.build_postings(material)
+        school_id = material.school_id
+        scores: Counter = Counter()
+
+        if weights:
+            total, average_length = await MaterialSearchService._corpus(db, school_id)
+            frequencies = await db.execute(
+                select(MaterialSearchTerm.term, func.count())
+                .where(
+                    MaterialSearchTerm.school_id == school_id,
+                    MaterialSearchTerm.field == "text",
+                    MaterialSearchTerm.term.in_(list(weights)),
+                    MaterialSearchTerm.material_id != material.id
+                )
+                .group_by(MaterialSearchTerm.term)
+            )
+            # The material's most distinctive shared terms, weighted by how much it uses them
+            idf = {term: _idf(total, frequency) * weights[term] for term, frequency in frequencies.all()}
+            idf = dict(sorted(idf.items(), key=lambda item: -item[1])[:RELATED_QUERY_TERMS])
+            if idf:
+                score = MaterialSearchService._bm25(idf, average_length).label("score")
+                result = await db.execute(
+                    select(MaterialSearchTerm.material_id, score)
+                    .where(
+                        MaterialSearchTerm.school_id == school_id,
+                        MaterialSearchTerm.field == "text",
+                        MaterialSearchTerm.term.in_(list(idf)),
+                        MaterialSearchTerm.material_id != material.id
+                    )
+                    .group_by(MaterialSearchTerm.material_id)
+                    .order_by(desc(score))
+                    .limit(RELATED_PER_MATERIAL * 2)
+                )
+                # Scaled to 0..1 by the highest score possible, so the bonuses stay comparable
+                ceiling = sum(idf.values()) * (BM25_K1 + 1)
+                for material_id, text_score in result.all():
+                    scores[material_id] += RELATED_TEXT_WEIGHT * text_score / ceiling
+
+        structural = []
+        if material.subject_id:
+            structural.append(TeacherMaterial.subject_id == material.subject_id)
+        if material.topic:
+            structural.append(func.lower(TeacherMaterial.topic) == material.topic.lower())
+        if material.grade_level:
+            structural.append(TeacherMaterial.grade_level == material.grade_level)
+        if structural:
+            result = await db.execute(
+                select(TeacherMaterial.id, TeacherMaterial.subject_id, TeacherMaterial.topic, TeacherMaterial.grade_level)
+                .where(*_searchable(school_id), TeacherMaterial.id != material.id, or_(*structural))
+                .order_by(desc(TeacherMaterial.view_count))
+                .limit(RELATED_PER_MATERIAL * 2)
+            )
+            for other_id, subject_id, topic, grade_level in result.all():
+                if material.subject_id and subject_id == material.subject_id:
+                    scores[other_id] += SAME_SUBJECT_BONUS
+                if material.topic and topic and topic.lower() == material.topic.lower():
+                    scores[other_id] += SAME_TOPIC_BONUS
+                if material.grade_level and grade_level == material.grade_level:
+                    scores[other_id] += SAME_GRADE_BONUS
+
+        return dict(scores.most_common(RELATED_PER_MATERIAL))
+
+    @staticmethod
+    async def refresh_related(
+        db: AsyncSession,
+        material: TeacherMaterial,
+        weights: Optional[Counter] = None
+    ) -> Dict[str, float]:
+        """
+        Recompute and store the related materials of a material, and add it to
+        the related materials of each of its neighbours. Runs in the caller's
+        transaction.
+        """
+        neighbours = await MaterialSearchService._related_scores(db, material, weights)
+        await db.execute(delete(MaterialSimilarity).where(or_(
+            MaterialSimilarity.material_id == material.id,
+            MaterialSimilarity.related_id == material.id
+        )))
+        if neighbours:
+            await db.execute(insert(MaterialSimilarity), [
+                {
+                    "id": str(uuid.uuid4()),
+                    "school_id": material.school_id,
+                    "material_id": source,
+                    "related_id": target,
+                    "score": round(score, 6),
+                }
+                for other, score in neighbours.items()
+                for source, target in ((material.id, other), (other, material.id))
+            ])
+        return neighbours
+
+    @staticmethod
+    async def get_related(
+        db: AsyncSession,
+        material: TeacherMaterial,
+        limit: int = 5
+    ) -> List[TeacherMaterial]:
+        """
+        Published materials most related to a material, from the precomputed
+        scores. Materials the backlog job has not reached yet are scored live
+        instead; nothing is stored here.
+        """
+        statement = (
+            select(TeacherMaterial)
+            .join(MaterialSimilarity, MaterialSimilarity.related_id == TeacherMaterial.id)
+            # Similarity rows belong to the material's school; a school filter here would
+            # lead the planner to scan the school's materials instead
+            .where(MaterialSimilarity.material_id == material.id, *_published())
+            .options(selectinload(TeacherMaterial.subject), selectinload(TeacherMaterial.class_))
+            .order_by(desc(MaterialSimilarity.score), desc(TeacherMaterial.view_count))
+            .limit(limit)
+        )
+        related = list((await db.execute(statement)).scalars().all())
+        if related:
+            return related
+
+        # Not computed yet, or nothing was related then
+        scores = await MaterialSearchService._related_scores(db, material)
+        if not scores:
+            return []
+        result = await db.execute(
+            select(TeacherMaterial)
+            .where(TeacherMaterial.id.in_(list(scores)), *_published())
+            .options(selectinload(TeacherMaterial.subject), selectinload(TeacherMaterial.class_))
+        )
+        ranked = sorted(result.scalars().all(), key=lambda m: (-scores[m.id], -(m.view_count or 0)))
+        return ranked[:limit]
+
+    @staticmethod
+    def clear() -> None:
+        MaterialSearchService._corpus_stats.clear()
@@ -13,6 +13,7 @@ from app.models.teacher_material import (
     MaterialType, ShareType, AccessType, DifficultyLevel
 )
 from app.models.academic import Subject, Class, Term
+from app.services.material_search_service import MaterialSearchService
 import logging
 import uuid
 
@@ -72,6 +73,8 @@ class MaterialService:
             published_at=datetime.utcnow() if is_published else None
         )
         db.add(material)
+        await db.flush()
+        await MaterialSearchService.index_material(db, material)
         await db.commit()
         await db.refresh(material)
         return material
@@ -174,6 +177,7 @@ class MaterialService:
             if hasattr(material, field):
                 setattr(material, field, value)
 
+        await MaterialSearchService.index_material(db, material)
         await db.commit()
         await db.refresh(material)
         return material
@@ -198,6 +202,7 @@ class MaterialService:
 
         material.is_deleted = True
         material.deleted_at = datetime.utcnow()
+        await MaterialSearchService.index_material(db, material)
         await db.commit()
         return True
 
@@ -217,78 +222,20 @@ class MaterialService:
         limit: int = 20
     ) -> List[Dict[str, Any]]:
         """
-        Smart search for materials using text matching.
+        Smart search for materials, ranked by relevance.
         Searches across title, description, topic, tags, and keywords.
         """
-        conditions = [
-            TeacherMaterial.school_id == school_id,
-            TeacherMaterial.is_deleted == False,
-            TeacherMaterial.is_current_version == True,
-            TeacherMaterial.is_published == True
-        ]
-
-        # Text search conditions
-        search_term = f"%{query.lower()}%"
-        text_conditions = or_(
-            func.lower(TeacherMaterial.title).like(search_term),
-            func.lower(TeacherMaterial.description).like(search_term),
-            func.lower(TeacherMaterial.topic).like(search_term),
-            func.lower(TeacherMaterial.grade_level).like(search_term),
-            func.lower(TeacherMaterial.exam_type).like(search_term)
-        )
-        conditions.append(text_conditions)
-
-        # Additional filters
-        if subject_id:
-            conditions.append(TeacherMaterial.subject_id == subject_id)
-        if class_id:
-            conditions.append(TeacherMaterial.class_id == class_id)
-        if grade_level:
-            conditions.append(TeacherMaterial.grade_level == grade_level)
-        if difficulty_level:
-            conditions.append(TeacherMaterial.difficulty_level == difficulty_level)
-        if exam_type:
-            conditions.append(TeacherMaterial.exam_type == exam_type)
-        if material_type:
-            conditions.append(TeacherMaterial.material_type == material_type)
-
-        result = await db.execute(
-            select(TeacherMaterial).where(
-                and_(*conditions)
-            ).options(
-                selectinload(TeacherMaterial.subject),
-                selectinload(TeacherMaterial.class_),
-                selectinload(TeacherMaterial.uploader)
-            ).order_by(
-                desc(TeacherMaterial.view_count),
-                desc(TeacherMaterial.download_count),
-                desc(TeacherMaterial.created_at)
-            ).limit(limit)
+        found = await MaterialSearchService.search(
+            db, school_id, query,
+            subject_id=subject_id,
+            class_id=class_id,
+            grade_level=grade_level,
+            difficulty_level=difficulty_level,
+            exam_type=exam_type,
+            material_type=material_type,
+            limit=limit
         )
-        materials = result.scalars().all()
-
-        # Format results with relevance info
-        search_results = []
-        for material in materials:
-            search_results.append({
-                "id": material.id,
-                "title": material.title,
-                "description": material.description,
-                "material_type": material.material_type.value,
-                "subject_name": material.subject.name if material.subject else None,
-                "class_name": material.class_.name if material.class_ else None,
-                "grade_level": material.grade_level,
-                "topic": material.topic,
-                "tags": material.tags or [],
-                "difficulty_level": material.difficulty_level.value if material.difficulty_level else None,
-                "exam_type": material.exam_type,
-                "view_count": material.view_count,
-                "download_count": material.download_count,
-                "uploader_name": f"{material.uploader.first_name} {material.uploader.last_name}" if material.uploader else None,
-                "created_at": material.created_at.isoformat()
-            })
-
-        return search_results
+        return found["results"]
 
     @staticmethod
     async def get_related_materials(
@@ -297,43 +244,12 @@ class MaterialService:
         material_id: str,
         limit: int = 5
     ) -> List[TeacherMaterial]:
-        """Get related materials based on subject, topic, and tags"""
+        """Get related materials based on shared terms, subject, topic and grade level"""
         # Get the source material
         source = await MaterialService.get_material(db, school_id, material_id)
         if not source:
             return []
-
-        conditions = [
-            TeacherMaterial.school_id == school_id,
-            TeacherMaterial.is_deleted == False,
-            TeacherMaterial.is_current_version == True,
-            TeacherMaterial.is_published == True,
-            TeacherMaterial.id != material_id
-        ]
-
-        # Match by subject or topic
-        related_conditions = []
-        if source.subject_id:
-            related_conditions.append(TeacherMaterial.subject_id == source.subject_id)
-        if source.topic:
-            related_conditions.append(func.lower(TeacherMaterial.topic).like(f"%{source.topic.lower()}%"))
-        if source.grade_level:
-            related_conditions.append(TeacherMaterial.grade_level == source.grade_level)
-
-        if related_conditions:
-            conditions.append(or_(*related_conditions))
-
-        result = await db.execute(
-            select(TeacherMaterial).where(
-                and_(*conditions)
-            ).options(
-                selectinload(TeacherMaterial.subject),
-                selectinload(TeacherMaterial.class_)
-            ).order_by(
-                desc(TeacherMaterial.view_count)
-            ).limit(limit)
-        )
-        return list(result.scalars().all())
+        return await MaterialSearchService.get_related(db, source, limit)
 
     @staticmethod
     async def get_suggested_materials_for_lesson(
@@ -401,6 +317,7 @@ class MaterialService:
         new_tags = list(set(existing_tags + tags))
         material.tags = new_tags
 
+        await MaterialSearchService.index_material(db, material)
         await db.commit()
         await db.refresh(material)
         return material
@@ -427,6 +344,7 @@ class MaterialService:
         existing_tags = material.tags or []
         material.tags = [t for t in existing_tags if t not in tags]
 
+        await MaterialSearchService.index_material(db, material)
         await db.commit()
         await db.refresh(material)
         return material
@@ -1,6 +1,7 @@
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, desc
+from sqlalchemy import select, func, desc, insert, update, cast, literal, String
+import uuid
 from app.models.notification import Notification, NotificationType
 from app.schemas.notification import NotificationCreate, NotificationUpdate
 
@@ -20,6 +21,104 @@ class NotificationService:
         await db.refresh(notification)
         return notification
 
+    @staticmethod
+    async def create_notifications_bulk(
+        db: AsyncSession,
+        school_id: str,
+        notifications: Iterable[NotificationCreate],
+        group_key: Optional[str] = None,
+        collapsed_message: Optional[str] = None,
+        commit: bool = True
+    ) -> int:
+        """
+        Create many notifications with a single INSERT; returns how many users were notified.
+
+        Identical notifications to the same user are only sent once. With a
+        group_key, each user's notifications in that group collapse into one
+        unread row: its group_count keeps the running total and, past one,
+        its message becomes collapsed_message with {count} filled in (e.g.
+        "{count} new grades have been posted."). Set commit=False to keep
+        the rows in the caller's transaction.
+        """
+        by_user: Dict[str, List[NotificationCreate]] = {}
+        seen = set()
+        for notification in notifications:
+            key = (notification.user_id, notification.title, notification.message, notification.type, notification.link)
+            if key not in seen:
+                seen.add(key)
+                by_user.setdefault(notification.user_id, []).append(notification)
+        if not by_user:
+            return 0
+
+        rows = []
+        if group_key is None:
+            for items in by_user.values():
+                rows.extend(NotificationService._row(school_id, notification) for notification in items)
+        else:
+            prefix, _, suffix = (collapsed_message or "{count} new notifications").partition("{count}")
+
+            # The unread row each user already has in this group, if any
+            existing_result = await db.execute(
+                select(Notification.user_id, Notification.id).where(
+                    Notification.school_id == school_id,
+                    Notification.user_id.in_(list(by_user)),
+                    Notification.group_key == group_key,
+                    Notification.is_read == False,
+                    Notification.is_deleted == False
+                )
+            )
+            existing = {}
+            for user_id, notification_id in existing_result:
+                existing.setdefault(user_id, notification_id)
+
+            # Existing rows grow by each user's new count; one UPDATE per distinct count
+            bumps: Dict[int, List[str]] = {}
+            for user_id, items in by_user.items():
+                if user_id in existing:
+                    bumps.setdefault(len(items), []).append(existing[user_id])
+                    continue
+                row = NotificationService._row(school_id, items[-1], group_key, len(items))
+                if len(items) > 1:
+                    row['message'] = f"{prefix}{len(items)}{suffix}"
+                rows.append(row)
+
+            for added, notification_ids in bumps.items():
+                total = Notification.group_count + added
+                await db.execute(
+                    update(Notification).where(Notification.id.in_(notification_ids)).values(
+                        group_count=total,
+                        message=literal(prefix, String) + cast(total, String) + literal(suffix, String),
+                        created_at=func.now()  # Back to the top of the user's list
+                    ).execution_options(synchronize_session=False)
+                )
+
+        if rows:
+            await db.execute(insert(Notification.__table__), rows)
+        if commit:
+            await db.commit()
+        return len(by_user)
+
+    @staticmethod
+    def _row(
+        school_id: str,
+        notification: NotificationCreate,
+        group_key: Optional[str] = None,
+        group_count: int = 1
+    ) -> dict:
+        return {
+            'id': str(uuid.uuid4()),
+            'school_id': school_id,
+            'user_id': notification.user_id,
+            'title': notification.title,
+            'message': notification.message,
+            'type': NotificationType(notification.type).value,
+            'link': notification.link,
+            'is_read': False,
+            'is_deleted': False,
+            'group_key': group_key,
+            'group_count': group_count
+        }
+
     @staticmethod
     async def get_notifications(
         db: AsyncSession,
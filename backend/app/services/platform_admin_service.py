@@ -11,8 +11,10 @@ from app.models.school import School
 from app.models.user import User, UserRole
 from app.models.student import Student
 from app.models.academic import Class, Subject, Term
+from app.models.platform_stats import SchoolStats
 from app.schemas.user import UserCreate
 from app.core.security import get_password_hash
+from app.services.platform_stats_service import PlatformStatsService
 
 
 class PlatformAdminService:
@@ -20,83 +22,8 @@ class PlatformAdminService:
     
     @staticmethod
     async def get_platform_statistics(db: AsyncSession) -> Dict[str, Any]:
-        """Get comprehensive platform statistics"""
-        
-        # Total schools
-        total_schools_result = await db.execute(
-            select(func.count(School.id)).where(School.is_deleted == False)
-        )
-        total_schools = total_schools_result.scalar() or 0
-        
-        # Active schools
-        active_schools_result = await db.execute(
-            select(func.count(School.id)).where(
-                and_(School.is_deleted == False, School.is_active == True)
-            )
-        )
-        active_schools = active_schools_result.scalar() or 0
-        
-        # Total school owners
-        school_owners_result = await db.execute(
-            select(func.count(User.id)).where(
-                and_(
-                    User.is_deleted == False,
-                    User.role == UserRole.SCHOOL_OWNER
-                )
-            )
-        )
-        total_school_owners = school_owners_result.scalar() or 0
-        
-        # Trial schools count
-        trial_schools_result = await db.execute(
-            select(func.count(School.id)).where(
-                and_(
-                    School.subscription_plan == "trial",
-                    School.is_deleted == False
-                )
-            )
-        )
-        total_trial_schools = trial_schools_result.scalar() or 0
-        
-        # Schools created this month
-        current_month_start = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        schools_this_month_result = await db.execute(
-            select(func.count(School.id)).where(
-                and_(
-                    School.is_deleted == False,
-                    School.created_at >= current_month_start
-                )
-            )
-        )
-        schools_this_month = schools_this_month_result.scalar() or 0
-        
-        # Calculate growth percentages
-        last_month_start = (current_month_start - timedelta(days=1)).replace(day=1)
-        
-        # Schools last month
-        schools_last_month_result = await db.execute(
-            select(func.count(School.id)).where(
-                and_(
-                    School.is_deleted == False,
-                    School.created_at >= last_month_start,
-                    School.created_at < current_month_start
-                )
-            )
-        )
-        schools_last_month = schools_last_month_result.scalar() or 0
-        
-        # School owners last month
-        owners_last_month_result = await db.execute(
-            select(func.count(User.id)).where(
-                and_(
-                    User.is_deleted == False,
-                    User.role == UserRole.SCHOOL_OWNER,
-                    User.created_at >= last_month_start,
-                    User.created_at < current_month_start
-                )
-            )
-        )
-        owners_last_month = owners_last_month_result.scalar() or 0
+        """Get comprehensive platform statistics from the rollup (see PlatformStatsService)"""
+        current, previous = await PlatformStatsService.get_snapshots(db)
         
         def calculate_growth(current, previous):
             if previous == 0:
@@ -104,61 +31,24 @@ class PlatformAdminService:
             growth = ((current - previous) / previous) * 100
             return f"{'+' if growth >= 0 else ''}{round(growth, 1)}%"
 
-        schools_growth = calculate_growth(schools_this_month, schools_last_month)
-        
-        # Owners this month (reusing logic)
-        owners_this_month_result = await db.execute(
-            select(func.count(User.id)).where(
-                and_(
-                    User.is_deleted == False,
-                    User.role == UserRole.SCHOOL_OWNER,
-                    User.created_at >= current_month_start
-                )
-            )
-        )
-        owners_this_month = owners_this_month_result.scalar() or 0
-        school_owners_growth = calculate_growth(owners_this_month, owners_last_month)
-        
-        # Trial schools growth (simplified, just using total trials vs last month trials)
-        # Or just use a placeholder if tracking historical trials is hard without a history table.
-        # Let's use the same logic for trial schools created this month vs last month.
-        trial_schools_this_month_result = await db.execute(
-            select(func.count(School.id)).where(
-                and_(
-                    School.subscription_plan == "trial",
-                    School.is_deleted == False,
-                    School.created_at >= current_month_start
-                )
-            )
-        )
-        trial_schools_this_month = trial_schools_this_month_result.scalar() or 0
-        
-        trial_schools_last_month_result = await db.execute(
-            select(func.count(School.id)).where(
-                and_(
-                    School.subscription_plan == "trial",
-                    School.is_deleted == False,
-                    School.created_at >= last_month_start,
-                    School.created_at < current_month_start
-                )
-            )
-        )
-        trial_schools_last_month = trial_schools_last_month_result.scalar() or 0
-        trial_schools_growth = calculate_growth(trial_schools_this_month, trial_schools_last_month)
-        
+        def growth(name):
+            return calculate_growth(getattr(current, name), getattr(previous, name) if previous else 0)
+
+        schools_growth = growth("schools_created")
         monthly_growth = schools_growth # Simplified
 
         return {
-            "total_schools": total_schools,
-            "active_schools": active_schools,
-            "total_school_owners": total_school_owners,
-            "schools_this_month": schools_this_month,
+            "total_schools": current.total_schools,
+            "active_schools": current.active_schools,
+            "total_school_owners": current.school_owners,
+            "schools_this_month": current.schools_created,
             "growth_metrics": {
                 "schools": schools_growth,
-                "school_owners": school_owners_growth,
-                "trial_schools": trial_schools_growth,
+                "school_owners": growth("school_owners_created"),
+                "trial_schools": growth("trial_schools_created"),
                 "monthly_growth": monthly_growth
-            }
+            },
+            "refreshed_at": current.refreshed_at
         }
     
     @staticmethod
@@ -169,10 +59,15 @@ class PlatformAdminService:
         search: Optional[str] = None,
         status_filter: Optional[str] = None
     ) -> List[Dict[str, Any]]:
-        """Get all schools with detailed information"""
+        """
+        Get all schools with detailed information
+
+        Student and teacher counts come from the rollup; schools created since
+        its last refresh show zero until the next one.
+        """
         
-        query = select(School).options(
-            selectinload(School.users)
+        query = select(School, SchoolStats.student_count, SchoolStats.teacher_count).outerjoin(
+            SchoolStats, SchoolStats.school_id == School.id
         ).where(School.is_deleted == False)
         
         # Apply search filter
@@ -197,32 +92,24 @@ class PlatformAdminService:
         query = query.order_by(desc(School.created_at)).offset(skip).limit(limit)
         
         result = await db.execute(query)
-        schools = result.scalars().all()
+        rows = result.all()
+        
+        # Owners of the schools on this page
+        owners = {}
+        if rows:
+            owners_result = await db.execute(
+                select(User).where(
+                    User.school_id.in_([school.id for school, _, _ in rows]),
+                    User.role == UserRole.SCHOOL_OWNER
+                ).order_by(User.created_at)
+            )
+            for user in owners_result.scalars().all():
+                owners.setdefault(user.school_id, user)
         
         schools_data = []
-        for school in schools:
+        for school, student_count, teacher_count in rows:
             # Get school owner
-            owner = next((user for user in school.users if user.role == UserRole.SCHOOL_OWNER), None)
-            
-            # Get student count
-            student_count_result = await db.execute(
-                select(func.count(Student.id)).where(
-                    and_(Student.school_id == school.id, Student.is_deleted == False)
-                )
-            )
-            student_count = student_count_result.scalar() or 0
-            
-            # Get teacher count
-            teacher_count_result = await db.execute(
-                select(func.count(User.id)).where(
-                    and_(
-                        User.school_id == school.id,
-                        User.role == UserRole.TEACHER,
-                        User.is_deleted == False
-                    )
-                )
-            )
-            teacher_count = teacher_count_result.scalar() or 0
+            owner = owners.get(school.id)
             
             # Build address string from individual fields
             address_parts = [school.address_line1]
@@ -243,8 +130,8 @@ class PlatformAdminService:
                 "is_active": school.is_active,
                 "is_verified": school.is_verified,
                 "created_at": school.created_at.isoformat(),
-                "student_count": student_count,
-                "teacher_count": teacher_count,
+                "student_count": student_count or 0,
+                "teacher_count": teacher_count or 0,
                 "last_activity": school.updated_at.isoformat() if school.updated_at else None
             })
         
@@ -0,0 +1,177 @@
+"""
+Platform Statistics Rollup
+
+The platform admin console reads school and user counts from two rollup
+tables instead of counting live rows: school_stats holds each school's
+student and teacher counts, and platform_stats_snapshots holds one row per
+calendar month with the platform totals and how many schools and owners
+were created that month. Reading them costs the same however many schools
+there are.
+
+refresh rebuilds both with a fixed number of aggregate queries. It runs as
+the periodic "platform_stats_refresh" job (every
+settings.platform_stats_interval seconds) and on demand, so the console is
+at most that far behind the live tables. Refreshes are serialised with an
+advisory lock on PostgreSQL, so the job and a manual refresh cannot both
+insert the same rows. Past months' rows are kept as history.
+
+Reads never write: until the first refresh of a month has run, get_snapshots
+computes that month's figures live instead.
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import and_, case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.platform_stats import PlatformStatsSnapshot, SchoolStats
+from app.models.school import School
+from app.models.student import Student
+from app.models.user import User, UserRole
+from app.services.job_service import utcnow
+
+REFRESH_JOB_TYPE = "platform_stats_refresh"
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _as_utc(moment: datetime) -> datetime:
+    # SQLite hands timezone-aware columns back naive
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _count(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def _within(column, start: datetime, end: Optional[datetime] = None):
+    return column >= start if end is None else and_(column >= start, column < end)
+
+
+class PlatformStatsService:
+    """Maintains and reads the platform statistics rollup"""
+
+    @staticmethod
+    async def _monthly_figures(db: AsyncSession, now: datetime) -> Dict[datetime, dict]:
+        """Snapshot values for this month (totals and growth) and last month (growth only)"""
+        current_start = month_start(now)
+        previous_start = month_start(current_start - timedelta(days=1))
+        is_trial = School.subscription_plan == "trial"
+
+        schools = (await db.execute(
+            select(
+                func.count(School.id),
+                _count(School.is_active == True),
+                _count(is_trial),
+                _count(_within(School.created_at, current_start)),
+                _count(_within(School.created_at, previous_start, current_start)),
+                _count(and_(is_trial, _within(School.created_at, current_start))),
+                _count(and_(is_trial, _within(School.created_at, previous_start, current_start)))
+            ).where(School.is_deleted == False)
+        )).one()
+        owners = (await db.execute(
+            select(
+                func.count(User.id),
+                _count(_within(User.created_at, current_start)),
+                _count(_within(User.created_at, previous_start, current_start))
+            ).where(User.is_deleted == False, User.role == UserRole.SCHOOL_OWNER)
+        )).one()
+
+        return {
+            current_start: dict(
+                schools_created=schools[3], trial_schools_created=schools[5], school_owners_created=owners[1],
+                total_schools=schools[0], active_schools=schools[1], trial_schools=schools[2],
+                school_owners=owners[0], refreshed_at=now
+            ),
+            previous_start: dict(
+                schools_created=schools[4], trial_schools_created=schools[6], school_owners_created=owners[2]
+            )
+        }
+
+    @staticmethod
+    async def refresh(db: AsyncSession) -> dict:
+        """Rebuild the per-school counters and this and last month's snapshots"""
+        if db.bind.dialect.name == 'postgresql':
+            # Serialise refreshes so concurrent ones cannot insert the same snapshot or school rows
+            await db.execute(select(func.pg_advisory_xact_lock(func.hashtext(REFRESH_JOB_TYPE))))
+
+        now = utcnow()
+        current_start = month_start(now)
+        # Last month's snapshot is updated too, as its growth settles after the month ends
+        periods = await PlatformStatsService._monthly_figures(db, now)
+        existing = {
+            _as_utc(snapshot.period_start): snapshot
+            for snapshot in (await db.execute(
+                select(PlatformStatsSnapshot).where(PlatformStatsSnapshot.period_start.in_(list(periods)))
+            )).scalars().all()
+        }
+        for period_start, values in periods.items():
+            snapshot = existing.get(period_start)
+            if snapshot is None:
+                # Totals of a month with no snapshot yet can only be today's
+                snapshot = PlatformStatsSnapshot(period_start=period_start, **periods[current_start])
+                db.add(snapshot)
+            for name, value in values.items():
+                setattr(snapshot, name, value)
+
+        # Per-school counters, rebuilt from two grouped counts
+        students = dict((await db.execute(
+            select(Student.school_id, func.count(Student.id))
+            .where(Student.is_deleted == False)
+            .group_by(Student.school_id)
+        )).all())
+        teachers = dict((await db.execute(
+            select(User.school_id, func.count(User.id))
+            .where(User.is_deleted == False, User.role == UserRole.TEACHER, User.school_id.isnot(None))
+            .group_by(User.school_id)
+        )).all())
+        school_ids = (await db.execute(select(School.id).where(School.is_deleted == False))).scalars().all()
+
+        await db.execute(delete(SchoolStats.__table__))
+        if school_ids:
+            await db.execute(
+                insert(SchoolStats.__table__),
+                [
+                    {
+                        'id': str(uuid.uuid4()),
+                        'school_id': school_id,
+                        'student_count': students.get(school_id, 0),
+                        'teacher_count': teachers.get(school_id, 0),
+                        'refreshed_at': now
+                    }
+                    for school_id in school_ids
+                ]
+            )
+        await db.commit()
+
+        return {'schools': len(school_ids), 'refreshed_at': now.isoformat()}
+
+    @staticmethod
+    async def get_snapshots(
+        db: AsyncSession
+    ) -> Tuple[Optional[PlatformStatsSnapshot], Optional[PlatformStatsSnapshot]]:
+        """
+        This month's and last month's snapshots. Until this month's first
+        refresh they are computed live and not stored.
+        """
+        now = utcnow()
+        current_start = month_start(now)
+        previous_start = month_start(current_start - timedelta(days=1))
+        snapshots = (await db.execute(
+            select(PlatformStatsSnapshot).where(
+                PlatformStatsSnapshot.period_start.in_([current_start, previous_start])
+            ).execution_options(populate_existing=True)
+        )).scalars().all()
+
+        by_period = {_as_utc(s.period_start): s for s in snapshots}
+        if current_start not in by_period:
+            periods = await PlatformStatsService._monthly_figures(db, now)
+            by_period = {
+                current_start: PlatformStatsSnapshot(period_start=current_start, **periods[current_start]),
+                previous_start: PlatformStatsSnapshot(period_start=previous_start, **periods[previous_start])
+            }
+        return by_period.get(current_start), by_period.get(previous_start)
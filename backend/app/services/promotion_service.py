@@ -33,6 +33,7 @@ from app.schemas.academic_session import (
 from app.services.notification_service import NotificationService
 from app.schemas.notification import NotificationCreate
 from app.models.notification import NotificationType
+from app.core.cache_manager import CacheManager, tenant_tag
 
 
 # Class level progression order
@@ -504,6 +505,8 @@ class PromotionService:
         session.promotion_completed = True
         
         await db.commit()
+        # Promoted, graduated and transferred students changed class or status
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "students"))
         
         return BulkPromotionResult(
             total_processed=len(decisions),
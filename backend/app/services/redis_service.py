@@ -1,5 +1,5 @@
 import json
-from typing import Optional, Any
+from typing import List, Optional, Any
 import redis.asyncio as redis
 from app.core.config import settings
 import logging
@@ -55,6 +55,23 @@ class RedisService:
         except Exception as e:
             logger.error(f"Redis DELETE error for key {key}: {e}")
 
+    async def get_many(self, keys: List[str]) -> List[Optional[str]]:
+        """Get raw values for several keys in one round trip (MGET)"""
+        if not self.redis:
+            await self.connect()
+
+        return await self.redis.mget(keys) # type: ignore
+
+    async def incr_many(self, keys: List[str]):
+        """Increment several counters in one pipelined round trip"""
+        if not self.redis:
+            await self.connect()
+
+        async with self.redis.pipeline(transaction=False) as pipe: # type: ignore
+            for key in keys:
+                pipe.incr(key)
+            await pipe.execute()
+
     async def delete_prefix(self, prefix: str):
         """Delete all keys matching prefix"""
         try:
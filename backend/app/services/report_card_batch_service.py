@@ -0,0 +1,58 @@
+"""
+Report Card Batch Service
+
+Runs whole-term report card generation as a background job (see JobService)
+and exposes its progress so clients can poll it.
+"""
+
+from typing import List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.background_job import BackgroundJob
+from app.services.job_service import JobService
+
+JOB_TYPE = "report_card_batch"
+
+
+class ReportCardBatchService:
+    """Batch report card jobs on top of JobService"""
+
+    @staticmethod
+    def _as_response(job: BackgroundJob) -> dict:
+        return {
+            **JobService.as_dict(job),
+            'term_id': job.payload['term_id'],
+            'class_ids': job.payload.get('class_ids')
+        }
+
+    @staticmethod
+    async def create_job(
+        db: AsyncSession,
+        school_id: str,
+        term_id: str,
+        generated_by: str,
+        class_ids: Optional[List[str]] = None
+    ) -> dict:
+        """Queue a batch job and return its state"""
+        job = await JobService.enqueue(
+            db,
+            school_id,
+            JOB_TYPE,
+            {'term_id': term_id, 'class_ids': class_ids},
+            created_by=generated_by,
+            progress={
+                'total_students': 0,
+                'processed_students': 0,
+                'created_count': 0,
+                'skipped_count': 0,
+                'students_per_second': 0.0
+            }
+        )
+        return ReportCardBatchService._as_response(job)
+
+    @staticmethod
+    async def get_job(db: AsyncSession, job_id: str, school_id: str) -> Optional[dict]:
+        """Get a job's state, scoped to the school that started it"""
+        job = await JobService.get_job(db, job_id, school_id, job_type=JOB_TYPE)
+        return ReportCardBatchService._as_response(job) if job else None
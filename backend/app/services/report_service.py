@@ -1,9 +1,10 @@
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 from datetime import date, datetime
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, extract
 from app.models.fee import FeeAssignment, FeePayment, FeeStructure, PaymentStatus, FeeType
 from app.schemas.report import FinancialReport, MonthlyRevenue, FeeTypeBreakdown
+from app.services.export_service import EXPORT_BATCH_SIZE, ExportService
 
 class ReportService:
     @staticmethod
@@ -115,23 +116,19 @@ class ReportService:
         total_expected = fees_collected + pending_fees
         collection_rate = (fees_collected / total_expected * 100) if total_expected > 0 else 0.0
 
-        # 4. Calculate Monthly Revenue Trend
-        monthly_trend_query = select(FeePayment.payment_date, FeePayment.amount).where(and_(*payment_conditions))
-        monthly_trend_query = apply_filters(monthly_trend_query, 'payment')
-            
+        # 4. Calculate Monthly Revenue Trend, summed per calendar month in the database
+        payment_month = extract('month', FeePayment.payment_date)
+        monthly_trend_query = select(payment_month, func.sum(FeePayment.amount)).where(and_(*payment_conditions))
+        monthly_trend_query = apply_filters(monthly_trend_query, 'payment').group_by(payment_month)
+
         monthly_trend_result = await db.execute(monthly_trend_query)
-        payments = monthly_trend_result.all()
-        
-        monthly_data = {}
-        for payment_date, amount in payments:
-            month_key = payment_date.strftime("%b")
-            monthly_data[month_key] = monthly_data.get(month_key, 0.0) + float(amount)
-            
+        monthly_data = {int(month): float(amount) for month, amount in monthly_trend_result.all()}
+
         months_order = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-        monthly_revenue = []
-        for month in months_order:
-            if month in monthly_data:
-                monthly_revenue.append(MonthlyRevenue(month=month, amount=monthly_data[month]))
+        monthly_revenue = [
+            MonthlyRevenue(month=months_order[month - 1], amount=monthly_data[month])
+            for month in sorted(monthly_data)
+        ]
         
         if not monthly_revenue:
              monthly_revenue = [MonthlyRevenue(month=m, amount=0) for m in months_order[:6]]
@@ -183,7 +180,7 @@ class ReportService:
         )
 
     @staticmethod
-    async def export_financial_report_csv(
+    async def financial_report_rows(
         db: AsyncSession,
         school_id: str,
         start_date: Optional[date] = None,
@@ -192,47 +189,107 @@ class ReportService:
         class_id: Optional[str] = None,
         fee_type: Optional[str] = None,
         payment_status: Optional[str] = None
-    ) -> str:
+    ) -> AsyncIterator[list]:
         """
-        Generate CSV content for financial report
+        Yield the financial report as rows: the summary sections, then every
+        matching payment streamed through a server-side cursor.
         """
-        import csv
-        import io
+        from app.models.student import Student
 
         report = await ReportService.get_financial_report(
             db, school_id, start_date, end_date, term_id, class_id, fee_type, payment_status
         )
 
-        output = io.StringIO()
-        writer = csv.writer(output)
-
         # Header
-        writer.writerow(['Financial Report'])
-        writer.writerow(['Generated At', datetime.now().strftime('%Y-%m-%d %H:%M:%S')])
+        yield ['Financial Report']
+        yield ['Generated At', datetime.now().strftime('%Y-%m-%d %H:%M:%S')]
         if start_date and end_date:
-            writer.writerow(['Period', f"{start_date} to {end_date}"])
-        writer.writerow([])
+            yield ['Period', f"{start_date} to {end_date}"]
+        yield []
 
         # Summary
-        writer.writerow(['Summary Metrics'])
-        writer.writerow(['Total Revenue', report.total_revenue])
-        writer.writerow(['Fees Collected', report.fees_collected])
-        writer.writerow(['Pending Fees', report.pending_fees])
-        writer.writerow(['Overdue Fees', report.overdue_fees])
-        writer.writerow(['Collection Rate (%)', report.collection_rate])
-        writer.writerow([])
+        yield ['Summary Metrics']
+        yield ['Total Revenue', report.total_revenue]
+        yield ['Fees Collected', report.fees_collected]
+        yield ['Pending Fees', report.pending_fees]
+        yield ['Overdue Fees', report.overdue_fees]
+        yield ['Collection Rate (%)', report.collection_rate]
+        yield []
 
         # Monthly Revenue
-        writer.writerow(['Monthly Revenue Trend'])
-        writer.writerow(['Month', 'Amount'])
+        yield ['Monthly Revenue Trend']
+        yield ['Month', 'Amount']
         for item in report.monthly_revenue:
-            writer.writerow([item.month, item.amount])
-        writer.writerow([])
+            yield [item.month, item.amount]
+        yield []
 
         # Fee Type Breakdown
-        writer.writerow(['Fee Type Breakdown'])
-        writer.writerow(['Fee Type', 'Amount', 'Percentage (%)'])
+        yield ['Fee Type Breakdown']
+        yield ['Fee Type', 'Amount', 'Percentage (%)']
         for item in report.fee_type_breakdown:
-            writer.writerow([item.fee_type, item.amount, item.percentage])
+            yield [item.fee_type, item.amount, item.percentage]
+        yield []
 
-        return output.getvalue()
+        # Payments
+        payments_query = select(
+            FeePayment.payment_date,
+            FeePayment.receipt_number,
+            Student.admission_number,
+            Student.first_name,
+            Student.last_name,
+            FeeStructure.fee_type,
+            FeePayment.payment_method,
+            FeePayment.amount
+        ).join(
+            Student, FeePayment.student_id == Student.id
+        ).join(
+            FeeAssignment, FeePayment.fee_assignment_id == FeeAssignment.id
+        ).join(
+            FeeStructure, FeeAssignment.fee_structure_id == FeeStructure.id
+        ).where(
+            FeePayment.school_id == school_id
+        ).order_by(FeePayment.payment_date, FeePayment.receipt_number)
+
+        if start_date:
+            payments_query = payments_query.where(FeePayment.payment_date >= start_date)
+        if end_date:
+            payments_query = payments_query.where(FeePayment.payment_date <= end_date)
+        if term_id:
+            payments_query = payments_query.where(FeeAssignment.term_id == term_id)
+        if class_id:
+            payments_query = payments_query.where(Student.current_class_id == class_id)
+        if fee_type:
+            payments_query = payments_query.where(FeeStructure.fee_type == fee_type)
+
+        yield ['Payments']
+        yield ['Payment Date', 'Receipt Number', 'Admission Number', 'Student Name', 'Fee Type', 'Payment Method', 'Amount']
+        result = await db.stream(payments_query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        async for payment_date, receipt, admission_number, first_name, last_name, f_type, method, amount in result:
+            yield [
+                payment_date,
+                receipt,
+                admission_number,
+                f"{first_name} {last_name}",
+                f_type.value if hasattr(f_type, 'value') else str(f_type),
+                method.value if hasattr(method, 'value') else str(method),
+                float(amount)
+            ]
+
+    @staticmethod
+    async def export_financial_report_csv(
+        db: AsyncSession,
+        school_id: str,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        term_id: Optional[str] = None,
+        class_id: Optional[str] = None,
+        fee_type: Optional[str] = None,
+        payment_status: Optional[str] = None
+    ) -> str:
+        """
+        Generate CSV content for financial report
+        """
+        rows = ReportService.financial_report_rows(
+            db, school_id, start_date, end_date, term_id, class_id, fee_type, payment_status
+        )
+        return ''.join([chunk async for chunk in ExportService.write_csv(rows)])
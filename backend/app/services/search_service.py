@@ -1,152 +1,236 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, and_
-from typing import List, Dict, Any, Optional
-from app.models.user import User, UserRole
+"""
+Universal search across students, staff, subjects and classes.
+
+Every category the user may see becomes one branch of a single UNION ALL
+query. Each branch matches the search term against its name fields, ranks its
+rows (exact match, then prefix, then substring) and keeps its own top rows, so
+the database returns at most `limit` rows per category already ordered.
+
+On PostgreSQL the branches also match and rank by pg_trgm similarity, which
+tolerates typos and is served by the trigram GIN indexes; prefix (typeahead)
+searches compare lower(field) LIKE 'term%' and are served by text_pattern_ops
+indexes. Other databases (SQLite in tests) use the same ranking without
+trigram similarity.
+"""
+
+from typing import Any, Dict, List
+
+from sqlalchemy import Float, String, case, cast, func, literal_column, null, or_, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.academic import Class, ClassLevel, Subject
 from app.models.student import Student
-from app.models.academic import Subject, Class
-from app.models.school import School
+from app.models.user import User, UserRole
+
+SEARCH_MODES = ("contains", "prefix")
+
+# Rendered inline rather than bound, so the name expressions match the expression indexes
+_SPACE = literal_column("' '", String)
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _person_name(model) -> Any:
+    """first [middle ]last, as displayed"""
+    return model.first_name + _SPACE + func.coalesce(model.middle_name + _SPACE, "") + model.last_name
+
+
+def _search_name(model) -> Any:
+    """first last; the indexed expression names are matched against"""
+    return model.first_name + _SPACE + model.last_name
+
 
 class SearchService:
     @staticmethod
-    def search_universal(
-        db: Session, 
-        query: str, 
-        user: User, 
-        school_id: str, 
-        limit: int = 10
-    ) -> List[Dict[str, Any]]:
-        """
-        Perform a universal search based on the user's role and the search query.
-        """
-        results = []
-        query = query.strip()
-        if not query:
-            return results
+    def _match(fields: List[Any], term: str, mode: str, trigram: bool) -> Any:
+        lowered = _escape_like(term.lower())
+        if mode == "prefix":
+            return or_(*(func.lower(field).like(f"{lowered}%", escape="\\") for field in fields))
+        conditions = [field.ilike(f"%{_escape_like(term)}%", escape="\\") for field in fields]
+        if trigram:
+            conditions += [field.op("%")(term) for field in fields]
+        return or_(*conditions)
 
-        search_term = f"%{query}%"
+    @staticmethod
+    def _rank(fields: List[Any], term: str, trigram: bool) -> Any:
+        lowered = term.lower()
+        prefix = f"{_escape_like(lowered)}%"
+        rank = case(
+            (or_(*(func.lower(field) == lowered for field in fields)), literal_column("3.0", Float)),
+            (or_(*(func.lower(field).like(prefix, escape="\\") for field in fields)), literal_column("2.0", Float)),
+            else_=literal_column("1.0", Float)
+        )
+        if trigram:
+            # Similarity (0..1) orders rows within a tier
+            rank = rank + func.greatest(*(func.similarity(field, term) for field in fields))
+        return rank
 
-        # 1. School Owner / Admin Search
-        if user.role in [UserRole.SCHOOL_OWNER, UserRole.SCHOOL_ADMIN]:
-            results.extend(SearchService._search_students(db, search_term, school_id, limit))
-            results.extend(SearchService._search_staff(db, search_term, school_id, limit))
-            results.extend(SearchService._search_subjects(db, search_term, school_id, limit))
-            results.extend(SearchService._search_classes(db, search_term, school_id, limit))
-
-        # 2. Teacher Search
-        elif user.role == UserRole.TEACHER:
-            # Teachers can search students (ideally restricted to their classes, but for now broad search within school is often acceptable or we can restrict)
-            # For strictness, let's allow searching all students in the school for now as teachers might need to look up students not in their class
-            # If restriction is needed, we would join with Enrollment or Class
-            results.extend(SearchService._search_students(db, search_term, school_id, limit))
-            results.extend(SearchService._search_subjects(db, search_term, school_id, limit)) # All subjects or just theirs? Let's say all for visibility.
-
-        # 3. Student Search
-        elif user.role == UserRole.STUDENT:
-            results.extend(SearchService._search_subjects(db, search_term, school_id, limit))
-            # Students can search for teachers
-            results.extend(SearchService._search_staff(db, search_term, school_id, limit, role_filter=[UserRole.TEACHER]))
-
-        # Sort results by relevance (simple exact match could be boosted, but for now just mixing)
-        # We could slice here if we want strict total limit, but we applied limit per category
-        return results[:limit]
+    @staticmethod
+    def _branch(kind: str, model, columns: Dict[str, Any], fields: List[Any], filters: List[Any],
+                term: str, mode: str, trigram: bool, limit: int, outer_join=None):
+        rank = SearchService._rank(fields, term, trigram)
+        query = select(
+            literal_column(f"'{kind}'", String).label("kind"),
+            model.id.label("id"),
+            columns["title"].label("title"),
+            columns.get("detail", cast(null(), String)).label("detail"),
+            columns.get("extra", cast(null(), String)).label("extra"),
+            columns.get("image", cast(null(), String)).label("image"),
+            rank.label("rank")
+        )
+        if outer_join is not None:
+            query = query.outerjoin(*outer_join)
+        query = (
+            query.where(*filters, SearchService._match(fields, term, mode, trigram))
+            .order_by(rank.desc(), func.length(columns["title"]), columns["title"])
+            .limit(limit)
+        )
+        return select(query.subquery())
 
     @staticmethod
-    def _search_students(db: Session, search_term: str, school_id: str, limit: int) -> List[Dict[str, Any]]:
-        students = db.query(Student).filter(
-            Student.school_id == school_id,
-            or_(
-                Student.first_name.ilike(search_term),
-                Student.last_name.ilike(search_term),
-                Student.middle_name.ilike(search_term),
-                Student.admission_number.ilike(search_term)
-            )
-        ).limit(limit).all()
-
-        return [
+    def _student_branch(school_id: str, term: str, mode: str, trigram: bool, limit: int):
+        return SearchService._branch(
+            "student", Student,
             {
-                "id": str(student.id),
-                "type": "student",
-                "title": student.full_name,
-                "subtitle": f"{student.admission_number} • {student.current_class_name or 'No Class'}",
-                "url": f"/students/{student.id}",
-                "image": student.profile_picture_url
-            }
-            for student in students
-        ]
+                "title": _person_name(Student),
+                "detail": Student.admission_number,
+                "extra": Class.name,
+                "image": Student.profile_picture_url,
+            },
+            [_search_name(Student), _person_name(Student), Student.last_name, Student.middle_name,
+             Student.admission_number],
+            [Student.school_id == school_id, Student.is_deleted == False],
+            term, mode, trigram, limit,
+            outer_join=(Class, Class.id == Student.current_class_id)
+        )
 
     @staticmethod
-    def _search_staff(
-        db: Session, 
-        search_term: str, 
-        school_id: str, 
-        limit: int, 
-        role_filter: Optional[List[UserRole]] = None
-    ) -> List[Dict[str, Any]]:
-        query = db.query(User).filter(
-            User.school_id == school_id,
-            or_(
-                User.first_name.ilike(search_term),
-                User.last_name.ilike(search_term),
-                User.email.ilike(search_term)
-            )
+    def _staff_branch(school_id: str, term: str, mode: str, trigram: bool, limit: int,
+                      roles: List[UserRole]):
+        return SearchService._branch(
+            "staff", User,
+            {
+                "title": _person_name(User),
+                "detail": User.email,
+                "extra": cast(User.role, String),
+                "image": User.profile_picture_url,
+            },
+            [_search_name(User), User.last_name, User.email],
+            [User.school_id == school_id, User.is_deleted == False, User.role.in_(roles)],
+            term, mode, trigram, limit
         )
 
-        if role_filter:
-            query = query.filter(User.role.in_(role_filter))
-        else:
-            query = query.filter(User.role.in_([UserRole.TEACHER, UserRole.SCHOOL_ADMIN]))
-
-        staff = query.limit(limit).all()
+    @staticmethod
+    def _subject_branch(school_id: str, term: str, mode: str, trigram: bool, limit: int):
+        return SearchService._branch(
+            "subject", Subject,
+            {"title": Subject.name, "detail": Subject.code},
+            [Subject.name, Subject.code],
+            [Subject.school_id == school_id, Subject.is_deleted == False],
+            term, mode, trigram, limit
+        )
 
-        return [
-            {
-                "id": str(user.id),
-                "type": "teacher" if user.role == UserRole.TEACHER else "staff",
-                "title": user.full_name,
-                "subtitle": user.email,
-                "url": f"/settings/users?id={user.id}" if user.role != UserRole.TEACHER else f"/teachers/{user.id}", # Adjust URLs as needed
-                "image": user.profile_picture_url
-            }
-            for user in staff
-        ]
+    @staticmethod
+    def _class_branch(school_id: str, term: str, mode: str, trigram: bool, limit: int):
+        return SearchService._branch(
+            "class", Class,
+            {"title": Class.name, "detail": cast(Class.level, String), "extra": Class.section},
+            [Class.name],
+            [Class.school_id == school_id, Class.is_deleted == False],
+            term, mode, trigram, limit
+        )
 
     @staticmethod
-    def _search_subjects(db: Session, search_term: str, school_id: str, limit: int) -> List[Dict[str, Any]]:
-        subjects = db.query(Subject).filter(
-            Subject.school_id == school_id,
-            or_(
-                Subject.name.ilike(search_term),
-                Subject.code.ilike(search_term)
-            )
-        ).limit(limit).all()
-
-        return [
-            {
-                "id": str(subject.id),
-                "type": "subject",
-                "title": subject.name,
-                "subtitle": subject.code,
-                "url": f"/subjects", # Ideally navigate to specific subject or filter
-                "image": None
-            }
-            for subject in subjects
-        ]
+    def _branches(user: User, school_id: str, term: str, mode: str, trigram: bool, limit: int) -> List:
+        args = (school_id, term, mode, trigram, limit)
+        if user.role in [UserRole.SCHOOL_OWNER, UserRole.SCHOOL_ADMIN]:
+            return [
+                SearchService._student_branch(*args),
+                SearchService._staff_branch(*args, roles=[UserRole.TEACHER, UserRole.SCHOOL_ADMIN]),
+                SearchService._subject_branch(*args),
+                SearchService._class_branch(*args),
+            ]
+        if user.role == UserRole.TEACHER:
+            # Teachers look up students across the school, not only their own classes
+            return [SearchService._student_branch(*args), SearchService._subject_branch(*args)]
+        if user.role == UserRole.STUDENT:
+            return [
+                SearchService._subject_branch(*args),
+                SearchService._staff_branch(*args, roles=[UserRole.TEACHER]),
+            ]
+        return []
 
     @staticmethod
-    def _search_classes(db: Session, search_term: str, school_id: str, limit: int) -> List[Dict[str, Any]]:
-        classes = db.query(Class).filter(
-            Class.school_id == school_id,
-            Class.name.ilike(search_term)
-        ).limit(limit).all()
+    async def search_universal(
+        db: AsyncSession,
+        query: str,
+        user: User,
+        school_id: str,
+        limit: int = 10,
+        mode: str = "contains"
+    ) -> List[Dict[str, Any]]:
+        """
+        Search the categories the user's role may see, best matches first.
 
-        return [
-            {
-                "id": str(cls.id),
-                "type": "class",
-                "title": cls.name,
-                "subtitle": f"{cls.level} • {cls.section or ''}",
-                "url": f"/classes/{cls.id}",
+        mode="prefix" matches the start of names, codes and admission numbers
+        (typeahead); "contains" matches anywhere and, on PostgreSQL, near misses.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        term = query.strip()
+        if not term:
+            return []
+
+        trigram = mode == "contains" and db.get_bind().dialect.name == "postgresql"
+        branches = SearchService._branches(user, school_id, term, mode, trigram, limit)
+        if not branches:
+            return []
+
+        combined = union_all(*branches).subquery()
+        result = await db.execute(
+            select(combined)
+            .order_by(combined.c.rank.desc(), func.length(combined.c.title), combined.c.title)
+            .limit(limit)
+        )
+        return [SearchService._format(row) for row in result.all()]
+
+    @staticmethod
+    def _format(row) -> Dict[str, Any]:
+        if row.kind == "student":
+            return {
+                "id": str(row.id),
+                "type": "student",
+                "title": row.title,
+                "subtitle": f"{row.detail} • {row.extra or 'No Class'}",
+                "url": f"/students/{row.id}",
+                "image": row.image
+            }
+        if row.kind == "staff":
+            is_teacher = UserRole[row.extra] == UserRole.TEACHER
+            return {
+                "id": str(row.id),
+                "type": "teacher" if is_teacher else "staff",
+                "title": row.title,
+                "subtitle": row.detail,
+                "url": f"/teachers/{row.id}" if is_teacher else f"/settings/users?id={row.id}",
+                "image": row.image
+            }
+        if row.kind == "subject":
+            return {
+                "id": str(row.id),
+                "type": "subject",
+                "title": row.title,
+                "subtitle": row.detail,
+                "url": "/subjects",
                 "image": None
             }
-            for cls in classes
-        ]
+        return {
+            "id": str(row.id),
+            "type": "class",
+            "title": row.title,
+            "subtitle": f"{ClassLevel[row.detail].value} • {row.extra or ''}",
+            "url": f"/classes/{row.id}",
+            "image": None
+        }
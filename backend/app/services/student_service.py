@@ -19,6 +19,7 @@ from app.schemas.audit_log import AuditLogCreate
 from app.services.notification_service import NotificationService
 from app.schemas.notification import NotificationCreate
 from app.models.notification import NotificationType
+from app.core.cache_manager import CacheManager, tenant_tag
 
 
 def convert_date_string(date_str):
@@ -96,6 +97,7 @@ class StudentService:
         db.add(student)
         await db.commit()
         await db.refresh(student)
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "students"))
 
         # Auto-enroll student in class subjects if assigned to a class
         if student.current_class_id:
@@ -277,6 +279,7 @@ class StudentService:
 
         await db.commit()
         await db.refresh(student)
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "students"))
 
         # Auto-enroll student in new class subjects if class changed
         if new_class_id and new_class_id != old_class_id:
@@ -332,6 +335,7 @@ class StudentService:
         
         student.is_deleted = True
         await db.commit()
+        await CacheManager.invalidate_tags(tenant_tag(school_id, "students"))
         
         # Audit Log
         if current_user_id:
@@ -0,0 +1,66 @@
+"""
+Celery worker for background jobs (settings.job_broker == "celery").
+
+The broker only carries job ids; each job's state lives in background_jobs
+and is claimed and run by JobService, so a redelivered message is harmless.
+A job whose worker died mid-run is still marked running, so its redelivered
+message cannot claim it; beat requeues it once its heartbeat goes stale.
+Start a worker next to the web app, plus one beat process for periodic jobs:
+
+    celery -A app.worker worker --loglevel=info
+    celery -A app.worker beat --loglevel=info
+"""
+
+import asyncio
+
+from celery import Celery
+
+from app.core.config import settings
+
+celery_app = Celery("school_management", broker=settings.redis_url)
+celery_app.conf.update(
+    task_acks_late=True,  # Redeliver if a worker dies before a job is claimed
+    worker_prefetch_multiplier=1,  # Jobs are long; don't reserve more than one
+    task_ignore_result=True,  # Results are stored on the job row
+    beat_schedule={
+        # Queues periodic job types that are due (see JobService.enqueue_scheduled)
+        "enqueue-scheduled-jobs": {"task": "jobs.schedule", "schedule": settings.job_schedule_interval},
+        # Requeues running jobs whose worker died (see JobService.requeue_stale)
+        "requeue-stale-jobs": {"task": "jobs.requeue_stale", "schedule": settings.job_schedule_interval},
+    }
+)
+
+# One event loop per worker process, so pooled async connections are reused across tasks
+_loop = None
+
+
+def _run(coro):
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+
+@celery_app.task(name="jobs.run", bind=True, max_retries=None)
+def run_background_job(self, job_id: str) -> None:
+    """Run a stored job; offer it again later while it is not due or its school is busy"""
+    from app.services.job_service import JobService
+
+    if not _run(JobService.run_job(job_id)):
+        raise self.retry(countdown=settings.job_poll_interval)
+
+
+@celery_app.task(name="jobs.schedule")
+def enqueue_scheduled_jobs() -> None:
+    """Queue the periodic jobs that are due"""
+    from app.services.job_service import JobService
+
+    _run(JobService.enqueue_scheduled())
+
+
+@celery_app.task(name="jobs.requeue_stale")
+def requeue_stale_jobs() -> None:
+    """Requeue running jobs whose worker stopped sending heartbeats"""
+    from app.services.job_service import JobService
+
+    _run(JobService.requeue_stale())
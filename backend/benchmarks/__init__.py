@@ -0,0 +1,10 @@
+"""
+Benchmark scripts for the backend's hot paths.
+
+Each module is a standalone script run from the backend directory, e.g.
+
+    python -m benchmarks.notifications --users 2000
+
+Most seed a throwaway SQLite database through benchmarks.common and compare
+an old code path with the current one.
+"""
@@ -0,0 +1,164 @@
+"""
+Benchmark of scheduled alert rule evaluation.
+
+Seeds --students students with --days days of attendance and --subjects
+grades each in a throwaway SQLite database, plus an attendance rule and a
+grade rule. Evaluates them the way AlertService used to (an aggregate query
+per student and a flush per alert) and then through evaluate_due_rules (one
+grouped query and one INSERT per rule):
+
+    python -m benchmarks.alert_rules --students 2000 --days 20
+"""
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+from sqlalchemy import case, func, select
+
+from app.models.academic import Attendance, AttendanceStatus, Class, ClassLevel, Subject, Term, TermType
+from app.models.alert_rule import AlertConditionOperator, AlertFrequency, AlertNotification, AlertRule, AlertType
+from app.models.grade import Exam, ExamType, Grade
+from app.models.student import Gender, Student, StudentStatus
+from app.models.user import User, UserRole
+from app.services.alert_service import AlertService
+from benchmarks.common import SCHOOL_ID, measure, scratch_database
+
+async def seed(db, students, days, subjects):
+    admin = User(
+        email="admin@bench.test", password_hash="x", first_name="Bench", last_name="Admin",
+        role=UserRole.SCHOOL_ADMIN, school_id=SCHOOL_ID, is_active=True, is_verified=True
+    )
+    term = Term(
+        id=str(uuid4()), name="First Term", type=TermType.FIRST_TERM, academic_session="2024/2025",
+        start_date=date(2024, 9, 1), end_date=date(2024, 12, 15), is_current=True, school_id=SCHOOL_ID
+    )
+    cls = Class(id=str(uuid4()), name="Class 001", level=ClassLevel.JSS_1, academic_session="2024/2025", school_id=SCHOOL_ID)
+    subject_rows = [Subject(id=str(uuid4()), name=f"Subject {s}", code=f"SUB{s}", school_id=SCHOOL_ID) for s in range(subjects)]
+    db.add_all([admin, term, cls] + subject_rows)
+    await db.flush()
+    exams = [
+        Exam(
+            id=str(uuid4()), name=f"Exam {s.code}", exam_type=ExamType.FINAL_EXAM, exam_date=date(2024, 12, 1),
+            total_marks=Decimal("100"), pass_marks=Decimal("50"), subject_id=s.id, class_id=cls.id,
+            term_id=term.id, school_id=SCHOOL_ID, created_by=admin.id
+        )
+        for s in subject_rows
+    ]
+    rows = []
+    statuses = list(AttendanceStatus)
+    for i in range(students):
+        student = Student(
+            id=str(uuid4()), admission_number=f"ADM{i:05d}", first_name=f"Student{i}", last_name="Bench",
+            date_of_birth=date(2012, 1, 1), gender=Gender.MALE, address_line1="1 Seed Street",
+            city="Seed City", state="Seed State", postal_code="00000", admission_date=date(2024, 9, 1),
+            current_class_id=cls.id, status=StudentStatus.ACTIVE, school_id=SCHOOL_ID
+        )
+        rows.append(student)
+        rows.extend(
+            Attendance(
+                date=date(2024, 10, 1) + timedelta(days=d), status=statuses[(i + d) % len(statuses)],
+                student_id=student.id, class_id=cls.id, term_id=term.id, school_id=SCHOOL_ID
+            )
+            for d in range(days)
+        )
+        rows.extend(
+            Grade(
+                score=Decimal((i * 7 + s * 13) % 100), total_marks=Decimal("100"),
+                percentage=Decimal((i * 7 + s * 13) % 100), student_id=student.id, subject_id=exam.subject_id,
+                exam_id=exam.id, term_id=term.id, school_id=SCHOOL_ID, graded_by=admin.id, graded_date=date(2024, 12, 2)
+            )
+            for s, exam in enumerate(exams)
+        )
+    db.add_all(exams + rows)
+    await db.commit()
+    return admin
+
+
+async def add_rules(db, admin):
+    rules = [
+        AlertRule(
+            school_id=SCHOOL_ID, created_by=admin.id, name=name, alert_type=alert_type, metric=metric,
+            operator=AlertConditionOperator.LESS_THAN, threshold=threshold, scope_type="school",
+            notify_roles=["school_admin"], notification_channels=["in_app"], frequency=AlertFrequency.DAILY,
+            next_evaluation_at=datetime.utcnow() - timedelta(minutes=1)
+        )
+        for name, alert_type, metric, threshold in (
+            ("Low attendance", AlertType.ATTENDANCE, "attendance_rate", 50.0),
+            ("Low grades", AlertType.GRADE, "average_grade", 40.0),
+        )
+    ]
+    db.add_all(rules)
+    await db.commit()
+    return rules
+
+
+async def per_student(db, rules):
+    """The old evaluator: an aggregate query per student and a flush per alert"""
+    rules = (await db.execute(select(AlertRule).where(AlertRule.id.in_([rule.id for rule in rules])))).scalars().all()
+    students = (await db.execute(
+        select(Student).where(Student.school_id == SCHOOL_ID, Student.status == StudentStatus.ACTIVE)
+    )).scalars().all()
+    created = 0
+    for rule in rules:
+        for student in students:
+            if rule.alert_type == AlertType.ATTENDANCE:
+                total, present = (await db.execute(
+                    select(
+                        func.count(Attendance.id),
+                        func.sum(case((Attendance.status == AttendanceStatus.PRESENT, 1), else_=0))
+                    ).where(Attendance.student_id == student.id, Attendance.school_id == SCHOOL_ID)
+                )).one()
+                value = (present or 0) / total * 100 if total else None
+            else:
+                value = (await db.execute(
+                    select(func.avg(Grade.percentage)).where(Grade.student_id == student.id, Grade.school_id == SCHOOL_ID)
+                )).scalar()
+            if value is None or not AlertService._check_condition(float(value), rule.operator, rule.threshold):
+                continue
+            db.add(AlertNotification(
+                school_id=SCHOOL_ID, rule_id=rule.id, title=f"Alert: {student.full_name}", message="below threshold",
+                severity=rule.severity, context_type="student", context_id=student.id, metric_value=float(value),
+                threshold_value=rule.threshold
+            ))
+            await db.flush()
+            created += 1
+        rule.last_evaluated_at = datetime.utcnow()
+        rule.next_evaluation_at = AlertService._calculate_next_evaluation(rule.frequency)
+    await db.commit()
+    return created
+
+
+async def run(engine, session_factory, label, evaluate):
+    async with session_factory() as db:
+        with measure(engine) as measurement:
+            created = await evaluate(db)
+    print(f"{label:>12}: {measurement.ms:>8.0f} ms  {measurement.statements:>6} statements  {created} alerts")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--subjects", type=int, default=6)
+    args = parser.parse_args()
+
+    async with scratch_database() as (engine, session_factory):
+        async with session_factory() as db:
+            admin = await seed(db, args.students, args.days, args.subjects)
+            old_rules = await add_rules(db, admin)
+
+        async def scheduled(db):
+            await add_rules(db, admin)
+            metrics = await AlertService.evaluate_due_rules(db)
+            print(f"{'':>12}  metrics: {metrics}")
+            return metrics["alerts_created"]
+
+        print(f"{args.students} students, {args.days} attendance days, {args.subjects} grades each")
+        await run(engine, session_factory, "per student", lambda db: per_student(db, old_rules))
+        await run(engine, session_factory, "grouped", scheduled)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""
+Benchmark of the auth dependency chain with and without the principal cache.
+
+Each simulated request opens its own session and resolves get_current_user,
+get_school_context and get_current_school_context, the chain behind every
+endpoint taking both current_user and current_school. Reports SQL queries per
+request and throughput against a throwaway SQLite database:
+
+    python -m benchmarks.auth_deps --requests 2000
+"""
+import argparse
+import asyncio
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core import auth_cache, deps
+from app.core.auth_cache import PrincipalCache
+from app.core.security import create_access_token
+from app.models.user import User, UserRole
+from benchmarks.common import measure, scratch_database, seed_school
+
+
+async def seed(session_factory) -> HTTPAuthorizationCredentials:
+    school = await seed_school(session_factory)
+    async with session_factory() as db:
+        user = User(
+            email="admin@bench.com", password_hash="x", first_name="Bench", last_name="Admin",
+            role=UserRole.SCHOOL_ADMIN, school_id=school.id, is_active=True, is_verified=True
+        )
+        db.add(user)
+        await db.commit()
+        token = create_access_token(
+            data={"sub": user.id, "email": user.email, "role": user.role, "school_id": school.id}
+        )
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+async def run_mode(session_factory, engine, credentials, cached: bool, requests: int) -> dict:
+    cache = PrincipalCache(ttl=300 if cached else 0, max_entries=1000)
+    auth_cache.principal_cache = cache
+    deps.principal_cache = cache
+
+    with measure(engine) as measurement:
+        for _ in range(requests):
+            async with session_factory() as db:
+                await deps.get_current_user(credentials, db)
+                context = await deps.get_school_context(credentials, db)
+                await deps.get_current_school_context(context, db)
+
+    return {
+        "mode": "cached" if cached else "uncached",
+        "queries_per_request": round(measurement.statements / requests, 3),
+        "requests_per_second": round(requests / measurement.seconds, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    async with scratch_database() as (engine, session_factory):
+        credentials = await seed(session_factory)
+
+        for cached in (False, True):
+            result = await run_mode(session_factory, engine, credentials, cached, args.requests)
+            print(
+                f"{result['mode']:>8}: {result['queries_per_request']:>6} queries/request  "
+                f"{result['requests_per_second']:>8} req/s"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
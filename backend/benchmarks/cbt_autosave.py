@@ -0,0 +1,150 @@
+"""
+Benchmark of CBT answer ingestion under a class-wide submission at the deadline.
+
+Every student starts the test, answers each question (changing some answers
+along the way) and then all of them submit at once. Three modes are compared:
+
+    submit-only    no autosave; only the final POST carries the answer sheet
+    write-through  every autosave is written and committed immediately
+    buffered       autosaves are coalesced and flushed in the background
+
+Reports cbt_answers rows written per final answer (write amplification), SQL
+statements and the p50/p99 latency of the submission herd against a
+throwaway SQLite database:
+
+    python -m benchmarks.cbt_autosave --students 500 --questions 40
+"""
+import argparse
+import asyncio
+import statistics
+
+from app.api.v1.endpoints.cbt_student import autosave_answers, start_test, submit_test
+from app.core.config import settings
+from app.core.deps import SchoolContext
+from app.schemas.cbt import CBTAnswerAutosave, CBTAnswerCreate, CBTSubmissionSubmit
+from app.services import cbt_answer_buffer_service
+from app.services.cbt_answer_buffer_service import CBTAnswerBufferService
+from app.services.cbt_compiled_test_service import CBTCompiledTestService
+from benchmarks.common import measure, percentile, scratch_database, seed_school
+from tests.utils import seed_cbt_sitting
+
+MODES = ("submit-only", "write-through", "buffered")
+
+
+async def seed(session_factory, students: int, questions: int):
+    school = await seed_school(session_factory)
+    async with session_factory() as db:
+        sitting = await seed_cbt_sitting(db, school.id, students=students, questions=questions)
+
+    options = {}
+    for option in sitting["options"]:
+        options.setdefault(option.question_id, []).append(option)
+    for question_options in options.values():
+        question_options.sort(key=lambda o: o.order_number)
+    return school, sitting, options
+
+
+async def run_mode(mode: str, students: int, questions: int, flush_interval: float) -> dict:
+    async with scratch_database() as (engine, session_factory):
+        return await run_sitting(engine, session_factory, mode, students, questions, flush_interval)
+
+
+async def run_sitting(engine, session_factory, mode, students, questions, flush_interval) -> dict:
+    school, sitting, options = await seed(session_factory, students, questions)
+
+    CBTCompiledTestService.clear()
+    CBTAnswerBufferService.clear()
+    cbt_answer_buffer_service.AsyncSessionLocal = session_factory
+    settings.cbt_autosave_buffered = mode == "buffered"
+    settings.cbt_autosave_flush_interval = flush_interval
+
+    slots = asyncio.Semaphore(settings.db_pool_size)
+    contexts = [
+        SchoolContext(school_id=school.id, user=student, school=school) for student in sitting["students"]
+    ]
+    submission_ids = [submission.id for submission in sitting["submissions"]]
+
+    async def call(handler):
+        async with slots:
+            with measure() as measurement:
+                async with session_factory() as db:
+                    await handler(db)
+            return measurement.ms
+
+    def answer(question, option_index):
+        return CBTAnswerCreate(question_id=question.id, selected_option_id=options[question.id][option_index].id)
+
+    # Every fourth question is first answered wrongly and corrected later
+    saves = []
+    for i, question in enumerate(sitting["questions"]):
+        saves.append(answer(question, 1 if i % 4 == 0 else 0))
+    for i, question in enumerate(sitting["questions"]):
+        if i % 4 == 0:
+            saves.append(answer(question, 0))
+    final_sheet = [answer(question, 0) for question in sitting["questions"]]
+
+    await asyncio.gather(*(
+        call(lambda db, s=s, c=c: start_test(s, c, db)) for s, c in zip(submission_ids, contexts)
+    ))
+
+    with measure(engine) as sql:
+        if mode == "buffered":
+            CBTAnswerBufferService.start()
+
+        if mode != "submit-only":
+            for save in saves:
+                payload = CBTAnswerAutosave(answers=[save])
+                await asyncio.gather(*(
+                    call(lambda db, s=s, c=c: autosave_answers(s, payload, c, db))
+                    for s, c in zip(submission_ids, contexts)
+                ))
+            # The sitting outlasts the flush interval; let the last flush land before the deadline
+            while CBTAnswerBufferService.pending_count() or CBTAnswerBufferService._in_flight:
+                await asyncio.sleep(flush_interval)
+        autosave_statements = sql.statements
+        autosave_rows = CBTAnswerBufferService.rows_written
+
+        payload = CBTSubmissionSubmit(answers=final_sheet)
+        with measure() as herd:
+            latencies = await asyncio.gather(*(
+                call(lambda db, s=s, c=c: submit_test(s, payload, c, db)) for s, c in zip(submission_ids, contexts)
+            ))
+
+        if mode == "buffered":
+            await CBTAnswerBufferService.stop()
+
+    final_answers = students * questions
+    return {
+        "mode": mode,
+        "saves": len(saves) * students if mode != "submit-only" else 0,
+        "rows_per_answer": round(CBTAnswerBufferService.rows_written / final_answers, 2),
+        "autosave_statements": autosave_statements,
+        "herd_rows": CBTAnswerBufferService.rows_written - autosave_rows,
+        "herd_statements": sql.statements - autosave_statements,
+        "submit_p50_ms": round(statistics.median(latencies), 1),
+        "submit_p99_ms": round(percentile(latencies, 0.99), 1),
+        "herd_s": round(herd.seconds, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=40)
+    parser.add_argument("--flush-interval", type=float, default=0.2)
+    args = parser.parse_args()
+
+    for mode in MODES:
+        result = await run_mode(mode, args.students, args.questions, args.flush_interval)
+        print(
+            f"{result['mode']:>13}: {result['saves']:>6} saves  "
+            f"{result['rows_per_answer']:>5} rows/answer  "
+            f"{result['autosave_statements']:>6} autosave statements  "
+            f"herd: {result['herd_rows']:>6} rows {result['herd_statements']:>5} statements  "
+            f"submit p50 {result['submit_p50_ms']:>7} ms  p99 {result['submit_p99_ms']:>7} ms  "
+            f"{result['herd_s']:>6} s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
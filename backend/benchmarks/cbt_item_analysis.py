@@ -0,0 +1,117 @@
+"""
+Benchmark of CBT item analysis over a large sitting.
+
+Seeds a published test with --questions questions and --submissions submitted
+attempts whose answers depend on a per-student ability, then times a cold
+analysis, a cached one and an incremental refresh after a further batch of
+submissions, against a throwaway SQLite database:
+
+    python -m benchmarks.cbt_item_analysis --submissions 2000 --questions 100
+"""
+import argparse
+import asyncio
+import random
+from decimal import Decimal
+from uuid import uuid4
+
+from sqlalchemy import insert, update
+
+from app.models.cbt import CBTAnswer, CBTSubmission, SubmissionStatus
+from app.services.cbt_compiled_test_service import CBTCompiledTestService
+from app.services.cbt_item_analysis_service import CBTItemAnalysisService
+from benchmarks.common import measure, scratch_database, seed_school
+from tests.utils import seed_cbt_sitting
+
+
+async def submit(session_factory, sitting, options, submissions):
+    """Answer and submit the given submissions with simulated abilities"""
+    questions = sitting["questions"]
+    answer_rows, scores = [], []
+    for submission in submissions:
+        ability = random.random()
+        score = 0
+        for question in questions:
+            choice = 0 if random.random() < 0.25 + 0.7 * ability else random.randint(1, 3)
+            score += choice == 0
+            answer_rows.append({
+                "id": str(uuid4()),
+                "submission_id": submission.id,
+                "question_id": question.id,
+                "selected_option_id": options[question.id][choice],
+                "is_correct": choice == 0,
+                "points_earned": Decimal(int(choice == 0)),
+                "school_id": submission.school_id,
+            })
+        scores.append((submission.id, score))
+
+    async with session_factory() as db:
+        await db.execute(insert(CBTAnswer), answer_rows)
+        await db.execute(update(CBTSubmission), [
+            {
+                "id": submission_id,
+                "status": SubmissionStatus.SUBMITTED,
+                "total_score": Decimal(score),
+                "total_possible": Decimal(len(questions)),
+                "percentage": Decimal(score * 100) / len(questions),
+            }
+            for submission_id, score in scores
+        ])
+        await db.commit()
+
+
+async def timed(session_factory, engine, test):
+    async with session_factory() as db:
+        with measure(engine) as measurement:
+            analysis = await CBTItemAnalysisService.get_item_analysis(db, test)
+    return analysis, measurement
+
+
+def report(label, analysis, measurement):
+    print(
+        f"{label:>12}: {analysis.submission_count:>5} submissions  {measurement.statements:>3} statements  "
+        f"{measurement.ms:>8.1f} ms"
+    )
+
+
+async def run(engine, session_factory, args):
+    school = await seed_school(session_factory)
+    async with session_factory() as db:
+        sitting = await seed_cbt_sitting(
+            db, school.id, students=args.submissions + args.late, questions=args.questions
+        )
+    options = {}
+    for option in sorted(sitting["options"], key=lambda o: o.order_number):
+        options.setdefault(option.question_id, []).append(option.id)
+
+    submissions = sitting["submissions"]
+    await submit(session_factory, sitting, options, submissions[:args.submissions])
+
+    CBTCompiledTestService.clear()
+    CBTItemAnalysisService.clear()
+    test = sitting["test"]
+    for label in ("cold", "cached"):
+        report(label, *await timed(session_factory, engine, test))
+
+    await submit(session_factory, sitting, options, submissions[args.submissions:])
+    analysis, measurement = await timed(session_factory, engine, test)
+    report("incremental", analysis, measurement)
+    print(
+        f"{'':>12}  KR-20 {analysis.score_distribution.kr20}  "
+        f"mean discrimination {sum(i.discrimination_index for i in analysis.items) / len(analysis.items):.3f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=100)
+    parser.add_argument("--late", type=int, default=50, help="Submissions arriving after the first analysis")
+    args = parser.parse_args()
+    random.seed(7)
+
+    async with scratch_database() as (engine, session_factory):
+        await run(engine, session_factory, args)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+"""
+Benchmark of a CBT sitting with and without the compiled test cache.
+
+Seeds one published test and a class of students, then has every student start
+and submit concurrently (each request with its own session, bounded by the
+pool size) through the start_test and submit_test endpoints. Reports SQL
+statements per request, compilations and latency against a throwaway SQLite
+database:
+
+    python -m benchmarks.cbt_sitting --students 500 --questions 40
+"""
+import argparse
+import asyncio
+import statistics
+
+from app.api.v1.endpoints.cbt_student import start_test, submit_test
+from app.core.config import settings
+from app.core.deps import SchoolContext
+from app.schemas.cbt import CBTAnswerCreate, CBTSubmissionSubmit
+from app.services.cbt_compiled_test_service import CBTCompiledTestService
+from benchmarks.common import measure, percentile, scratch_database, seed_school
+from tests.utils import seed_cbt_sitting
+
+
+async def seed(session_factory, students: int, questions: int):
+    school = await seed_school(session_factory)
+    async with session_factory() as db:
+        sitting = await seed_cbt_sitting(db, school.id, students=students, questions=questions)
+
+    first_option = {}
+    for option in sitting["options"]:
+        if option.order_number == 1:
+            first_option[option.question_id] = option.id
+    answers = [
+        CBTAnswerCreate(question_id=question.id, selected_option_id=first_option[question.id])
+        for question in sitting["questions"]
+    ]
+    return school, sitting, CBTSubmissionSubmit(answers=answers)
+
+
+async def run_mode(cached: bool, students: int, questions: int) -> dict:
+    async with scratch_database() as (engine, session_factory):
+        return await run_sitting(engine, session_factory, cached, students, questions)
+
+
+async def run_sitting(engine, session_factory, cached, students, questions) -> dict:
+    school, sitting, payload = await seed(session_factory, students, questions)
+
+    CBTCompiledTestService.clear()
+    CBTCompiledTestService.enabled = cached
+    compilations = CBTCompiledTestService.compilations
+
+    slots = asyncio.Semaphore(settings.db_pool_size)
+    latencies = {"start": [], "submit": []}
+
+    async def sit(student, submission):
+        context = SchoolContext(school_id=school.id, user=student, school=school)
+        for phase, call in (
+            ("start", lambda db: start_test(submission.id, context, db)),
+            ("submit", lambda db: submit_test(submission.id, payload, context, db)),
+        ):
+            async with slots:
+                with measure() as measurement:
+                    async with session_factory() as db:
+                        await call(db)
+                latencies[phase].append(measurement.ms)
+
+    with measure(engine) as sitting_run:
+        await asyncio.gather(*(
+            sit(student, submission)
+            for student, submission in zip(sitting["students"], sitting["submissions"])
+        ))
+    CBTCompiledTestService.enabled = True
+
+    return {
+        "mode": "cached" if cached else "uncached",
+        "statements_per_request": round(sitting_run.statements / (2 * students), 2),
+        "compilations": CBTCompiledTestService.compilations - compilations,
+        "start_p50_ms": round(statistics.median(latencies["start"]), 1),
+        "submit_p50_ms": round(statistics.median(latencies["submit"]), 1),
+        "submit_p99_ms": round(percentile(latencies["submit"], 0.99), 1),
+        "elapsed_s": round(sitting_run.seconds, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=40)
+    args = parser.parse_args()
+
+    for cached in (False, True):
+        result = await run_mode(cached, args.students, args.questions)
+        print(
+            f"{result['mode']:>8}: {result['statements_per_request']:>6} statements/request  "
+            f"{result['compilations']:>4} compilations  "
+            f"start p50 {result['start_p50_ms']:>7} ms  "
+            f"submit p50 {result['submit_p50_ms']:>7} ms  p99 {result['submit_p99_ms']:>7} ms  "
+            f"{result['elapsed_s']:>6} s total"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
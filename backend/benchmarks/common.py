@@ -0,0 +1,84 @@
+"""
+Shared set-up for the benchmark scripts: a throwaway database, statement
+counting and timing, percentiles and a seeded school.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+import app.models  # noqa: F401  (registers every table)
+from app.core.database import Base, create_app_async_engine
+from app.models.school import School
+
+# Scripts that never read the schools table seed their rows under this id
+SCHOOL_ID = "benchmark-school"
+
+
+@asynccontextmanager
+async def scratch_database() -> AsyncIterator[Tuple[AsyncEngine, sessionmaker]]:
+    """A pooled engine and session factory on a new SQLite file with every table, removed afterwards"""
+    tmp_dir = tempfile.mkdtemp()
+    engine = create_app_async_engine(f"sqlite+aiosqlite:///{os.path.join(tmp_dir, 'bench.db')}", pooled=True)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        yield engine, sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    finally:
+        await engine.dispose()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+@dataclass
+class Measurement:
+    seconds: float = 0.0
+    statements: int = 0
+
+    @property
+    def ms(self) -> float:
+        return self.seconds * 1000
+
+
+@contextmanager
+def measure(engine: Optional[AsyncEngine] = None) -> Iterator[Measurement]:
+    """Time the block and, given an engine, count the SQL statements it runs"""
+    measurement = Measurement()
+
+    def count(*args):
+        measurement.statements += 1
+
+    if engine is not None:
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+    began = time.perf_counter()
+    try:
+        yield measurement
+    finally:
+        measurement.seconds = time.perf_counter() - began
+        if engine is not None:
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def seed_school(session_factory: sessionmaker) -> School:
+    """The benchmark school, committed"""
+    async with session_factory() as db:
+        school = School(
+            name="Benchmark School", code="BENCH001", email="bench@school.com",
+            address_line1="1 Bench Street", city="City", state="State",
+            postal_code="00000", country="Nigeria", current_session="2024/2025", current_term="First Term"
+        )
+        db.add(school)
+        await db.commit()
+    return school
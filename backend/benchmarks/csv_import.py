@@ -0,0 +1,110 @@
+"""
+Benchmark of the student CSV import.
+
+Generates a --rows onboarding file (a few percent of rows invalid) and imports
+it into a throwaway SQLite database twice: once the way the import used to
+work (one class lookup, one admission number check and one flush per row)
+and once through CSVImportService.import_students, which validates each chunk
+column-wise and inserts it with one executemany:
+
+    python -m benchmarks.csv_import --rows 3000
+"""
+import argparse
+import asyncio
+import random
+
+from sqlalchemy import select
+
+from app.models.academic import Class, ClassLevel
+from app.models.student import Student, StudentStatus
+from app.services.csv_import_service import CSVImportService
+from benchmarks.common import measure, scratch_database, seed_school
+
+CLASS_NAMES = [f"JSS {level}{arm}" for level in (1, 2, 3) for arm in "ABCD"]
+
+
+def build_csv(rows, prefix):
+    lines = [",".join(CSVImportService.get_csv_template_headers())]
+    for i in range(rows):
+        dob = "2010-13-45" if random.random() < 0.02 else f"2010-{random.randint(1, 12):02d}-15"
+        email = "not-an-email" if random.random() < 0.02 else f"s{i}@example.com"
+        lines.append(",".join([
+            f"{prefix}{i:05d}", "First", "Last", "", dob, random.choice(["male", "female"]), "", email,
+            f"{i} Road", "", "Lagos", "Lagos", "100001", "2024-01-15", random.choice(CLASS_NAMES),
+            "Guardian", "", "", "Parent", "", "", "", "", "", "", ""
+        ]))
+    return "\n".join(lines)
+
+
+async def row_at_a_time_import(db, school_id, content):
+    """The import before chunking: per-row lookups and a flush per created student"""
+    known = set((await db.execute(
+        select(Student.admission_number).where(Student.school_id == school_id)
+    )).scalars().all())
+    created = 0
+    for chunk in CSVImportService.iter_csv_chunks(content):
+        for _, row in chunk.iterrows():
+            try:
+                dob = CSVImportService.parse_date(row["date_of_birth"], "date_of_birth")
+                admitted = CSVImportService.parse_date(row["admission_date"], "admission_date")
+                gender = CSVImportService.validate_gender(row["gender"])
+            except ValueError:
+                continue
+            duplicate = await db.execute(select(Student).where(
+                Student.admission_number == row["admission_number"], Student.school_id == school_id
+            ))
+            if duplicate.scalar_one_or_none() or row["admission_number"] in known:
+                continue
+            class_id = (await db.execute(select(Class.id).where(
+                Class.name == row["current_class_name"], Class.school_id == school_id
+            ))).scalar_one_or_none()
+            db.add(Student(
+                admission_number=row["admission_number"], first_name=row["first_name"],
+                last_name=row["last_name"], date_of_birth=dob, gender=gender, email=row["email"] or None,
+                address_line1=row["address_line1"], city=row["city"], state=row["state"],
+                postal_code=row["postal_code"], admission_date=admitted, current_class_id=class_id,
+                status=StudentStatus.ACTIVE, school_id=school_id
+            ))
+            await db.flush()
+            known.add(row["admission_number"])
+            created += 1
+    await db.commit()
+    return created
+
+
+async def run(session_factory, rows):
+    school = await seed_school(session_factory)
+    async with session_factory() as db:
+        db.add_all([
+            Class(name=name, level=ClassLevel.JSS_1, academic_session="2024/2025", school_id=school.id)
+            for name in CLASS_NAMES
+        ])
+        await db.commit()
+
+    for label, prefix, import_rows in [
+        ("row at a time", "OLD", lambda db, content: row_at_a_time_import(db, school.id, content)),
+        ("chunked", "NEW", lambda db, content: CSVImportService.import_students(
+            db, school.id, content, collect_created=False
+        )),
+    ]:
+        content = build_csv(rows, prefix)
+        async with session_factory() as db:
+            with measure() as measurement:
+                result = await import_rows(db, content)
+        created = result if isinstance(result, int) else result.successful_imports
+        print(f"{label:>14}: {rows} rows  {created} created  {measurement.ms:>8.0f} ms  "
+              f"{rows / measurement.seconds:>8.0f} rows/s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=3000)
+    args = parser.parse_args()
+    random.seed(7)
+
+    async with scratch_database() as (engine, session_factory):
+        await run(session_factory, args.rows)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
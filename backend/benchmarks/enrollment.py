@@ -0,0 +1,113 @@
+"""
+Benchmark of class auto-enrollment.
+
+Seeds --classes classes of --students students and --subjects subjects in a
+throwaway SQLite database, then enrolls half the classes the way
+auto_enroll_students_in_class_subjects used to (an existence SELECT per
+student and subject, then a refresh per new enrollment) and the other half
+with the set-based engine:
+
+    python -m benchmarks.enrollment --classes 10 --students 40 --subjects 14
+"""
+import argparse
+import asyncio
+from datetime import date
+from uuid import uuid4
+
+from sqlalchemy import select
+
+from app.models.academic import Class, ClassLevel, Enrollment, Subject, Term, TermType, class_subject_association
+from app.models.student import Gender, Student
+from app.services.enrollment_service import EnrollmentService
+from benchmarks.common import SCHOOL_ID, measure, scratch_database
+
+async def seed(db, classes, students, subjects):
+    term = Term(
+        name="First Term", type=TermType.FIRST_TERM, academic_session="2024/2025",
+        start_date=date(2024, 9, 1), end_date=date(2024, 12, 15), is_current=True, school_id=SCHOOL_ID
+    )
+    subject_rows = [
+        Subject(id=str(uuid4()), name=f"Subject {s}", code=f"SUB{s}", school_id=SCHOOL_ID) for s in range(subjects)
+    ]
+    class_rows, student_rows, links = [], [], []
+    for c in range(classes):
+        cls = Class(
+            id=str(uuid4()), name=f"Class {c:03d}", level=ClassLevel.JSS_1,
+            academic_session="2024/2025", school_id=SCHOOL_ID
+        )
+        class_rows.append(cls)
+        links.extend(
+            {"id": str(uuid4()), "class_id": cls.id, "subject_id": subject.id, "school_id": SCHOOL_ID}
+            for subject in subject_rows
+        )
+        student_rows.extend(
+            Student(
+                admission_number=f"ADM{c:03d}{i:03d}", first_name=f"Student{i}", last_name=f"Class{c}",
+                date_of_birth=date(2012, 1, 1), gender=Gender.MALE, address_line1="1 Seed Street",
+                city="Seed City", state="Seed State", postal_code="00000", admission_date=date(2024, 9, 1),
+                current_class_id=cls.id, school_id=SCHOOL_ID
+            )
+            for i in range(students)
+        )
+    db.add_all([term] + subject_rows + class_rows + student_rows)
+    await db.flush()
+    await db.execute(class_subject_association.insert(), links)
+    await db.commit()
+    return term, class_rows, subject_rows
+
+
+async def per_pair(db, term, cls, subjects):
+    """The old engine: an existence check per (student, subject), a refresh per row"""
+    students = (await db.execute(select(Student).where(Student.current_class_id == cls.id))).scalars().all()
+    enrollments = []
+    for student in students:
+        for subject in subjects:
+            existing = await db.execute(select(Enrollment).where(
+                Enrollment.student_id == student.id, Enrollment.subject_id == subject.id,
+                Enrollment.term_id == term.id, Enrollment.is_deleted == False
+            ))
+            if not existing.scalar_one_or_none():
+                enrollment = Enrollment(
+                    student_id=student.id, class_id=cls.id, subject_id=subject.id, term_id=term.id,
+                    school_id=SCHOOL_ID, enrollment_date=date.today()
+                )
+                db.add(enrollment)
+                enrollments.append(enrollment)
+    await db.commit()
+    for enrollment in enrollments:
+        await db.refresh(enrollment)
+    return len(enrollments)
+
+
+async def run(engine, session_factory, label, enroll, classes):
+    created = 0
+    with measure(engine) as measurement:
+        for cls in classes:
+            async with session_factory() as db:
+                created += await enroll(db, cls)
+    print(f"{label:>12}: {measurement.ms:>8.0f} ms  {measurement.statements:>6} statements  {created} enrollments")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--classes", type=int, default=10)
+    parser.add_argument("--students", type=int, default=40)
+    parser.add_argument("--subjects", type=int, default=14)
+    args = parser.parse_args()
+
+    async def set_based(db, cls):
+        counts = await EnrollmentService.auto_enroll_students_in_class_subjects(db, cls.id, SCHOOL_ID)
+        return counts["enrollments_created"]
+
+    async with scratch_database() as (engine, session_factory):
+        async with session_factory() as db:
+            term, classes, subjects = await seed(db, args.classes * 2, args.students, args.subjects)
+
+        print(f"{args.classes} classes x {args.students} students x {args.subjects} subjects")
+        await run(engine, session_factory, "per pair", lambda db, cls: per_pair(db, term, cls, subjects), classes[::2])
+        await run(engine, session_factory, "set-based", set_based, classes[1::2])
+        await run(engine, session_factory, "re-run", set_based, classes[1::2])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
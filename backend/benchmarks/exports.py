@@ -0,0 +1,107 @@
+"""
+Benchmark of the students export.
+
+For each --students size, fills a throwaway SQLite database and measures
+time and peak traced memory (tracemalloc) of the export built the old way
+(every student loaded as an ORM object with its class and parent, the whole
+CSV held in one string) against the streamed CSV and XLSX exports, whose
+chunks are consumed and dropped as a response would send them:
+
+    python -m benchmarks.exports --students 5000 20000
+"""
+import argparse
+import asyncio
+import csv
+import io
+import tracemalloc
+import uuid
+from datetime import date
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import selectinload
+
+from app.models.academic import Class, ClassLevel
+from app.models.student import Student, StudentStatus
+from app.models.user import Gender
+from app.services.export_service import ExportService
+from benchmarks.common import measure, scratch_database, seed_school
+
+
+async def materialized_export(db, school_id):
+    """The export before streaming: all ORM rows, then one string"""
+    result = await db.execute(
+        select(Student).options(selectinload(Student.current_class), selectinload(Student.parent))
+        .where(Student.school_id == school_id, Student.is_deleted == False)
+    )
+    output = io.StringIO()
+    writer = csv.writer(output)
+    for student in result.scalars().all():
+        writer.writerow([
+            student.admission_number, student.first_name, student.last_name, student.date_of_birth,
+            student.current_class.name if student.current_class else '', student.guardian_name,
+            student.address_line1, student.city, student.state, student.postal_code, student.notes
+        ])
+    return len(output.getvalue())
+
+
+async def streamed(chunks):
+    size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+    return size
+
+
+async def run(session_factory, label, export):
+    async with session_factory() as db:
+        tracemalloc.start()
+        with measure() as measurement:
+            size = await export(db)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(f"{label:>20}: {measurement.ms:>8.0f} ms  peak {peak / 2**20:>7.1f} MiB  output {size / 2**20:>6.1f} MiB")
+
+
+async def run_size(session_factory, students):
+    school = await seed_school(session_factory)
+    async with session_factory() as db:
+        classes = [
+            Class(id=str(uuid.uuid4()), name=f"Class {c}", level=ClassLevel.JSS_1,
+                  academic_session="2024/2025", school_id=school.id)
+            for c in range(40)
+        ]
+        db.add_all(classes)
+        await db.commit()
+        await db.execute(insert(Student.__table__), [
+            {
+                "id": str(uuid.uuid4()), "admission_number": f"ADM{i:06d}", "first_name": "First",
+                "last_name": f"Last{i}", "date_of_birth": date(2012, 1, 1), "gender": Gender.FEMALE,
+                "address_line1": f"{i} Long Street Name", "city": "Lagos", "state": "Lagos",
+                "postal_code": "100001", "admission_date": date(2024, 9, 1), "status": StudentStatus.ACTIVE,
+                "current_class_id": classes[i % len(classes)].id, "guardian_name": "Guardian Name",
+                "notes": "Some notes about the student " * 3, "school_id": school.id
+            }
+            for i in range(students)
+        ])
+        await db.commit()
+
+    print(f"{students} students")
+    await run(session_factory, "materialized csv", lambda db: materialized_export(db, school.id))
+    await run(session_factory, "streamed csv", lambda db: streamed(
+        ExportService.write_csv(ExportService.student_rows(db, school.id))
+    ))
+    await run(session_factory, "streamed xlsx", lambda db: streamed(
+        ExportService.write_xlsx(ExportService.student_rows(db, school.id), "students")
+    ))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, nargs="+", default=[5000, 20000])
+    args = parser.parse_args()
+    for students in args.students:
+        async with scratch_database() as (engine, session_factory):
+            await run_size(session_factory, students)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
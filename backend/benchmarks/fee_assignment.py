@@ -0,0 +1,119 @@
+"""
+Benchmark of bulk fee assignment.
+
+Seeds --students students across --classes classes in a throwaway SQLite
+database, then assigns one fee structure to the whole school the way
+bulk_create_fee_assignments used to (an existence SELECT per student, then
+reloading every assignment with its relationships) and another with the
+chunked engine:
+
+    python -m benchmarks.fee_assignment --students 1500 --classes 30
+"""
+import argparse
+import asyncio
+from datetime import date, timedelta
+from decimal import Decimal
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.models.academic import Class, ClassLevel, Term, TermType
+from app.models.fee import FeeAssignment, FeeStructure, FeeType
+from app.models.student import Gender, Student
+from app.schemas.fee import BulkFeeAssignmentCreate
+from app.services.fee_service import FeeService
+from benchmarks.common import SCHOOL_ID, measure, scratch_database
+
+async def seed(db, students, classes):
+    term = Term(
+        name="First Term", type=TermType.FIRST_TERM, academic_session="2024/2025",
+        start_date=date(2024, 9, 1), end_date=date(2024, 12, 15), is_current=True, school_id=SCHOOL_ID
+    )
+    class_rows = [
+        Class(id=str(uuid4()), name=f"Class {c:03d}", level=ClassLevel.JSS_1, academic_session="2024/2025", school_id=SCHOOL_ID)
+        for c in range(classes)
+    ]
+    structures = [
+        FeeStructure(name=name, academic_session="2024/2025", fee_type=FeeType.TUITION, amount=Decimal("1000.00"), school_id=SCHOOL_ID)
+        for name in ("Tuition", "Development Levy")
+    ]
+    student_rows = [
+        Student(
+            admission_number=f"ADM{i:05d}", first_name=f"Student{i}", last_name="Bench",
+            date_of_birth=date(2012, 1, 1), gender=Gender.MALE, address_line1="1 Seed Street",
+            city="Seed City", state="Seed State", postal_code="00000", admission_date=date(2024, 9, 1),
+            current_class_id=class_rows[i % classes].id, school_id=SCHOOL_ID
+        )
+        for i in range(students)
+    ]
+    db.add_all([term] + class_rows + structures + student_rows)
+    await db.commit()
+    return term, class_rows, structures
+
+
+async def per_student(db, bulk_data, fee_structure):
+    """The old engine: an existence check per student, then a reload with relationships"""
+    students = (await db.execute(
+        select(Student).where(Student.current_class_id.in_(bulk_data.class_ids), Student.school_id == SCHOOL_ID)
+    )).scalars().all()
+    assignments = []
+    for student in students:
+        existing = await db.execute(select(FeeAssignment).where(
+            FeeAssignment.student_id == student.id, FeeAssignment.fee_structure_id == fee_structure.id,
+            FeeAssignment.term_id == bulk_data.term_id, FeeAssignment.is_deleted == False
+        ))
+        if existing.scalar_one_or_none():
+            continue
+        assignment = FeeAssignment(
+            student_id=student.id, fee_structure_id=fee_structure.id, term_id=bulk_data.term_id,
+            assigned_date=date.today(), due_date=date.today() + timedelta(days=30), amount=fee_structure.amount,
+            amount_outstanding=fee_structure.amount, school_id=SCHOOL_ID
+        )
+        db.add(assignment)
+        assignments.append(assignment)
+    await db.commit()
+    result = await db.execute(
+        select(FeeAssignment).where(FeeAssignment.id.in_([a.id for a in assignments])).options(
+            selectinload(FeeAssignment.student).selectinload(Student.current_class),
+            selectinload(FeeAssignment.fee_structure),
+            selectinload(FeeAssignment.term)
+        )
+    )
+    return len(result.scalars().all())
+
+
+async def run(engine, session_factory, label, assign):
+    async with session_factory() as db:
+        with measure(engine) as measurement:
+            created = await assign(db)
+    print(f"{label:>12}: {measurement.ms:>8.0f} ms  {measurement.statements:>6} statements  {created} assignments")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=1500)
+    parser.add_argument("--classes", type=int, default=30)
+    args = parser.parse_args()
+
+    async with scratch_database() as (engine, session_factory):
+        async with session_factory() as db:
+            term, classes, (tuition, levy) = await seed(db, args.students, args.classes)
+
+        def bulk_data(structure):
+            return BulkFeeAssignmentCreate(
+                fee_structure_id=structure.id, term_id=term.id, class_ids=[cls.id for cls in classes]
+            )
+
+        async def chunked(db):
+            summary = await FeeService.bulk_create_fee_assignments(db, bulk_data(levy), SCHOOL_ID, collect_ids=False)
+            return summary["created_count"]
+
+        print(f"{args.students} students in {args.classes} classes")
+        await run(engine, session_factory, "per student", lambda db: per_student(db, bulk_data(tuition), tuition))
+        await run(engine, session_factory, "chunked", chunked)
+        await run(engine, session_factory, "re-run", chunked)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
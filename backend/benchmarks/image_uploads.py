@@ -0,0 +1,109 @@
+"""
+Benchmark of event-loop lag during concurrent image uploads.
+
+Uploads --uploads different --size x --size photos at once into a throwaway
+local upload directory, first the way FileUploadService used to (Pillow
+decoding, compositing and encoding inside the coroutine) and then through
+the process pool. A probe task sleeps 5 ms in a loop throughout and records
+how late it wakes, which is how long every other request on the worker
+would have been stalled:
+
+    python -m benchmarks.image_uploads --uploads 8 --size 3000 --workers 2
+"""
+import argparse
+import asyncio
+import io
+import shutil
+import tempfile
+import time
+
+from fastapi import UploadFile
+from PIL import Image
+
+from app.core.config import settings
+from app.services.file_upload_service import FileUploadService
+from benchmarks.common import measure, percentile
+
+PROBE_INTERVAL = 0.005
+
+
+def photo(size, seed):
+    """A noisy gradient JPEG: expensive to decode and to compress, like a real photo"""
+    noise = Image.effect_noise((size, size), 64).convert("RGB")
+    gradient = Image.linear_gradient("L").resize((size, size)).convert("RGB")
+    output = io.BytesIO()
+    Image.blend(noise, gradient, 0.3 + seed * 0.01).save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+async def inline_upload(content, school_id):
+    """The old upload: Pillow work directly in the coroutine"""
+    image = Image.open(io.BytesIO(content))
+    if image.mode in ('RGBA', 'LA', 'P'):
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        if image.mode == 'P':
+            image = image.convert('RGBA')
+        background.paste(image, mask=image.split()[-1] if image.mode == 'RGBA' else None)
+        image = background
+    if image.size[0] > 500 or image.size[1] > 500:
+        image.thumbnail((500, 500), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+async def pooled_upload(content, school_id):
+    return await FileUploadService.upload_school_logo(
+        UploadFile(file=io.BytesIO(content), filename="logo.jpg", size=len(content)), school_id
+    )
+
+
+async def run(label, upload, images):
+    lags = []
+    running = True
+
+    async def probe():
+        while running:
+            began = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL)
+            lags.append(time.perf_counter() - began - PROBE_INTERVAL)
+
+    prober = asyncio.create_task(probe())
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+    with measure() as measurement:
+        await asyncio.gather(*(upload(content, f"school-{n}") for n, content in enumerate(images)))
+    running = False
+    await prober
+
+    print(
+        f"{label:>8}: {measurement.ms:>7.0f} ms total  loop lag max {max(lags) * 1000:>6.1f} ms  "
+        f"p99 {percentile(lags, 0.99) * 1000:>6.1f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--size", type=int, default=3000)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    upload_dir = tempfile.mkdtemp()
+    settings.upload_dir = upload_dir
+    settings.image_workers = args.workers
+    FileUploadService._configure_cloudinary = classmethod(lambda cls: False)
+    images = [photo(args.size, n) for n in range(args.uploads)]
+    print(f"{args.uploads} concurrent uploads of {args.size}x{args.size} JPEGs, {args.workers} image workers")
+
+    await run("inline", inline_upload, images)
+    # Start the pool outside the measurement, as a running server would have
+    await asyncio.get_running_loop().run_in_executor(FileUploadService._get_image_pool(), time.sleep, 0)
+    await run("pooled", pooled_upload, images)
+    await run("re-run", pooled_upload, images)
+
+    FileUploadService.shutdown()
+    shutil.rmtree(upload_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
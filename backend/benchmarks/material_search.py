@@ -0,0 +1,142 @@
+"""
+Benchmark of teacher material search.
+
+Creates --materials materials through MaterialService (so each one is indexed
+and its related materials precomputed) and reports ingestion throughput.
+Then replays single- and multi-word queries against the ranked index and
+against the previous lower(col) LIKE '%q%' scan ordered by view count, and
+times related-material lookups, against a throwaway SQLite database:
+
+    python -m benchmarks.material_search --materials 5000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+
+from sqlalchemy import desc, func, or_, select
+from sqlalchemy.orm import selectinload
+
+from app.models.academic import Subject
+from app.models.teacher_material import MaterialType, TeacherMaterial
+from app.models.user import User, UserRole
+from app.services.material_search_service import MaterialSearchService
+from app.services.material_service import MaterialService
+from benchmarks.common import measure, percentile, scratch_database, seed_school
+
+TOPICS = {
+    "Mathematics": ["algebra", "fractions", "geometry", "trigonometry", "statistics", "probability", "calculus"],
+    "Biology": ["cells", "photosynthesis", "genetics", "ecology", "respiration", "evolution", "nutrition"],
+    "Physics": ["motion", "electricity", "magnetism", "waves", "optics", "energy", "pressure"],
+    "English": ["grammar", "comprehension", "poetry", "essay", "vocabulary", "literature", "summary"],
+}
+FILLER = "introduction practice revision notes worksheet examples exercises guide lesson review".split()
+# Descriptions draw from a larger vocabulary with a Zipf-like spread, as real prose does
+VOCABULARY = [f"word{i}" for i in range(3000)]
+VOCABULARY_WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+QUERIES = ["algebra", "photosynthesis notes", "electricity worksheet", "poetry", "genetics revision guide", "calc"]
+
+
+async def like_search(db, school_id, query, limit=20):
+    """The search before the index: substring scans ordered by popularity"""
+    term = f"%{query.lower()}%"
+    result = await db.execute(
+        select(TeacherMaterial).where(
+            TeacherMaterial.school_id == school_id,
+            TeacherMaterial.is_deleted == False,
+            TeacherMaterial.is_current_version == True,
+            TeacherMaterial.is_published == True,
+            or_(
+                func.lower(TeacherMaterial.title).like(term),
+                func.lower(TeacherMaterial.description).like(term),
+                func.lower(TeacherMaterial.topic).like(term),
+                func.lower(TeacherMaterial.grade_level).like(term),
+                func.lower(TeacherMaterial.exam_type).like(term)
+            )
+        ).options(
+            selectinload(TeacherMaterial.subject),
+            selectinload(TeacherMaterial.class_),
+            selectinload(TeacherMaterial.uploader)
+        ).order_by(desc(TeacherMaterial.view_count), desc(TeacherMaterial.created_at)).limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def timed(session_factory, calls):
+    latencies = []
+    async with session_factory() as db:
+        for call in calls:
+            with measure() as measurement:
+                await call(db)
+            latencies.append(measurement.ms)
+    return latencies
+
+
+def report(label, latencies):
+    print(
+        f"{label:>22}: {len(latencies):>4} calls  p50 {statistics.median(latencies):>7.1f} ms  "
+        f"p95 {percentile(latencies, 0.95):>7.1f} ms"
+    )
+
+
+async def run(session_factory, materials):
+    school = await seed_school(session_factory)
+    async with session_factory() as db:
+        teacher = User(
+            email="teacher@bench.com", password_hash="x", first_name="Bench", last_name="Teacher",
+            role=UserRole.TEACHER, school_id=school.id, is_active=True, is_verified=True
+        )
+        subjects = {name: Subject(name=name, code=name[:3].upper(), school_id=school.id) for name in TOPICS}
+        db.add_all([teacher, *subjects.values()])
+        await db.commit()
+
+    material_ids = []
+    async with session_factory() as db:
+        with measure() as ingest:
+            for i in range(materials):
+                subject = random.choice(list(TOPICS))
+                topic = random.choice(TOPICS[subject])
+                words = (
+                    random.sample(TOPICS[subject], 3) + random.sample(FILLER, 3)
+                    + random.choices(VOCABULARY, VOCABULARY_WEIGHTS, k=30)
+                )
+                material = await MaterialService.create_material(
+                    db, school.id, teacher.id,
+                    title=f"{topic.title()} {random.choice(FILLER).title()} {i}",
+                    description=" ".join(random.sample(words, len(words))),
+                    material_type=MaterialType.DOCUMENT,
+                    file_name="file.pdf", original_file_name="file.pdf", file_path="/uploads/file.pdf",
+                    file_size=1024, mime_type="application/pdf",
+                    subject_id=subjects[subject].id, topic=topic.title(),
+                    grade_level=random.choice(["JSS1", "JSS2", "SS1"]),
+                    tags=[subject.lower(), topic], is_published=True
+                )
+                material_ids.append(material.id)
+    print(f"{'ingestion':>22}: {materials} materials  {materials / ingest.seconds:>7.1f} materials/s  "
+          f"{ingest.ms / materials:>6.1f} ms each (index + related)")
+
+    searches = QUERIES * 5
+    report("search (like scan)", await timed(
+        session_factory, [lambda db, q=q: like_search(db, school.id, q) for q in searches]
+    ))
+    report("search (bm25 index)", await timed(
+        session_factory, [lambda db, q=q: MaterialSearchService.search(db, school.id, q) for q in searches]
+    ))
+    sample = random.sample(material_ids, min(50, len(material_ids)))
+    report("related (precomputed)", await timed(
+        session_factory, [lambda db, m=m: MaterialService.get_related_materials(db, school.id, m) for m in sample]
+    ))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--materials", type=int, default=5000)
+    args = parser.parse_args()
+    random.seed(7)
+
+    async with scratch_database() as (engine, session_factory):
+        await run(session_factory, args.materials)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""
+Benchmark of email delivery for a message to many recipients.
+
+Sends --recipients emails to a local SMTP sink that waits --latency seconds
+before each reply (a stand-in for a remote server) and compares sending
+them one at a time, each on a new connection as send_message used to,
+with EmailService.send_bulk over a few reused connections:
+
+    python -m benchmarks.message_delivery --recipients 300 --latency 0.01
+"""
+import argparse
+import asyncio
+
+from app.core.config import settings
+from app.services.email_service import EmailService, OutgoingEmail
+from benchmarks.common import measure
+from tests.utils import SMTPSink
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=300)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    settings.resend_api_key = None
+    settings.smtp_host, settings.smtp_user, settings.smtp_password = "127.0.0.1", "bench", "bench"
+    settings.smtp_tls = settings.smtp_ssl = False
+    settings.email_concurrency = args.concurrency
+    settings.email_rate_limit = 0
+    emails = [
+        OutgoingEmail(to=f"parent{i}@bench.test", subject="Term begins", html_content="<p>School resumes on Monday.</p>")
+        for i in range(args.recipients)
+    ]
+
+    async with SMTPSink(latency=args.latency) as sink:
+        settings.smtp_port = sink.port
+
+        with measure() as one_by_one:
+            for email in emails:
+                await EmailService.send_email([email.to], email.subject, email.html_content)
+        print(f"{'one at a time':>14}: {one_by_one.seconds:6.2f} s  ({sink.connections} connections)")
+
+        sink.connections = 0
+        with measure() as bulk:
+            errors = await EmailService.send_bulk(emails)
+        print(f"{'send_bulk':>14}: {bulk.seconds:6.2f} s  ({sink.connections} connections, {errors.count(None)} sent)")
+        print(f"speedup: {one_by_one.seconds / bulk.seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""
+Benchmark of notification fan-out.
+
+Notifies --users users in a throwaway SQLite database, first one
+create_notification call (and commit) per user as the grade, alert and
+communication paths used to, then with one create_notifications_bulk call,
+then with a grouped bulk call that collapses into the rows already there:
+
+    python -m benchmarks.notifications --users 2000
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import func, select
+
+from app.models.notification import Notification
+from app.schemas.notification import NotificationCreate
+from app.services.notification_service import NotificationService
+from benchmarks.common import SCHOOL_ID, measure, scratch_database
+
+def fan_out(users, label):
+    return [
+        NotificationCreate(user_id=f"user-{i}", title="New Grade Posted", message=f"{label} grade posted", link="/grades")
+        for i in range(users)
+    ]
+
+
+async def run(session_factory, label, send):
+    async with session_factory() as db:
+        with measure() as measurement:
+            await send(db)
+        rows = await db.scalar(select(func.count(Notification.id)))
+    print(f"{label:>22}: {measurement.ms:>8.0f} ms  ({rows} rows in table)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    args = parser.parse_args()
+
+    async def one_by_one(db):
+        for notification in fan_out(args.users, "Maths"):
+            await NotificationService.create_notification(db, notification, SCHOOL_ID)
+
+    async def bulk(db):
+        await NotificationService.create_notifications_bulk(db, SCHOOL_ID, fan_out(args.users, "English"))
+
+    async def grouped(db):
+        await NotificationService.create_notifications_bulk(
+            db, SCHOOL_ID, fan_out(args.users, "Physics"),
+            group_key="new_grades", collapsed_message="{count} new grades have been posted."
+        )
+
+    print(f"{args.users} users")
+    async with scratch_database() as (engine, session_factory):
+        await run(session_factory, "one at a time", one_by_one)
+        await run(session_factory, "bulk", bulk)
+        await run(session_factory, "grouped bulk (new)", grouped)
+        await run(session_factory, "grouped bulk (collapse)", grouped)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
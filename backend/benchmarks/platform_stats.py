@@ -0,0 +1,92 @@
+"""
+Benchmark of the platform admin console's statistics.
+
+Seeds --schools schools, each with a few students and teachers, in a
+throwaway SQLite database, then lists a page of schools with their student
+and teacher counts the way get_all_schools_with_details used to (two count
+queries per school) and from the rollup, which one refresh rebuilds:
+
+    python -m benchmarks.platform_stats --schools 1000 --page 100
+"""
+import argparse
+import asyncio
+from datetime import date
+from uuid import uuid4
+
+from sqlalchemy import and_, func, insert, select
+
+from app.models.school import School
+from app.models.student import Gender, Student
+from app.models.user import User, UserRole
+from app.services.platform_admin_service import PlatformAdminService
+from app.services.platform_stats_service import PlatformStatsService
+from benchmarks.common import measure, scratch_database
+
+
+async def seed(db, schools, students, teachers):
+    school_rows, student_rows, user_rows = [], [], []
+    for n in range(schools):
+        school_id = str(uuid4())
+        school_rows.append(dict(
+            id=school_id, name=f"School {n}", code=f"SCH{n:05d}", email=f"school{n}@test.com",
+            address_line1="1 Road", city="City", state="State", postal_code="00000", country="Nigeria",
+            current_session="2024/2025", current_term="First Term", settings={}
+        ))
+        student_rows.extend(dict(
+            id=str(uuid4()), admission_number=f"ADM{n:05d}{i:03d}", first_name="Student", last_name=str(i),
+            date_of_birth=date(2012, 1, 1), gender=Gender.MALE, address_line1="1 Road", city="City",
+            state="State", postal_code="00000", admission_date=date(2024, 9, 1), school_id=school_id
+        ) for i in range(students))
+        user_rows.extend(dict(
+            id=str(uuid4()), email=f"user{n}_{i}@test.com", password_hash="x", first_name="User", last_name=str(i),
+            role=UserRole.SCHOOL_OWNER if i == 0 else UserRole.TEACHER, school_id=school_id
+        ) for i in range(teachers + 1))
+    await db.execute(insert(School), school_rows)
+    await db.execute(insert(Student), student_rows)
+    await db.execute(insert(User), user_rows)
+    await db.commit()
+
+
+async def per_school_counts(db, page):
+    """The old listing: two count queries per school on the page"""
+    schools = (await db.execute(select(School).limit(page))).scalars().all()
+    for school in schools:
+        await db.scalar(select(func.count(Student.id)).where(
+            and_(Student.school_id == school.id, Student.is_deleted == False)
+        ))
+        await db.scalar(select(func.count(User.id)).where(
+            and_(User.school_id == school.id, User.role == UserRole.TEACHER, User.is_deleted == False)
+        ))
+
+
+async def run(engine, session_factory, label, call):
+    async with session_factory() as db:
+        with measure(engine) as measurement:
+            await call(db)
+    print(f"{label:>20}: {measurement.ms:>8.1f} ms  {measurement.statements:>5} statements")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schools", type=int, default=1000)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--teachers", type=int, default=3)
+    args = parser.parse_args()
+
+    async with scratch_database() as (engine, session_factory):
+        async with session_factory() as db:
+            await seed(db, args.schools, args.students, args.teachers)
+
+        print(f"{args.schools} schools, pages of {args.page}")
+        await run(engine, session_factory, "per-school counts", lambda db: per_school_counts(db, args.page))
+        await run(engine, session_factory, "rollup refresh", PlatformStatsService.refresh)
+        await run(
+            engine, session_factory, "rollup listing",
+            lambda db: PlatformAdminService.get_all_schools_with_details(db, limit=args.page)
+        )
+        await run(engine, session_factory, "rollup statistics", PlatformAdminService.get_platform_statistics)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
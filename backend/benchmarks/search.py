@@ -0,0 +1,120 @@
+"""
+Benchmark of universal search over a large school.
+
+Seeds --students students, --staff staff, subjects and classes, then replays
+typeahead keystroke sequences ("o", "ok", "oka", ...) as prefix searches and
+full terms as contains searches. Each search runs as the single ranked UNION
+query and, for comparison, as one query per category issued in turn, against
+a throwaway SQLite database:
+
+    python -m benchmarks.search --students 50000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+from datetime import date
+from uuid import uuid4
+
+from sqlalchemy import insert
+
+from app.models.academic import Class, ClassLevel, Subject
+from app.models.student import Student
+from app.models.user import Gender, User, UserRole
+from app.services.search_service import SearchService
+from benchmarks.common import measure, percentile, scratch_database, seed_school
+
+FIRST_NAMES = ["Ada", "Chinedu", "Emeka", "Fatima", "Ibrahim", "Ngozi", "Oluwaseun", "Tunde", "Yetunde", "Zainab"]
+LAST_NAMES = ["Okafor", "Adeyemi", "Bello", "Eze", "Mohammed", "Nwosu", "Okonkwo", "Olawale", "Usman", "Yusuf"]
+TERMS = ["okafor", "zainab", "adm0123", "mathematics", "jss"]
+
+
+async def seed(session_factory, students: int, staff: int) -> tuple:
+    school = await seed_school(session_factory)
+    async with session_factory() as db:
+        admin = User(
+            email="admin@bench.com", password_hash="x", first_name="Bench", last_name="Admin",
+            role=UserRole.SCHOOL_ADMIN, school_id=school.id, is_active=True, is_verified=True
+        )
+        db.add(admin)
+        await db.commit()
+
+        levels = list(ClassLevel)
+        class_ids = [str(uuid4()) for _ in range(100)]
+        await db.execute(insert(Class), [
+            {
+                "id": class_id, "name": f"{levels[i % len(levels)].name} {i}", "level": levels[i % len(levels)],
+                "section": "A", "academic_session": "2024/2025", "school_id": school.id,
+            }
+            for i, class_id in enumerate(class_ids)
+        ])
+        await db.execute(insert(Subject), [
+            {"id": str(uuid4()), "name": name, "code": f"S{i:03d}", "school_id": school.id}
+            for i, name in enumerate(["Mathematics", "English", "Biology", "Physics", "Chemistry"] * 10)
+        ])
+        await db.execute(insert(User), [
+            {
+                "id": str(uuid4()), "email": f"staff{i}@bench.com", "password_hash": "x",
+                "first_name": random.choice(FIRST_NAMES), "last_name": random.choice(LAST_NAMES),
+                "role": UserRole.TEACHER, "school_id": school.id, "is_active": True, "is_verified": True,
+            }
+            for i in range(staff)
+        ])
+        await db.execute(insert(Student), [
+            {
+                "id": str(uuid4()), "admission_number": f"ADM{i:06d}",
+                "first_name": random.choice(FIRST_NAMES), "last_name": f"{random.choice(LAST_NAMES)}{i % 97}",
+                "date_of_birth": date(2012, 1, 1), "gender": Gender.FEMALE,
+                "address_line1": "1 Seed Street", "city": "Seed City", "state": "Seed State",
+                "postal_code": "00000", "admission_date": date(2024, 9, 1),
+                "current_class_id": class_ids[i % len(class_ids)], "school_id": school.id,
+            }
+            for i in range(students)
+        ])
+        await db.commit()
+    return school, admin
+
+
+async def per_category(db, term, user, school_id, limit, mode):
+    """The same branches, queried one after another"""
+    rows = []
+    for branch in SearchService._branches(user, school_id, term, mode, False, limit):
+        rows.extend((await db.execute(branch)).all())
+    rows.sort(key=lambda row: (-row.rank, len(row.title), row.title))
+    return [SearchService._format(row) for row in rows[:limit]]
+
+
+async def run(session_factory, searches, admin, school_id, strategy) -> list:
+    latencies = []
+    async with session_factory() as db:
+        for term, mode in searches:
+            with measure() as measurement:
+                await strategy(db, term, admin, school_id, 10, mode)
+            latencies.append(measurement.ms)
+    return latencies
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=50000)
+    parser.add_argument("--staff", type=int, default=500)
+    args = parser.parse_args()
+    random.seed(7)
+
+    typeahead = [(term[:n], "prefix") for term in TERMS for n in range(1, len(term) + 1)]
+    contains = [(term, "contains") for term in TERMS]
+    strategies = {"union": SearchService.search_universal, "per-category": per_category}
+    async with scratch_database() as (engine, session_factory):
+        school, admin = await seed(session_factory, args.students, args.staff)
+        for label, searches in (("typeahead", typeahead), ("contains", contains)):
+            for name, strategy in strategies.items():
+                await run(session_factory, searches[:3], admin, school.id, strategy)  # warm up
+                latencies = await run(session_factory, searches, admin, school.id, strategy)
+                print(
+                    f"{label:>10} {name:>12}: {len(searches):>3} searches  "
+                    f"p50 {statistics.median(latencies):>7.1f} ms  p95 {percentile(latencies, 0.95):>7.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
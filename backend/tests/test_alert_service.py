@@ -4,7 +4,8 @@ Unit tests for Alert Service (P3.1)
 
 import pytest
 import pytest_asyncio
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.services.alert_service import AlertService
@@ -12,6 +13,12 @@ from app.models.alert_rule import (
     AlertRule, AlertNotification, AlertType, AlertSeverity,
     AlertConditionOperator, AlertFrequency
 )
+from app.models.academic import AttendanceStatus
+from app.models.fee import PaymentStatus
+from app.models.notification import Notification
+from app.models.student import StudentStatus
+from app.schemas.alert_rule import AlertResolve
+from tests.utils import QueryCounter, seed_school_with_classes
 
 
 @pytest_asyncio.fixture
@@ -193,3 +200,170 @@ class TestAlertService:
         )
         assert not any(r.id == rule.id for r in rules)
 
+
+
+async def add_rule(db_session, school_id, created_by, **kwargs):
+    """Insert a rule directly, due a minute ago unless next_evaluation_at is given"""
+    values = dict(
+        name="Rule", alert_type=AlertType.ATTENDANCE, severity=AlertSeverity.WARNING,
+        metric="attendance_rate", operator=AlertConditionOperator.LESS_THAN, threshold=50.0,
+        scope_type="school", notify_roles=["school_admin"], notification_channels=["in_app"],
+        frequency=AlertFrequency.DAILY, is_active=True,
+        next_evaluation_at=datetime.utcnow() - timedelta(minutes=1)
+    )
+    values.update(kwargs)
+    rule = AlertRule(school_id=school_id, created_by=created_by, **values)
+    db_session.add(rule)
+    await db_session.commit()
+    return rule
+
+
+async def alerts_for(db_session, rule_id):
+    result = await db_session.execute(select(AlertNotification).where(AlertNotification.rule_id == rule_id))
+    return {alert.context_id: alert for alert in result.scalars()}
+
+
+class TestAlertEvaluation:
+
+    @pytest.mark.asyncio
+    async def test_grouped_queries_match_per_student_metrics(self, db_session, test_school, test_admin):
+        seed = await seed_school_with_classes(db_session, test_school.id, class_count=3, students_per_class=5)
+        active = [s for s in seed["students"] if s.status == StudentStatus.ACTIVE]
+        present = {s.id: [] for s in seed["students"]}
+        for row in seed["attendance"]:
+            present[row.student_id].append(row.status == AttendanceStatus.PRESENT)
+        percentages = {s.id: [] for s in seed["students"]}
+        for grade in seed["grades"]:
+            percentages[grade.student_id].append(float(grade.percentage))
+        outstanding = {
+            fee.student_id: float(fee.amount_outstanding) for fee in seed["fee_assignments"]
+            if fee.status in (PaymentStatus.PENDING, PaymentStatus.PARTIAL)
+        }
+
+        cases = [
+            (AlertType.ATTENDANCE, AlertConditionOperator.LESS_THAN, 50.0,
+             {s.id: sum(present[s.id]) / len(present[s.id]) * 100 for s in active}),
+            (AlertType.GRADE, AlertConditionOperator.LESS_THAN_OR_EQUAL, 40.0,
+             {s.id: sum(percentages[s.id]) / len(percentages[s.id]) for s in active}),
+            (AlertType.FEE, AlertConditionOperator.GREATER_THAN, 500.0,
+             {s.id: outstanding[s.id] for s in seed["students"] if outstanding.get(s.id, 0) > 0}),
+        ]
+        for alert_type, operator, threshold, values in cases:
+            rule = await add_rule(
+                db_session, test_school.id, test_admin.id,
+                alert_type=alert_type, operator=operator, threshold=threshold
+            )
+            expected = {
+                student_id for student_id, value in values.items()
+                if AlertService._check_condition(value, operator, threshold)
+            }
+            assert expected, alert_type
+
+            with QueryCounter(db_session) as counter:
+                created = await AlertService.evaluate_rule(db_session, test_school.id, rule.id)
+
+            assert {alert.context_id for alert in created} == expected
+            alerts = await alerts_for(db_session, rule.id)
+            assert set(alerts) == expected
+            for student_id, alert in alerts.items():
+                assert alert.metric_value == pytest.approx(values[student_id])
+            # Rule lookup, grouped metric, one INSERT, recipients, notification fan-out, rule update
+            assert sum(s.startswith("INSERT INTO alert_notifications") for s in counter.statements) == 1
+            assert len(counter.statements) <= 8
+
+    @pytest.mark.asyncio
+    async def test_class_scope_and_collapsed_notifications(self, db_session, test_school, test_admin):
+        seed = await seed_school_with_classes(db_session, test_school.id, class_count=2, students_per_class=5)
+        target = seed["classes"][0]
+        rule = await add_rule(
+            db_session, test_school.id, test_admin.id, name="Low grades",
+            alert_type=AlertType.GRADE, operator=AlertConditionOperator.GREATER_THAN_OR_EQUAL, threshold=0.0,
+            scope_type="class", scope_id=target.id
+        )
+
+        created = await AlertService.evaluate_rule(db_session, test_school.id, rule.id)
+
+        in_class = {s.id for s in seed["students"] if s.current_class_id == target.id and s.status == StudentStatus.ACTIVE}
+        assert {alert.context_id for alert in created} == in_class
+        notifications = (await db_session.execute(
+            select(Notification).where(Notification.user_id == test_admin.id)
+        )).scalars().all()
+        assert [(n.group_count, n.message) for n in notifications] == [
+            (len(in_class), f'{len(in_class)} new alerts from the rule "Low grades".')
+        ]
+
+    @pytest.mark.asyncio
+    async def test_reevaluation_skips_students_with_unresolved_alerts(self, db_session, test_school, test_admin):
+        await seed_school_with_classes(db_session, test_school.id, class_count=1, students_per_class=5)
+        rule = await add_rule(db_session, test_school.id, test_admin.id, threshold=101.0)
+
+        first = await AlertService.evaluate_rule(db_session, test_school.id, rule.id)
+        assert len(first) == 4
+        assert await AlertService.evaluate_rule(db_session, test_school.id, rule.id) == []
+        assert len(await alerts_for(db_session, rule.id)) == 4
+
+        # Resolving an alert lets the student be alerted again
+        await AlertService.resolve_notification(
+            db_session, test_school.id, first[0].id, test_admin.id, AlertResolve(resolution_notes="Called parents")
+        )
+        again = await AlertService.evaluate_rule(db_session, test_school.id, rule.id)
+        assert [alert.context_id for alert in again] == [first[0].context_id]
+
+    @pytest.mark.asyncio
+    async def test_due_rules_are_claimed_and_rescheduled(self, db_session, test_school, test_admin):
+        await seed_school_with_classes(db_session, test_school.id, class_count=2, students_per_class=5)
+        due = [
+            await add_rule(db_session, test_school.id, test_admin.id, name=f"Due {n}", threshold=101.0)
+            for n in range(3)
+        ]
+        later = await add_rule(
+            db_session, test_school.id, test_admin.id, name="Later",
+            next_evaluation_at=datetime.utcnow() + timedelta(hours=1)
+        )
+        inactive = await add_rule(db_session, test_school.id, test_admin.id, name="Off", is_active=False)
+
+        metrics = await AlertService.get_evaluation_metrics(db_session, test_school.id)
+        assert metrics["backlog"] == 3 and metrics["oldest_due_seconds"] >= 60
+
+        progress = {}
+        result = await AlertService.evaluate_due_rules(db_session, batch_size=2, progress=progress)
+
+        assert result["rules_evaluated"] == 3 and result["rules_failed"] == 0
+        assert result["alerts_created"] == 3 * 8  # Every active student is under 101%
+        assert result["backlog"] == 0 and result["max_lag_seconds"] >= 60
+        assert result["max_latency_ms"] >= result["mean_latency_ms"] > 0
+        assert progress["rules_evaluated"] == 3
+
+        rules = {
+            rule.id: rule for rule in (await db_session.execute(
+                select(AlertRule).execution_options(populate_existing=True)
+            )).scalars()
+        }
+        for rule in due:
+            assert rules[rule.id].last_evaluated_at is not None
+            assert rules[rule.id].next_evaluation_at > datetime.utcnow()
+        assert rules[later.id].last_evaluated_at is None
+        assert rules[inactive.id].last_evaluated_at is None
+        assert not await alerts_for(db_session, later.id)
+
+        # Nothing is due any more
+        assert (await AlertService.evaluate_due_rules(db_session))["rules_evaluated"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failing_rule_does_not_stop_the_run(self, db_session, test_school, test_admin, monkeypatch):
+        await seed_school_with_classes(db_session, test_school.id, class_count=1, students_per_class=5)
+        broken = await add_rule(db_session, test_school.id, test_admin.id, name="Broken", threshold=101.0)
+        working = await add_rule(db_session, test_school.id, test_admin.id, name="Working", threshold=101.0)
+        metric_query = AlertService._metric_query
+
+        def failing(rule):
+            if rule.id == broken.id:
+                raise RuntimeError("bad metric")
+            return metric_query(rule)
+
+        monkeypatch.setattr(AlertService, "_metric_query", staticmethod(failing))
+        result = await AlertService.evaluate_due_rules(db_session)
+
+        assert result["rules_evaluated"] == 1 and result["rules_failed"] == 1
+        assert len(await alerts_for(db_session, working.id)) == 4
+        assert not await alerts_for(db_session, broken.id)
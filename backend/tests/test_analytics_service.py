@@ -0,0 +1,285 @@
+"""
+Unit tests for Analytics Service query efficiency
+"""
+
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.analytics_service import AnalyticsService
+from app.models.academic import AttendanceStatus
+from app.models.student import StudentStatus
+from app.models.fee import PaymentStatus
+from tests.utils import QueryCounter, seed_school_with_classes
+
+
+CLASS_COUNT = 50
+
+
+@pytest_asyncio.fixture
+async def seeded_school(db_session: AsyncSession, test_school):
+    """Seed a 50-class school."""
+    return await seed_school_with_classes(
+        db_session, test_school.id, class_count=CLASS_COUNT, students_per_class=10
+    )
+
+
+def _expected_class_figures(seed, class_id, threshold=50.0):
+    """Recompute per-class aggregates from the seeded objects."""
+    students = [s for s in seed["students"] if s.current_class_id == class_id]
+    student_ids = {s.id for s in students}
+    exam_ids = {e.id for e in seed["exams"] if e.class_id == class_id}
+    grades = [g for g in seed["grades"] if g.exam_id in exam_ids]
+    attendance = [a for a in seed["attendance"] if a.class_id == class_id]
+    fees = [f for f in seed["fee_assignments"] if f.student_id in student_ids]
+    today = datetime.utcnow().date()
+
+    percentages = [float(g.percentage) for g in grades]
+    return {
+        "active_students": sum(1 for s in students if s.status == StudentStatus.ACTIVE),
+        "all_students": len(students),
+        "attendance_total": len(attendance),
+        "attendance": {
+            status: sum(1 for a in attendance if a.status == status)
+            for status in AttendanceStatus
+        },
+        "average_grade": sum(percentages) / len(percentages),
+        "highest": max(percentages),
+        "lowest": min(percentages),
+        "graded": len({g.student_id for g in grades}),
+        "passing": len({g.student_id for g in grades if float(g.percentage) >= threshold}),
+        "below": len({g.student_id for g in grades if float(g.percentage) < threshold}),
+        "total_fees": float(sum(f.amount for f in fees)),
+        "fees_collected": float(sum(f.amount_paid for f in fees)),
+        "overdue": float(sum(
+            f.amount_outstanding for f in fees
+            if f.due_date < today and f.status != PaymentStatus.PAID
+        )),
+    }
+
+
+class TestClassLevelAnalytics:
+    """Grouped per-class analytics must be correct and use a fixed number of queries"""
+
+    @pytest.mark.asyncio
+    async def test_class_level_stats_values(self, db_session: AsyncSession, test_school, seeded_school):
+        """Class stats match a recompute from the seeded rows."""
+        stats = await AnalyticsService.get_class_level_stats(db_session, test_school.id)
+
+        assert len(stats) == CLASS_COUNT
+        for row in stats[:5]:
+            expected = _expected_class_figures(seeded_school, row.class_id)
+            present = expected["attendance"][AttendanceStatus.PRESENT]
+            assert row.total_students == expected["active_students"]
+            assert row.attendance_rate == round(present / expected["attendance_total"] * 100, 1)
+            assert row.average_grade == round(expected["average_grade"], 1)
+            assert row.total_fees == expected["total_fees"]
+            assert row.fees_collected == expected["fees_collected"]
+            assert row.pending_fees == expected["total_fees"] - expected["fees_collected"]
+
+    @pytest.mark.asyncio
+    async def test_attendance_performance_and_fees_by_class_values(
+        self, db_session: AsyncSession, test_school, seeded_school
+    ):
+        """Attendance, performance and fee breakdowns match a recompute."""
+        attendance = await AnalyticsService.get_attendance_by_class(db_session, test_school.id)
+        performance = await AnalyticsService.get_performance_by_class(db_session, test_school.id)
+        fees = await AnalyticsService.get_fees_by_class(db_session, test_school.id)
+
+        for att, perf, fee in list(zip(attendance, performance, fees))[:5]:
+            expected = _expected_class_figures(seeded_school, att.class_id)
+            counts = expected["attendance"]
+            assert att.present_count == counts[AttendanceStatus.PRESENT]
+            assert att.absent_count == counts[AttendanceStatus.ABSENT]
+            assert att.late_count == counts[AttendanceStatus.LATE]
+            assert att.excused_count == counts[AttendanceStatus.EXCUSED]
+            assert att.total_students == expected["active_students"]
+
+            assert perf.class_id == att.class_id
+            assert perf.average_score == round(expected["average_grade"], 1)
+            assert perf.highest_score == expected["highest"]
+            assert perf.total_graded_students == expected["graded"]
+            assert perf.below_threshold_count == expected["below"]
+            assert perf.pass_rate == round(expected["passing"] / expected["graded"] * 100, 1)
+
+            assert fee.class_id == att.class_id
+            assert fee.total_students == expected["all_students"]
+            assert fee.total_fees == expected["total_fees"]
+            assert fee.overdue_fees == expected["overdue"]
+
+    @pytest.mark.asyncio
+    async def test_class_dashboards_statement_count(self, db_session: AsyncSession, test_school, seeded_school):
+        """Benchmark: statements issued for a 50-class school stay constant."""
+        calls = {
+            "class_stats": AnalyticsService.get_class_level_stats,
+            "attendance_by_class": AnalyticsService.get_attendance_by_class,
+            "performance_by_class": AnalyticsService.get_performance_by_class,
+            "fees_by_class": AnalyticsService.get_fees_by_class,
+        }
+        budgets = {
+            "class_stats": 5,
+            "attendance_by_class": 3,
+            "performance_by_class": 2,
+            "fees_by_class": 3,
+        }
+
+        for name, call in calls.items():
+            with QueryCounter(db_session) as counter:
+                result = await call(db_session, test_school.id)
+
+            assert len(result) == CLASS_COUNT
+            assert counter.count <= budgets[name]
+
+
+def _expected_risk(seed, student):
+    """Score one student the way the per-student implementation did."""
+    attendance = [a for a in seed["attendance"] if a.student_id == student.id]
+    present = sum(
+        1 for a in attendance
+        if a.status in (AttendanceStatus.PRESENT, AttendanceStatus.LATE)
+    )
+    attendance_rate = (present / len(attendance) * 100) if attendance else 100.0
+    grades = [float(g.percentage) for g in seed["grades"] if g.student_id == student.id]
+    average_grade = sum(grades) / len(grades) if grades else None
+
+    risk_factors = []
+    if attendance_rate < 75:
+        risk_factors.append("poor_attendance")
+    if average_grade and average_grade < 40:
+        risk_factors.append("low_grades")
+    elif average_grade and average_grade < 50:
+        risk_factors.append("below_average_grades")
+
+    if len(risk_factors) >= 2 or "low_grades" in risk_factors:
+        risk_level = "high"
+    elif len(risk_factors) == 1:
+        risk_level = "medium"
+    else:
+        risk_level = "low"
+    return risk_level, risk_factors
+
+
+class TestClassInsights:
+    """Class insights must score risk in a constant number of queries"""
+
+    @pytest.mark.asyncio
+    async def test_at_risk_scoring_matches_per_student_rules(self, db_session: AsyncSession, test_school):
+        """Batched risk levels match the per-student rules."""
+        seed = await seed_school_with_classes(
+            db_session, test_school.id, class_count=1, students_per_class=45, attendance_days=4
+        )
+        class_id = seed["classes"][0].id
+
+        insights = await AnalyticsService.get_class_insights(db_session, test_school.id, class_id)
+
+        active = [s for s in seed["students"] if s.status == StudentStatus.ACTIVE]
+        expected = {}
+        for student in active:
+            risk_level, risk_factors = _expected_risk(seed, student)
+            if risk_factors:
+                expected[student.id] = (risk_level, risk_factors)
+
+        assert insights.total_students == len(active)
+        assert {s.student_id for s in insights.at_risk_students} == set(expected)
+        for student in insights.at_risk_students:
+            assert (student.risk_level, student.risk_factors) == expected[student.student_id]
+        assert insights.high_risk_count == sum(1 for level, _ in expected.values() if level == "high")
+        assert sum(d.count for d in insights.grade_distribution) == len(seed["grades"])
+
+    @pytest.mark.asyncio
+    async def test_class_insights_statement_count_is_constant(self, db_session: AsyncSession, test_school):
+        """Benchmark: a 45-student class issues as many statements as a 5-student class."""
+        seed = await seed_school_with_classes(
+            db_session, test_school.id, class_count=2, students_per_class=45
+        )
+        small_class = seed["classes"][1]
+        for student in seed["students"]:
+            if student.current_class_id == small_class.id and student.admission_number[-3:] >= "005":
+                student.current_class_id = None
+        await db_session.commit()
+
+        counts = {}
+        for label, cls in (("45 students", seed["classes"][0]), ("5 students", small_class)):
+            with QueryCounter(db_session) as counter:
+                await AnalyticsService.get_class_insights(db_session, test_school.id, cls.id)
+            counts[label] = counter.count
+
+        assert counts["45 students"] == counts["5 students"]
+        assert counts["45 students"] <= 7
+
+
+class TestStudentAnalytics:
+    """Student analytics must be derived from one load of the student's rows"""
+
+    @pytest_asyncio.fixture
+    async def student_history(self, db_session: AsyncSession, test_school):
+        """A student with grades in the current term and an earlier term."""
+        from datetime import date
+        from decimal import Decimal
+        from app.models.academic import Term, TermType
+        from app.models.grade import Grade
+
+        seed = await seed_school_with_classes(
+            db_session, test_school.id, class_count=1, students_per_class=3, subjects=6
+        )
+        previous_term = Term(
+            name="Third Term",
+            type=TermType.THIRD_TERM,
+            academic_session="2023/2024",
+            start_date=date(2024, 4, 1),
+            end_date=date(2024, 7, 15),
+            is_active=False,
+            school_id=test_school.id
+        )
+        db_session.add(previous_term)
+        await db_session.flush()
+
+        student = seed["students"][1]
+        for grade in [g for g in seed["grades"] if g.student_id == student.id]:
+            db_session.add(Grade(
+                score=Decimal("90"),
+                total_marks=Decimal("100"),
+                percentage=Decimal("90"),
+                student_id=student.id,
+                subject_id=grade.subject_id,
+                exam_id=grade.exam_id,
+                term_id=previous_term.id,
+                school_id=test_school.id,
+                graded_by=grade.graded_by,
+                graded_date=date(2024, 7, 1)
+            ))
+        await db_session.commit()
+        return seed, student, previous_term
+
+    @pytest.mark.asyncio
+    async def test_student_analytics_values(self, db_session: AsyncSession, test_school, student_history):
+        """Averages, trends and term history are computed from the loaded rows."""
+        seed, student, previous_term = student_history
+        current_grades = [g for g in seed["grades"] if g.student_id == student.id]
+        current_average = sum(float(g.percentage) for g in current_grades) / len(current_grades)
+
+        analytics = await AnalyticsService.get_student_analytics(db_session, test_school.id, student.id)
+
+        assert analytics.current_average == round(current_average, 1)
+        assert analytics.previous_average == 90.0
+        assert analytics.overall_trend == "declining"
+        assert len(analytics.subjects) == 6
+        for subject in analytics.subjects:
+            grade = next(g for g in current_grades if g.subject_id == subject.subject_id)
+            assert subject.current_average == float(grade.percentage)
+            assert subject.previous_average == 90.0
+            assert subject.grade_count == 2
+        assert [t.term_id for t in analytics.term_history] == [seed["term"].id, previous_term.id]
+        assert analytics.term_history[0].subject_count == 6
+        assert analytics.term_history[1].attendance_rate is None
+
+    @pytest.mark.asyncio
+    async def test_student_analytics_statement_count(self, db_session: AsyncSession, test_school, student_history):
+        """Regression: statements do not grow with subjects or terms."""
+        seed, student, previous_term = student_history
+
+        with QueryCounter(db_session) as counter:
+            await AnalyticsService.get_student_analytics(db_session, test_school.id, student.id)
+
+        assert counter.count <= 7
@@ -0,0 +1,156 @@
+"""
+Tests for the principal cache behind the auth dependencies
+"""
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import select
+
+from app.core import auth_cache, deps
+from app.core.auth_cache import PrincipalCache
+from app.core.deps import get_current_school_context, get_current_user, get_school_context
+from app.core.security import create_access_token
+from app.models.school import School
+from app.models.school_ownership import SchoolOwnership
+from app.models.user import User, UserRole
+from tests.utils import QueryCounter, create_test_user
+
+
+@pytest.fixture
+def principals(monkeypatch):
+    """Fresh principal cache shared by the dependencies and the flush hooks"""
+    cache = PrincipalCache(ttl=30, max_entries=100)
+    monkeypatch.setattr(auth_cache, "principal_cache", cache)
+    monkeypatch.setattr(deps, "principal_cache", cache)
+    return cache
+
+
+def _credentials(user: User, school_id: str) -> HTTPAuthorizationCredentials:
+    token = create_access_token(
+        data={"sub": user.id, "email": user.email, "role": user.role, "school_id": school_id}
+    )
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+async def _resolve(db, credentials):
+    """Run the dependency chain of an endpoint taking current_user and current_school"""
+    user = await get_current_user(credentials, db)
+    context = await get_current_school_context(await get_school_context(credentials, db), db)
+    return user, context
+
+
+class TestPrincipalCache:
+    """Warm requests resolve identity and school without queries"""
+
+    @pytest.mark.asyncio
+    async def test_warm_path_issues_no_queries(self, principals, db_session, test_school, test_admin_user):
+        credentials = _credentials(test_admin_user, test_school.id)
+        db_session.expunge_all()
+
+        with QueryCounter(db_session) as cold:
+            await _resolve(db_session, credentials)
+        db_session.expunge_all()
+        with QueryCounter(db_session) as warm:
+            user, context = await _resolve(db_session, credentials)
+
+        assert cold.count == 2  # the user lookup is shared by both dependencies even when cold
+        assert warm.count == 0
+        assert user.id == test_admin_user.id
+        assert context.user.role == UserRole.SCHOOL_ADMIN
+        assert context.school.id == test_school.id
+        assert context.school.name == test_school.name
+
+    @pytest.mark.asyncio
+    async def test_restored_user_is_writable(self, principals, db_session, test_school, test_admin_user):
+        credentials = _credentials(test_admin_user, test_school.id)
+        await _resolve(db_session, credentials)
+        db_session.expunge_all()
+
+        user, _ = await _resolve(db_session, credentials)
+        user.first_name = "Renamed"
+        await db_session.commit()
+        db_session.expunge_all()
+
+        stored = (await db_session.execute(select(User).where(User.id == test_admin_user.id))).scalar_one()
+        assert stored.first_name == "Renamed"
+
+    @pytest.mark.asyncio
+    async def test_deactivation_takes_effect_immediately(self, principals, db_session, test_school, test_admin_user):
+        credentials = _credentials(test_admin_user, test_school.id)
+        await _resolve(db_session, credentials)
+
+        test_admin_user.is_active = False
+        await db_session.commit()
+
+        with pytest.raises(HTTPException) as exc:
+            await get_current_user(credentials, db_session)
+        assert exc.value.status_code == 401
+
+    @pytest.mark.asyncio
+    async def test_role_change_takes_effect_immediately(self, principals, db_session, test_school, test_admin_user):
+        credentials = _credentials(test_admin_user, test_school.id)
+        await _resolve(db_session, credentials)
+
+        test_admin_user.role = UserRole.TEACHER
+        await db_session.commit()
+        db_session.expunge_all()
+
+        _, context = await _resolve(db_session, credentials)
+        assert context.user.role == UserRole.TEACHER
+
+    @pytest.mark.asyncio
+    async def test_school_deactivation_takes_effect_immediately(self, principals, db_session, test_school, test_admin_user):
+        credentials = _credentials(test_admin_user, test_school.id)
+        await _resolve(db_session, credentials)
+
+        school = (await db_session.execute(select(School).where(School.id == test_school.id))).scalar_one()
+        school.is_active = False
+        await db_session.commit()
+
+        with pytest.raises(HTTPException) as exc:
+            await _resolve(db_session, credentials)
+        assert exc.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_revoked_ownership_takes_effect_immediately(self, principals, db_session, test_school):
+        other_school = School(
+            name="Second School",
+            code="TEST002",
+            email="second@school.com",
+            address_line1="1 Second Street",
+            city="Test City",
+            state="Test State",
+            postal_code="12345",
+            country="Nigeria",
+            current_session="2023/2024",
+            current_term="First Term"
+        )
+        db_session.add(other_school)
+        await db_session.commit()
+        owner = await create_test_user(db_session, role=UserRole.SCHOOL_OWNER, school_id=test_school.id)
+        ownership = SchoolOwnership(user_id=owner.id, school_id=other_school.id, is_active=True)
+        db_session.add(ownership)
+        await db_session.commit()
+
+        credentials = _credentials(owner, other_school.id)
+        _, context = await _resolve(db_session, credentials)
+        assert context.school_id == other_school.id
+
+        ownership.is_active = False
+        await db_session.commit()
+
+        with pytest.raises(HTTPException) as exc:
+            await _resolve(db_session, credentials)
+        assert exc.value.status_code == 403
+
+    @pytest.mark.asyncio
+    async def test_disabled_cache_always_queries(self, monkeypatch, db_session, test_school, test_admin_user):
+        cache = PrincipalCache(ttl=0, max_entries=100)
+        monkeypatch.setattr(deps, "principal_cache", cache)
+        credentials = _credentials(test_admin_user, test_school.id)
+        await _resolve(db_session, credentials)
+
+        with QueryCounter(db_session) as counter:
+            await _resolve(db_session, credentials)
+        assert counter.count == 3
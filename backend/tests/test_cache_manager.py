@@ -0,0 +1,327 @@
+"""
+Unit tests for the two-tier response cache
+"""
+
+import asyncio
+from datetime import date
+import pytest
+import pytest_asyncio
+from types import SimpleNamespace
+from fastapi import HTTPException
+
+from app.api.v1.endpoints import dashboard as dashboard_endpoints
+from app.core import cache_manager
+from app.core.cache_manager import CacheManager, LocalCache, cache_response
+from app.models.academic import AttendanceStatus
+from app.models.academic_session import AcademicSession
+from app.models.student import StudentClassHistory
+from app.schemas.academic import AttendanceUpdate
+from app.schemas.academic_session import PromotionDecision
+from app.services.attendance_service import AttendanceService
+from app.services.promotion_service import PromotionService
+from app.services.student_service import StudentService
+from tests.utils import seed_school_with_classes
+
+
+@pytest.fixture
+def l1_only(monkeypatch):
+    """Fresh L1 tier with Redis switched off"""
+    monkeypatch.setattr(cache_manager.settings, "redis_url", "")
+    monkeypatch.setattr(cache_manager, "local_cache", LocalCache(max_entries_per_tenant=2, max_tenants=10))
+    return cache_manager.local_cache
+
+
+def _school(school_id):
+    return SimpleNamespace(id=school_id)
+
+
+class TestLocalCacheTier:
+    """Responses are cached in process even without Redis"""
+
+    @pytest.mark.asyncio
+    async def test_hit_after_miss(self, l1_only):
+        calls = []
+
+        @cache_response(expire=60)
+        async def handler(term_id=None, current_school=None):
+            calls.append(term_id)
+            return {"term": term_id}
+
+        assert await handler(term_id="t1", current_school=_school("s1")) == {"term": "t1"}
+        assert await handler(term_id="t1", current_school=_school("s1")) == {"term": "t1"}
+        assert await handler(term_id="t1", current_school=_school("s2")) == {"term": "t1"}
+        assert calls == ["t1", "t1"]
+        assert l1_only.stats()["l1_hits"] == 1
+        assert l1_only.stats()["misses"] == 2
+
+    @pytest.mark.asyncio
+    async def test_per_tenant_size_limit(self, l1_only):
+        @cache_response(expire=60)
+        async def handler(page=1, current_school=None):
+            return {"page": page}
+
+        for page in range(5):
+            await handler(page=page, current_school=_school("busy"))
+        await handler(page=0, current_school=_school("quiet"))
+
+        stats = l1_only.stats()
+        assert stats["tenants"] == 2
+        assert stats["entries"] == 3  # two for the busy school, one for the quiet one
+
+    @pytest.mark.asyncio
+    async def test_invalidate_prefix_clears_l1(self, l1_only, monkeypatch):
+        async def no_redis(prefix):
+            return None
+        monkeypatch.setattr(cache_manager.redis_service, "delete_prefix", no_redis)
+        calls = []
+
+        @cache_response(expire=60)
+        async def get_things(current_school=None):
+            calls.append(1)
+            return {"n": len(calls)}
+
+        await get_things(current_school=_school("s1"))
+        await CacheManager.invalidate_prefix("get_things")
+        assert await get_things(current_school=_school("s1")) == {"n": 2}
+
+
+class TestSingleflight:
+    """Concurrent misses on one key run the handler once"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_call(self, l1_only):
+        calls = []
+
+        @cache_response(expire=60)
+        async def slow(current_school=None):
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return {"value": 42}
+
+        results = await asyncio.gather(*(slow(current_school=_school("s1")) for _ in range(20)))
+        assert results == [{"value": 42}] * 20
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_handler_errors_propagate_once(self, l1_only):
+        calls = []
+
+        @cache_response(expire=60)
+        async def failing(current_school=None):
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise HTTPException(status_code=404, detail="Not found")
+
+        results = await asyncio.gather(
+            *(failing(current_school=_school("s1")) for _ in range(3)),
+            return_exceptions=True
+        )
+        assert all(isinstance(r, HTTPException) for r in results)
+        assert len(calls) == 1
+        assert l1_only.stats()["entries"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_first_caller_does_not_fail_waiters(self, l1_only):
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        first = asyncio.create_task(cache_manager.singleflight("key", load))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(cache_manager.singleflight("key", load)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        # One waiter takes over the load and the other shares its result
+        assert await asyncio.gather(*waiters) == [2, 2]
+        assert first.cancelled()
+        assert len(calls) == 2
+        assert cache_manager._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_the_load_running(self, l1_only):
+        async def load():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        first = asyncio.create_task(cache_manager.singleflight("key", load))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(cache_manager.singleflight("key", load))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+
+        assert await first == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+
+class FakeSharedRedis:
+    """Stands in for the Redis calls the tag versions use"""
+
+    def __init__(self):
+        self.counters = {}
+        self.incr_calls = []
+
+    async def get_many(self, keys):
+        return [self.counters.get(key) for key in keys]
+
+    async def incr_many(self, keys):
+        self.incr_calls.append(list(keys))
+        for key in keys:
+            self.counters[key] = str(int(self.counters.get(key, 0)) + 1)
+
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value, expire=300):
+        return None
+
+    async def delete_prefix(self, prefix):
+        raise AssertionError("tag invalidation must not scan the keyspace")
+
+
+class TestTagInvalidation:
+    """Entries carry tags and bumping a tag version drops them"""
+
+    @pytest.mark.asyncio
+    async def test_bump_drops_only_tagged_school(self, l1_only):
+        calls = []
+
+        @cache_response(expire=60, tags=("school:{school_id}:students",))
+        async def handler(current_school=None):
+            calls.append(current_school.id)
+            return {"n": len(calls)}
+
+        await handler(current_school=_school("s1"))
+        await handler(current_school=_school("s2"))
+        await CacheManager.invalidate_tags(cache_manager.tenant_tag("s1", "students"))
+
+        assert await handler(current_school=_school("s1")) == {"n": 3}
+        assert await handler(current_school=_school("s2")) == {"n": 2}
+        assert calls == ["s1", "s2", "s1"]
+
+    @pytest.mark.asyncio
+    async def test_promotion_drops_cached_student_responses(self, l1_only, db_session, test_school):
+        seed = await seed_school_with_classes(
+            db_session, test_school.id, class_count=2, students_per_class=1, subjects=1, attendance_days=0
+        )
+        student, target = seed["students"][0], seed["classes"][1]
+        session = AcademicSession(
+            name="2024/2025", start_date=date(2024, 9, 1), end_date=date(2025, 7, 31), school_id=test_school.id
+        )
+        db_session.add(session)
+        await db_session.flush()
+        history = StudentClassHistory(
+            student_id=student.id, class_id=student.current_class_id, term_id=seed["term"].id,
+            school_id=test_school.id, academic_session="2024/2025", academic_session_id=session.id,
+            enrollment_date=date(2024, 9, 1), is_current=True
+        )
+        db_session.add(history)
+        await db_session.commit()
+        calls = []
+
+        @cache_response(expire=60, tags=("school:{school_id}:students",))
+        async def handler(current_school=None):
+            calls.append(current_school.id)
+            return {"n": len(calls)}
+
+        await handler(current_school=test_school)
+        await PromotionService.promote_students(
+            db_session, test_school.id, session.id,
+            [PromotionDecision(
+                student_id=student.id, class_history_id=history.id, action="promote", next_class_id=target.id
+            )],
+            decided_by=seed["teacher"].id
+        )
+
+        assert await handler(current_school=test_school) == {"n": 2}
+
+    @pytest.mark.asyncio
+    async def test_templates_with_missing_values_are_skipped(self, l1_only):
+        @cache_response(expire=60, tags=("school:{school_id}:grades", "class:{class_id}:grades"))
+        async def handler(class_id=None, current_school=None):
+            return {"class": class_id}
+
+        assert cache_manager._render_tags(
+            ("school:{school_id}:grades", "class:{class_id}:grades"), {"class_id": None}, "s1"
+        ) == ["school:s1:grades"]
+        assert await handler(class_id=None, current_school=_school("s1")) == {"class": None}
+
+    @pytest.mark.asyncio
+    async def test_shared_versions_cost_one_increment_per_tag(self, l1_only, monkeypatch):
+        fake = FakeSharedRedis()
+        monkeypatch.setattr(cache_manager.settings, "redis_url", "redis://fake")
+        monkeypatch.setattr(cache_manager, "redis_service", fake)
+        monkeypatch.setattr(cache_manager, "local_cache", LocalCache(max_entries_per_tenant=100, max_tenants=10))
+        calls = []
+
+        @cache_response(expire=60, tags=("school:{school_id}:students",))
+        async def handler(page=1, current_school=None):
+            calls.append(page)
+            return {"page": page}
+
+        for page in range(50):
+            await handler(page=page, current_school=_school("s1"))
+        await CacheManager.invalidate_tags(
+            cache_manager.tenant_tag("s1", "students"), cache_manager.tenant_tag("s1", "students")
+        )
+
+        assert fake.incr_calls == [["cachetag:school:s1:students"]]
+        await handler(page=0, current_school=_school("s1"))
+        assert len(calls) == 51
+
+
+@pytest_asyncio.fixture
+async def dashboard_setup(db_session, test_school, test_admin_user):
+    seed = await seed_school_with_classes(
+        db_session, test_school.id, class_count=2, students_per_class=3, subjects=1, attendance_days=2
+    )
+    return {
+        "school": test_school,
+        "admin": test_admin_user,
+        "student_ids": [s.id for s in seed["students"]],
+        "attendance_ids": [a.id for a in seed["attendance"]],
+    }
+
+
+class TestDashboardFreshness:
+    """A cached dashboard is never served after a write to the data behind it"""
+
+    async def _stats(self, db_session, setup):
+        stats = await dashboard_endpoints.get_dashboard_stats(
+            term_id=None,
+            current_user=setup["admin"],
+            current_school=setup["school"],
+            db=db_session
+        )
+        return stats if isinstance(stats, dict) else stats.model_dump()
+
+    @pytest.mark.asyncio
+    async def test_student_write_refreshes_dashboard(self, l1_only, db_session, dashboard_setup):
+        before = await self._stats(db_session, dashboard_setup)
+        assert await self._stats(db_session, dashboard_setup) == before
+        assert l1_only.stats()["l1_hits"] == 1
+
+        await StudentService.delete_student(
+            db_session, dashboard_setup["student_ids"][0], dashboard_setup["school"].id
+        )
+
+        after = await self._stats(db_session, dashboard_setup)
+        assert after["total_students"] == before["total_students"] - 1
+
+    @pytest.mark.asyncio
+    async def test_attendance_write_refreshes_dashboard(self, l1_only, db_session, dashboard_setup):
+        school_id = dashboard_setup["school"].id
+        before = await self._stats(db_session, dashboard_setup)
+
+        for attendance_id in dashboard_setup["attendance_ids"]:
+            await AttendanceService.update_attendance_record(
+                db_session, attendance_id, AttendanceUpdate(status=AttendanceStatus.PRESENT), school_id
+            )
+
+        after = await self._stats(db_session, dashboard_setup)
+        assert before["attendance_rate"] < 100
+        assert after["attendance_rate"] == 100
@@ -0,0 +1,231 @@
+"""
+Tests for CBT answer autosave, the answer buffer and finalizing submissions
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import select, update
+
+from app.api.v1.endpoints.cbt_student import autosave_answers, start_test, submit_test
+from app.core.config import settings
+from app.core.deps import SchoolContext
+from app.models.cbt import CBTAnswer, CBTSubmission, SubmissionStatus
+from app.schemas.cbt import CBTAnswerAutosave, CBTAnswerCreate, CBTSubmissionSubmit
+from app.services.cbt_answer_buffer_service import CBTAnswerBufferService, PendingAnswer
+from app.services.cbt_compiled_test_service import CBTCompiledTestService
+from tests.utils import QueryCounter, seed_cbt_sitting
+
+
+@pytest.fixture(autouse=True)
+def fresh_buffer():
+    CBTAnswerBufferService.clear()
+    CBTCompiledTestService.clear()
+    yield
+    CBTAnswerBufferService.clear()
+    CBTCompiledTestService.clear()
+
+
+@pytest_asyncio.fixture
+async def sitting(db_session, test_school):
+    seed = await seed_cbt_sitting(db_session, test_school.id, students=2, questions=4)
+    seed["school"] = test_school
+    seed["context"] = SchoolContext(school_id=test_school.id, user=seed["students"][0], school=test_school)
+    seed["submission_id"] = seed["submissions"][0].id
+    options = {}
+    for option in seed["options"]:
+        options.setdefault(option.question_id, {})[option.option_label] = option.id
+    seed["option"] = lambda index, label: options[seed["questions"][index].id][label]
+    await start_test(seed["submission_id"], seed["context"], db_session)
+    return seed
+
+
+def _save(sitting, *choices):
+    """Autosave payload from (question index, option label) pairs"""
+    return CBTAnswerAutosave(answers=[
+        CBTAnswerCreate(question_id=sitting["questions"][i].id, selected_option_id=sitting["option"](i, label))
+        for i, label in choices
+    ])
+
+
+async def _stored(db_session, submission_id):
+    result = await db_session.execute(
+        select(CBTAnswer).where(CBTAnswer.submission_id == submission_id)
+    )
+    return {row.question_id: row for row in result.scalars().all()}
+
+
+class TestAutosave:
+    """Autosaves are buffered, coalesced and flushed in batches"""
+
+    @pytest.mark.asyncio
+    async def test_saves_are_coalesced_until_flush(self, db_session, sitting):
+        submission_id = sitting["submission_id"]
+        await autosave_answers(submission_id, _save(sitting, (0, "B"), (1, "A")), sitting["context"], db_session)
+        await autosave_answers(submission_id, _save(sitting, (0, "A")), sitting["context"], db_session)
+
+        assert await _stored(db_session, submission_id) == {}
+        assert CBTAnswerBufferService.pending_count() == 2
+
+        assert await CBTAnswerBufferService.flush(db_session) == 2
+        stored = await _stored(db_session, submission_id)
+        assert {row.selected_option_id for row in stored.values()} == {sitting["option"](0, "A"), sitting["option"](1, "A")}
+        assert all(row.is_correct for row in stored.values())
+        assert CBTAnswerBufferService.stats()["rows_written"] == 2
+        assert CBTAnswerBufferService.stats()["answers_received"] == 3
+
+    @pytest.mark.asyncio
+    async def test_flush_cancelled_mid_write_keeps_answers(self, db_session, sitting, monkeypatch):
+        submission_id = sitting["submission_id"]
+        await autosave_answers(submission_id, _save(sitting, (0, "A"), (1, "B")), sitting["context"], db_session)
+        # Read before the cancelled flush's rollback expires the seeded rows
+        expected = {sitting["option"](0, "A"), sitting["option"](1, "B")}
+        writing = asyncio.Event()
+        write = CBTAnswerBufferService.write
+
+        async def stalled(db, submissions, sheets):
+            writing.set()
+            await asyncio.Event().wait()
+
+        monkeypatch.setattr(CBTAnswerBufferService, "write", staticmethod(stalled))
+        flusher = asyncio.create_task(CBTAnswerBufferService.flush(db_session))
+        await writing.wait()
+        # What stop() does to a flusher caught mid-write
+        flusher.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flusher
+
+        assert CBTAnswerBufferService.pending_count() == 2
+        monkeypatch.setattr(CBTAnswerBufferService, "write", staticmethod(write))
+        assert await CBTAnswerBufferService.flush(db_session) == 2
+        stored = await _stored(db_session, submission_id)
+        assert {row.selected_option_id for row in stored.values()} == expected
+
+    @pytest.mark.asyncio
+    async def test_repeat_autosave_only_checks_status(self, db_session, sitting):
+        with QueryCounter(db_session) as counter:
+            await autosave_answers(sitting["submission_id"], _save(sitting, (0, "A")), sitting["context"], db_session)
+        assert counter.count == 1
+
+    @pytest.mark.asyncio
+    async def test_autosave_after_submit_elsewhere_is_rejected(self, db_session, sitting):
+        submission_id = sitting["submission_id"]
+        # Submitted on another worker, so this one still remembers the sitting
+        await db_session.execute(
+            update(CBTSubmission).where(CBTSubmission.id == submission_id).values(status=SubmissionStatus.SUBMITTED)
+        )
+        await db_session.commit()
+        assert CBTAnswerBufferService.get_sitting(submission_id) is not None
+
+        with pytest.raises(HTTPException) as exc:
+            await autosave_answers(submission_id, _save(sitting, (0, "A")), sitting["context"], db_session)
+        assert exc.value.status_code == 400
+        assert CBTAnswerBufferService.pending_count() == 0
+
+    @pytest.mark.asyncio
+    async def test_other_students_submission_is_rejected(self, db_session, sitting):
+        other = SchoolContext(school_id=sitting["school"].id, user=sitting["students"][1], school=sitting["school"])
+        with pytest.raises(HTTPException) as exc:
+            await autosave_answers(sitting["submission_id"], _save(sitting, (0, "A")), other, db_session)
+        assert exc.value.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_write_through_when_not_buffered(self, db_session, sitting, monkeypatch):
+        monkeypatch.setattr(settings, "cbt_autosave_buffered", False)
+        response = await autosave_answers(
+            sitting["submission_id"], _save(sitting, (0, "A")), sitting["context"], db_session
+        )
+
+        assert response.buffered is False
+        assert CBTAnswerBufferService.pending_count() == 0
+        assert len(await _stored(db_session, sitting["submission_id"])) == 1
+
+    @pytest.mark.asyncio
+    async def test_older_save_does_not_overwrite_newer_row(self, db_session, sitting):
+        submission_id = sitting["submission_id"]
+        await autosave_answers(submission_id, _save(sitting, (0, "A")), sitting["context"], db_session)
+        await CBTAnswerBufferService.flush(db_session)
+
+        # A save taken before the stored one, e.g. flushed late by another worker
+        question_id = sitting["questions"][0].id
+        stale = PendingAnswer(question_id, sitting["option"](0, "B"), datetime.now(timezone.utc) - timedelta(minutes=5))
+        CBTAnswerBufferService._pending[submission_id] = {question_id: stale}
+        await CBTAnswerBufferService.flush(db_session)
+
+        stored = await _stored(db_session, submission_id)
+        assert stored[question_id].selected_option_id == sitting["option"](0, "A")
+
+
+def _sheet(sitting, *choices):
+    """Submit payload from (question index, option label) pairs"""
+    return CBTSubmissionSubmit(answers=_save(sitting, *choices).answers)
+
+
+class TestFinalize:
+    """Submitting merges autosaved, buffered and final answers"""
+
+    def test_answer_sheet_is_required(self):
+        with pytest.raises(ValidationError):
+            CBTSubmissionSubmit()
+
+    @pytest.mark.asyncio
+    async def test_submit_after_flush_writes_nothing_new(self, db_session, sitting):
+        submission_id = sitting["submission_id"]
+        await autosave_answers(
+            submission_id, _save(sitting, (0, "A"), (1, "A"), (2, "A"), (3, "B")), sitting["context"], db_session
+        )
+        await CBTAnswerBufferService.flush(db_session)
+        rows_before = CBTAnswerBufferService.rows_written
+
+        result = await submit_test(
+            submission_id, _sheet(sitting, (0, "A"), (1, "A"), (2, "A"), (3, "B")), sitting["context"], db_session
+        )
+
+        assert CBTAnswerBufferService.rows_written == rows_before
+        assert result.total_score == Decimal("3")
+        assert result.percentage == Decimal("75")
+        assert len(result.answers) == 4
+
+    @pytest.mark.asyncio
+    async def test_submit_merges_buffer_and_final_answers(self, db_session, sitting):
+        submission_id = sitting["submission_id"]
+        await autosave_answers(submission_id, _save(sitting, (0, "A"), (1, "B")), sitting["context"], db_session)
+        await CBTAnswerBufferService.flush(db_session)
+        await autosave_answers(submission_id, _save(sitting, (2, "A")), sitting["context"], db_session)
+
+        # Question 2 is still buffered; the final sheet changes question 1
+        result = await submit_test(
+            submission_id, _sheet(sitting, (0, "A"), (1, "A"), (2, "A")), sitting["context"], db_session
+        )
+
+        assert result.total_score == Decimal("3")
+        assert CBTAnswerBufferService.pending_count() == 0
+        stored = await _stored(db_session, submission_id)
+        assert len(stored) == 3
+        assert all(row.is_correct for row in stored.values())
+
+    @pytest.mark.asyncio
+    async def test_answers_buffered_on_another_worker_come_from_the_sheet(self, db_session, sitting):
+        submission_id = sitting["submission_id"]
+        await autosave_answers(submission_id, _save(sitting, (0, "A"), (1, "A")), sitting["context"], db_session)
+        # The saves were buffered by a worker other than the one taking the submission
+        CBTAnswerBufferService._pending.clear()
+
+        result = await submit_test(submission_id, _sheet(sitting, (0, "A"), (1, "A")), sitting["context"], db_session)
+
+        assert result.total_score == Decimal("2")
+        assert len(await _stored(db_session, submission_id)) == 2
+
+    @pytest.mark.asyncio
+    async def test_autosave_after_submit_is_rejected(self, db_session, sitting):
+        submission_id = sitting["submission_id"]
+        await submit_test(submission_id, _sheet(sitting, (0, "A")), sitting["context"], db_session)
+
+        with pytest.raises(HTTPException) as exc:
+            await autosave_answers(submission_id, _save(sitting, (0, "A")), sitting["context"], db_session)
+        assert exc.value.status_code == 400
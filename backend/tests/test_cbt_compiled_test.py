@@ -0,0 +1,134 @@
+"""
+Tests for compiled CBT tests and the student start/submit endpoints
+"""
+
+import pytest
+import pytest_asyncio
+from decimal import Decimal
+from types import SimpleNamespace
+from sqlalchemy import select
+
+from app.api.v1.endpoints.cbt_student import start_test, submit_test
+from app.core.deps import SchoolContext
+from app.models.cbt import CBTAnswer, CBTQuestionOption
+from app.schemas.cbt import CBTAnswerCreate, CBTSubmissionSubmit
+from app.services.cbt_compiled_test_service import CBTCompiledTestService
+from tests.utils import QueryCounter, seed_cbt_sitting
+
+
+@pytest.fixture(autouse=True)
+def fresh_compiled_cache():
+    CBTCompiledTestService.clear()
+    yield
+    CBTCompiledTestService.clear()
+
+
+@pytest_asyncio.fixture
+async def sitting(db_session, test_school):
+    seed = await seed_cbt_sitting(db_session, test_school.id, students=3, questions=4)
+    seed["school"] = test_school
+    return seed
+
+
+def _context(sitting, index):
+    return SchoolContext(
+        school_id=sitting["school"].id,
+        user=sitting["students"][index],
+        school=sitting["school"]
+    )
+
+
+def _answers(sitting, correct):
+    """Answer every question, picking the correct option for the first `correct` ones"""
+    options_by_question = {}
+    for option in sitting["options"]:
+        options_by_question.setdefault(option.question_id, []).append(option)
+    answers = []
+    for i, question in enumerate(sitting["questions"]):
+        options = sorted(options_by_question[question.id], key=lambda o: o.order_number)
+        chosen = options[0] if i < correct else options[1]
+        answers.append(CBTAnswerCreate(question_id=question.id, selected_option_id=chosen.id))
+    return answers
+
+
+class TestCompiledTest:
+    """The artifact mirrors the test and grades with lookups"""
+
+    @pytest.mark.asyncio
+    async def test_compile_and_grade(self, db_session, sitting):
+        compiled = await CBTCompiledTestService.get_compiled_test(db_session, sitting["test"])
+
+        assert [q.id for q in compiled.questions] == [q.id for q in sitting["questions"]]
+        assert all(q.correct_mask == 0b0001 for q in compiled.questions)
+
+        answers = _answers(sitting, correct=3)
+        answers.append(SimpleNamespace(question_id="unknown", selected_option_id=None))
+        answers.append(SimpleNamespace(question_id=sitting["questions"][0].id, selected_option_id="not-an-option"))
+        graded, total = compiled.grade(answers)
+
+        assert total == Decimal("3")
+        assert len(graded) == 5
+        assert [g.is_correct for g in graded] == [True, True, True, False, False]
+
+    @pytest.mark.asyncio
+    async def test_student_view_has_no_answer_key(self, db_session, sitting):
+        compiled = await CBTCompiledTestService.get_compiled_test(db_session, sitting["test"])
+        view = compiled.for_student()
+
+        assert view.question_count == 4
+        assert "is_correct" not in view.questions[0].options[0].model_dump()
+
+
+class TestSittingEndpoints:
+    """Start and submit share one compiled artifact per test version"""
+
+    @pytest.mark.asyncio
+    async def test_start_and_submit(self, db_session, sitting):
+        submission_id = sitting["submissions"][0].id
+        started = await start_test(submission_id, _context(sitting, 0), db_session)
+        assert started.question_count == 4
+
+        payload = CBTSubmissionSubmit(answers=_answers(sitting, correct=3))
+        result = await submit_test(submission_id, payload, _context(sitting, 0), db_session)
+
+        assert result.total_score == Decimal("3")
+        assert result.percentage == Decimal("75")
+        assert result.passed is True
+        stored = (await db_session.execute(
+            select(CBTAnswer).where(CBTAnswer.submission_id == submission_id)
+        )).scalars().all()
+        assert sorted(a.is_correct for a in stored) == [False, True, True, True]
+
+    @pytest.mark.asyncio
+    async def test_students_share_one_compilation(self, db_session, sitting):
+        compilations = CBTCompiledTestService.compilations
+
+        with QueryCounter(db_session) as cold:
+            await start_test(sitting["submissions"][0].id, _context(sitting, 0), db_session)
+        with QueryCounter(db_session) as warm:
+            await start_test(sitting["submissions"][1].id, _context(sitting, 1), db_session)
+        await start_test(sitting["submissions"][2].id, _context(sitting, 2), db_session)
+
+        assert CBTCompiledTestService.compilations == compilations + 1
+        assert warm.count == cold.count - 2  # no question/option loads
+
+    @pytest.mark.asyncio
+    async def test_edit_bumps_version_and_regrades(self, db_session, sitting):
+        test = sitting["test"]
+        await start_test(sitting["submissions"][0].id, _context(sitting, 0), db_session)
+
+        # Make option B the correct answer for the first question, as update_question would
+        first_question = sitting["questions"][0]
+        options = (await db_session.execute(
+            select(CBTQuestionOption).where(CBTQuestionOption.question_id == first_question.id)
+        )).scalars().all()
+        for option in options:
+            option.is_correct = option.option_label == "B"
+        test.content_version += 1
+        await db_session.commit()
+
+        payload = CBTSubmissionSubmit(answers=_answers(sitting, correct=0))
+        result = await submit_test(sitting["submissions"][0].id, payload, _context(sitting, 0), db_session)
+
+        # Every answer picked option B; only the edited question now accepts it
+        assert result.total_score == Decimal("1")
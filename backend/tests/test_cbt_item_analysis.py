@@ -0,0 +1,140 @@
+"""
+Tests for CBT item analysis
+"""
+
+import pytest
+import pytest_asyncio
+from decimal import Decimal
+
+from app.models.cbt import CBTAnswer, SubmissionStatus
+from app.services.cbt_compiled_test_service import CBTCompiledTestService
+from app.services.cbt_item_analysis_service import CBTItemAnalysisService
+from tests.utils import QueryCounter, seed_cbt_sitting
+
+# Answer sheets (one label per question, None when omitted); option A is correct
+SHEETS = [
+    ["A", "A", "A", "A"],
+    ["A", "A", "A", "B"],
+    ["A", "A", "B", "B"],
+    ["A", "B", "C", None],
+    ["B", "C", "D", None],
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_caches():
+    CBTItemAnalysisService.clear()
+    CBTCompiledTestService.clear()
+    yield
+    CBTItemAnalysisService.clear()
+    CBTCompiledTestService.clear()
+
+
+async def _submit(db, seed, index, labels):
+    """Record a submitted attempt with the given answers"""
+    submission = seed["submissions"][index]
+    score = 0
+    for question, label in zip(seed["questions"], labels):
+        option_id = seed["option"](question, label) if label else None
+        is_correct = label == "A"
+        score += is_correct
+        db.add(CBTAnswer(
+            submission_id=submission.id,
+            question_id=question.id,
+            selected_option_id=option_id,
+            is_correct=is_correct,
+            points_earned=Decimal(int(is_correct)),
+            school_id=submission.school_id
+        ))
+    submission.status = SubmissionStatus.SUBMITTED
+    submission.total_score = Decimal(score)
+    submission.total_possible = Decimal(len(labels))
+    submission.percentage = Decimal(score * 100 / len(labels))
+    await db.commit()
+
+
+@pytest_asyncio.fixture
+async def seed(db_session, test_school):
+    seed = await seed_cbt_sitting(db_session, test_school.id, students=6, questions=4)
+    options = {(o.question_id, o.option_label): o.id for o in seed["options"]}
+    seed["option"] = lambda question, label: options[(question.id, label)]
+    for index, labels in enumerate(SHEETS):
+        await _submit(db_session, seed, index, labels)
+    return seed
+
+
+class TestItemAnalysis:
+    """Statistics computed from the answer matrix"""
+
+    @pytest.mark.asyncio
+    async def test_item_statistics(self, db_session, seed):
+        analysis = await CBTItemAnalysisService.get_item_analysis(db_session, seed["test"])
+
+        assert analysis.submission_count == 5
+        assert [item.p_value for item in analysis.items] == [0.8, 0.6, 0.4, 0.2]
+        # Top two (scores 4, 3) against bottom two (scores 1, 0)
+        assert [item.discrimination_index for item in analysis.items] == [0.5, 1.0, 1.0, 0.5]
+        assert all(item.point_biserial > 0 for item in analysis.items)
+
+        last = analysis.items[3]
+        assert last.omitted == 2
+        assert {o.option_label: o.count for o in last.options} == {"A": 1, "B": 2, "C": 0, "D": 0}
+        assert [o.is_correct for o in last.options] == [True, False, False, False]
+
+        distribution = analysis.score_distribution
+        assert distribution.mean == 2.0
+        assert distribution.median == 2.0
+        assert distribution.pass_rate == 0.6
+        assert distribution.kr20 is not None
+        assert [b.count for b in distribution.buckets] == [1, 0, 1, 0, 0, 1, 0, 1, 0, 1]
+
+    @pytest.mark.asyncio
+    async def test_schedule_filter(self, db_session, seed):
+        analysis = await CBTItemAnalysisService.get_item_analysis(db_session, seed["test"], schedule_id="other")
+        assert analysis.submission_count == 0
+        assert analysis.items == []
+
+
+class TestIncrementalRefresh:
+    """Cached per test version and refreshed with only the new submissions"""
+
+    @pytest.mark.asyncio
+    async def test_cached_until_new_submissions_arrive(self, db_session, seed):
+        await CBTItemAnalysisService.get_item_analysis(db_session, seed["test"])
+
+        with QueryCounter(db_session) as warm:
+            await CBTItemAnalysisService.get_item_analysis(db_session, seed["test"])
+        assert warm.count == 1  # only the submission list
+
+        await _submit(db_session, seed, 5, ["A", "A", "A", "A"])
+        with QueryCounter(db_session) as incremental:
+            updated = await CBTItemAnalysisService.get_item_analysis(db_session, seed["test"])
+        assert incremental.count == 3  # submission list, then option counts and correct cells of the new one
+
+        CBTItemAnalysisService.clear()
+        recomputed = await CBTItemAnalysisService.get_item_analysis(db_session, seed["test"])
+        assert updated == recomputed
+        assert updated.submission_count == 6
+
+    @pytest.mark.asyncio
+    async def test_regraded_submission_triggers_rebuild(self, db_session, seed):
+        await CBTItemAnalysisService.get_item_analysis(db_session, seed["test"])
+
+        submission = seed["submissions"][4]
+        submission.total_score = Decimal("4")
+        submission.percentage = Decimal("100")
+        await db_session.commit()
+
+        analysis = await CBTItemAnalysisService.get_item_analysis(db_session, seed["test"])
+        assert analysis.score_distribution.mean == 2.8
+
+    @pytest.mark.asyncio
+    async def test_new_content_version_is_analysed_separately(self, db_session, seed):
+        first = await CBTItemAnalysisService.get_item_analysis(db_session, seed["test"])
+
+        seed["test"].content_version += 1
+        await db_session.commit()
+        second = await CBTItemAnalysisService.get_item_analysis(db_session, seed["test"])
+
+        assert (first.content_version, second.content_version) == (1, 2)
+        assert second.items == first.items
@@ -146,7 +146,7 @@ class TestCommunicationService:
         recipient = message.message_recipients[0]
         assert recipient.recipient_id == test_teacher.id
     
-    @patch('app.services.communication_service.CommunicationService._send_to_recipient')
+    @patch('app.services.communication_service.EmailService.send_bulk')
     async def test_send_message(
         self,
         mock_send,
@@ -1,14 +1,19 @@
 import pytest
+import pytest_asyncio
 import io
 import pandas as pd
 from fastapi import UploadFile
 from fastapi.testclient import TestClient
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.csv_import_service import CSVImportService
 from app.models.student import Student
-from app.models.academic import Class
+from app.models.academic import Class, ClassLevel
 from app.models.user import Gender
 from app.schemas.student import StudentImportResult
+from app.services.job_service import JobService
+from tests.conftest import TestingSessionLocal
+from tests.utils import QueryCounter
 
 
 class TestCSVImportService:
@@ -232,6 +237,84 @@ STU998,Jane,,2011-08-22,female,456 Oak Ave,Abuja,FCT,900001,2024-01-20"""
             assert "error" in error
 
 
+HEADER = "admission_number,first_name,last_name,date_of_birth,gender,address_line1,city,state,postal_code,admission_date,email,current_class_name,middle_name"
+
+
+@pytest_asyncio.fixture
+async def jss1(db_session, test_school):
+    class_ = Class(name="JSS 1A", level=ClassLevel.JSS_1, academic_session="2024/2025", school_id=test_school.id)
+    db_session.add(class_)
+    await db_session.commit()
+    return class_
+
+
+class TestChunkedImport:
+    """Chunked, column-wise validated import"""
+
+    @pytest.mark.asyncio
+    async def test_rows_validated_and_inserted_per_chunk(self, db_session, test_school, jss1):
+        db_session.add(Student(
+            admission_number="OLD1", first_name="Old", last_name="Student", date_of_birth=pd.Timestamp("2010-01-01").date(),
+            gender=Gender.MALE, address_line1="1 St", city="C", state="S", postal_code="1",
+            admission_date=pd.Timestamp("2020-01-01").date(), school_id=test_school.id
+        ))
+        await db_session.commit()
+        content = "\n".join([
+            HEADER,
+            "STU1,Ada,Obi,2010-05-15,f,1 Road,Lagos,Lagos,00101,15/01/2024,ada@example.com,JSS 1A,",
+            "STU2,Bola,Ade,2011-02-03,male,2 Road,Lagos,Lagos,00102,2024-01-15,,,Tunde",
+            "OLD1,Chi,Eze,2010-05-15,female,3 Road,Lagos,Lagos,00103,2024-01-15,,,",
+            "STU1,Dayo,Ola,2010-05-15,male,4 Road,Lagos,Lagos,00104,2024-01-15,,,",
+            "STU5,Efe,Uba,2010-13-45,male,5 Road,Lagos,Lagos,00105,2024-01-15,,,",
+            "STU6,Femi,Ali,2010-05-15,male,6 Road,Lagos,Lagos,00106,2024-01-15,not-an-email,,",
+            "STU7,Gbenga,Bello,2010-05-15,male,7 Road,Lagos,Lagos,00107,2024-01-15,,SS 3Z,",
+        ])
+
+        with QueryCounter(db_session) as counter:
+            result = await CSVImportService.import_students(db_session, test_school.id, content, chunk_size=2)
+
+        assert result.total_rows == 7
+        assert result.successful_imports == 2
+        assert [(e.row, e.field) for e in result.errors] == [
+            (4, "admission_number"), (5, "admission_number"), (6, "date_of_birth"),
+            (7, "email"), (8, "current_class_name")
+        ]
+        assert result.errors[-1].error == "Class 'SS 3Z' not found in the system"
+        # Classes and admission numbers once, then one insert per chunk that had valid rows
+        assert counter.count <= 3
+
+        students = {
+            s.admission_number: s for s in (await db_session.execute(
+                select(Student).where(Student.school_id == test_school.id)
+            )).scalars()
+        }
+        assert set(students) == {"OLD1", "STU1", "STU2"}
+        assert students["STU1"].current_class_id == jss1.id
+        assert students["STU1"].postal_code == "00101"
+        assert students["STU1"].admission_date.isoformat() == "2024-01-15"
+        assert students["STU1"].middle_name is None
+        assert students["STU2"].middle_name == "Tunde"
+        assert students["STU2"].email is None
+        assert [s.admission_number for s in result.created_students] == ["STU1", "STU2"]
+
+    @pytest.mark.asyncio
+    async def test_background_job_reports_progress_and_errors(self, db_session, test_school, monkeypatch):
+        monkeypatch.setattr(JobService, "session_factory", TestingSessionLocal)
+        rows = [f"BG{i},First,Last,2010-05-15,male,1 Road,Lagos,Lagos,100001,2024-01-15,,," for i in range(5)]
+        content = "\n".join([HEADER, *rows, "BG9,,Last,2010-05-15,male,1 Road,Lagos,Lagos,100001,2024-01-15,,,"])
+
+        job = await CSVImportService.create_import_job(db_session, test_school.id, "admin", content)
+        assert job["status"] == "pending"
+        assert await JobService.run_job(job["job_id"])
+
+        job = await CSVImportService.get_import_job(db_session, job["job_id"], test_school.id)
+        assert job["status"] == "completed"
+        assert (job["total_rows"], job["processed_rows"]) == (6, 6)
+        assert (job["successful_imports"], job["failed_imports"]) == (5, 1)
+        assert job["errors"][0]["row"] == 7 and job["errors"][0]["field"] == "first_name"
+        assert await CSVImportService.get_import_job(db_session, job["job_id"], "another-school") is None
+
+
 # Fixtures for testing
 @pytest.fixture
 def super_admin_headers(client: TestClient):
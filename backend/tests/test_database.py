@@ -0,0 +1,65 @@
+"""
+Unit tests for async engine pool configuration
+"""
+
+import asyncio
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import (
+    PoolMetrics,
+    build_connect_args,
+    create_app_async_engine,
+    use_pooled_engine,
+)
+
+
+class TestPoolMode:
+    """Pooled mode is chosen unless an external pooler is in front"""
+
+    def test_auto_mode(self):
+        assert use_pooled_engine("postgresql+psycopg://u:p@localhost:5432/db", "auto") is True
+        assert use_pooled_engine("postgresql+asyncpg://u:p@aws-0.pooler.supabase.com:6543/db", "auto") is False
+        assert use_pooled_engine("postgresql+psycopg://u:p@localhost:6432/db", "auto") is False
+        assert use_pooled_engine("sqlite+aiosqlite:///./test.db", "auto") is False
+
+    def test_explicit_modes(self):
+        assert use_pooled_engine("sqlite+aiosqlite:///./test.db", "pooled") is True
+        assert use_pooled_engine("postgresql+psycopg://u:p@localhost:5432/db", "null") is False
+
+    def test_statement_cache_disabled_behind_pooler(self):
+        assert build_connect_args("postgresql+asyncpg://u:p@db.supabase.com:5432/db") == {
+            "prepared_statement_cache_size": 0,
+            "statement_cache_size": 0,
+        }
+        assert build_connect_args("postgresql+asyncpg://u:p@localhost:5432/db")["statement_cache_size"] == \
+            settings.db_statement_cache_size
+        assert build_connect_args("postgresql+psycopg://u:p@localhost:6432/db") == {"prepare_threshold": None}
+
+
+class TestPoolMetrics:
+    """Checkout latency and saturation are reported"""
+
+    @pytest.mark.asyncio
+    async def test_pooled_metrics(self, tmp_path):
+        engine = create_app_async_engine(f"sqlite+aiosqlite:///{tmp_path}/pool.db", pooled=True)
+        metrics = PoolMetrics(engine, pooled=True)
+
+        async def one_request():
+            async with engine.connect() as conn:
+                metrics.record_checkout(0.001)
+                await conn.execute(text("SELECT 1"))
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(one_request() for _ in range(5)))
+        snapshot = metrics.snapshot()
+        await engine.dispose()
+
+        assert snapshot["mode"] == "pooled"
+        assert snapshot["checkouts"] == 5
+        assert snapshot["checkout_latency_ms"]["max"] == pytest.approx(1.0)
+        assert snapshot["peak_in_use"] == 5
+        assert snapshot["in_use"] == 0
+        assert snapshot["checked_out"] == 0
+        assert snapshot["saturation"] == 0
@@ -0,0 +1,109 @@
+"""
+Tests for set-based auto-enrollment
+"""
+
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.academic import Enrollment, class_subject_association
+from app.models.notification import Notification
+from app.models.student import StudentClassHistory, StudentStatus
+from app.services.enrollment_service import EnrollmentService
+from tests.utils import QueryCounter, create_test_user, seed_school_with_classes
+
+
+async def seed_class(db_session, school_id, subjects=4):
+    seeded = await seed_school_with_classes(
+        db_session, school_id, class_count=2, students_per_class=10, subjects=subjects, attendance_days=0
+    )
+    cls = seeded["classes"][0]
+    await db_session.execute(
+        class_subject_association.insert(),
+        [
+            {"id": str(uuid4()), "class_id": cls.id, "subject_id": subject.id, "school_id": school_id}
+            for subject in seeded["subjects"]
+        ]
+    )
+    await db_session.commit()
+    students = [s for s in seeded["students"] if s.current_class_id == cls.id]
+    return seeded, cls, students
+
+
+async def count(db_session, model, **filters):
+    return await db_session.scalar(select(func.count()).select_from(model).filter_by(is_deleted=False, **filters))
+
+
+class TestAutoEnrollClass:
+
+    @pytest.mark.asyncio
+    async def test_enrolls_missing_pairs_in_constant_queries(self, db_session, test_school):
+        seeded, cls, students = await seed_class(db_session, test_school.id)
+        active = [s for s in students if s.status == StudentStatus.ACTIVE]
+        subjects = seeded["subjects"]
+        parent = await create_test_user(db_session, email="enrolled@test.com", school_id=test_school.id)
+        active[0].user_id = parent.id
+        # One pair is already enrolled
+        db_session.add(Enrollment(
+            student_id=active[1].id, class_id=cls.id, subject_id=subjects[0].id,
+            term_id=seeded["term"].id, school_id=test_school.id, enrollment_date=seeded["term"].start_date
+        ))
+        await db_session.commit()
+
+        with QueryCounter(db_session) as counter:
+            counts = await EnrollmentService.auto_enroll_students_in_class_subjects(db_session, cls.id, test_school.id)
+
+        assert counts == {
+            "enrollments_created": len(active) * len(subjects) - 1,
+            "students_enrolled": len(active),
+            "class_history_created": len(active)
+        }
+        assert len(counter.statements) <= 8
+        assert await count(db_session, Enrollment, class_id=cls.id) == len(active) * len(subjects)
+        assert await count(db_session, StudentClassHistory, class_id=cls.id) == len(active)
+
+        # The student's four enrollments collapse into one notification
+        notification = (await db_session.execute(
+            select(Notification).where(Notification.user_id == parent.id)
+        )).scalar_one()
+        assert notification.group_count == len(subjects)
+        assert notification.message == f"You have been enrolled in {len(subjects)} subjects."
+
+        # Running again is a no-op
+        again = await EnrollmentService.auto_enroll_students_in_class_subjects(db_session, cls.id, test_school.id)
+        assert again == {"enrollments_created": 0, "students_enrolled": 0, "class_history_created": 0}
+
+    @pytest.mark.asyncio
+    async def test_specific_subjects_and_single_student(self, db_session, test_school):
+        seeded, cls, students = await seed_class(db_session, test_school.id)
+        subjects = seeded["subjects"]
+
+        counts = await EnrollmentService.auto_enroll_students_in_class_subjects(
+            db_session, cls.id, test_school.id, [subjects[0].id]
+        )
+        active = [s for s in students if s.status == StudentStatus.ACTIVE]
+        assert counts["enrollments_created"] == len(active)
+
+        inactive = next(s for s in students if s.status != StudentStatus.ACTIVE)
+        counts = await EnrollmentService.auto_enroll_student_in_class_subjects(
+            db_session, inactive.id, cls.id, test_school.id
+        )
+        assert counts == {"enrollments_created": len(subjects)}
+        assert await count(db_session, Enrollment, student_id=inactive.id) == len(subjects)
+
+    @pytest.mark.asyncio
+    async def test_unique_index_skips_duplicates(self, db_session, test_school):
+        seeded, cls, students = await seed_class(db_session, test_school.id, subjects=1)
+        term = seeded["term"]
+        table = Enrollment.__table__
+        row = {
+            "student_id": students[0].id, "class_id": cls.id, "subject_id": seeded["subjects"][0].id,
+            "term_id": term.id, "school_id": test_school.id, "enrollment_date": term.start_date, "is_active": True
+        }
+
+        # As when a concurrent run inserts between the anti-join and the INSERT
+        statement = EnrollmentService._insert_skipping_duplicates(db_session, table).returning(table.c.id)
+        assert len((await db_session.execute(statement, [row, row])).all()) == 1
+        await db_session.commit()
+        assert await count(db_session, Enrollment, student_id=students[0].id) == 1
@@ -0,0 +1,121 @@
+"""
+Tests for streamed CSV/XLSX exports
+"""
+
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+import pytest_asyncio
+from openpyxl import load_workbook
+from sqlalchemy import insert
+
+from app.models.academic import teacher_subject_association
+from app.models.fee import FeePayment, PaymentMethod
+from app.models.user import UserRole
+from app.services import export_service
+from app.services.export_service import ExportService, STUDENT_EXPORT_HEADER, TEACHER_EXPORT_HEADER
+from app.services.report_service import ReportService
+from tests.utils import QueryCounter, create_test_user, seed_school_with_classes
+
+
+@pytest_asyncio.fixture
+async def seeded(db_session, test_school):
+    return await seed_school_with_classes(
+        db_session, test_school.id, class_count=3, students_per_class=4, attendance_days=0
+    )
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+class TestStudentExport:
+
+    @pytest.mark.asyncio
+    async def test_csv_rows_match_students(self, db_session, test_school, seeded, monkeypatch):
+        monkeypatch.setattr(export_service, "EXPORT_BATCH_SIZE", 5)
+
+        with QueryCounter(db_session) as counter:
+            chunks = await collect(ExportService.write_csv(
+                ExportService.student_rows(db_session, test_school.id)
+            ))
+
+        # 13 rows in batches of 5, from a single streamed query
+        assert len(chunks) == 3
+        assert counter.count == 1
+        rows = list(csv.reader(io.StringIO("".join(chunks))))
+        assert rows[0] == STUDENT_EXPORT_HEADER
+        assert len(rows) == 1 + 12
+        first = dict(zip(rows[0], rows[1]))
+        assert first["Admission Number"] == "ADM000000"
+        assert first["Current Class"] == "Class 000"
+        assert first["Gender"] == "female"
+        assert first["Status"] == "inactive"
+        assert first["Date of Birth"] == "2012-01-01"
+
+    @pytest.mark.asyncio
+    async def test_filters_and_xlsx(self, db_session, test_school, seeded):
+        class_id = seeded["classes"][1].id
+        chunks = await collect(ExportService.write_xlsx(
+            ExportService.student_rows(db_session, test_school.id, class_id=class_id), "students"
+        ))
+
+        sheet = load_workbook(io.BytesIO(b"".join(chunks)), read_only=True).active
+        values = list(sheet.values)
+        assert list(values[0]) == STUDENT_EXPORT_HEADER
+        assert [row[0] for row in values[1:]] == [f"ADM001{i:03d}" for i in range(4)]
+        assert {row[9] for row in values[1:]} == {"Class 001"}
+
+
+class TestTeacherExport:
+
+    @pytest.mark.asyncio
+    async def test_subjects_and_classes_without_per_teacher_queries(self, db_session, test_school, seeded):
+        teacher = seeded["teacher"]
+        other = await create_test_user(db_session, role=UserRole.TEACHER, school_id=test_school.id, last_name="Zed")
+        seeded["classes"][0].teacher_id = teacher.id
+        await db_session.execute(insert(teacher_subject_association), [
+            {"teacher_id": teacher.id, "subject_id": subject.id, "school_id": test_school.id}
+            for subject in seeded["subjects"]
+        ])
+        await db_session.commit()
+
+        with QueryCounter(db_session) as counter:
+            csv_text = await ExportService.export_teachers_csv(db_session, test_school.id)
+        assert counter.count == 3
+
+        rows = [dict(zip(TEACHER_EXPORT_HEADER, row)) for row in list(csv.reader(io.StringIO(csv_text)))[1:]]
+        assert [row["Email"] for row in rows] == [teacher.email, other.email]
+        assert rows[0]["Subjects Taught"] == "Subject 0, Subject 1"
+        assert rows[0]["Classes Assigned"] == "Class 000"
+        assert rows[1]["Subjects Taught"] == ""
+
+
+class TestFinancialExport:
+
+    @pytest.mark.asyncio
+    async def test_summary_then_payments(self, db_session, test_school, test_admin_user, seeded):
+        assignments = seeded["fee_assignments"]
+        db_session.add_all([
+            FeePayment(
+                payment_date=date(2024, 10, 5), amount=Decimal("300.00"), payment_method=PaymentMethod.CASH,
+                receipt_number=f"RCP{n}", student_id=assignment.student_id, fee_assignment_id=assignment.id,
+                collected_by=test_admin_user.id, school_id=test_school.id
+            )
+            for n, assignment in enumerate(assignments[:2])
+        ])
+        await db_session.commit()
+
+        csv_text = await ReportService.export_financial_report_csv(db_session, test_school.id)
+        rows = list(csv.reader(io.StringIO(csv_text)))
+
+        assert ["Total Revenue", "600.0"] in rows
+        assert ["Oct", "600.0"] in rows
+        payments = rows[rows.index(["Payments"]) + 2:]
+        assert payments == [
+            ["2024-10-05", "RCP0", "ADM000000", "Student0 Class0", "tuition", "cash", "300.0"],
+            ["2024-10-05", "RCP1", "ADM000001", "Student1 Class0", "tuition", "cash", "300.0"],
+        ]
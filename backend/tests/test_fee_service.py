@@ -0,0 +1,113 @@
+"""
+Tests for bulk fee assignment
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+
+from app.models.background_job import JobStatus
+from app.models.fee import FeeAssignment, FeeStructure, FeeType
+from app.models.notification import Notification
+from app.schemas.fee import BulkFeeAssignmentCreate
+from app.services.fee_service import FeeService, FEE_ASSIGNMENT_JOB_TYPE
+from app.services.job_service import JobService
+from tests.conftest import TestingSessionLocal
+from tests.utils import QueryCounter, create_test_user, seed_school_with_classes
+
+
+async def seed_library_fee(db_session, school_id):
+    seeded = await seed_school_with_classes(
+        db_session, school_id, class_count=3, students_per_class=5, subjects=1, attendance_days=0
+    )
+    library = FeeStructure(
+        name="Library", academic_session="2024/2025", fee_type=FeeType.LIBRARY,
+        amount=Decimal("150.00"), school_id=school_id
+    )
+    db_session.add(library)
+    await db_session.commit()
+    bulk_data = BulkFeeAssignmentCreate(
+        fee_structure_id=library.id,
+        term_id=seeded["term"].id,
+        class_ids=[cls.id for cls in seeded["classes"][:2]],
+        due_date=date(2024, 10, 1),
+        discount_amount=Decimal("50.00")
+    )
+    return seeded, library, bulk_data
+
+
+async def library_assignments(db_session, library):
+    return await db_session.scalar(
+        select(func.count()).select_from(FeeAssignment).where(FeeAssignment.fee_structure_id == library.id)
+    )
+
+
+class TestBulkFeeAssignment:
+
+    @pytest.mark.asyncio
+    async def test_existing_assignments_skipped_in_chunks(self, db_session, test_school):
+        seeded, library, bulk_data = await seed_library_fee(db_session, test_school.id)
+        students = [s for s in seeded["students"] if s.current_class_id in bulk_data.class_ids]
+        parent = await create_test_user(db_session, email="fees@test.com", school_id=test_school.id)
+        students[5].user_id = parent.id
+        db_session.add(FeeAssignment(
+            student_id=students[0].id, fee_structure_id=library.id, term_id=seeded["term"].id,
+            assigned_date=date(2024, 9, 1), due_date=date(2024, 10, 1), amount=Decimal("150.00"),
+            amount_outstanding=Decimal("150.00"), school_id=test_school.id
+        ))
+        await db_session.commit()
+
+        progress = {}
+        with QueryCounter(db_session) as counter:
+            summary = await FeeService.bulk_create_fee_assignments(
+                db_session, bulk_data, test_school.id, chunk_size=4, progress=progress
+            )
+
+        assert summary.pop("assignment_ids") and summary == {
+            "fee_structure_id": library.id,
+            "term_id": seeded["term"].id,
+            "total_students": 10,
+            "created_count": 9,
+            "skipped_count": 1
+        }
+        assert progress == {"total_students": 10, "processed_students": 10, "created_count": 9, "skipped_count": 1}
+        # Structure lookup, the diff, then one INSERT per chunk of four
+        inserts = [s for s in counter.statements if s.startswith("INSERT INTO fee_assignments")]
+        assert len(inserts) == 3
+        assert sum(s.startswith("SELECT") for s in counter.statements) == 2
+
+        created = (await db_session.execute(
+            select(FeeAssignment).where(FeeAssignment.fee_structure_id == library.id, FeeAssignment.student_id == students[5].id)
+        )).scalar_one()
+        assert created.amount_outstanding == Decimal("100.00")
+        assert created.due_date == date(2024, 10, 1)
+        notification = (await db_session.execute(
+            select(Notification).where(Notification.user_id == parent.id)
+        )).scalar_one()
+        assert notification.message == "A new fee 'Library' of 150.00 has been assigned to you."
+
+        again = await FeeService.bulk_create_fee_assignments(db_session, bulk_data, test_school.id, collect_ids=False)
+        assert (again["created_count"], again["skipped_count"]) == (0, 10)
+        assert await library_assignments(db_session, library) == 10
+
+    @pytest.mark.asyncio
+    async def test_runs_as_background_job(self, db_session, test_school, test_admin_user, monkeypatch):
+        import app.services.job_handlers  # noqa: F401  (registers the job type)
+
+        monkeypatch.setattr(JobService, "session_factory", TestingSessionLocal)
+        seeded, library, bulk_data = await seed_library_fee(db_session, test_school.id)
+
+        job = await JobService.enqueue(
+            db_session, test_school.id, FEE_ASSIGNMENT_JOB_TYPE, bulk_data.model_dump(mode="json"),
+            created_by=test_admin_user.id
+        )
+        assert await JobService.run_job(job.id)
+
+        state = JobService.as_dict(await JobService.get_job(db_session, job.id, test_school.id))
+        assert state["status"] == JobStatus.COMPLETED.value
+        assert state["result"]["created_count"] == 10
+        assert "assignment_ids" not in state["result"]
+        assert state["processed_students"] == 10
+        assert await library_assignments(db_session, library) == 10
@@ -0,0 +1,171 @@
+"""
+Tests for image uploads: off-loop processing into responsive PNG and WebP
+variants, content-hash deduplication and cleanup of stored variants
+"""
+
+import asyncio
+import io
+import os
+import sys
+import types
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image
+
+from app.core.config import settings
+from app.services.file_upload_service import FileUploadService
+from app.services.image_pipeline import process_image
+
+
+@pytest.fixture
+def local_storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "image_workers", 1)
+    monkeypatch.setattr(FileUploadService, "_configure_cloudinary", classmethod(lambda cls: False))
+    yield tmp_path
+    FileUploadService.shutdown()
+
+
+def image_bytes(size=(1000, 600), mode="RGBA", fmt="PNG", color=(200, 30, 30, 128)):
+    output = io.BytesIO()
+    Image.new(mode, size, color).save(output, format=fmt)
+    return output.getvalue()
+
+
+def upload(data, filename="logo.png"):
+    return UploadFile(file=io.BytesIO(data), filename=filename, size=len(data))
+
+
+class TestProcessImage:
+
+    def test_variants_from_one_decode(self):
+        variants = process_image(image_bytes(), (500, 500), widths=(250, 120, 800))
+
+        # 800 is wider than the full-size image, so it is skipped
+        assert [(v.suffix, v.format, v.width, v.height) for v in variants] == [
+            ("", "PNG", 500, 300), ("", "WEBP", 500, 300),
+            ("_250", "PNG", 250, 150), ("_250", "WEBP", 250, 150),
+            ("_120", "PNG", 120, 72), ("_120", "WEBP", 120, 72),
+        ]
+        full = Image.open(io.BytesIO(variants[0].data))
+        # Transparency is composited onto white
+        assert full.mode == "RGB" and full.getpixel((0, 0)) == (227, 142, 142)
+        assert Image.open(io.BytesIO(variants[1].data)).format == "WEBP"
+
+    def test_jpeg_and_png_only(self):
+        variants = process_image(image_bytes((3000, 3000), "RGB", "JPEG", (10, 20, 30)), (200, 200), webp=False)
+
+        assert [(v.suffix, v.format, v.width, v.height) for v in variants] == [("", "PNG", 200, 200)]
+
+
+class TestUploadSchoolLogo:
+
+    @pytest.mark.asyncio
+    async def test_stores_variants_and_deduplicates(self, local_storage, monkeypatch):
+        processed = []
+        process = FileUploadService._process_image.__func__
+
+        async def counting(cls, *args, **kwargs):
+            processed.append(args[0])
+            return await process(cls, *args, **kwargs)
+
+        monkeypatch.setattr(FileUploadService, "_process_image", classmethod(counting))
+        data = image_bytes()
+
+        # Concurrent uploads of the same image share one processing run
+        urls = await asyncio.gather(*(FileUploadService.upload_school_logo(upload(data), "school-1") for _ in range(3)))
+        assert len(set(urls)) == 1 and len(processed) == 1
+
+        url = urls[0]
+        stem = os.path.splitext(os.path.basename(url))[0]
+        assert url == f"/uploads/school_logos/{stem}.png" and stem.startswith("school-1_")
+        stored = sorted(os.listdir(local_storage / "school_logos"))
+        assert stored == sorted(
+            f"{stem}{suffix}{ext}" for suffix in ("", "_250", "_120") for ext in (".png", ".webp")
+        )
+
+        # Once stored, the same image is not processed again
+        assert await FileUploadService.upload_school_logo(upload(data), "school-1") == url
+        assert len(processed) == 1
+        # Another school's copy is its own
+        other = await FileUploadService.upload_school_logo(upload(data), "school-2")
+        assert other != url and len(processed) == 2
+
+        await FileUploadService.delete_school_logo(url)
+        assert sorted(os.listdir(local_storage / "school_logos")) == sorted(
+            f"{os.path.splitext(os.path.basename(other))[0]}{suffix}{ext}"
+            for suffix in ("", "_250", "_120") for ext in (".png", ".webp")
+        )
+
+    @pytest.mark.asyncio
+    async def test_invalid_image_is_rejected(self, local_storage):
+        with pytest.raises(HTTPException) as error:
+            await FileUploadService.upload_school_logo(upload(b"not an image"), "school-1")
+
+        assert error.value.status_code == 400
+        assert not (local_storage / "school_logos").exists() or not os.listdir(local_storage / "school_logos")
+
+    @pytest.mark.asyncio
+    async def test_thread_fallback_without_workers(self, local_storage, monkeypatch):
+        monkeypatch.setattr(settings, "image_workers", 0)
+
+        url = await FileUploadService.upload_profile_picture(upload(image_bytes((400, 400))), "user-1")
+
+        assert FileUploadService._image_pool is None
+        stem = os.path.splitext(os.path.basename(url))[0]
+        with Image.open(local_storage / "profile_pictures" / f"{stem}_96.webp") as image:
+            assert image.size == (96, 96)
+
+
+@pytest.fixture
+def cloudinary_storage(monkeypatch):
+    """A stand-in Cloudinary SDK that versions each upload like the real service"""
+    assets, calls = {}, []
+
+    def upload(content, folder, public_id, **options):
+        asset = f"{folder}/{public_id}"
+        assets[asset] = assets.get(asset, 0) + 1
+        calls.append(("upload", asset))
+        return {"secure_url": f"https://res.cloudinary.com/demo/image/upload/v{assets[asset]}/{asset}.png"}
+
+    def destroy(public_id, resource_type):
+        calls.append(("destroy", public_id))
+        assets.pop(public_id, None)
+        return {"result": "ok"}
+
+    uploader = types.SimpleNamespace(upload=upload, destroy=destroy)
+    monkeypatch.setitem(sys.modules, "cloudinary", types.SimpleNamespace(uploader=uploader))
+    monkeypatch.setitem(sys.modules, "cloudinary.uploader", uploader)
+    monkeypatch.setattr(settings, "image_workers", 0)
+    monkeypatch.setattr(FileUploadService, "_configure_cloudinary", classmethod(lambda cls: True))
+    return assets, calls
+
+
+class TestReplaceSchoolLogo:
+
+    @pytest.mark.asyncio
+    async def test_same_image_again_keeps_the_asset(self, cloudinary_storage):
+        assets, calls = cloudinary_storage
+        data = image_bytes()
+
+        first = await FileUploadService.replace_school_logo(upload(data), "school-1", None)
+        again = await FileUploadService.replace_school_logo(upload(data), "school-1", first)
+
+        # A new version of the same public_id, which must not be destroyed
+        assert first != again and "/v2/" in again
+        assert not any(call[0] == "destroy" for call in calls)
+        assert len(assets) == 1
+
+    @pytest.mark.asyncio
+    async def test_new_image_deletes_the_old_asset(self, cloudinary_storage):
+        assets, calls = cloudinary_storage
+
+        first = await FileUploadService.replace_school_logo(upload(image_bytes()), "school-1", None)
+        second = await FileUploadService.replace_school_logo(
+            upload(image_bytes(color=(0, 0, 255, 255))), "school-1", first
+        )
+
+        old_id = FileUploadService._stored_id(first, "school_logos")
+        assert calls[-1] == ("destroy", old_id)
+        assert list(assets) == [FileUploadService._stored_id(second, "school_logos")]
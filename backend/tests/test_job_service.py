@@ -0,0 +1,235 @@
+"""
+Tests for durable background jobs: claiming, retries, tenant limits,
+restart recovery, progress and the Celery hand-off
+"""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy import select, update
+
+from app.core.config import settings
+from app.models.background_job import BackgroundJob, JobStatus
+from app.services.job_service import JobService, JobType, utcnow
+from tests.conftest import TestingSessionLocal
+
+
+@pytest_asyncio.fixture
+async def jobs(db_session, monkeypatch):
+    """Job service on the test database with test-only job types"""
+    monkeypatch.setattr(JobService, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(settings, "job_retry_delay", 60.0)
+    calls = []
+
+    async def echo(db, job, progress):
+        calls.append(job.payload)
+        progress["done"] = progress.get("done", 0) + 1
+        return {"echo": job.payload["value"]}
+
+    async def flaky(db, job, progress):
+        calls.append(job.attempts)
+        if job.attempts < 2:
+            raise RuntimeError("temporary outage")
+        return {"attempts": job.attempts}
+
+    async def rejected(db, job, progress):
+        raise HTTPException(status_code=404, detail="Term not found")
+
+    monkeypatch.setitem(JobService._handlers, "test_echo", JobType(echo, 1))
+    monkeypatch.setitem(JobService._handlers, "test_flaky", JobType(flaky, 3))
+    monkeypatch.setitem(JobService._handlers, "test_rejected", JobType(rejected, 3))
+    return calls
+
+
+async def load(job_id):
+    async with TestingSessionLocal() as db:
+        return (await db.execute(select(BackgroundJob).where(BackgroundJob.id == job_id))).scalar_one()
+
+
+class TestRunJob:
+
+    @pytest.mark.asyncio
+    async def test_completed_job_keeps_result_and_progress(self, db_session, test_school, jobs):
+        job = await JobService.enqueue(db_session, test_school.id, "test_echo", {"value": 7}, progress={"done": 0})
+        assert job.status == JobStatus.PENDING
+
+        assert await JobService.run_job(job.id)
+        # A finished job is not run again
+        assert await JobService.run_job(job.id)
+
+        job = await JobService.get_job(db_session, job.id, test_school.id)
+        state = JobService.as_dict(job)
+        assert state["status"] == "completed"
+        assert state["result"] == {"echo": 7}
+        assert state["done"] == 1 and state["progress"] == {"done": 1}
+        assert state["attempts"] == 1
+        assert jobs == [{"value": 7}]
+        assert await JobService.get_job(db_session, job.id, "another-school") is None
+
+    @pytest.mark.asyncio
+    async def test_failures_retry_with_backoff(self, db_session, test_school, jobs):
+        job = await JobService.enqueue(db_session, test_school.id, "test_flaky", {})
+
+        assert await JobService.run_job(job.id)
+        retried = await load(job.id)
+        assert retried.status == JobStatus.PENDING
+        assert retried.attempts == 1
+        assert retried.error == "temporary outage"
+
+        # Not due until the backoff has passed
+        assert not await JobService.run_job(job.id)
+        assert jobs == [1]
+
+        await db_session.execute(
+            update(BackgroundJob).where(BackgroundJob.id == job.id).values(run_after=utcnow() - timedelta(seconds=1))
+        )
+        await db_session.commit()
+        assert await JobService.run_job(job.id)
+
+        done = await load(job.id)
+        assert done.status == JobStatus.COMPLETED
+        assert done.result == {"attempts": 2}
+        assert done.error is None
+
+    @pytest.mark.asyncio
+    async def test_http_errors_are_not_retried(self, db_session, test_school, jobs):
+        job = await JobService.enqueue(db_session, test_school.id, "test_rejected", {})
+
+        assert await JobService.run_job(job.id)
+
+        failed = await load(job.id)
+        assert failed.status == JobStatus.FAILED
+        assert failed.error == "Term not found"
+        assert failed.attempts == 1 and failed.finished_at is not None
+
+    @pytest.mark.asyncio
+    async def test_progress_is_saved_while_running(self, db_session, test_school, jobs, monkeypatch):
+        monkeypatch.setattr(settings, "job_progress_interval", 0.01)
+        seen = {}
+
+        async def slow(db, job, progress):
+            progress["processed"] = 5
+            await asyncio.sleep(0.1)
+            seen.update((await load(job.id)).progress)
+            return None
+
+        monkeypatch.setitem(JobService._handlers, "test_slow", JobType(slow, 1))
+        job = await JobService.enqueue(db_session, test_school.id, "test_slow", {}, progress={"processed": 0})
+
+        assert await JobService.run_job(job.id)
+        assert seen == {"processed": 5}
+
+    @pytest.mark.asyncio
+    async def test_cancelling_the_handler_stops_progress_reports(self, db_session, test_school, jobs, monkeypatch):
+        monkeypatch.setattr(settings, "job_progress_interval", 0.01)
+        started = asyncio.Event()
+
+        async def hang(db, job, progress):
+            started.set()
+            await asyncio.sleep(10)
+
+        monkeypatch.setitem(JobService._handlers, "test_hang", JobType(hang, 1))
+        job = await JobService.enqueue(db_session, test_school.id, "test_hang", {})
+        before = set(asyncio.all_tasks())
+
+        run = asyncio.create_task(JobService.run_job(job.id))
+        await started.wait()
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+        await asyncio.sleep(0)
+
+        assert not [t for t in asyncio.all_tasks() - before if not t.done()]
+
+
+class TestScheduling:
+
+    @pytest.mark.asyncio
+    async def test_tenant_concurrency_limit(self, db_session, test_school, jobs, monkeypatch):
+        monkeypatch.setattr(settings, "job_tenant_concurrency", 1)
+        busy = await JobService.enqueue(db_session, test_school.id, "test_echo", {"value": 1})
+        waiting = await JobService.enqueue(db_session, test_school.id, "test_echo", {"value": 2})
+        other = await JobService.enqueue(db_session, "other-school", "test_echo", {"value": 3})
+        await db_session.execute(
+            update(BackgroundJob).where(BackgroundJob.id == busy.id).values(status=JobStatus.RUNNING)
+        )
+        await db_session.commit()
+
+        # The school's slot is taken, so its job waits; other schools are unaffected
+        assert not await JobService.run_job(waiting.id)
+        assert (await load(waiting.id)).status == JobStatus.PENDING
+
+        assert await JobService.dispatch() == 1
+        assert set(JobService._active) == {other.id}
+        await asyncio.gather(*JobService._active.values())
+        assert (await load(other.id)).status == JobStatus.COMPLETED
+        assert not JobService._active
+
+    @pytest.mark.asyncio
+    async def test_recover_requeues_interrupted_jobs(self, db_session, test_school, jobs):
+        retryable = await JobService.enqueue(db_session, test_school.id, "test_flaky", {})
+        exhausted = await JobService.enqueue(db_session, test_school.id, "test_echo", {"value": 1})
+        await db_session.execute(
+            update(BackgroundJob).where(BackgroundJob.id.in_([retryable.id, exhausted.id])).values(
+                status=JobStatus.RUNNING, attempts=1
+            )
+        )
+        await db_session.commit()
+
+        await JobService.recover()
+
+        assert (await load(retryable.id)).status == JobStatus.PENDING
+        interrupted = await load(exhausted.id)
+        assert interrupted.status == JobStatus.FAILED
+        assert interrupted.error == "Interrupted by a restart"
+
+    @pytest.mark.asyncio
+    async def test_requeue_stale_hands_back_abandoned_jobs(self, db_session, test_school, jobs, monkeypatch):
+        monkeypatch.setattr(settings, "job_lease_timeout", 60)
+        stale = utcnow() - timedelta(minutes=5)
+        abandoned = await JobService.enqueue(db_session, test_school.id, "test_flaky", {})
+        exhausted = await JobService.enqueue(db_session, test_school.id, "test_echo", {"value": 1})
+        alive = await JobService.enqueue(db_session, test_school.id, "test_flaky", {})
+        await db_session.execute(
+            update(BackgroundJob).where(BackgroundJob.id.in_([abandoned.id, exhausted.id])).values(
+                status=JobStatus.RUNNING, attempts=1, started_at=stale, heartbeat_at=stale
+            )
+        )
+        await db_session.execute(
+            update(BackgroundJob).where(BackgroundJob.id == alive.id).values(
+                status=JobStatus.RUNNING, attempts=1, started_at=stale, heartbeat_at=utcnow()
+            )
+        )
+        await db_session.commit()
+
+        assert await JobService.requeue_stale() == [abandoned.id]
+
+        assert (await load(abandoned.id)).status == JobStatus.PENDING
+        lost = await load(exhausted.id)
+        assert lost.status == JobStatus.FAILED
+        assert lost.error == "Worker stopped responding"
+        assert (await load(alive.id)).status == JobStatus.RUNNING
+
+        # The requeued job can be claimed again by a fresh message
+        assert await JobService.run_job(abandoned.id)
+        assert (await load(abandoned.id)).attempts == 2
+
+    @pytest.mark.asyncio
+    async def test_celery_broker_receives_job_ids(self, db_session, test_school, jobs, monkeypatch):
+        from app import worker
+
+        monkeypatch.setattr(settings, "job_broker", "celery")
+        sent = []
+        monkeypatch.setattr(
+            worker.run_background_job, "apply_async",
+            lambda args, countdown=0: sent.append((args, countdown))
+        )
+
+        job = await JobService.enqueue(db_session, test_school.id, "test_flaky", {})
+        await JobService.run_job(job.id)
+
+        # Published once on enqueue and again, delayed, for the retry
+        assert sent == [([job.id], 0), ([job.id], 60.0)]
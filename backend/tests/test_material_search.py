@@ -0,0 +1,213 @@
+"""
+Tests for the material search index, ranking, facets and related materials
+"""
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, func, select, update
+
+from app.models.academic import Subject
+from app.models.teacher_material import MaterialSearchTerm, MaterialSimilarity, MaterialType, TeacherMaterial
+from app.models.user import UserRole
+from app.services.material_search_service import MaterialSearchService, tokenize
+from app.services.material_service import MaterialService
+from tests.utils import QueryCounter, create_test_user
+
+
+@pytest.fixture(autouse=True)
+def fresh_index_state():
+    MaterialSearchService.clear()
+    yield
+    MaterialSearchService.clear()
+
+
+@pytest_asyncio.fixture
+async def teacher(db_session, test_school):
+    return await create_test_user(db_session, role=UserRole.TEACHER, school_id=test_school.id)
+
+
+@pytest_asyncio.fixture
+async def subjects(db_session, test_school):
+    maths = Subject(name="Mathematics", code="MTH", school_id=test_school.id)
+    biology = Subject(name="Biology", code="BIO", school_id=test_school.id)
+    db_session.add_all([maths, biology])
+    await db_session.commit()
+    return {"maths": maths, "biology": biology}
+
+
+@pytest_asyncio.fixture
+async def add_material(db_session, test_school, teacher):
+    async def add(title, description=None, tags=None, is_published=True, **kwargs):
+        return await MaterialService.create_material(
+            db=db_session,
+            school_id=test_school.id,
+            user_id=teacher.id,
+            title=title,
+            description=description,
+            material_type=MaterialType.DOCUMENT,
+            file_name="file.pdf",
+            original_file_name="file.pdf",
+            file_path="/uploads/file.pdf",
+            file_size=1024,
+            mime_type="application/pdf",
+            tags=tags,
+            is_published=is_published,
+            **kwargs
+        )
+    return add
+
+
+def test_tokenize():
+    assert tokenize("The Basics of Algebra, Part 2!") == ["basics", "algebra", "part", "2"]
+    assert tokenize(None) == []
+
+
+class TestMaterialSearch:
+    """BM25 ranking over the inverted index"""
+
+    @pytest.mark.asyncio
+    async def test_ranked_by_relevance_not_popularity(self, db_session, test_school, add_material):
+        passing = await add_material("Photosynthesis", description="Mentions algebra once")
+        await MaterialService.update_material(db_session, test_school.id, passing.id, view_count=500)
+        await add_material("Algebra Basics", description="Algebra equations and algebra practice", tags=["algebra"])
+        await add_material("Geometry Introduction", description="Shapes")
+
+        found = await MaterialSearchService.search(db_session, test_school.id, "algebra")
+
+        assert [r["title"] for r in found["results"]] == ["Algebra Basics", "Photosynthesis"]
+        assert found["results"][0]["score"] > found["results"][1]["score"]
+        assert found["total"] == 2
+
+    @pytest.mark.asyncio
+    async def test_partial_last_word_and_unpublished(self, db_session, test_school, add_material):
+        await add_material("Algebra Basics")
+        await add_material("Algebraic Fractions", is_published=False)
+
+        results = await MaterialService.smart_search(db_session, test_school.id, "basics alg")
+        assert [r["title"] for r in results] == ["Algebra Basics"]
+        assert await MaterialService.smart_search(db_session, test_school.id, "the of") == []
+
+    @pytest.mark.asyncio
+    async def test_tag_facets_and_filter(self, db_session, test_school, add_material):
+        await add_material("Cell Biology", tags=["Biology", "WAEC"])
+        await add_material("Cell Division", tags=["biology"])
+        await add_material("Cell Phones in Class", tags=["policy"])
+
+        found = await MaterialSearchService.search(db_session, test_school.id, "cell")
+        assert found["facets"]["tags"] == [
+            {"tag": "biology", "count": 2}, {"tag": "policy", "count": 1}, {"tag": "waec", "count": 1}
+        ]
+
+        narrowed = await MaterialSearchService.search(db_session, test_school.id, "cell", tags=["biology", "waec"])
+        assert [r["title"] for r in narrowed["results"]] == ["Cell Biology"]
+        assert narrowed["total"] == 1
+
+    @pytest.mark.asyncio
+    async def test_index_follows_updates_tags_and_deletes(self, db_session, test_school, add_material):
+        material = await add_material("Fractions Worksheet")
+
+        await MaterialService.update_material(db_session, test_school.id, material.id, title="Decimals Worksheet")
+        assert await MaterialService.smart_search(db_session, test_school.id, "fractions") == []
+        assert len(await MaterialService.smart_search(db_session, test_school.id, "decimals")) == 1
+
+        await MaterialService.add_tags(db_session, test_school.id, material.id, ["numeracy"])
+        assert len(await MaterialService.smart_search(db_session, test_school.id, "numeracy")) == 1
+        await MaterialService.remove_tags(db_session, test_school.id, material.id, ["numeracy"])
+        assert await MaterialService.smart_search(db_session, test_school.id, "numeracy") == []
+
+        await MaterialService.delete_material(db_session, test_school.id, material.id)
+        assert await MaterialService.smart_search(db_session, test_school.id, "decimals") == []
+        postings = await db_session.execute(
+            select(func.count()).select_from(MaterialSearchTerm).where(MaterialSearchTerm.material_id == material.id)
+        )
+        assert postings.scalar() == 0
+
+    @pytest.mark.asyncio
+    async def test_materials_created_before_the_index_are_indexed_by_the_backlog_job(
+        self, db_session, test_school, add_material
+    ):
+        material = await add_material("Trigonometry Revision")
+        draft = await add_material("Trigonometry Draft", is_published=False)
+        await db_session.execute(delete(MaterialSearchTerm))
+        await db_session.execute(
+            update(TeacherMaterial).where(TeacherMaterial.id.in_([material.id, draft.id])).values(search_length=None)
+        )
+        await db_session.commit()
+
+        # Searching only reads
+        with QueryCounter(db_session) as counter:
+            assert await MaterialService.smart_search(db_session, test_school.id, "trigonometry") == []
+        assert all(s.startswith("SELECT") for s in counter.statements)
+
+        progress = {}
+        assert await MaterialSearchService.index_backlog(db_session, batch_size=1, progress=progress) == {"indexed": 2}
+        assert progress == {"indexed": 2}
+        results = await MaterialService.smart_search(db_session, test_school.id, "trigonometry")
+        assert [r["id"] for r in results] == [material.id]
+        assert await MaterialSearchService.index_backlog(db_session) == {"indexed": 0}
+
+
+class TestRelatedMaterials:
+    """Related materials served from precomputed similarity"""
+
+    @pytest.mark.asyncio
+    async def test_related_materials_are_precomputed(self, db_session, test_school, add_material, subjects):
+        source = await add_material(
+            "Quadratic Equations", description="Solving quadratic equations by factorisation",
+            subject_id=subjects["maths"].id
+        )
+        close = await add_material(
+            "Quadratic Equations Practice", description="More quadratic equations",
+            subject_id=subjects["biology"].id
+        )
+        same_subject = await add_material("Times Tables", subject_id=subjects["maths"].id)
+        await add_material("Plant Cells", subject_id=subjects["biology"].id)
+
+        stored = await db_session.execute(
+            select(MaterialSimilarity.related_id).where(MaterialSimilarity.material_id == source.id)
+        )
+        assert set(stored.scalars().all()) == {close.id, same_subject.id}
+
+        with QueryCounter(db_session) as counter:
+            related = await MaterialService.get_related_materials(db_session, test_school.id, source.id)
+        assert [m.id for m in related] == [close.id, same_subject.id]
+        assert counter.count <= 7  # source, then one similarity lookup, plus eager loads
+
+    @pytest.mark.asyncio
+    async def test_related_materials_before_the_backlog_job_are_scored_live(
+        self, db_session, test_school, add_material, subjects
+    ):
+        source = await add_material("Photosynthesis", subject_id=subjects["biology"].id)
+        other = await add_material("Photosynthesis in Leaves", subject_id=subjects["biology"].id)
+        await db_session.execute(delete(MaterialSearchTerm))
+        await db_session.execute(delete(MaterialSimilarity))
+        await db_session.execute(
+            update(TeacherMaterial).where(TeacherMaterial.id.in_([source.id, other.id])).values(search_length=None)
+        )
+        await db_session.commit()
+
+        # The lookup only reads
+        with QueryCounter(db_session) as counter:
+            related = await MaterialService.get_related_materials(db_session, test_school.id, source.id)
+        assert [m.id for m in related] == [other.id]
+        assert all(s.startswith("SELECT") for s in counter.statements)
+
+        # The backlog job stores them
+        await MaterialSearchService.index_backlog(db_session)
+        stored = await db_session.execute(
+            select(MaterialSimilarity.related_id).where(MaterialSimilarity.material_id == source.id)
+        )
+        assert stored.scalars().all() == [other.id]
+
+    @pytest.mark.asyncio
+    async def test_deleted_material_leaves_related_lists(self, db_session, test_school, add_material):
+        source = await add_material("Volcanoes", topic="Geography")
+        other = await add_material("Volcanoes and Earthquakes", topic="Geography")
+
+        await MaterialService.delete_material(db_session, test_school.id, other.id)
+
+        assert await MaterialService.get_related_materials(db_session, test_school.id, source.id) == []
+        remaining = await db_session.execute(
+            select(func.count()).select_from(MaterialSimilarity).where(MaterialSimilarity.related_id == other.id)
+        )
+        assert remaining.scalar() == 0
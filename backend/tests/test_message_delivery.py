@@ -0,0 +1,186 @@
+"""
+Tests for batched message delivery through EmailService, against a local
+SMTP sink and a recorded Resend batch client, and as a background job
+"""
+
+import time
+
+import pytest
+import resend
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.background_job import JobStatus
+from app.models.communication import Message, MessageRecipient, MessageStatus, MessageType, RecipientType
+from app.models.user import UserRole
+from app.services.communication_service import CommunicationService, MESSAGE_DELIVERY_JOB_TYPE
+from app.services.email_service import EmailService, OutgoingEmail, RateLimiter
+from app.services.job_service import JobService
+from tests.conftest import TestingSessionLocal
+from tests.utils import QueryCounter, SMTPSink, create_test_user
+
+
+@pytest.fixture
+def smtp_settings(monkeypatch):
+    monkeypatch.setattr(settings, "resend_api_key", None)
+    monkeypatch.setattr(settings, "smtp_host", "127.0.0.1")
+    monkeypatch.setattr(settings, "smtp_user", "sink")
+    monkeypatch.setattr(settings, "smtp_password", "sink")
+    monkeypatch.setattr(settings, "smtp_tls", False)
+    monkeypatch.setattr(settings, "smtp_ssl", False)
+    monkeypatch.setattr(settings, "email_concurrency", 2)
+    monkeypatch.setattr(settings, "email_rate_limit", 0)
+
+
+def emails(*addresses):
+    return [OutgoingEmail(to=address, subject="Hello", html_content=f"<p>{address}</p>") for address in addresses]
+
+
+async def seed_parent_message(db_session, school_id, sender_id):
+    """An email to four parents, the first of whom has no email address"""
+    parents = [
+        await create_test_user(
+            db_session, email=f"parent{i}@test.com", role=UserRole.PARENT,
+            school_id=school_id, first_name=f"Parent{i}"
+        )
+        for i in range(4)
+    ]
+    message = Message(
+        subject="Term begins", content="School resumes on Monday.", message_type=MessageType.EMAIL,
+        sender_id=sender_id, sender_name="Admin", recipient_type=RecipientType.ALL_PARENTS,
+        school_id=school_id
+    )
+    db_session.add(message)
+    await db_session.flush()
+    db_session.add_all([
+        MessageRecipient(
+            message_id=message.id, recipient_id=parent.id, recipient_name=parent.first_name,
+            recipient_email=None if i == 0 else parent.email, school_id=school_id
+        )
+        for i, parent in enumerate(parents)
+    ])
+    await db_session.commit()
+    return message
+
+
+class TestSendBulk:
+
+    @pytest.mark.asyncio
+    async def test_smtp_reuses_connections_and_reports_rejections(self, smtp_settings, monkeypatch):
+        addresses = [f"parent{i}@test.com" for i in range(6)]
+        async with SMTPSink(reject={"parent3@test.com"}) as sink:
+            monkeypatch.setattr(settings, "smtp_port", sink.port)
+            errors = await EmailService.send_bulk(emails(*addresses))
+
+        assert sink.connections == 2
+        assert sorted(rcpts[0] for rcpts, _ in sink.messages) == sorted(set(addresses) - {"parent3@test.com"})
+        assert errors[3].startswith("550")
+        assert errors[:3] + errors[4:] == [None] * 5
+
+    @pytest.mark.asyncio
+    async def test_smtp_unreachable_fails_every_email(self, smtp_settings, monkeypatch):
+        async with SMTPSink() as sink:
+            port = sink.port
+        monkeypatch.setattr(settings, "smtp_port", port)
+
+        errors = await EmailService.send_bulk(emails("a@test.com", "b@test.com", "c@test.com"))
+
+        assert len(errors) == 3 and all(errors)
+
+    @pytest.mark.asyncio
+    async def test_resend_sends_batches(self, monkeypatch):
+        monkeypatch.setattr(settings, "resend_api_key", "re_test")
+        monkeypatch.setattr(settings, "email_batch_size", 2)
+        monkeypatch.setattr(settings, "email_rate_limit", 0)
+        batches = []
+
+        def send(params):
+            batches.append([item["to"][0] for item in params])
+            if "bad@test.com" in batches[-1][0]:
+                raise ValueError("invalid batch")
+            return {"data": [{"id": str(n)} for n in range(len(params))]}
+
+        monkeypatch.setattr(resend.Batch, "send", send)
+        errors = await EmailService.send_bulk(emails("a@test.com", "b@test.com", "bad@test.com", "c@test.com", "d@test.com"))
+
+        assert sorted(batches) == [["a@test.com", "b@test.com"], ["bad@test.com", "c@test.com"], ["d@test.com"]]
+        assert errors == [None, None, "invalid batch", "invalid batch", None]
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_spaces_requests(self):
+        limiter = RateLimiter(50)
+        began = time.perf_counter()
+        for _ in range(5):
+            await limiter.wait()
+        assert time.perf_counter() - began >= 4 / 50 * 0.9
+
+
+class TestSendMessage:
+
+    @pytest.mark.asyncio
+    async def test_email_rendered_once_and_statuses_bulk_updated(
+        self, db_session, test_school, test_admin_user, smtp_settings, monkeypatch
+    ):
+        message = await seed_parent_message(db_session, test_school.id, test_admin_user.id)
+
+        async with SMTPSink(reject={"parent2@test.com"}) as sink:
+            monkeypatch.setattr(settings, "smtp_port", sink.port)
+            with QueryCounter(db_session) as counter:
+                assert await CommunicationService.send_message(db_session, message.id, test_school.id)
+
+        # One UPDATE per outcome: delivered, no email address, rejected
+        recipient_updates = [s for s in counter.statements if s.startswith("UPDATE message_recipients")]
+        assert len(recipient_updates) == 3
+
+        bodies = {rcpts[0]: body for rcpts, body in sink.messages}
+        assert set(bodies) == {"parent1@test.com", "parent3@test.com"}
+        assert "Dear Parent3," in bodies["parent3@test.com"]
+
+        recipients = {
+            r.recipient_name: r for r in (await db_session.execute(
+                select(MessageRecipient).where(MessageRecipient.message_id == message.id)
+            )).scalars()
+        }
+        assert recipients["Parent1"].status == MessageStatus.DELIVERED
+        assert recipients["Parent1"].delivered_at is not None
+        assert recipients["Parent0"].status == MessageStatus.FAILED
+        assert recipients["Parent0"].error_message == "No email address"
+        assert recipients["Parent2"].status == MessageStatus.FAILED
+        assert recipients["Parent2"].error_message.startswith("550")
+        assert message.status == MessageStatus.SENT
+
+    @pytest.mark.asyncio
+    async def test_runs_as_background_job(self, db_session, test_school, test_admin_user, smtp_settings, monkeypatch):
+        import app.services.job_handlers  # noqa: F401  (registers the job type)
+
+        monkeypatch.setattr(JobService, "session_factory", TestingSessionLocal)
+        message = await seed_parent_message(db_session, test_school.id, test_admin_user.id)
+
+        job = await JobService.enqueue(
+            db_session, test_school.id, MESSAGE_DELIVERY_JOB_TYPE, {'message_id': message.id},
+            created_by=test_admin_user.id
+        )
+        async with SMTPSink() as sink:
+            monkeypatch.setattr(settings, "smtp_port", sink.port)
+            assert await JobService.run_job(job.id)
+
+        state = JobService.as_dict(await JobService.get_job(db_session, job.id, test_school.id))
+        assert state["status"] == JobStatus.COMPLETED.value
+        assert state["result"] == {'total_recipients': 4, 'delivered_count': 3, 'failed_count': 1}
+        assert len(sink.messages) == 3
+
+        await db_session.refresh(message)
+        assert message.status == MessageStatus.SENT
+
+    @pytest.mark.asyncio
+    async def test_background_job_for_missing_message_is_not_retried(self, db_session, test_school, monkeypatch):
+        import app.services.job_handlers  # noqa: F401  (registers the job type)
+
+        monkeypatch.setattr(JobService, "session_factory", TestingSessionLocal)
+
+        job = await JobService.enqueue(db_session, test_school.id, MESSAGE_DELIVERY_JOB_TYPE, {'message_id': 'missing'})
+        await JobService.run_job(job.id)
+
+        state = JobService.as_dict(await JobService.get_job(db_session, job.id, test_school.id))
+        assert state["status"] == JobStatus.FAILED.value
+        assert state["error"] == "Message not found"
@@ -0,0 +1,79 @@
+"""
+Tests for bulk notification fan-out
+"""
+
+import pytest
+from sqlalchemy import select
+
+from app.models.notification import Notification
+from app.schemas.notification import NotificationCreate
+from app.services.notification_service import NotificationService
+from tests.utils import QueryCounter
+
+
+def grade(user_id, subject):
+    return NotificationCreate(user_id=user_id, title="New Grade Posted", message=f"{subject} grade posted", link="/grades")
+
+
+async def notifications_by_user(db_session, school_id):
+    result = await db_session.execute(
+        select(Notification).where(Notification.school_id == school_id).order_by(Notification.user_id)
+        .execution_options(populate_existing=True)
+    )
+    by_user = {}
+    for notification in result.scalars():
+        by_user.setdefault(notification.user_id, []).append(notification)
+    return by_user
+
+
+class TestCreateNotificationsBulk:
+
+    @pytest.mark.asyncio
+    async def test_one_insert_and_duplicates_dropped(self, db_session, test_school):
+        with QueryCounter(db_session) as counter:
+            notified = await NotificationService.create_notifications_bulk(
+                db_session,
+                test_school.id,
+                [grade("u1", "Maths"), grade("u2", "Maths"), grade("u1", "Maths"), grade("u1", "English")]
+            )
+
+        assert notified == 2
+        assert [s for s in counter.statements if s.startswith("INSERT")] == [counter.statements[0]]
+        by_user = await notifications_by_user(db_session, test_school.id)
+        assert sorted(n.message for n in by_user["u1"]) == ["English grade posted", "Maths grade posted"]
+        assert len(by_user["u2"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_group_collapses_into_unread_row(self, db_session, test_school):
+        collapse = dict(group_key="new_grades", collapsed_message="{count} new grades have been posted.")
+
+        await NotificationService.create_notifications_bulk(
+            db_session, test_school.id,
+            [grade("u1", "Maths"), grade("u2", "Maths"), grade("u2", "English"), grade("u2", "Physics")],
+            **collapse
+        )
+        by_user = await notifications_by_user(db_session, test_school.id)
+        assert [(n.group_count, n.message) for n in by_user["u1"]] == [(1, "Maths grade posted")]
+        assert [(n.group_count, n.message) for n in by_user["u2"]] == [(3, "3 new grades have been posted.")]
+
+        # Later grades add to the unread row instead of adding rows
+        with QueryCounter(db_session) as counter:
+            await NotificationService.create_notifications_bulk(
+                db_session, test_school.id,
+                [grade("u1", "English"), grade("u1", "Physics"), grade("u2", "Biology"), grade("u3", "Maths")],
+                **collapse
+            )
+        assert sum(s.startswith("UPDATE") for s in counter.statements) == 2
+        by_user = await notifications_by_user(db_session, test_school.id)
+        assert [(n.group_count, n.message) for n in by_user["u1"]] == [(3, "3 new grades have been posted.")]
+        assert [(n.group_count, n.message) for n in by_user["u2"]] == [(4, "4 new grades have been posted.")]
+        assert [(n.group_count, n.message) for n in by_user["u3"]] == [(1, "Maths grade posted")]
+
+        # Once read, the next grade starts a new notification
+        by_user["u3"][0].is_read = True
+        await db_session.commit()
+        await NotificationService.create_notifications_bulk(
+            db_session, test_school.id, [grade("u3", "English")], **collapse
+        )
+        by_user = await notifications_by_user(db_session, test_school.id)
+        assert sorted(n.message for n in by_user["u3"]) == ["English grade posted", "Maths grade posted"]
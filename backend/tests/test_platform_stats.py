@@ -0,0 +1,154 @@
+"""
+Tests for the platform statistics rollup behind the platform admin console
+"""
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.core.config import settings
+from app.models.background_job import BackgroundJob, JobStatus
+from app.models.platform_stats import PlatformStatsSnapshot, SchoolStats
+from app.models.school import School
+from app.models.student import Student
+from app.models.user import User, UserRole
+from app.services.job_service import JobService, JobType, PLATFORM_SCOPE, utcnow
+from app.services.platform_admin_service import PlatformAdminService
+from app.services.platform_stats_service import PlatformStatsService, month_start
+from tests.conftest import TestingSessionLocal
+from tests.utils import QueryCounter, create_test_user, seed_school_with_classes
+
+
+async def add_school(db_session, n, **kwargs):
+    school = School(
+        name=f"School {n}", code=f"SCH{n:03d}", email=f"school{n}@test.com", address_line1="1 Road",
+        city="City", state="State", postal_code="00000", current_session="2024/2025",
+        current_term="First Term", **kwargs
+    )
+    db_session.add(school)
+    await db_session.commit()
+    return school
+
+
+async def live_count(db_session, column, *conditions):
+    return await db_session.scalar(select(func.count(column)).where(*conditions))
+
+
+class TestRollup:
+
+    @pytest.mark.asyncio
+    async def test_rollup_matches_live_counts(self, db_session, test_school):
+        schools = [test_school] + [
+            await add_school(db_session, n, is_active=n % 2 == 0, subscription_plan="trial" if n < 3 else "starter")
+            for n in range(5)
+        ]
+        await seed_school_with_classes(db_session, schools[1].id, class_count=2, students_per_class=3, subjects=1)
+        await seed_school_with_classes(db_session, schools[2].id, class_count=1, students_per_class=4, subjects=1)
+        for i, school in enumerate(schools[:3]):
+            await create_test_user(db_session, role=UserRole.SCHOOL_OWNER, school_id=school.id, first_name=f"Owner{i}")
+        # The seeded schools' teachers plus one more
+        await create_test_user(db_session, role=UserRole.TEACHER, school_id=schools[1].id)
+        # Last month's school, for growth
+        await db_session.execute(
+            update(School).where(School.id == schools[5].id).values(
+                created_at=month_start(utcnow()) - timedelta(days=3)
+            )
+        )
+        await db_session.commit()
+
+        await PlatformStatsService.refresh(db_session)
+
+        with QueryCounter(db_session) as counter:
+            stats = await PlatformAdminService.get_platform_statistics(db_session)
+            listed = await PlatformAdminService.get_all_schools_with_details(db_session)
+        # One snapshot read, then the page of schools and their owners
+        assert len(counter.statements) == 3
+
+        live_schools = School.is_deleted == False
+        assert stats["total_schools"] == await live_count(db_session, School.id, live_schools) == 6
+        assert stats["active_schools"] == await live_count(db_session, School.id, live_schools, School.is_active == True)
+        assert stats["total_school_owners"] == await live_count(db_session, User.id, User.role == UserRole.SCHOOL_OWNER)
+        assert stats["schools_this_month"] == 5
+        assert stats["growth_metrics"]["schools"] == "+400.0%"
+        assert stats["growth_metrics"]["school_owners"] == "+100%"
+        assert stats["refreshed_at"] is not None
+
+        assert len(listed) == 6
+        for school in listed:
+            assert school["student_count"] == await live_count(db_session, Student.id, Student.school_id == school["id"])
+            assert school["teacher_count"] == await live_count(
+                db_session, User.id, User.school_id == school["id"], User.role == UserRole.TEACHER
+            )
+        by_name = {school["name"]: school for school in listed}
+        assert by_name["School 0"]["student_count"] == 6
+        assert by_name["School 0"]["teacher_count"] == 2
+        assert by_name["School 1"]["owner_name"] == "Owner2 User"
+        assert by_name["School 4"]["owner_name"] == "No Owner"
+
+    @pytest.mark.asyncio
+    async def test_reads_before_the_first_refresh_are_live_and_write_nothing(self, db_session, test_school):
+        stats = await PlatformAdminService.get_platform_statistics(db_session)
+        assert stats["total_schools"] == 1
+        assert stats["schools_this_month"] == 1
+        assert await live_count(db_session, PlatformStatsSnapshot.id) == 0
+        assert await live_count(db_session, SchoolStats.id) == 0
+
+        await add_school(db_session, 1)
+        assert (await PlatformAdminService.get_platform_statistics(db_session))["total_schools"] == 2
+
+        # Once refreshed, reads serve the snapshot until the next refresh
+        await PlatformStatsService.refresh(db_session)
+        await add_school(db_session, 2)
+        assert (await PlatformAdminService.get_platform_statistics(db_session))["total_schools"] == 2
+        await PlatformStatsService.refresh(db_session)
+        assert (await PlatformAdminService.get_platform_statistics(db_session))["total_schools"] == 3
+        assert await live_count(db_session, PlatformStatsSnapshot.id) == 2
+
+
+class TestScheduledJobs:
+
+    @pytest.mark.asyncio
+    async def test_periodic_job_queued_when_due(self, db_session, monkeypatch):
+        monkeypatch.setattr(JobService, "session_factory", TestingSessionLocal)
+        monkeypatch.setattr(JobService, "_handlers", {})
+        monkeypatch.setattr(JobService, "_load_handlers", staticmethod(lambda: None))
+        runs = []
+
+        async def tick(db, job, progress):
+            runs.append(job.id)
+
+        JobService._handlers["test_tick"] = JobType(tick, 1, every=3600)
+        JobService._handlers["test_once"] = JobType(tick, 1)
+
+        assert await JobService.enqueue_scheduled() == ["test_tick"]
+        # Already waiting
+        assert await JobService.enqueue_scheduled() == []
+
+        job = (await db_session.execute(select(BackgroundJob))).scalar_one()
+        assert job.school_id == PLATFORM_SCOPE
+        assert await JobService.run_job(job.id)
+        assert runs == [job.id]
+        # Ran too recently
+        assert await JobService.enqueue_scheduled() == []
+
+        await db_session.execute(
+            update(BackgroundJob).values(created_at=utcnow() - timedelta(hours=2))
+        )
+        await db_session.commit()
+        assert await JobService.enqueue_scheduled() == ["test_tick"]
+
+    @pytest.mark.asyncio
+    async def test_rollup_refresh_is_scheduled(self, db_session, test_school, monkeypatch):
+        monkeypatch.setattr(JobService, "session_factory", TestingSessionLocal)
+
+        assert "platform_stats_refresh" in await JobService.enqueue_scheduled()
+        job = (await db_session.execute(
+            select(BackgroundJob).where(BackgroundJob.job_type == "platform_stats_refresh")
+        )).scalar_one()
+        assert JobService._handlers[job.job_type].every == settings.platform_stats_interval
+
+        assert await JobService.run_job(job.id)
+        job = await JobService.get_job(db_session, job.id, PLATFORM_SCOPE)
+        assert job.status == JobStatus.COMPLETED
+        assert job.result["schools"] == 1
@@ -0,0 +1,157 @@
+"""
+Tests for universal search
+"""
+
+import pytest
+import pytest_asyncio
+from datetime import date
+from uuid import uuid4
+
+from app.models.academic import Class, ClassLevel, Subject
+from app.models.student import Student
+from app.models.user import Gender, User, UserRole
+from app.services.search_service import SearchService
+from tests.utils import QueryCounter
+
+
+def _student(school_id, first_name, last_name, admission_number, class_id=None, **kwargs):
+    return Student(
+        id=str(uuid4()),
+        admission_number=admission_number,
+        first_name=first_name,
+        last_name=last_name,
+        date_of_birth=date(2012, 1, 1),
+        gender=Gender.FEMALE,
+        address_line1="1 Seed Street",
+        city="Seed City",
+        state="Seed State",
+        postal_code="00000",
+        admission_date=date(2024, 9, 1),
+        current_class_id=class_id,
+        school_id=school_id,
+        **kwargs
+    )
+
+
+def _user(school_id, first_name, last_name, role):
+    return User(
+        id=str(uuid4()),
+        email=f"{first_name.lower()}.{last_name.lower()}@test.com",
+        password_hash="x",
+        first_name=first_name,
+        last_name=last_name,
+        role=role,
+        school_id=school_id,
+        is_active=True,
+        is_verified=True
+    )
+
+
+@pytest_asyncio.fixture
+async def school_data(db_session, test_school):
+    school_id = test_school.id
+    cls = Class(
+        id=str(uuid4()), name="Mark Class", level=ClassLevel.JSS_1, section="A",
+        academic_session="2024/2025", school_id=school_id
+    )
+    teacher = _user(school_id, "Markus", "Teacher", UserRole.TEACHER)
+    student_user = _user(school_id, "Stu", "Dent", UserRole.STUDENT)
+    db_session.add_all([
+        cls,
+        teacher,
+        student_user,
+        _student(school_id, "Mark", "Okafor", "ADM001", class_id=cls.id),
+        _student(school_id, "Ada", "Markson", "ADM002"),
+        _student(school_id, "Remark", "Bello", "ADM003"),
+        _student(school_id, "Mark", "Hidden", "ADM004", is_deleted=True),
+        Subject(id=str(uuid4()), name="Marketing", code="MKT", school_id=school_id),
+        Subject(id=str(uuid4()), name="100% Maths", code="M_1", school_id=school_id),
+    ])
+    await db_session.commit()
+    return {"class": cls, "teacher": teacher, "student_user": student_user}
+
+
+class TestUniversalSearch:
+    """One ranked query across the categories the role may see"""
+
+    @pytest.mark.asyncio
+    async def test_admin_searches_every_category_in_one_query(self, db_session, test_school, test_admin_user, school_data):
+        with QueryCounter(db_session) as counter:
+            results = await SearchService.search_universal(db_session, "mark", test_admin_user, test_school.id, limit=20)
+        assert counter.count == 1
+
+        assert {r["type"] for r in results} == {"student", "teacher", "subject", "class"}
+        titles = [r["title"] for r in results]
+        assert "Mark Hidden" not in titles  # soft-deleted
+        # Prefix matches (shortest first) before substring matches
+        assert titles[:2] == ["Marketing", "Mark Class"]
+        assert titles[-1] == "Remark Bello"
+
+        student = next(r for r in results if r["title"] == "Mark Okafor")
+        assert student["subtitle"] == "ADM001 • Mark Class"
+        assert student["url"] == f"/students/{student['id']}"
+        teacher = next(r for r in results if r["type"] == "teacher")
+        assert teacher["url"] == f"/teachers/{school_data['teacher'].id}"
+        klass = next(r for r in results if r["type"] == "class")
+        assert klass["subtitle"] == f"{ClassLevel.JSS_1.value} • A"
+
+    @pytest.mark.asyncio
+    async def test_prefix_mode(self, db_session, test_school, test_admin_user, school_data):
+        results = await SearchService.search_universal(
+            db_session, "Mar", test_admin_user, test_school.id, limit=20, mode="prefix"
+        )
+        titles = {r["title"] for r in results}
+        assert {"Mark Okafor", "Ada Markson", "Marketing", "Markus Teacher", "Mark Class"} <= titles
+        assert "Remark Bello" not in titles
+
+        by_admission = await SearchService.search_universal(
+            db_session, "adm00", test_admin_user, test_school.id, mode="prefix"
+        )
+        assert len(by_admission) == 3
+
+    @pytest.mark.asyncio
+    async def test_limit_applies_to_the_merged_results(self, db_session, test_school, test_admin_user, school_data):
+        results = await SearchService.search_universal(db_session, "mark", test_admin_user, test_school.id, limit=2)
+        assert [r["title"] for r in results] == ["Marketing", "Mark Class"]
+
+    @pytest.mark.asyncio
+    async def test_exact_match_ranks_first(self, db_session, test_school, test_admin_user, school_data):
+        results = await SearchService.search_universal(db_session, "okafor", test_admin_user, test_school.id)
+        assert results[0]["title"] == "Mark Okafor"
+        results = await SearchService.search_universal(db_session, "MARK OKAFOR", test_admin_user, test_school.id)
+        assert [r["title"] for r in results] == ["Mark Okafor"]
+
+    @pytest.mark.asyncio
+    async def test_like_wildcards_are_literal(self, db_session, test_school, test_admin_user, school_data):
+        percent = await SearchService.search_universal(db_session, "100%", test_admin_user, test_school.id)
+        assert [r["title"] for r in percent] == ["100% Maths"]
+        underscore = await SearchService.search_universal(db_session, "M_", test_admin_user, test_school.id)
+        assert [r["subtitle"] for r in underscore] == ["M_1"]
+
+    @pytest.mark.asyncio
+    async def test_role_restrictions(self, db_session, test_school, school_data):
+        teacher_results = await SearchService.search_universal(
+            db_session, "mark", school_data["teacher"], test_school.id, limit=20
+        )
+        assert {r["type"] for r in teacher_results} == {"student", "subject"}
+
+        student_results = await SearchService.search_universal(
+            db_session, "mark", school_data["student_user"], test_school.id, limit=20
+        )
+        assert {r["type"] for r in student_results} == {"subject", "teacher"}
+
+    @pytest.mark.asyncio
+    async def test_student_middle_name(self, db_session, test_school, test_admin_user, school_data):
+        db_session.add(_student(test_school.id, "Grace", "Eze", "ADM005", middle_name="Chioma"))
+        await db_session.commit()
+
+        for query in ("Chioma", "Grace Chioma Eze"):
+            results = await SearchService.search_universal(db_session, query, test_admin_user, test_school.id)
+            assert [(r["type"], r["title"]) for r in results] == [("student", "Grace Chioma Eze")], query
+        results = await SearchService.search_universal(db_session, "chio", test_admin_user, test_school.id, mode="prefix")
+        assert [r["title"] for r in results] == ["Grace Chioma Eze"]
+
+    @pytest.mark.asyncio
+    async def test_unknown_mode_rejected(self, db_session, test_school, test_admin_user):
+        with pytest.raises(ValueError):
+            await SearchService.search_universal(db_session, "x", test_admin_user, test_school.id, mode="fuzzy")
@@ -2,13 +2,25 @@
 Test utility functions for creating test data.
 """
 
+import asyncio
+
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
 from uuid import uuid4
 
-from app.models.user import User, UserRole
+from app.models.user import User, UserRole, Gender
 from app.models.school import School
-from app.models.academic import Term
+from app.models.academic import (
+    Term, TermType, Class, ClassLevel, Subject, Attendance, AttendanceStatus
+)
+from app.models.student import Student, StudentStatus
+from app.models.grade import Exam, ExamType, Grade
+from app.models.fee import FeeStructure, FeeAssignment, FeeType, PaymentStatus
+from app.models.cbt import (
+    CBTTest, CBTQuestion, CBTQuestionOption, CBTTestSchedule, CBTSubmission, TestStatus
+)
 from app.core.security import get_password_hash
 
 
@@ -95,3 +107,344 @@ async def create_test_term(
     await db.refresh(term)
     return term
 
+
+
+class QueryCounter:
+    """Count the SQL statements a session issues inside a ``with`` block."""
+
+    def __init__(self, db: AsyncSession):
+        self.engine = db.bind.sync_engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._record)
+
+
+class SMTPSink:
+    """
+    A local SMTP server that accepts and keeps every message, for exercising
+    real SMTP delivery in tests. Addresses in ``reject`` are refused at RCPT;
+    ``latency`` seconds are added before each reply, like a remote server.
+
+        async with SMTPSink() as sink:
+            monkeypatch.setattr(settings, "smtp_port", sink.port)
+    """
+
+    def __init__(self, reject=(), latency: float = 0.0):
+        self.reject = set(reject)
+        self.latency = latency
+        self.messages = []  # (recipients, raw message)
+        self.connections = 0
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        recipients = []
+        writer.write(b"220 sink ready\r\n")
+        while line := await reader.readline():
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            command = line.decode().strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                writer.write(b"250-sink\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif verb == "AUTH":
+                writer.write(b"235 Authentication successful\r\n")
+            elif verb == "MAIL":
+                recipients = []
+                writer.write(b"250 OK\r\n")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].split()[0].strip("<>")
+                if address in self.reject:
+                    writer.write(b"550 No such user\r\n")
+                else:
+                    recipients.append(address)
+                    writer.write(b"250 OK\r\n")
+            elif verb == "DATA":
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                data = []
+                while (chunk := await reader.readline()) not in (b".\r\n", b""):
+                    data.append(chunk)
+                self.messages.append((recipients, b"".join(data).decode()))
+                writer.write(b"250 OK\r\n")
+            elif verb == "QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+        writer.close()
+
+
+async def seed_school_with_classes(
+    db: AsyncSession,
+    school_id: str,
+    class_count: int = 50,
+    students_per_class: int = 10,
+    subjects: int = 2,
+    attendance_days: int = 3
+) -> dict:
+    """Seed a school with classes, students, grades, attendance and fees.
+
+    Values are deterministic so tests can recompute expected aggregates.
+    """
+    teacher = User(
+        id=str(uuid4()),
+        email=f"seed_teacher_{uuid4().hex[:8]}@test.com",
+        password_hash="x",
+        first_name="Seed",
+        last_name="Teacher",
+        role=UserRole.TEACHER,
+        school_id=school_id,
+        is_active=True,
+        is_verified=True
+    )
+    term = Term(
+        id=str(uuid4()),
+        name="First Term",
+        type=TermType.FIRST_TERM,
+        academic_session="2024/2025",
+        start_date=date(2024, 9, 1),
+        end_date=date(2024, 12, 15),
+        is_current=True,
+        school_id=school_id
+    )
+    subject_rows = [
+        Subject(id=str(uuid4()), name=f"Subject {s}", code=f"SUB{s}", school_id=school_id)
+        for s in range(subjects)
+    ]
+    fee_structure = FeeStructure(
+        id=str(uuid4()),
+        name="Tuition",
+        academic_session="2024/2025",
+        fee_type=FeeType.TUITION,
+        amount=Decimal("1000.00"),
+        school_id=school_id
+    )
+
+    classes, students, exams, grades = [], [], [], []
+    attendance, fee_assignments = [], []
+    statuses = list(AttendanceStatus)
+    for c in range(class_count):
+        cls = Class(
+            id=str(uuid4()),
+            name=f"Class {c:03d}",
+            level=ClassLevel.JSS_1,
+            academic_session="2024/2025",
+            school_id=school_id
+        )
+        classes.append(cls)
+        class_exams = [
+            Exam(
+                id=str(uuid4()),
+                name=f"Exam {cls.name} {subject.code}",
+                exam_type=ExamType.FINAL_EXAM,
+                exam_date=date(2024, 12, 1),
+                total_marks=Decimal("100"),
+                pass_marks=Decimal("50"),
+                subject_id=subject.id,
+                class_id=cls.id,
+                term_id=term.id,
+                school_id=school_id,
+                created_by=teacher.id
+            )
+            for subject in subject_rows
+        ]
+        exams.extend(class_exams)
+        for i in range(students_per_class):
+            student = Student(
+                id=str(uuid4()),
+                admission_number=f"ADM{c:03d}{i:03d}",
+                first_name=f"Student{i}",
+                last_name=f"Class{c}",
+                date_of_birth=date(2012, 1, 1),
+                gender=Gender.MALE if i % 2 else Gender.FEMALE,
+                address_line1="1 Seed Street",
+                city="Seed City",
+                state="Seed State",
+                postal_code="00000",
+                admission_date=date(2024, 9, 1),
+                current_class_id=cls.id,
+                status=StudentStatus.ACTIVE if i % 5 else StudentStatus.INACTIVE,
+                school_id=school_id
+            )
+            students.append(student)
+            for s, (subject, exam) in enumerate(zip(subject_rows, class_exams)):
+                percentage = Decimal((c * 7 + i * 11 + s * 13) % 100)
+                grades.append(Grade(
+                    score=percentage,
+                    total_marks=Decimal("100"),
+                    percentage=percentage,
+                    student_id=student.id,
+                    subject_id=subject.id,
+                    exam_id=exam.id,
+                    term_id=term.id,
+                    school_id=school_id,
+                    graded_by=teacher.id,
+                    graded_date=date(2024, 12, 2)
+                ))
+            for d in range(attendance_days):
+                attendance.append(Attendance(
+                    date=date(2024, 10, 1 + d),
+                    status=statuses[(c + i + d) % len(statuses)],
+                    student_id=student.id,
+                    class_id=cls.id,
+                    term_id=term.id,
+                    school_id=school_id,
+                    marked_by=teacher.id
+                ))
+            paid = Decimal((c * 37 + i * 53) % 1000)
+            fee_assignments.append(FeeAssignment(
+                student_id=student.id,
+                fee_structure_id=fee_structure.id,
+                term_id=term.id,
+                school_id=school_id,
+                assigned_date=date(2024, 9, 1),
+                due_date=date(2024, 9, 30),
+                amount=Decimal("1000.00"),
+                amount_paid=paid,
+                amount_outstanding=Decimal("1000.00") - paid,
+                status=PaymentStatus.PARTIAL if paid else PaymentStatus.PENDING
+            ))
+
+    db.add_all(
+        [teacher, term, fee_structure] + subject_rows + classes + students
+        + exams + grades + attendance + fee_assignments
+    )
+    await db.commit()
+
+    return {
+        "teacher": teacher,
+        "term": term,
+        "subjects": subject_rows,
+        "classes": classes,
+        "students": students,
+        "exams": exams,
+        "grades": grades,
+        "attendance": attendance,
+        "fee_assignments": fee_assignments,
+    }
+
+
+async def seed_cbt_sitting(
+    db: AsyncSession,
+    school_id: str,
+    students: int = 5,
+    questions: int = 10,
+    options_per_question: int = 4
+) -> dict:
+    """Seed a published CBT test with an open schedule and one submission per student.
+
+    Option 0 of every question is correct and every question is worth 1 point.
+    """
+    teacher = User(
+        id=str(uuid4()),
+        email=f"cbt_teacher_{uuid4().hex[:8]}@test.com",
+        password_hash="x",
+        first_name="Cbt",
+        last_name="Teacher",
+        role=UserRole.TEACHER,
+        school_id=school_id,
+        is_active=True,
+        is_verified=True
+    )
+    subject = Subject(id=str(uuid4()), name="CBT Subject", code="CBT1", school_id=school_id)
+    test = CBTTest(
+        id=str(uuid4()),
+        title="Sitting",
+        duration_minutes=60,
+        total_points=Decimal(questions),
+        pass_percentage=Decimal("50"),
+        status=TestStatus.PUBLISHED,
+        subject_id=subject.id,
+        created_by=teacher.id,
+        school_id=school_id
+    )
+    question_rows, option_rows = [], []
+    for q in range(questions):
+        question = CBTQuestion(
+            id=str(uuid4()),
+            question_text=f"Question {q}",
+            points=Decimal("1"),
+            order_number=q + 1,
+            test_id=test.id,
+            school_id=school_id
+        )
+        question_rows.append(question)
+        for o in range(options_per_question):
+            option_rows.append(CBTQuestionOption(
+                id=str(uuid4()),
+                option_label=chr(ord("A") + o),
+                option_text=f"Option {o}",
+                is_correct=o == 0,
+                order_number=o + 1,
+                question_id=question.id,
+                school_id=school_id
+            ))
+    now = datetime.now(timezone.utc)
+    schedule = CBTTestSchedule(
+        id=str(uuid4()),
+        start_datetime=now - timedelta(hours=1),
+        end_datetime=now + timedelta(hours=1),
+        test_id=test.id,
+        school_id=school_id,
+        created_by=teacher.id
+    )
+    student_rows, submissions = [], []
+    for i in range(students):
+        student = Student(
+            id=str(uuid4()),
+            admission_number=f"CBT{i:05d}",
+            first_name=f"Student{i}",
+            last_name="Cbt",
+            date_of_birth=date(2012, 1, 1),
+            gender=Gender.MALE if i % 2 else Gender.FEMALE,
+            address_line1="1 Seed Street",
+            city="Seed City",
+            state="Seed State",
+            postal_code="00000",
+            admission_date=date(2024, 9, 1),
+            status=StudentStatus.ACTIVE,
+            school_id=school_id
+        )
+        student_rows.append(student)
+        submissions.append(CBTSubmission(
+            id=str(uuid4()),
+            test_id=test.id,
+            schedule_id=schedule.id,
+            student_id=student.id,
+            school_id=school_id
+        ))
+
+    db.add_all([teacher, subject, test, schedule] + question_rows + option_rows + student_rows + submissions)
+    await db.commit()
+
+    return {
+        "test": test,
+        "questions": question_rows,
+        "options": option_rows,
+        "schedule": schedule,
+        "students": student_rows,
+        "submissions": submissions,
+    }
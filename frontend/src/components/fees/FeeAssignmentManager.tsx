@@ -146,9 +146,9 @@ const FeeAssignmentManager: React.FC = () => {
   const handleBulkAssign = async (data: any) => {
     try {
       setFormLoading(true);
-      const newAssignments = await FeeService.bulkCreateFeeAssignments(data);
+      const result = await FeeService.bulkCreateFeeAssignments(data);
 
-      showSuccess(`Successfully assigned fees to ${newAssignments.length} students`);
+      showSuccess(`Successfully assigned fees to ${result.created_count} students`);
       setShowAssignModal(false);
       fetchAssignments();
     } catch (error: any) {
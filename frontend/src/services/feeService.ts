@@ -5,6 +5,7 @@ import {
   FeePayment,
   CreateFeeStructureForm,
   BulkFeeAssignmentForm,
+  BulkFeeAssignmentResult,
   CreateFeePaymentForm
 } from '../types';
 
@@ -83,8 +84,8 @@ export class FeeService {
     return await apiService.get<FeeAssignment[]>(url);
   }
 
-  static async bulkCreateFeeAssignments(data: BulkFeeAssignmentForm): Promise<FeeAssignment[]> {
-    return await apiService.post<FeeAssignment[]>('/api/v1/fees/assignments/bulk', data);
+  static async bulkCreateFeeAssignments(data: BulkFeeAssignmentForm): Promise<BulkFeeAssignmentResult> {
+    return await apiService.post<BulkFeeAssignmentResult>('/api/v1/fees/assignments/bulk', data);
   }
 
   // Fee Payment Management
@@ -950,6 +950,15 @@ export interface BulkFeeAssignmentForm {
   discount_amount?: number;
 }
 
+export interface BulkFeeAssignmentResult {
+  fee_structure_id: string;
+  term_id: string;
+  total_students: number;
+  created_count: number;
+  skipped_count: number;
+  assignments?: FeeAssignment[];
+}
+
 export interface CreateFeePaymentForm {
   student_id: string;
   fee_assignment_id: string;